@@ -0,0 +1,246 @@
+#!/usr/bin/env python3
+"""End-to-end Bilibili pipeline benchmark against a local mock API.
+
+Runs the whole path from a b23.tv short link to a muxed file through a
+:class:`MockBilibiliServer`: short link resolution, the view and playurl
+API calls, format extraction and selection, the parallel download of the
+video and audio streams and the ffmpeg mux. Each stage is timed on its
+own. With ffmpeg on the PATH the mock serves real fragmented MP4 streams
+rendered by ffmpeg and the streams are muxed; without it the streams are
+synthetic and the mux stage is skipped. Results are printed as JSON.
+
+Usage:
+    python benchmarks/bilibili_pipeline.py [--runs 3] [--video-size 64M] [--audio-size 4M]
+        [--latency-ms 40 --jitter-ms 10] [--media-bandwidth 20M] [--synthetic] [--output pipeline.json]
+"""
+
+import argparse
+import asyncio
+import json
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Set
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from benchmarks.mock_bilibili import MockBilibiliServer, MockVideo  # noqa: E402
+
+MB = 1024 * 1024
+
+STAGES = ('resolve', 'view', 'playurl', 'formats', 'extract', 'select', 'download', 'mux')
+
+_ENDPOINT_STAGES = {'/x/web-interface/view': 'view', '/x/player/playurl': 'playurl'}
+
+
+class StageTimer:
+    """Accumulates wall time per pipeline stage."""
+
+    def __init__(self):
+        self.seconds: Dict[str, float] = {}
+        self._active: Set[str] = set()
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        """Time a block; nested blocks of the same stage count once."""
+        if name in self._active:
+            yield
+            return
+
+        self._active.add(name)
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.seconds[name] = self.seconds.get(name, 0.0) + time.perf_counter() - started
+            self._active.discard(name)
+
+    def wrap(self, obj: Any, method: str, stage: Callable[..., str]) -> None:
+        """Time every call of ``obj.method`` under the stage named by ``stage(*args)``."""
+        original = getattr(obj, method)
+
+        def _timed(*args, **kwargs):
+            with self.stage(stage(*args, **kwargs)):
+                return original(*args, **kwargs)
+
+        setattr(obj, method, _timed)
+
+
+def render_media(duration: int) -> Optional[Dict[str, bytes]]:
+    """Render a 720p video and an audio stream as fragmented MP4 with ffmpeg.
+
+    The streams have the layout of Bilibili m4s files (ftyp, moov, sidx,
+    then moof/mdat fragments). Returns None when ffmpeg is not available.
+    """
+    ffmpeg = shutil.which('ffmpeg')
+    if not ffmpeg:
+        return None
+
+    sources = {
+        'video': ['-f', 'lavfi', '-i', 'testsrc2=size=1280x720:rate=30', '-c:v', 'libx264',
+                  '-preset', 'veryfast', '-pix_fmt', 'yuv420p', '-g', '30'],
+        'audio': ['-f', 'lavfi', '-i', 'sine=frequency=440:sample_rate=48000', '-c:a', 'aac', '-b:a', '128k'],
+    }
+    media = {}
+    with tempfile.TemporaryDirectory(prefix='mock-media-') as directory:
+        for kind, arguments in sources.items():
+            path = Path(directory) / f"{kind}.m4s"
+            subprocess.run(
+                [ffmpeg, '-y', '-v', 'error', *arguments, '-t', str(duration),
+                 '-f', 'mp4', '-movflags', '+dash+global_sidx', str(path)],
+                check=True,
+            )
+            media[kind] = path.read_bytes()
+    return media
+
+
+def make_video(bvid: str, video_size: int, audio_size: int, duration: int, pages: int = 1,
+               real_media: bool = True) -> MockVideo:
+    """Mock video with real streams when ffmpeg is available, synthetic ones otherwise."""
+    media = render_media(duration) if real_media else None
+    if media is not None:
+        return MockVideo(bvid, 'Pipeline benchmark', duration, pages,
+                         video={64: media['video']}, audio={30280: media['audio']})
+    return MockVideo(
+        bvid, 'Pipeline benchmark', duration, pages,
+        video={80: video_size, 64: video_size // 2, 32: video_size // 4},
+        audio={30280: audio_size, 30216: audio_size // 2},
+    )
+
+
+async def run_pipeline(server: MockBilibiliServer, url: str, directory: str, quality: str = 'best',
+                       threads: Optional[int] = None) -> Dict[str, Any]:
+    """Take one URL to a (muxed) file through the mock and time every stage."""
+    from src.core.exceptions import DownloadError
+    from src.services.bilibili import BilibiliService
+    from src.services.dash_clip import DashClipper
+    from src.services.downloader import AsyncDownloader
+    from src.services.format_selector import has_video, select_streams
+
+    service = BilibiliService()
+    server.install(service)
+    timer = StageTimer()
+    timer.wrap(service, '_get_bvid_from_url', lambda *args: 'resolve')
+    timer.wrap(service, '_call_bilibili_api', lambda endpoint, *args: _ENDPOINT_STAGES.get(endpoint, endpoint))
+    timer.wrap(service, '_extract_formats_from_api', lambda *args: 'formats')
+
+    started = time.perf_counter()
+    with timer.stage('extract'):
+        info = await asyncio.to_thread(service._get_info_via_official, url)
+    if not info:
+        raise DownloadError(f"Extraction failed for {url}")
+
+    with timer.stage('select'):
+        streams = select_streams(info['formats'], quality)
+    if not streams:
+        raise DownloadError("No format matches the requested quality")
+
+    output = Path(directory) / f"{info['bvid']}.mp4"
+    if len(streams) > 1:
+        paths = [output.with_suffix('.video.m4s' if has_video(fmt) else '.audio.m4s') for fmt in streams]
+    else:
+        paths = [output]
+
+    with timer.stage('download'):
+        await AsyncDownloader.download_group(
+            [(fmt['url'], str(path)) for fmt, path in zip(streams, paths)], num_threads=threads
+        )
+    downloaded = sum(path.stat().st_size for path in paths)
+
+    muxed = len(paths) == 1
+    if len(paths) > 1 and shutil.which('ffmpeg'):
+        with timer.stage('mux'):
+            await DashClipper().mux(paths, output)
+        muxed = output.exists()
+
+    return {
+        'url': url,
+        'bvid': info['bvid'],
+        'streams': [fmt['format_id'] for fmt in streams],
+        'bytes': downloaded,
+        'muxed': muxed,
+        'output': str(output if muxed else paths[0]),
+        'total_seconds': round(time.perf_counter() - started, 4),
+        'stages_ms': {name: round(timer.seconds[name] * 1000, 2) for name in STAGES if name in timer.seconds},
+    }
+
+
+def summarize(runs: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Median stage latencies and throughput over the runs."""
+    stages = {
+        name: round(statistics.median(run['stages_ms'][name] for run in runs), 2)
+        for name in STAGES if all(name in run['stages_ms'] for run in runs)
+    }
+    total = statistics.median(run['total_seconds'] for run in runs)
+    download = stages.get('download', 0) / 1000
+    return {
+        'runs': len(runs),
+        'median_stages_ms': stages,
+        'median_total_seconds': round(total, 4),
+        'download_mb_per_s': round(runs[0]['bytes'] / MB / download, 2) if download else None,
+    }
+
+
+async def run_benchmark(video: MockVideo, runs: int, directory: str, latency: float = 0.0,
+                        jitter: float = 0.0, media_bandwidth: int = 0,
+                        threads: Optional[int] = None) -> Dict[str, Any]:
+    """Run the pipeline ``runs`` times against one mock server."""
+    server = MockBilibiliServer([video], {'bench': video.bvid}, latency, jitter, media_bandwidth, seed=0)
+    results = []
+    async with server:
+        for index in range(runs):
+            run_directory = Path(directory) / f"run{index}"
+            run_directory.mkdir(parents=True, exist_ok=True)
+            results.append(await run_pipeline(server, 'https://b23.tv/bench', str(run_directory),
+                                              threads=threads))
+            shutil.rmtree(run_directory, ignore_errors=True)
+
+    return {
+        'real_media': isinstance(next(iter(video.video.values())), bytes),
+        'api_requests': server.api_requests,
+        'summary': summarize(results),
+        'results': results,
+    }
+
+
+def main() -> int:
+    from src.core.logger import logger
+    from src.utils.file_utils import parse_filesize
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--runs', type=int, default=3)
+    parser.add_argument('--video-size', default='64M', help='Best synthetic video stream size')
+    parser.add_argument('--audio-size', default='4M', help='Best synthetic audio stream size')
+    parser.add_argument('--duration', type=int, default=30, help='Duration of rendered media in seconds')
+    parser.add_argument('--threads', type=int, default=None, help='Download threads per stream')
+    parser.add_argument('--latency-ms', type=float, default=0.0, help='Delay of each API response')
+    parser.add_argument('--jitter-ms', type=float, default=0.0, help='Random +/- variation of the delay')
+    parser.add_argument('--media-bandwidth', default='0', help='Per-connection media cap in bytes/s (0 = unlimited)')
+    parser.add_argument('--synthetic', action='store_true', help='Use synthetic streams even with ffmpeg')
+    parser.add_argument('--output', help='Write the JSON results to this file')
+    options = parser.parse_args()
+
+    logger.remove()
+    video = make_video('BV1bench4y1Pipe', parse_filesize(options.video_size), parse_filesize(options.audio_size),
+                       options.duration, real_media=not options.synthetic)
+    with tempfile.TemporaryDirectory(prefix='pipeline-bench-') as directory:
+        report = asyncio.run(run_benchmark(
+            video, options.runs, directory, options.latency_ms / 1000, options.jitter_ms / 1000,
+            parse_filesize(options.media_bandwidth), options.threads
+        ))
+
+    text = json.dumps(report, indent=2)
+    if options.output:
+        Path(options.output).write_text(text, encoding='utf-8')
+    print(text)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
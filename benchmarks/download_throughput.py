@@ -0,0 +1,254 @@
+#!/usr/bin/env python3
+"""Offline download-throughput benchmark of MultiThreadDownloader.
+
+Serves synthetic files from a local :mod:`range_server` in a separate
+process and downloads them with every combination of file size, thread
+count and chunk size. Each case runs in a fresh process, so its CPU time
+and peak RSS belong to that download only; a second pass under tracemalloc
+measures the peak of Python allocations. Results are written as JSON, and
+``--baseline`` compares them with an earlier run and fails when throughput
+regressed by more than the tolerance.
+
+Usage:
+    python benchmarks/download_throughput.py [--sizes 64M,1G] [--threads 1,4,8] [--chunk-sizes 64K,1M]
+        [--bandwidth 10M] [--latency-ms 20 --jitter-ms 5] [--output results.json] [--baseline old.json]
+"""
+
+import argparse
+import asyncio
+import itertools
+import json
+import multiprocessing
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+from benchmarks.range_server import SyntheticRangeServer, synthetic_bytes  # noqa: E402
+
+MB = 1024 * 1024
+
+# Offsets checked against the synthetic content after each download
+_VERIFY_SAMPLES = 16
+
+
+def _rusage() -> Optional[Any]:
+    return resource.getrusage(resource.RUSAGE_SELF) if resource else None
+
+
+def _peak_rss_mb(usage: Any) -> Optional[float]:
+    """Peak RSS of this process (ru_maxrss is KiB on Linux, bytes on macOS)."""
+    if usage is None:
+        return None
+    scale = 1 if sys.platform == 'darwin' else 1024
+    return round(usage.ru_maxrss * scale / MB, 1)
+
+
+def verify_download(path: Path, size: int) -> None:
+    """Check the size and sampled content of a downloaded synthetic file."""
+    actual = path.stat().st_size
+    if actual != size:
+        raise AssertionError(f"{path.name}: {actual} bytes, expected {size}")
+
+    with open(path, 'rb') as f:
+        for i in range(_VERIFY_SAMPLES):
+            offset = max(0, size * i // _VERIFY_SAMPLES - 1)
+            f.seek(offset)
+            length = min(4096, size - offset)
+            if f.read(length) != synthetic_bytes(offset, length):
+                raise AssertionError(f"{path.name}: corrupt data at offset {offset}")
+
+
+def run_case(url: str, size: int, threads: int, chunk_size: int, directory: str,
+             trace_allocations: bool = False) -> Dict[str, Any]:
+    """Download one synthetic file and measure it (runs in a fresh process)."""
+    from src.core.config import download_config
+    from src.core.logger import logger
+    from src.services.downloader import MultiThreadDownloader
+
+    logger.remove()
+    logger.add(sys.stderr, level='WARNING')
+    download_config.chunk_size = chunk_size
+    save_path = Path(directory) / f"bench-{size}-{threads}-{chunk_size}.bin"
+    downloader = MultiThreadDownloader(url, str(save_path), threads, total_size=size, staging=False)
+
+    if trace_allocations:
+        tracemalloc.start()
+    before = _rusage()
+    started = time.perf_counter()
+    asyncio.run(downloader.download())
+    elapsed = time.perf_counter() - started
+    after = _rusage()
+
+    result: Dict[str, Any] = {'seconds': round(elapsed, 3), 'mb_per_s': round(size / MB / elapsed, 2)}
+    if trace_allocations:
+        result['alloc_peak_mb'] = round(tracemalloc.get_traced_memory()[1] / MB, 2)
+        tracemalloc.stop()
+    if after is not None:
+        cpu = (after.ru_utime - before.ru_utime) + (after.ru_stime - before.ru_stime)
+        result['cpu_percent'] = round(cpu / elapsed * 100, 1)
+        result['peak_rss_mb'] = _peak_rss_mb(after)
+
+    try:
+        verify_download(save_path, size)
+    finally:
+        save_path.unlink(missing_ok=True)
+    return result
+
+
+def _run_isolated(*args: Any) -> Dict[str, Any]:
+    """Run a case in a fresh process."""
+    context = multiprocessing.get_context('spawn')
+    with context.Pool(1) as pool:
+        return pool.apply(run_case, args)
+
+
+def _serve(files: Dict[str, int], bandwidth: int, latency: float, jitter: float,
+           port_queue: Any, stop: Any) -> None:
+    """Server process: serve until ``stop`` is set."""
+    async def _main() -> None:
+        async with SyntheticRangeServer(files, bandwidth, latency, jitter, seed=0) as server:
+            port_queue.put(server.port)
+            while not stop.is_set():
+                await asyncio.sleep(0.1)
+
+    asyncio.run(_main())
+
+
+@contextmanager
+def server_process(files: Dict[str, int], bandwidth: int = 0, latency: float = 0.0,
+                   jitter: float = 0.0) -> Iterator[str]:
+    """Run a synthetic range server in its own process; yields its base URL."""
+    context = multiprocessing.get_context('spawn')
+    port_queue, stop = context.Queue(), context.Event()
+    process = context.Process(target=_serve, args=(files, bandwidth, latency, jitter, port_queue, stop), daemon=True)
+    process.start()
+    try:
+        port = port_queue.get(timeout=30)
+        yield f"http://127.0.0.1:{port}"
+    finally:
+        stop.set()
+        process.join(timeout=5)
+        if process.is_alive():
+            process.terminate()
+
+
+def compare_results(results: List[Dict[str, Any]], baseline: List[Dict[str, Any]],
+                    tolerance: float) -> List[str]:
+    """Cases whose throughput dropped more than ``tolerance`` below the baseline."""
+    def key(case: Dict[str, Any]) -> tuple:
+        return (case['file_size'], case['threads'], case['chunk_size'],
+                case['bandwidth'], case['latency_ms'], case['jitter_ms'])
+
+    previous = {key(case): case for case in baseline}
+    regressions = []
+    for case in results:
+        old = previous.get(key(case))
+        if old and case['mb_per_s'] < old['mb_per_s'] * (1 - tolerance):
+            regressions.append(
+                f"size={case['file_size']} threads={case['threads']} chunk={case['chunk_size']}: "
+                f"{case['mb_per_s']:.1f} MB/s vs {old['mb_per_s']:.1f} MB/s"
+            )
+    return regressions
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        result = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=str(ROOT),
+                                capture_output=True, text=True, check=True)
+        return result.stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _parse_sizes(value: str) -> List[int]:
+    from src.utils.file_utils import parse_filesize
+    return [parse_filesize(part) for part in value.split(',') if part.strip()]
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', default='64M,256M', help='File sizes, e.g. 64M,1G,4G')
+    parser.add_argument('--threads', default='1,4,8', help='Thread counts')
+    parser.add_argument('--chunk-sizes', default='64K,1M', help='Read chunk sizes (download_config.chunk_size)')
+    parser.add_argument('--bandwidth', default='0', help='Per-connection cap in bytes/s, e.g. 10M (0 = unlimited)')
+    parser.add_argument('--latency-ms', type=float, default=0.0, help='Server delay before each response')
+    parser.add_argument('--jitter-ms', type=float, default=0.0, help='Random +/- variation of the delay')
+    parser.add_argument('--repeat', type=int, default=1, help='Runs per case (median throughput is reported)')
+    parser.add_argument('--no-allocations', action='store_true', help='Skip the tracemalloc pass')
+    parser.add_argument('--dir', help='Download directory (default: a temporary directory)')
+    parser.add_argument('--output', help='Write the JSON results to this file (default: stdout)')
+    parser.add_argument('--baseline', help='Earlier JSON results to compare against')
+    parser.add_argument('--tolerance', type=float, default=0.10, help='Allowed throughput drop vs the baseline')
+    options = parser.parse_args()
+
+    sizes = _parse_sizes(options.sizes)
+    threads = [int(t) for t in options.threads.split(',')]
+    chunk_sizes = _parse_sizes(options.chunk_sizes)
+    bandwidth = _parse_sizes(options.bandwidth)[0]
+    files = {f"synthetic-{size}.bin": size for size in sizes}
+
+    results = []
+    directory = options.dir or tempfile.mkdtemp(prefix='vd-bench-')
+    with server_process(files, bandwidth, options.latency_ms / 1000, options.jitter_ms / 1000) as base_url:
+        for size, thread_count, chunk_size in itertools.product(sizes, threads, chunk_sizes):
+            url = f"{base_url}/synthetic-{size}.bin"
+            runs = [_run_isolated(url, size, thread_count, chunk_size, directory) for _ in range(options.repeat)]
+            runs.sort(key=lambda run: run['mb_per_s'])
+            case = {
+                'file_size': size, 'threads': thread_count, 'chunk_size': chunk_size,
+                'bandwidth': bandwidth, 'latency_ms': options.latency_ms, 'jitter_ms': options.jitter_ms,
+                **runs[len(runs) // 2],
+            }
+            if not options.no_allocations:
+                traced = _run_isolated(url, size, thread_count, chunk_size, directory, True)
+                case['alloc_peak_mb'] = traced['alloc_peak_mb']
+
+            results.append(case)
+            print(
+                f"{size / MB:8.0f} MB  threads={thread_count:<3} chunk={chunk_size // 1024:>5} KiB  "
+                f"{case['mb_per_s']:8.1f} MB/s  cpu={case.get('cpu_percent', '-')}%  "
+                f"rss={case.get('peak_rss_mb', '-')} MB  alloc={case.get('alloc_peak_mb', '-')} MB",
+                file=sys.stderr
+            )
+
+    report = {
+        'benchmark': 'download_throughput',
+        'timestamp': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'commit': _git_commit(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'results': results,
+    }
+    text = json.dumps(report, indent=2)
+    if options.output:
+        Path(options.output).write_text(text + '\n', encoding='utf-8')
+    else:
+        print(text)
+
+    if options.baseline:
+        baseline = json.loads(Path(options.baseline).read_text(encoding='utf-8'))['results']
+        regressions = compare_results(results, baseline, options.tolerance)
+        for line in regressions:
+            print(f"REGRESSION: {line}", file=sys.stderr)
+        if regressions:
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
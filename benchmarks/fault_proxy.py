@@ -0,0 +1,257 @@
+#!/usr/bin/env python3
+"""Fault-injecting HTTP proxy for resilience testing.
+
+Relays GET/HEAD requests (with their Range header) to an upstream server
+and injects failures according to a scriptable :class:`FaultSchedule`:
+
+- ``reset``      abort the connection after ``after_bytes`` of the body
+- ``truncate``   close the connection cleanly after ``after_bytes`` (short body)
+- ``bad_range``  answer with a Content-Range shifted by ``shift`` bytes
+- ``status``     answer with an error status (e.g. 403) instead of the body
+- ``stall``      stop sending for ``stall`` seconds after ``after_bytes``
+
+A rule can target specific request numbers, start once a number of body
+bytes has been relayed in total (e.g. "403 after 5 MB", like an expiring
+CDN URL) and fire a limited number of times.
+
+Usage:
+    python benchmarks/fault_proxy.py UPSTREAM_URL --fault "reset@1M" --fault "status:403@5M*2"
+
+A rule is ``kind[:status|seconds][@total_bytes][/after_bytes][*times][#req,req]``.
+"""
+
+import argparse
+import asyncio
+import re
+import sys
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional, Set
+
+import aiohttp
+from aiohttp import web
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+FAULT_KINDS = ('reset', 'truncate', 'bad_range', 'status', 'stall')
+
+RELAY_SIZE = 64 * 1024
+
+_RULE_RE = re.compile(
+    r'^(?P<kind>[a-z_]+)(?::(?P<arg>[\d.]+))?(?:@(?P<total>[\w.]+))?(?:/(?P<after>[\w.]+))?'
+    r'(?:\*(?P<times>\d+))?(?:#(?P<requests>[\d,]+))?$'
+)
+
+
+@dataclass
+class Fault:
+    """One injected failure."""
+
+    kind: str
+    after_bytes: int = 0
+    status: int = 403
+    stall: float = 0.0
+    shift: int = 1024 * 1024
+
+    def __post_init__(self):
+        if self.kind not in FAULT_KINDS:
+            raise ValueError(f"Unknown fault kind: {self.kind!r}")
+
+
+@dataclass
+class FaultRule:
+    """When a fault fires: request numbers, relayed-bytes threshold, count."""
+
+    fault: Fault
+    requests: Optional[Set[int]] = None
+    after_total_bytes: int = 0
+    times: Optional[int] = None
+    fired: int = 0
+
+    def matches(self, request_number: int, bytes_relayed: int) -> bool:
+        if self.requests is not None and request_number not in self.requests:
+            return False
+        if bytes_relayed < self.after_total_bytes:
+            return False
+        return self.times is None or self.fired < self.times
+
+
+@dataclass
+class FaultSchedule:
+    """Ordered fault rules; the first matching rule hits the request."""
+
+    rules: List[FaultRule] = field(default_factory=list)
+
+    def next_fault(self, request_number: int, bytes_relayed: int) -> Optional[Fault]:
+        """Fault for a request, if any."""
+        for rule in self.rules:
+            if rule.matches(request_number, bytes_relayed):
+                rule.fired += 1
+                return rule.fault
+        return None
+
+    @classmethod
+    def parse(cls, specs: List[str]) -> "FaultSchedule":
+        """Build a schedule from rule strings (see the module docstring)."""
+        from src.utils.file_utils import parse_filesize
+
+        rules = []
+        for spec in specs:
+            match = _RULE_RE.match(spec.strip())
+            if not match:
+                raise ValueError(f"Invalid fault rule: {spec!r}")
+            kind, arg = match.group('kind'), match.group('arg')
+            fault = Fault(kind, after_bytes=parse_filesize(match.group('after') or '0'))
+            if arg and kind == 'status':
+                fault.status = int(arg)
+            elif arg and kind == 'stall':
+                fault.stall = float(arg)
+            elif arg and kind == 'bad_range':
+                fault.shift = int(arg)
+            rules.append(FaultRule(
+                fault,
+                requests={int(n) for n in match.group('requests').split(',')} if match.group('requests') else None,
+                after_total_bytes=parse_filesize(match.group('total') or '0'),
+                times=int(match.group('times')) if match.group('times') else None,
+            ))
+        return cls(rules)
+
+
+class FaultInjectingProxy:
+    """Relays requests to ``upstream`` and injects scheduled faults."""
+
+    def __init__(self, upstream: str, schedule: Optional[FaultSchedule] = None,
+                 host: str = '127.0.0.1', port: int = 0):
+        self.upstream = upstream.rstrip('/')
+        self.schedule = schedule or FaultSchedule()
+        self.host = host
+        self.port = port
+        self._runner: Optional[web.AppRunner] = None
+        self._session: Optional[aiohttp.ClientSession] = None
+        self.requests = 0
+        self.bytes_relayed = 0
+        self.faults: Dict[str, int] = {}
+
+    @property
+    def url(self) -> str:
+        """Base URL of the proxy."""
+        return f"http://{self.host}:{self.port}"
+
+    async def start(self) -> None:
+        """Start the proxy."""
+        self._session = aiohttp.ClientSession(auto_decompress=False)
+        app = web.Application()
+        app.router.add_route('*', '/{path:.*}', self._handle)
+        self._runner = web.AppRunner(app)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, self.host, self.port)
+        await site.start()
+        self.port = self._runner.addresses[0][1]
+
+    async def stop(self) -> None:
+        """Stop the proxy."""
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    async def __aenter__(self) -> "FaultInjectingProxy":
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.stop()
+
+    async def _handle(self, request: web.Request) -> web.StreamResponse:
+        """Relay one request, injecting its scheduled fault."""
+        self.requests += 1
+        fault = None
+        if request.method == 'GET':
+            fault = self.schedule.next_fault(self.requests, self.bytes_relayed)
+        if fault:
+            self.faults[fault.kind] = self.faults.get(fault.kind, 0) + 1
+            if fault.kind == 'status':
+                return web.Response(status=fault.status, text=f"Injected {fault.status}")
+
+        headers = {name: value for name, value in request.headers.items() if name in ('Range', 'User-Agent')}
+        if fault and fault.kind == 'bad_range' and 'Range' in headers:
+            # Ask upstream for shifted bytes, so the body matches the wrong header
+            start, _, end = headers['Range'].replace('bytes=', '').partition('-')
+            headers['Range'] = f"bytes={int(start) + fault.shift}-{end}"
+
+        async with self._session.request(request.method, f"{self.upstream}/{request.match_info['path']}",
+                                         headers=headers) as upstream:
+            response_headers = {
+                name: value for name, value in upstream.headers.items()
+                if name in ('Content-Type', 'Content-Length', 'Content-Range', 'Accept-Ranges')
+            }
+            response = web.StreamResponse(status=upstream.status, headers=response_headers)
+            await response.prepare(request)
+            if request.method == 'HEAD':
+                return response
+
+            sent = 0
+            try:
+                async for data in upstream.content.iter_chunked(RELAY_SIZE):
+                    if fault and fault.kind in ('reset', 'truncate', 'stall') and sent + len(data) > fault.after_bytes:
+                        head = data[:max(0, fault.after_bytes - sent)]
+                        await self._send(response, head)
+                        sent += len(head)
+                        if fault.kind == 'stall':
+                            await asyncio.sleep(fault.stall)
+                            data = data[len(head):]
+                            fault = None
+                        else:
+                            self._break_connection(request, fault.kind)
+                            return response
+                    await self._send(response, data)
+                    sent += len(data)
+                await response.write_eof()
+            except ConnectionError:
+                # The client gave up on this response (e.g. a rejected Content-Range)
+                pass
+        return response
+
+    async def _send(self, response: web.StreamResponse, data: bytes) -> None:
+        if data:
+            await response.write(data)
+            self.bytes_relayed += len(data)
+
+    @staticmethod
+    def _break_connection(request: web.Request, kind: str) -> None:
+        """Drop the connection: RST for a reset, FIN for a truncation."""
+        transport = request.transport
+        if transport is None:
+            return
+        if kind == 'reset':
+            transport.abort()
+        else:
+            transport.close()
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('upstream', help='Upstream base URL')
+    parser.add_argument('--fault', action='append', default=[], help='Fault rule (repeatable)')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8766)
+    options = parser.parse_args()
+
+    async def _serve() -> None:
+        async with FaultInjectingProxy(options.upstream, FaultSchedule.parse(options.fault),
+                                       options.host, options.port) as proxy:
+            print(f"Proxying {options.upstream} at {proxy.url}")
+            await asyncio.Event().wait()
+
+    try:
+        asyncio.run(_serve())
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
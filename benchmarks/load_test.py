@@ -0,0 +1,310 @@
+#!/usr/bin/env python3
+"""Load test of the download scheduler with thousands of queued jobs.
+
+Queues N jobs in a :class:`DownloadScheduler`, each downloading a small
+synthetic file with ``AsyncDownloader.download_file``, the path
+``download-list`` takes. The files come from a range server in a separate
+process. While the jobs run, a monitor task samples the RSS, the number of
+open file descriptors (``.partN`` files and sockets) and the event-loop
+lag. Scheduler fairness is reported as queue wait percentiles from the
+moment all jobs were queued, the number of jobs started out of order and
+Jain's fairness index of the job durations (1.0 when equal jobs take equal
+time). Each job count runs in a fresh process. ``--baseline`` compares
+with an earlier run and fails when memory, descriptors or loop lag grew by
+more than the tolerance.
+
+Usage:
+    python benchmarks/load_test.py [--jobs 1000,5000] [--concurrency 32] [--threads 2] [--file-size 256K]
+        [--bandwidth 5M] [--latency-ms 20] [--output load.json] [--baseline old.json]
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+from benchmarks.download_throughput import server_process  # noqa: E402
+
+MB = 1024 * 1024
+
+# Metrics compared against a baseline (higher is worse)
+REGRESSION_METRICS = ('peak_rss_mb', 'peak_fds', 'loop_lag_p99_ms')
+
+
+def current_rss() -> Optional[int]:
+    """Resident set size of this process in bytes (Linux), None if unknown."""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def open_fds() -> Optional[int]:
+    """Number of open file descriptors of this process, None if unknown."""
+    for directory in ('/proc/self/fd', '/dev/fd'):
+        try:
+            return len(os.listdir(directory))
+        except OSError:
+            continue
+    return None
+
+
+def percentile(values: List[float], q: float) -> Optional[float]:
+    """Nearest-rank percentile (q in 0..100)."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, math.ceil(q / 100 * len(ordered)) - 1))]
+
+
+def jain_index(values: List[float]) -> Optional[float]:
+    """Jain's fairness index: 1.0 when all values are equal, 1/n when one takes all."""
+    squares = sum(value * value for value in values)
+    if not values or not squares:
+        return None
+    return sum(values) ** 2 / (len(values) * squares)
+
+
+def start_order_inversions(start_order: List[int]) -> int:
+    """Jobs that started before a job queued ahead of them."""
+    inversions = 0
+    highest = -1
+    for index in start_order:
+        if index < highest:
+            inversions += 1
+        highest = max(highest, index)
+    return inversions
+
+
+class ResourceMonitor:
+    """Samples RSS, open descriptors and event-loop lag from a background task."""
+
+    def __init__(self, interval: float = 0.01):
+        self.interval = interval
+        self.lags: List[float] = []
+        self.peak_rss = current_rss()
+        self.peak_fds = open_fds()
+        self._task: Optional[asyncio.Task] = None
+
+    def _sample(self) -> None:
+        rss, fds = current_rss(), open_fds()
+        if rss is not None:
+            self.peak_rss = max(self.peak_rss or 0, rss)
+        if fds is not None:
+            self.peak_fds = max(self.peak_fds or 0, fds)
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            scheduled = loop.time()
+            await asyncio.sleep(self.interval)
+            self.lags.append(max(0.0, loop.time() - scheduled - self.interval))
+            self._sample()
+
+    def start(self) -> None:
+        """Start sampling in the running loop."""
+        self._task = asyncio.ensure_future(self._run())
+
+    async def stop(self) -> None:
+        """Stop sampling."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        self._sample()
+
+
+def _ms(value: Optional[float]) -> Optional[float]:
+    return None if value is None else round(value * 1000, 3)
+
+
+def _mb(value: Optional[int]) -> Optional[float]:
+    return None if value is None else round(value / MB, 1)
+
+
+async def run_load(url: str, jobs: int, concurrency: int, threads: int, directory: str,
+                   sample_interval: float = 0.01) -> Dict[str, Any]:
+    """Run ``jobs`` downloads through the scheduler and measure the process."""
+    from src.services.downloader import AsyncDownloader
+    from src.services.scheduler import DownloadScheduler
+
+    baseline_rss, baseline_fds = current_rss(), open_fds()
+    usage_before = resource.getrusage(resource.RUSAGE_SELF) if resource else None
+    timings: Dict[int, List[float]] = {}
+    start_order: List[int] = []
+
+    async def _job(index: int) -> None:
+        started = time.monotonic()
+        start_order.append(index)
+        save_path = Path(directory) / f"job{index}.bin"
+        try:
+            await AsyncDownloader.download_file(url, str(save_path), num_threads=threads)
+        finally:
+            timings[index] = [started, time.monotonic()]
+            save_path.unlink(missing_ok=True)
+
+    monitor = ResourceMonitor(sample_interval)
+    scheduler = DownloadScheduler(_job, concurrency=concurrency)
+    monitor.start()
+    queued_at = time.monotonic()
+    try:
+        result = await scheduler.run(range(jobs))
+    finally:
+        await monitor.stop()
+    seconds = time.monotonic() - queued_at
+
+    final_rss = current_rss()
+    usage = resource.getrusage(resource.RUSAGE_SELF) if resource else None
+    waits = [started - queued_at for started, _ in timings.values()]
+    durations = [finished - started for started, finished in timings.values()]
+    active = min(concurrency, jobs) or 1
+
+    report = {
+        'jobs': jobs,
+        'concurrency': concurrency,
+        'threads': threads,
+        'completed': len(result.completed),
+        'failed': len(result.failed),
+        'seconds': round(seconds, 3),
+        'jobs_per_s': round(jobs / seconds, 1) if seconds else None,
+        'cpu_seconds': round(
+            usage.ru_utime + usage.ru_stime - usage_before.ru_utime - usage_before.ru_stime, 3
+        ) if usage else None,
+        'baseline_rss_mb': _mb(baseline_rss),
+        'peak_rss_mb': _mb(monitor.peak_rss),
+        'rss_per_active_job_kb': None,
+        'rss_growth_per_job_kb': None,
+        'baseline_fds': baseline_fds,
+        'peak_fds': monitor.peak_fds,
+        'fds_per_active_job': None,
+        'fd_limit': resource.getrlimit(resource.RLIMIT_NOFILE)[0] if resource else None,
+        'loop_lag_p50_ms': _ms(percentile(monitor.lags, 50)),
+        'loop_lag_p95_ms': _ms(percentile(monitor.lags, 95)),
+        'loop_lag_p99_ms': _ms(percentile(monitor.lags, 99)),
+        'loop_lag_max_ms': _ms(max(monitor.lags, default=None)),
+        'wait_p50_ms': _ms(percentile(waits, 50)),
+        'wait_p99_ms': _ms(percentile(waits, 99)),
+        'wait_max_ms': _ms(max(waits, default=None)),
+        'start_order_inversions': start_order_inversions(start_order),
+        'duration_fairness': round(jain_index(durations), 4) if durations else None,
+    }
+    if baseline_rss is not None and monitor.peak_rss is not None:
+        report['rss_per_active_job_kb'] = round((monitor.peak_rss - baseline_rss) / active / 1024, 1)
+    if baseline_rss is not None and final_rss is not None:
+        # Memory still held after every job finished: leaks grow with the job count
+        report['rss_growth_per_job_kb'] = round((final_rss - baseline_rss) / max(jobs, 1) / 1024, 3)
+    if baseline_fds is not None and monitor.peak_fds is not None:
+        report['fds_per_active_job'] = round((monitor.peak_fds - baseline_fds) / active, 2)
+    return report
+
+
+def run_case(url: str, jobs: int, concurrency: int, threads: int, directory: str,
+             sample_interval: float = 0.01) -> Dict[str, Any]:
+    """Run one job count (in a child process, with logging off)."""
+    from src.core.logger import logger
+
+    logger.remove()
+    return asyncio.run(run_load(url, jobs, concurrency, threads, directory, sample_interval))
+
+
+def _run_isolated(*args: Any) -> Dict[str, Any]:
+    """Run a case in a fresh process."""
+    context = multiprocessing.get_context('spawn')
+    with context.Pool(1) as pool:
+        return pool.apply(run_case, args)
+
+
+def compare_results(results: List[Dict[str, Any]], baseline: List[Dict[str, Any]],
+                    tolerance: float) -> List[str]:
+    """Cases whose memory, descriptors or loop lag grew more than ``tolerance``."""
+    def key(case: Dict[str, Any]) -> tuple:
+        return (case['jobs'], case['concurrency'], case['threads'], case['file_size'])
+
+    previous = {key(case): case for case in baseline}
+    regressions = []
+    for case in results:
+        old = previous.get(key(case))
+        if not old:
+            continue
+        for metric in REGRESSION_METRICS:
+            if case.get(metric) is None or not old.get(metric):
+                continue
+            if case[metric] > old[metric] * (1 + tolerance):
+                regressions.append(
+                    f"jobs={case['jobs']} concurrency={case['concurrency']}: "
+                    f"{metric} {old[metric]} -> {case[metric]}"
+                )
+    return regressions
+
+
+def main() -> int:
+    from src.utils.file_utils import parse_filesize
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--jobs', default='1000,5000', help='Comma-separated job counts')
+    parser.add_argument('--concurrency', type=int, default=32, help='Jobs running at once')
+    parser.add_argument('--threads', type=int, default=2, help='Download threads per job')
+    parser.add_argument('--file-size', default='256K', help='Size of each downloaded file')
+    parser.add_argument('--bandwidth', default='0', help='Per-connection cap in bytes/s (0 = unlimited)')
+    parser.add_argument('--latency-ms', type=float, default=0.0)
+    parser.add_argument('--jitter-ms', type=float, default=0.0)
+    parser.add_argument('--sample-ms', type=float, default=10.0, help='Monitor sampling interval')
+    parser.add_argument('--output', help='Write the JSON results to this file')
+    parser.add_argument('--baseline', help='Earlier results to compare against')
+    parser.add_argument('--tolerance', type=float, default=0.25, help='Allowed growth before failing')
+    options = parser.parse_args()
+
+    file_size = parse_filesize(options.file_size)
+    results = []
+    with server_process({'job.bin': file_size}, parse_filesize(options.bandwidth),
+                        options.latency_ms / 1000, options.jitter_ms / 1000) as base_url, \
+            tempfile.TemporaryDirectory(prefix='load-test-') as directory:
+        for jobs in (int(value) for value in options.jobs.split(',')):
+            report = _run_isolated(f"{base_url}/job.bin", jobs, options.concurrency, options.threads,
+                                   directory, options.sample_ms / 1000)
+            report.update({'file_size': file_size, 'bandwidth': options.bandwidth,
+                           'latency_ms': options.latency_ms})
+            results.append(report)
+            print(
+                f"jobs={jobs:>6} {report['jobs_per_s']} jobs/s  peak RSS {report['peak_rss_mb']} MB "
+                f"({report['rss_per_active_job_kb']} KB/active job)  peak fds {report['peak_fds']}  "
+                f"loop lag p99 {report['loop_lag_p99_ms']} ms  fairness {report['duration_fairness']}  "
+                f"failed {report['failed']}",
+                file=sys.stderr,
+            )
+
+    text = json.dumps(results, indent=2)
+    if options.output:
+        Path(options.output).write_text(text, encoding='utf-8')
+    print(text)
+
+    if options.baseline:
+        regressions = compare_results(results, json.loads(Path(options.baseline).read_text()), options.tolerance)
+        for line in regressions:
+            print(f"REGRESSION {line}", file=sys.stderr)
+        if regressions:
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
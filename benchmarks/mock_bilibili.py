@@ -0,0 +1,444 @@
+#!/usr/bin/env python3
+"""Local stand-in for the Bilibili web API, short links and media CDN.
+
+:class:`MockBilibiliServer` answers ``/x/web-interface/view`` and
+``/x/player/playurl`` with payloads shaped like the real ones: DASH streams
+with ``SegmentBase`` indexes when the request asks for DASH (``fnval``
+bit 16), legacy ``durl`` segments otherwise. Short links redirect like
+b23.tv does, and the media is served with Range support by a
+:class:`SyntheticRangeServer`. Streams are synthetic by default; real
+fragmented MP4 bytes (e.g. rendered by ffmpeg) get their actual
+``SegmentBase`` ranges. :meth:`MockBilibiliServer.install` points a
+BilibiliService at the mock, so the official API extraction and the
+download pipeline run end to end without network access.
+
+Usage:
+    python benchmarks/mock_bilibili.py [--port 8780] [--video-size 32M] [--audio-size 2M] [--latency-ms 40]
+"""
+
+import argparse
+import asyncio
+import random
+import struct
+import sys
+import zlib
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple, Union
+from urllib.parse import urlsplit
+
+from aiohttp import web
+from requests.adapters import HTTPAdapter
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from benchmarks.range_server import SyntheticRangeServer  # noqa: E402
+
+MB = 1024 * 1024
+
+# qn -> (description, width, height)
+QUALITIES: Dict[int, Tuple[str, int, int]] = {
+    120: ('超清 4K', 3840, 2160),
+    116: ('高清 1080P60', 1920, 1080),
+    80: ('高清 1080P', 1920, 1080),
+    64: ('高清 720P', 1280, 720),
+    32: ('清晰 480P', 852, 480),
+    16: ('流畅 360P', 640, 360),
+}
+
+AUDIO_CODECS = 'mp4a.40.2'
+VIDEO_CODECS = 'avc1.640032'
+AVC_CODECID = 7
+
+# SegmentBase of synthetic streams, as typical for Bilibili m4s files
+_SYNTHETIC_INIT = (0, 927)
+_SYNTHETIC_INDEX = (928, 1191)
+
+# fnval bit requesting DASH
+FNVAL_DASH = 16
+
+
+def _error(code: int, message: str) -> web.Response:
+    """API error envelope (Bilibili answers errors with HTTP 200)."""
+    return web.json_response({'code': code, 'message': message, 'ttl': 1})
+
+
+def segment_base(content: Union[int, bytes]) -> Tuple[Tuple[int, int], Tuple[int, int]]:
+    """Init and index byte ranges of a stream.
+
+    Real fragmented MP4 bytes are scanned for their top-level boxes: the
+    init segment ends with ``moov`` and the index is the ``sidx`` box.
+    """
+    if not isinstance(content, bytes):
+        return _SYNTHETIC_INIT, _SYNTHETIC_INDEX
+
+    init_end, index = None, None
+    position = 0
+    while position + 8 <= len(content):
+        size, box_type = struct.unpack_from('>I4s', content, position)
+        if size == 1:
+            size = struct.unpack_from('>Q', content, position + 8)[0]
+        if size < 8:
+            break
+        if box_type == b'moov':
+            init_end = position + size - 1
+        elif box_type == b'sidx':
+            index = (position, position + size - 1)
+            break
+        position += size
+
+    if init_end is None or index is None:
+        raise ValueError("Stream is not a fragmented MP4 with a sidx index")
+    return (0, init_end), index
+
+
+@dataclass
+class MockVideo:
+    """A video known to the mock: its pages and streams.
+
+    ``video`` maps quality ids (qn) and ``audio`` maps audio ids to the
+    stream content, either a synthetic size in bytes or real bytes.
+    """
+
+    bvid: str
+    title: str = 'Mock video'
+    duration: int = 60
+    pages: int = 1
+    video: Dict[int, Union[int, bytes]] = field(default_factory=lambda: {80: 16 * MB, 64: 8 * MB, 32: 4 * MB})
+    audio: Dict[int, Union[int, bytes]] = field(default_factory=lambda: {30280: 2 * MB, 30216: MB})
+    frame_rate: str = '30.000'
+
+    @property
+    def aid(self) -> int:
+        """Numeric av id, stable for a bvid."""
+        return zlib.crc32(self.bvid.encode()) & 0x7FFFFFFF
+
+    @property
+    def cids(self) -> List[int]:
+        """Content id of every page."""
+        return [self.aid * 10 + page for page in range(1, self.pages + 1)]
+
+
+class MockBilibiliServer:
+    """Serves the Bilibili API endpoints, short links and media for mock videos."""
+
+    def __init__(
+        self,
+        videos: List[MockVideo],
+        short_links: Optional[Dict[str, str]] = None,
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        media_bandwidth: int = 0,
+        media_latency: float = 0.0,
+        host: str = '127.0.0.1',
+        port: int = 0,
+        seed: Optional[int] = None,
+    ):
+        self.videos = {video.bvid: video for video in videos}
+        self.short_links = dict(short_links or {})
+        self.latency = latency
+        self.jitter = jitter
+        self.host = host
+        self.port = port
+        self._random = random.Random(seed)
+        self._runner: Optional[web.AppRunner] = None
+        self.api_requests: Dict[str, int] = {}
+
+        files: Dict[str, Union[int, bytes]] = {}
+        for video in self.videos.values():
+            for cid in video.cids:
+                for stream_id, content in {**video.video, **video.audio}.items():
+                    files[self._media_name(cid, stream_id)] = content
+                best = max(video.video)
+                files[self._media_name(cid, best, 'flv')] = video.video[best]
+        self.media = SyntheticRangeServer(files, media_bandwidth, media_latency, host=host, seed=seed)
+
+    @property
+    def url(self) -> str:
+        """Base URL of the API (the ``api_base`` of a BilibiliService)."""
+        return f"http://{self.host}:{self.port}"
+
+    def video_url(self, bvid: str, page: int = 1) -> str:
+        """Watch page URL of a video."""
+        suffix = f"?p={page}" if page > 1 else ''
+        return f"https://www.bilibili.com/video/{bvid}{suffix}"
+
+    @staticmethod
+    def _media_name(cid: int, stream_id: int, ext: str = 'm4s') -> str:
+        """File name of a stream on the media server, like upos names."""
+        return f"{cid}-1-{stream_id}.{ext}"
+
+    def install(self, service: Any) -> None:
+        """Point a BilibiliService at the mock.
+
+        The API base is replaced and b23.tv requests made by its session are
+        sent to the mock's short link endpoint instead.
+        """
+        service.api_base = self.url
+        adapter = _ShortLinkAdapter(f"{self.url}/b23")
+        service.api_session.mount('https://b23.tv/', adapter)
+        service.api_session.mount('http://b23.tv/', adapter)
+
+    async def start(self) -> None:
+        """Start the API and media servers."""
+        await self.media.start()
+        app = web.Application()
+        app.router.add_get('/x/web-interface/view', self._view)
+        app.router.add_get('/x/player/playurl', self._playurl)
+        app.router.add_get('/b23/{code}', self._short_link)
+        app.router.add_get('/video/{bvid}', self._watch_page)
+        self._runner = web.AppRunner(app)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, self.host, self.port)
+        await site.start()
+        self.port = self._runner.addresses[0][1]
+
+    async def stop(self) -> None:
+        """Stop serving."""
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+        await self.media.stop()
+
+    async def __aenter__(self) -> "MockBilibiliServer":
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.stop()
+
+    async def _api_delay(self, endpoint: str) -> None:
+        """Count an API request and delay it by the latency plus jitter."""
+        self.api_requests[endpoint] = self.api_requests.get(endpoint, 0) + 1
+        delay = max(0.0, self.latency + self._random.uniform(-self.jitter, self.jitter))
+        if delay:
+            await asyncio.sleep(delay)
+
+    async def _view(self, request: web.Request) -> web.Response:
+        """``/x/web-interface/view``: video metadata and page list."""
+        await self._api_delay('view')
+        bvid = request.query.get('bvid')
+        if not bvid:
+            return _error(-400, '请求错误')
+        video = self.videos.get(bvid)
+        if video is None:
+            return _error(-404, '啥都木有')
+
+        _, width, height = QUALITIES[max(video.video)]
+        dimension = {'width': width, 'height': height, 'rotate': 0}
+        pages = [
+            {
+                'cid': cid,
+                'page': page,
+                'from': 'vupload',
+                'part': f"{video.title} P{page}" if video.pages > 1 else video.title,
+                'duration': video.duration,
+                'vid': '',
+                'weblink': '',
+                'dimension': dimension,
+            }
+            for page, cid in enumerate(video.cids, 1)
+        ]
+        return web.json_response({'code': 0, 'message': '0', 'ttl': 1, 'data': {
+            'bvid': video.bvid,
+            'aid': video.aid,
+            'videos': video.pages,
+            'tid': 17,
+            'tname': '单机游戏',
+            'copyright': 1,
+            'pic': f"http://i0.hdslb.com/bfs/archive/{video.aid:x}.jpg",
+            'title': video.title,
+            'pubdate': 1700000000,
+            'ctime': 1700000000,
+            'desc': f"Mock video {video.bvid}",
+            'duration': video.duration * video.pages,
+            'owner': {'mid': 1000, 'name': 'mock-uploader', 'face': ''},
+            'stat': {
+                'aid': video.aid, 'view': 12345, 'danmaku': 67, 'reply': 89, 'favorite': 10,
+                'coin': 11, 'share': 12, 'like': 1234,
+            },
+            'cid': video.cids[0],
+            'dimension': dimension,
+            'pages': pages,
+        }})
+
+    def _stream_urls(self, cid: int, stream_id: int, ext: str = 'm4s') -> Tuple[str, List[str]]:
+        """Primary and backup URL of a stream."""
+        url = self.media.url(self._media_name(cid, stream_id, ext))
+        return url, [f"{url}?mirror=1"]
+
+    def _dash_stream(self, video: MockVideo, cid: int, stream_id: int, content: Union[int, bytes],
+                     audio: bool) -> Dict[str, Any]:
+        """One DASH ``video`` or ``audio`` entry."""
+        url, backup = self._stream_urls(cid, stream_id)
+        size = len(content) if isinstance(content, bytes) else content
+        (init_start, init_end), (index_start, index_end) = segment_base(content)
+        initialization = f"{init_start}-{init_end}"
+        index_range = f"{index_start}-{index_end}"
+        entry = {
+            'id': stream_id,
+            'baseUrl': url,
+            'base_url': url,
+            'backupUrl': backup,
+            'backup_url': backup,
+            'bandwidth': size * 8 // max(video.duration, 1),
+            'mimeType': 'audio/mp4' if audio else 'video/mp4',
+            'mime_type': 'audio/mp4' if audio else 'video/mp4',
+            'codecs': AUDIO_CODECS if audio else VIDEO_CODECS,
+            'width': 0,
+            'height': 0,
+            'frameRate': '',
+            'frame_rate': '',
+            'sar': '',
+            'startWithSap': 0,
+            'start_with_sap': 0,
+            'SegmentBase': {'Initialization': initialization, 'indexRange': index_range},
+            'segment_base': {'initialization': initialization, 'index_range': index_range},
+            'codecid': 0,
+        }
+        if not audio:
+            _, width, height = QUALITIES[stream_id]
+            entry.update({
+                'width': width,
+                'height': height,
+                'frameRate': video.frame_rate,
+                'frame_rate': video.frame_rate,
+                'sar': '1:1',
+                'startWithSap': 1,
+                'start_with_sap': 1,
+                'codecid': AVC_CODECID,
+            })
+        return entry
+
+    async def _playurl(self, request: web.Request) -> web.Response:
+        """``/x/player/playurl``: DASH streams or legacy durl segments of a page."""
+        await self._api_delay('playurl')
+        video = self.videos.get(request.query.get('bvid', ''))
+        try:
+            cid = int(request.query.get('cid', ''))
+            fnval = int(request.query.get('fnval', '0'))
+        except ValueError:
+            return _error(-400, '请求错误')
+        if video is None or cid not in video.cids:
+            return _error(-404, '啥都木有')
+
+        qualities = sorted(video.video, reverse=True)
+        data: Dict[str, Any] = {
+            'from': 'local',
+            'result': 'suee',
+            'message': '',
+            'quality': qualities[0],
+            'format': 'dash' if fnval & FNVAL_DASH else 'flv',
+            'timelength': video.duration * 1000,
+            'accept_format': ','.join(f"flv{qn}" for qn in qualities),
+            'accept_description': [QUALITIES[qn][0] for qn in qualities],
+            'accept_quality': qualities,
+            'video_codecid': AVC_CODECID,
+            'seek_param': 'start',
+            'seek_type': 'offset',
+            'support_formats': [
+                {'quality': qn, 'format': f"flv{qn}", 'new_description': QUALITIES[qn][0],
+                 'display_desc': QUALITIES[qn][0].split()[-1], 'codecs': [VIDEO_CODECS]}
+                for qn in qualities
+            ],
+            'last_play_time': 0,
+            'last_play_cid': 0,
+        }
+
+        if fnval & FNVAL_DASH:
+            data['dash'] = {
+                'duration': video.duration,
+                'minBufferTime': 1.5,
+                'min_buffer_time': 1.5,
+                'video': [self._dash_stream(video, cid, qn, video.video[qn], False) for qn in qualities],
+                'audio': [
+                    self._dash_stream(video, cid, audio_id, video.audio[audio_id], True)
+                    for audio_id in sorted(video.audio, reverse=True)
+                ],
+                'dolby': {'type': 0, 'audio': None},
+                'flac': None,
+            }
+        else:
+            content = video.video[qualities[0]]
+            url, backup = self._stream_urls(cid, qualities[0], 'flv')
+            data['durl'] = [{
+                'order': 1,
+                'length': video.duration * 1000,
+                'size': len(content) if isinstance(content, bytes) else content,
+                'ahead': '',
+                'vhead': '',
+                'url': url,
+                'backup_url': backup,
+            }]
+
+        return web.json_response({'code': 0, 'message': '0', 'ttl': 1, 'data': data})
+
+    async def _short_link(self, request: web.Request) -> web.Response:
+        """Short link redirect, as b23.tv answers."""
+        bvid = self.short_links.get(request.match_info['code'])
+        if bvid is None:
+            return web.Response(status=404)
+        raise web.HTTPFound(f"{self.url}/video/{bvid}?share_source=copy_web")
+
+    async def _watch_page(self, request: web.Request) -> web.Response:
+        """Minimal watch page, the target of short link redirects."""
+        bvid = request.match_info['bvid']
+        if bvid not in self.videos:
+            return web.Response(status=404)
+        return web.Response(text=f"<html><head><title>{self.videos[bvid].title}</title></head></html>",
+                            content_type='text/html')
+
+
+class _ShortLinkAdapter(HTTPAdapter):
+    """Sends b23.tv requests of a requests session to the mock server."""
+
+    def __init__(self, base_url: str):
+        super().__init__()
+        self.base_url = base_url
+
+    def send(self, request, **kwargs):
+        request.url = f"{self.base_url}/{urlsplit(request.url).path.lstrip('/')}"
+        return super().send(request, **kwargs)
+
+
+def main() -> int:
+    from src.utils.file_utils import parse_filesize
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8780)
+    parser.add_argument('--bvid', default='BV1mock4y1Test')
+    parser.add_argument('--pages', type=int, default=1)
+    parser.add_argument('--video-size', default='32M', help='Size of the best video stream')
+    parser.add_argument('--audio-size', default='2M', help='Size of the best audio stream')
+    parser.add_argument('--latency-ms', type=float, default=0.0, help='Delay of each API response')
+    parser.add_argument('--jitter-ms', type=float, default=0.0, help='Random +/- variation of the delay')
+    options = parser.parse_args()
+
+    video_size, audio_size = parse_filesize(options.video_size), parse_filesize(options.audio_size)
+    video = MockVideo(
+        options.bvid,
+        pages=options.pages,
+        video={80: video_size, 64: video_size // 2, 32: video_size // 4},
+        audio={30280: audio_size, 30216: audio_size // 2},
+    )
+
+    async def _serve() -> None:
+        server = MockBilibiliServer([video], {'mock': video.bvid}, options.latency_ms / 1000,
+                                    options.jitter_ms / 1000, host=options.host, port=options.port)
+        async with server:
+            print(f"API base:   {server.url}")
+            print(f"View:       {server.url}/x/web-interface/view?bvid={video.bvid}")
+            print(f"Short link: {server.url}/b23/mock")
+            await asyncio.Event().wait()
+
+    try:
+        asyncio.run(_serve())
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
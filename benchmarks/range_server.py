@@ -0,0 +1,208 @@
+#!/usr/bin/env python3
+"""Local HTTP server of synthetic files with Range support.
+
+Files are generated on the fly (byte ``i`` of every file is ``i % 251``),
+so multi-GB files need no disk space or memory; a file can also be given
+as real bytes. Each connection can be
+capped in bandwidth, and every response is delayed by a fixed latency plus
+random jitter before its headers are sent. Used by the throughput
+benchmark and by tests that need a realistic media server.
+
+Usage:
+    python benchmarks/range_server.py --file video.m4s=2G [--bandwidth 20M] [--latency-ms 30 --jitter-ms 10]
+"""
+
+import argparse
+import asyncio
+import random
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple, Union
+
+from aiohttp import web
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from src.utils.range_utils import parse_range_header  # noqa: E402
+
+
+# A prime period, so pattern boundaries never line up with chunk sizes
+PATTERN_PERIOD = 251
+_BLOCK = bytes(i % PATTERN_PERIOD for i in range(PATTERN_PERIOD * 4096))
+
+DEFAULT_SEND_SIZE = 64 * 1024
+
+
+def synthetic_bytes(offset: int, length: int) -> bytes:
+    """Content of a synthetic file at ``offset``."""
+    start = offset % PATTERN_PERIOD
+    if start + length <= len(_BLOCK):
+        return _BLOCK[start:start + length]
+
+    parts = []
+    while length > 0:
+        part = _BLOCK[start:start + length]
+        parts.append(part)
+        length -= len(part)
+        start = 0
+    return b''.join(parts)
+
+
+class SyntheticRangeServer:
+    """Serves synthetic files with per-connection bandwidth caps, latency and jitter."""
+
+    def __init__(
+        self,
+        files: Dict[str, Union[int, bytes]],
+        bandwidth: int = 0,
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        host: str = '127.0.0.1',
+        port: int = 0,
+        send_size: int = DEFAULT_SEND_SIZE,
+        seed: Optional[int] = None,
+    ):
+        self.files = dict(files)
+        self.bandwidth = bandwidth
+        self.latency = latency
+        self.jitter = jitter
+        self.host = host
+        self.port = port
+        self.send_size = send_size
+        self._random = random.Random(seed)
+        self._runner: Optional[web.AppRunner] = None
+        self.requests = 0
+        self.bytes_sent = 0
+        # (method, Range header) of every request, for tests
+        self.log: List[Tuple[str, Optional[str]]] = []
+
+    def url(self, name: str) -> str:
+        """URL of a served file."""
+        return f"http://{self.host}:{self.port}/{name}"
+
+    async def start(self) -> None:
+        """Start serving."""
+        app = web.Application()
+        app.router.add_route('*', '/{name}', self._handle)
+        self._runner = web.AppRunner(app)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, self.host, self.port)
+        await site.start()
+        self.port = self._runner.addresses[0][1]
+
+    async def stop(self) -> None:
+        """Stop serving."""
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    async def __aenter__(self) -> "SyntheticRangeServer":
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.stop()
+
+    def _read(self, name: str, offset: int, length: int) -> bytes:
+        """Bytes of a served file."""
+        content = self.files[name]
+        if isinstance(content, bytes):
+            return content[offset:offset + length]
+        return synthetic_bytes(offset, length)
+
+    def _delay(self) -> float:
+        """Latency of one response, with jitter."""
+        return max(0.0, self.latency + self._random.uniform(-self.jitter, self.jitter))
+
+    async def _handle(self, request: web.Request) -> web.StreamResponse:
+        """Serve a file or a byte range of it."""
+        self.requests += 1
+        self.log.append((request.method, request.headers.get('Range')))
+        name = request.match_info['name']
+        content = self.files.get(name)
+        if content is None:
+            return web.Response(status=404)
+        size = len(content) if isinstance(content, bytes) else content
+        if request.method not in ('GET', 'HEAD'):
+            return web.Response(status=405)
+
+        delay = self._delay()
+        if delay:
+            await asyncio.sleep(delay)
+
+        range_header = request.headers.get('Range')
+        try:
+            start, end = parse_range_header(range_header, size)
+        except ValueError:
+            return web.Response(status=416, headers={'Content-Range': f'bytes */{size}'})
+
+        headers = {
+            'Content-Type': 'application/octet-stream',
+            'Accept-Ranges': 'bytes',
+            'Content-Length': str(end - start + 1),
+        }
+        if range_header:
+            headers['Content-Range'] = f'bytes {start}-{end}/{size}'
+        response = web.StreamResponse(status=206 if range_header else 200, headers=headers)
+        await response.prepare(request)
+        if request.method == 'HEAD':
+            return response
+
+        # Pace each connection on its own: the cap is per connection, like a CDN
+        started = time.monotonic()
+        sent = 0
+        position = start
+        while position <= end:
+            length = min(self.send_size, end - position + 1)
+            await response.write(self._read(name, position, length))
+            position += length
+            sent += length
+            if self.bandwidth:
+                ahead = started + sent / self.bandwidth - time.monotonic()
+                if ahead > 0:
+                    await asyncio.sleep(ahead)
+
+        self.bytes_sent += sent
+        await response.write_eof()
+        return response
+
+
+def main() -> int:
+    from src.utils.file_utils import parse_filesize
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--file', action='append', default=[], metavar='NAME=SIZE',
+                        help='File to serve, e.g. video.m4s=2G (repeatable)')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--bandwidth', default='0', help='Per-connection cap in bytes/s, e.g. 10M (0 = unlimited)')
+    parser.add_argument('--latency-ms', type=float, default=0.0, help='Delay before each response')
+    parser.add_argument('--jitter-ms', type=float, default=0.0, help='Random +/- variation of the delay')
+    options = parser.parse_args()
+
+    files = {}
+    for spec in options.file or ['video.m4s=1G']:
+        name, _, size = spec.partition('=')
+        files[name] = parse_filesize(size)
+
+    async def _serve() -> None:
+        server = SyntheticRangeServer(
+            files, parse_filesize(options.bandwidth), options.latency_ms / 1000, options.jitter_ms / 1000,
+            options.host, options.port
+        )
+        async with server:
+            for name, size in files.items():
+                print(f"{server.url(name)}  ({size} bytes)")
+            await asyncio.Event().wait()
+
+    try:
+        asyncio.run(_serve())
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""Resilience scenarios: how fast downloads recover from injected faults.
+
+Each scenario downloads a synthetic file with MultiThreadDownloader through
+a :class:`FaultInjectingProxy` with one fault schedule, verifies the
+result and reports, per fault type, whether the download recovered, the
+retries it took, the bytes relayed but thrown away and the time lost
+compared with a clean run. Results are printed as JSON.
+
+Usage:
+    python benchmarks/resilience.py [--size 32M] [--threads 4] [--stall-timeout 2] [--output resilience.json]
+"""
+
+import argparse
+import asyncio
+import json
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Dict, List
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from benchmarks.download_throughput import verify_download  # noqa: E402
+from benchmarks.fault_proxy import FaultInjectingProxy, FaultSchedule  # noqa: E402
+from benchmarks.range_server import SyntheticRangeServer  # noqa: E402
+
+
+# Fault rules per scenario (see benchmarks/fault_proxy.py for the syntax)
+SCENARIOS: Dict[str, List[str]] = {
+    'clean': [],
+    'reset': ['reset/512K#2'],
+    'truncate': ['truncate/512K#1'],
+    'bad_range': ['bad_range#3'],
+    # The connection drops after 1 MB and the first reconnect is refused
+    'status_403_after_bytes': ['truncate/1M#1', 'status:403@1M*1'],
+    'stall': ['stall:{stall}/256K#2'],
+    'repeated_resets': ['reset/256K*3'],
+}
+
+
+async def run_scenario(name: str, rules: List[str], size: int, threads: int, directory: str,
+                       stall_timeout: float = 2.0, retry_delay: float = 1.0) -> Dict[str, Any]:
+    """Download through the fault proxy once and measure the recovery."""
+    from src.core.config import download_config
+    from src.services.downloader import MultiThreadDownloader
+
+    schedule = FaultSchedule.parse([rule.format(stall=stall_timeout * 2) for rule in rules])
+    save_path = Path(directory) / f"{name}.bin"
+    result: Dict[str, Any] = {'scenario': name, 'faults': rules}
+
+    timeout = download_config.timeout
+    download_config.timeout = stall_timeout
+    try:
+        async with SyntheticRangeServer({'video.bin': size}) as upstream, \
+                FaultInjectingProxy(upstream.url('').rstrip('/'), schedule) as proxy:
+            downloader = MultiThreadDownloader(f"{proxy.url}/video.bin", str(save_path), threads,
+                                               total_size=size, staging=False)
+            downloader.retry_delay = retry_delay
+            started = time.perf_counter()
+            try:
+                await downloader.download()
+                verify_download(save_path, size)
+                result['recovered'] = True
+            except Exception as e:
+                result['recovered'] = False
+                result['error'] = str(e)
+            result['seconds'] = round(time.perf_counter() - started, 3)
+            result['retries'] = downloader.retries
+            result['requests'] = proxy.requests
+            result['faults_injected'] = proxy.faults
+            result['bytes_relayed'] = proxy.bytes_relayed
+            result['bytes_wasted'] = max(0, proxy.bytes_relayed - size) if result['recovered'] else proxy.bytes_relayed
+    finally:
+        download_config.timeout = timeout
+        save_path.unlink(missing_ok=True)
+    return result
+
+
+async def run_suite(size: int, threads: int, stall_timeout: float, retry_delay: float,
+                    scenarios: Dict[str, List[str]] = SCENARIOS) -> List[Dict[str, Any]]:
+    """Run every scenario; time lost is relative to the clean run."""
+    directory = tempfile.mkdtemp(prefix='vd-resilience-')
+    results = [
+        await run_scenario(name, rules, size, threads, directory, stall_timeout, retry_delay)
+        for name, rules in scenarios.items()
+    ]
+    clean = next((r['seconds'] for r in results if r['scenario'] == 'clean'), 0.0)
+    for result in results:
+        result['time_lost'] = round(max(0.0, result['seconds'] - clean), 3)
+    return results
+
+
+def main() -> int:
+    from src.core.logger import logger
+    from src.utils.file_utils import parse_filesize
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--size', default='32M', help='Synthetic file size')
+    parser.add_argument('--threads', type=int, default=4, help='Download threads')
+    parser.add_argument('--stall-timeout', type=float, default=2.0,
+                        help='Read timeout of the downloader (stalls last twice as long)')
+    parser.add_argument('--retry-delay', type=float, default=1.0, help='First retry backoff of the downloader')
+    parser.add_argument('--scenario', action='append', help='Only run these scenarios')
+    parser.add_argument('--output', help='Write the JSON results to this file (default: stdout)')
+    options = parser.parse_args()
+
+    logger.remove()
+    logger.add(sys.stderr, level='ERROR')
+    scenarios = {name: SCENARIOS[name] for name in options.scenario} if options.scenario else SCENARIOS
+
+    results = asyncio.run(run_suite(parse_filesize(options.size), options.threads,
+                                    options.stall_timeout, options.retry_delay, scenarios))
+    for result in results:
+        print(
+            f"{result['scenario']:<24} {'ok' if result['recovered'] else 'FAILED':<7} "
+            f"retries={result['retries']:<3} lost={result['time_lost']:6.2f}s "
+            f"wasted={result['bytes_wasted'] / 1024:8.0f} KiB",
+            file=sys.stderr
+        )
+
+    text = json.dumps({'benchmark': 'resilience', 'results': results}, indent=2)
+    if options.output:
+        Path(options.output).write_text(text + '\n', encoding='utf-8')
+    else:
+        print(text)
+    return 0 if all(result['recovered'] for result in results) else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
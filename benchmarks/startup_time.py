@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""CLI startup-time benchmark with a regression threshold.
+
+Runs ``python -X importtime main.py <args>`` several times, reports the
+median wall time and import time, lists the slowest top-level imports and
+fails when the budget is exceeded or a heavy module is imported eagerly.
+
+Usage:
+    python benchmarks/startup_time.py [--runs 5] [--budget-ms 150] [-- --help]
+"""
+
+import argparse
+import re
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List, Set, Tuple
+
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# Modules that must not be imported by ``--help`` and other light commands
+HEAVY_MODULES = (
+    'aiohttp',
+    'requests',
+    'yt_dlp',
+    'pydantic',
+    'pydantic_settings',
+    'loguru',
+    'rich',
+    'src.services.bilibili',
+    'src.core.config',
+)
+
+DEFAULT_BUDGET_MS = 150.0
+
+_IMPORTTIME_RE = re.compile(r'^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)$')
+
+
+def parse_importtime(stderr: str) -> List[Tuple[str, int, int]]:
+    """Parse ``-X importtime`` output into ``(module, cumulative_us, depth)``."""
+    entries = []
+    for line in stderr.splitlines():
+        match = _IMPORTTIME_RE.match(line)
+        if match:
+            depth = (len(match.group(3)) - 1) // 2
+            entries.append((match.group(4), int(match.group(2)), depth))
+    return entries
+
+
+def imported_modules(entries: List[Tuple[str, int, int]]) -> Set[str]:
+    """Names of every module imported during the run."""
+    return {name for name, _, _ in entries}
+
+
+def find_heavy_imports(modules: Set[str], heavy=HEAVY_MODULES) -> List[str]:
+    """Heavy modules (or their submodules) that were imported."""
+    return sorted(
+        name for name in heavy
+        if any(module == name or module.startswith(name + '.') for module in modules)
+    )
+
+
+def run_once(args: List[str]) -> Tuple[float, List[Tuple[str, int, int]]]:
+    """Run the CLI once, returning wall seconds and parsed import times."""
+    start = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', str(ROOT / 'main.py')] + args,
+        cwd=str(ROOT),
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.PIPE,
+        text=True,
+    )
+    elapsed = time.perf_counter() - start
+    return elapsed, parse_importtime(result.stderr)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--runs', type=int, default=5, help='Number of runs (median is reported)')
+    parser.add_argument('--budget-ms', type=float, default=DEFAULT_BUDGET_MS,
+                        help='Maximum median import time of the entry point in ms')
+    parser.add_argument('--top', type=int, default=10, help='Number of slowest top-level imports to list')
+    parser.add_argument('cli_args', nargs='*', default=['--help'], help='Arguments passed to main.py')
+    options = parser.parse_args()
+
+    wall_times: List[float] = []
+    import_times: List[float] = []
+    top_level: Dict[str, int] = {}
+    modules: Set[str] = set()
+
+    for _ in range(options.runs):
+        elapsed, entries = run_once(options.cli_args)
+        wall_times.append(elapsed * 1000)
+        modules |= imported_modules(entries)
+
+        # Top-level project imports: main.py pulls in everything through them
+        roots = [(name, cumulative) for name, cumulative, depth in entries if depth == 0]
+        import_times.append(sum(c for n, c in roots if n.startswith('src')) / 1000)
+        for name, cumulative in roots:
+            top_level[name] = max(top_level.get(name, 0), cumulative)
+
+    wall_ms = statistics.median(wall_times)
+    import_ms = statistics.median(import_times)
+
+    print(f"main.py {' '.join(options.cli_args)}  ({options.runs} runs)")
+    print(f"  wall time (median):        {wall_ms:8.1f} ms")
+    print(f"  project import (median):   {import_ms:8.1f} ms  (budget {options.budget_ms:.0f} ms)")
+    print("  slowest top-level imports:")
+    for name, cumulative in sorted(top_level.items(), key=lambda item: -item[1])[:options.top]:
+        print(f"    {cumulative / 1000:8.1f} ms  {name}")
+
+    failed = False
+    heavy = find_heavy_imports(modules)
+    if heavy and options.cli_args == ['--help']:
+        print(f"FAIL: heavy modules imported eagerly: {', '.join(heavy)}")
+        failed = True
+    if import_ms > options.budget_ms:
+        print(f"FAIL: import time {import_ms:.1f} ms exceeds budget {options.budget_ms:.0f} ms")
+        failed = True
+
+    if not failed:
+        print("OK")
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
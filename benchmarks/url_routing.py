@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+"""Bulk URL classification benchmark for the platform URL router.
+
+Classifies a mixed list of URLs (video pages, short links, unsupported
+hosts and look-alike domains such as ``notyoutube.com``) with
+``PlatformManager.classify_urls`` and with a replica of the previous
+lookup, which scanned every registered domain as a substring of the host
+and then ran each plugin's patterns through ``re.search`` on the
+lowercased URL. The router also returns the canonical video id; the
+legacy lookup only finds the platform. Reports URLs/s for both and fails
+when the router takes longer than the budget.
+
+Usage:
+    python benchmarks/url_routing.py [--count 100000] [--file urls.txt] [--budget-s 1.0] [--output routing.json]
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import random
+import re
+import sys
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Sequence
+from urllib.parse import urlparse
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+DEFAULT_BUDGET_S = 1.0
+
+# Domains and patterns of the plugins before the router, in registration order
+LEGACY_DOMAINS = (
+    ('bilibili.com', 'bilibili'), ('b23.tv', 'bilibili'),
+    ('youtube.com', 'youtube'), ('youtu.be', 'youtube'),
+    ('douyin.com', 'douyin'), ('v.douyin.com', 'douyin'), ('iesdouyin.com', 'douyin'),
+)
+LEGACY_PATTERNS = {
+    'bilibili': (r'bilibili\.com/video/[a-zA-Z0-9]+', r'bilibili\.com/bangumi/play/[a-zA-Z]+[0-9]+',
+                 r'b23\.tv/[a-zA-Z0-9]+'),
+    'youtube': (r'youtube\.com/watch\?v=[a-zA-Z0-9_-]+', r'youtu\.be/[a-zA-Z0-9_-]+',
+                r'youtube\.com/embed/[a-zA-Z0-9_-]+', r'youtube\.com/shorts/[a-zA-Z0-9_-]+'),
+    'douyin': (r'douyin\.com/[a-zA-Z0-9_/]+', r'v\.douyin\.com/[a-zA-Z0-9]+',
+               r'iesdouyin\.com/[a-zA-Z0-9_/]+'),
+}
+
+_ALPHABET = 'abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789'
+
+
+def _token(rng: random.Random, length: int, alphabet: str = _ALPHABET) -> str:
+    return ''.join(rng.choice(alphabet) for _ in range(length))
+
+
+def generate_urls(count: int, seed: int = 0) -> List[str]:
+    """A reproducible mix of supported, unsupported and look-alike URLs."""
+    rng = random.Random(seed)
+    makers: Sequence[Callable[[], str]] = (
+        lambda: f"https://www.bilibili.com/video/BV1{_token(rng, 9)}?p={rng.randint(1, 9)}",
+        lambda: f"https://m.bilibili.com/video/av{rng.randint(1, 10 ** 9)}",
+        lambda: f"https://www.bilibili.com/bangumi/play/ep{rng.randint(1, 10 ** 6)}",
+        lambda: f"https://b23.tv/{_token(rng, 7)}",
+        lambda: f"https://www.youtube.com/watch?v={_token(rng, 11)}&t={rng.randint(1, 600)}s",
+        lambda: f"https://m.youtube.com/watch?feature=share&v={_token(rng, 11)}",
+        lambda: f"https://youtu.be/{_token(rng, 11)}",
+        lambda: f"https://www.youtube.com/shorts/{_token(rng, 11)}",
+        lambda: f"https://www.douyin.com/video/{rng.randint(10 ** 18, 10 ** 19)}",
+        lambda: f"https://v.douyin.com/{_token(rng, 8)}/",
+        lambda: f"https://notyoutube.com/watch?v={_token(rng, 11)}",
+        lambda: f"https://www.example.com/{_token(rng, 12)}/index.html",
+        lambda: f"http://cdn{rng.randint(1, 99)}.example.org/media/{_token(rng, 16)}.mp4",
+    )
+    return [rng.choice(makers)() for _ in range(count)]
+
+
+def legacy_platform_by_url(url: str) -> Optional[str]:
+    """The platform lookup as it was before the URL router."""
+    hostname = urlparse(url.lower()).netloc
+    if hostname.startswith('www.'):
+        hostname = hostname[4:]
+    for domain, name in LEGACY_DOMAINS:
+        if domain in hostname:
+            return name
+    for name, patterns in LEGACY_PATTERNS.items():
+        lowered = url.lower()
+        if any(re.search(pattern, lowered) for pattern in patterns):
+            return name
+    return None
+
+
+def _timed(classify: Callable[[List[str]], list], urls: List[str]) -> Dict[str, float]:
+    started = time.perf_counter()
+    results = classify(urls)
+    seconds = time.perf_counter() - started
+    return {
+        'seconds': round(seconds, 4),
+        'urls_per_s': round(len(urls) / seconds) if seconds else None,
+        'matched': sum(1 for result in results if result),
+    }
+
+
+def run_benchmark(urls: List[str], repeats: int = 3) -> Dict[str, Dict[str, float]]:
+    """Best of ``repeats`` runs of the router and of the legacy lookup."""
+    with contextlib.redirect_stdout(io.StringIO()):
+        from src.gui.plugins.platform_manager import PlatformManager
+
+        manager = PlatformManager()
+
+    def _best(classify: Callable[[List[str]], list]) -> Dict[str, float]:
+        return min((_timed(classify, urls) for _ in range(repeats)), key=lambda run: run['seconds'])
+
+    router = _best(manager.classify_urls)
+    legacy = _best(lambda batch: [legacy_platform_by_url(url) for url in batch])
+    return {
+        'urls': len(urls),
+        'router': router,
+        'legacy': legacy,
+        'speedup': round(legacy['seconds'] / router['seconds'], 1) if router['seconds'] else None,
+    }
+
+
+def _read_urls(path: str) -> List[str]:
+    lines = Path(path).read_text(encoding='utf-8').splitlines()
+    return [line.strip() for line in lines if line.strip()]
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--count', type=int, default=100000, help='Number of generated URLs')
+    parser.add_argument('--file', help='Classify the URLs in this file (one per line) instead')
+    parser.add_argument('--repeats', type=int, default=3, help='Runs per lookup; the fastest is reported')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--budget-s', type=float, default=DEFAULT_BUDGET_S,
+                        help='Fail if the router takes longer than this')
+    parser.add_argument('--output', help='Write the JSON results to this file')
+    options = parser.parse_args()
+
+    urls = _read_urls(options.file) if options.file else generate_urls(options.count, options.seed)
+    report = run_benchmark(urls, options.repeats)
+
+    print(
+        f"{report['urls']} URLs: router {report['router']['seconds']} s "
+        f"({report['router']['urls_per_s']} URLs/s), legacy {report['legacy']['seconds']} s "
+        f"({report['legacy']['urls_per_s']} URLs/s), {report['speedup']}x",
+        file=sys.stderr,
+    )
+    text = json.dumps(report, indent=2)
+    if options.output:
+        Path(options.output).write_text(text, encoding='utf-8')
+    print(text)
+
+    if report['router']['seconds'] > options.budget_s:
+        print(f"FAIL router took {report['router']['seconds']} s (budget {options.budget_s} s)", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
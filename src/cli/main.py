@@ -1,34 +1,51 @@
-"""Main CLI interface."""
+"""Main CLI interface.
+
+Heavy modules (rich, aiohttp, requests, pydantic, the services) are imported
+inside the commands that need them, so ``--help`` and simple commands start
+fast. ``benchmarks/startup_time.py`` guards the startup budget.
+"""
 
 import sys
 from pathlib import Path
-from typing import Optional
+from typing import Optional, TYPE_CHECKING
 import click
-from rich.console import Console
-from rich.progress import Progress, SpinnerColumn, TextColumn, BarColumn, DownloadColumn, TimeRemainingColumn
-from rich.table import Table
-from rich.panel import Panel
-from rich import print as rprint
 
 # Add src to path for imports
 sys.path.insert(0, str(Path(__file__).parent.parent.parent))
 
-from src.services.bilibili import bilibili_service
-from src.services.downloader import AsyncDownloader
-from src.core.config import download_config, config_manager
 from src.core.exceptions import VideoDownloaderError
-from src.core.logger import logger
-from src.utils.file_utils import safe_filename, format_filesize, ensure_directory
-from src.utils.url_utils import is_valid_url, is_bilibili_url
+
+if TYPE_CHECKING:
+    from rich.console import Console
+    from rich.progress import Progress
+
+
+_console: Optional["Console"] = None
 
 
-console = Console()
+def get_console() -> "Console":
+    """Get the rich console, created on first use."""
+    global _console
+    if _console is None:
+        from rich.console import Console
+        _console = Console()
+    return _console
+
+
+class _LazyConsole:
+    """Module-level ``console`` that defers importing rich until first use."""
+    
+    def __getattr__(self, name):
+        return getattr(get_console(), name)
+
+
+console = _LazyConsole()
 
 
 class ProgressCallback:
     """Progress callback for rich progress bar."""
     
-    def __init__(self, progress: Progress, task_id: int):
+    def __init__(self, progress: "Progress", task_id: int):
         self.progress = progress
         self.task_id = task_id
     
@@ -39,21 +56,55 @@ class ProgressCallback:
 @click.group()
 @click.version_option(version="1.0.0", prog_name="Video Downloader")
 @click.option('--verbose', '-v', is_flag=True, help='Enable verbose logging')
-def cli(verbose: bool):
+@click.option('--metrics-port', type=int, envvar='VIDEO_DOWNLOADER_METRICS_PORT',
+              help='Serve Prometheus metrics on http://127.0.0.1:PORT/metrics while running')
+@click.option('--daemon', 'daemon_url', envvar='VIDEO_DOWNLOADER_DAEMON',
+              help='Hand downloads to the daemon at this URL (see "serve"), e.g. http://127.0.0.1:9310')
+@click.pass_context
+def cli(ctx: click.Context, verbose: bool, metrics_port: Optional[int], daemon_url: Optional[str]):
     """Video Downloader - A modern video downloading tool."""
+    ctx.obj = {'daemon_url': daemon_url}
+    
     if verbose:
+        from src.core.logger import logger
         logger.remove()
         logger.add(sys.stderr, level="DEBUG")
+    
+    if metrics_port:
+        from src.core.metrics import start_metrics_server
+        start_metrics_server(metrics_port)
 
 
 @cli.command()
 @click.argument('url')
 @click.option('--output', '-o', help='Output file path')
-@click.option('--quality', '-q', default='best', help='Video quality (best/worst/specific format)')
+@click.option('--quality', '-q', default='best', help='Quality expression, e.g. "best", "<=1080p codec=hevc>avc", "br<=3M", "audio" or a format ID')
 @click.option('--threads', '-t', default=4, help='Number of download threads')
+@click.option('--pages', '-p', help='Pages of a multi-part video (or bangumi episodes) to download, e.g. "1-5,9" or "all"; season URLs default to "all"')
+@click.option('--section', '-s', help='Download only a time range, e.g. "00:10:00-00:15:00" (DASH streams)')
 @click.option('--info-only', is_flag=True, help='Show video info only, no download')
-def download(url: str, output: Optional[str], quality: str, threads: int, info_only: bool):
+@click.option('--force', is_flag=True, help='Download even if the archive has the video')
+@click.option('--dedupe/--no-dedupe', default=None, help='Link identical media already downloaded under another URL')
+@click.pass_obj
+def download(obj: dict, url: str, output: Optional[str], quality: str, threads: int, pages: Optional[str],
+             section: Optional[str], info_only: bool, force: bool, dedupe: Optional[bool]):
     """Download video from URL."""
+    from src.utils.url_utils import is_valid_url, is_bilibili_url, is_bangumi_season_url
+    
+    if pages is None and is_bangumi_season_url(url):
+        # A season link means every episode of it
+        pages = 'all'
+    
+    if obj['daemon_url'] and not (pages or section or info_only or force):
+        # Thin client: the daemon's warm caches and connections do the work
+        from src.services.daemon_client import DaemonClient
+        run_daemon_job(DaemonClient(obj['daemon_url']), url, output, quality, threads)
+        return
+    
+    import asyncio
+    from src.services.bilibili import bilibili_service
+    from src.core.logger import logger
+    
     try:
         # Validate URL
         if not is_valid_url(url):
@@ -64,74 +115,606 @@ def download(url: str, output: Optional[str], quality: str, threads: int, info_o
         if not is_bilibili_url(url):
             console.print(f"[yellow]Warning: URL may not be from supported platform[/yellow]")
         
-        # Show video info
-        with console.status("[bold green]Getting video information..."):
-            video_info = bilibili_service.get_video_info(url)
+        if info_only or pages:
+            with console.status("[bold green]Getting video information..."):
+                video_info = bilibili_service.get_video_info(url)
+            
+            display_video_info(video_info)
+            
+            if pages:
+                download_pages(url, video_info, pages, output, quality, threads, force)
+            return
         
-        # Display video info
-        display_video_info(video_info)
+        if section:
+            download_section(url, section, output, quality, threads)
+            return
         
-        if info_only:
+        result = asyncio.run(download_single(url, output, quality, threads, force, dedupe))
+        
+        if result.status == 'archived':
+            console.print(f"[yellow]Already downloaded: {result.path}[/yellow] (use --force to download again)")
             return
+        if result.status == 'linked':
+            console.print(f"[yellow]Same content already downloaded: {result.source['path']} ({result.method})[/yellow]")
+        
+        console.print(f"\n[bold green]✓ Download completed successfully![/bold green]")
+        console.print(f"[blue]Saved to: {result.path}[/blue]")
+        
+    except VideoDownloaderError as e:
+        console.print(f"[red]Error: {e}[/red]")
+        sys.exit(1)
+    except ValueError as e:
+        console.print(f"[red]Error: {e}[/red]")
+        sys.exit(1)
+    except Exception as e:
+        logger.error(f"Unexpected error: {e}")
+        console.print(f"[red]Unexpected error: {e}[/red]")
+        sys.exit(1)
+
+
+async def download_single(url: str, output: Optional[str], quality: str, threads: int,
+                          force: bool = False, dedupe: Optional[bool] = None):
+    """Download one video, preparing the download while its info is shown.
+    
+    Videos already in the archive are skipped unless ``force`` is set.
+    Play URL resolution, the size probe and the connection warm-up start
+    speculatively and overlap with rendering the video information; with
+    ``dedupe`` identical content already in the archive is linked instead
+    of downloaded. Returns the :class:`VideoDownloadResult`.
+    """
+    from rich.progress import Progress, SpinnerColumn, TextColumn, BarColumn, DownloadColumn, TimeRemainingColumn
+    from src.services.mover import drain_background_mover
+    from src.services.pipeline import download_video
+    from src.services.prefetch import SpeculativePrefetcher
+    from src.core.config import download_config
+    
+    if dedupe is None:
+        dedupe = download_config.dedupe
+    
+    status = console.status("[bold green]Getting video information...")
+    progress = Progress(
+        SpinnerColumn(),
+        TextColumn("[progress.description]{task.description}"),
+        BarColumn(),
+        DownloadColumn(),
+        TextColumn("{task.percentage:>3.0f}%"),
+        TimeRemainingColumn(),
+        console=get_console()
+    )
+    title = ''
+    
+    def _on_info(video_info: dict):
+        nonlocal title
+        title = video_info['title']
+        status.stop()
+        display_video_info(video_info)
+    
+    def _on_download(output: str) -> ProgressCallback:
+        console.print(f"\n[green]Starting download to: {output}[/green]")
+        task_id = progress.add_task(f"[cyan]Downloading {title[:50]}...", total=100)
+        progress.start()
+        return ProgressCallback(progress, task_id)
+    
+    async with SpeculativePrefetcher(warm_connections=threads, fingerprint=dedupe) as prefetcher:
+        status.start()
+        try:
+            result = await download_video(
+                prefetcher, url, quality, output, threads, force=force,
+                on_info=_on_info, on_download=_on_download
+            )
+        finally:
+            status.stop()
+            progress.stop()
+    
+    if result.moving is not None:
+        with console.status("[bold green]Moving to final storage..."):
+            await drain_background_mover()
+    return result
+
+
+def download_section(url: str, section: str, output: Optional[str], quality: str, threads: int):
+    """Download a time range using the DASH index instead of the whole stream."""
+    import asyncio
+    from src.services.bilibili import bilibili_service
+    from src.services.dash_clip import DashClipper
+    from src.services.format_selector import select_streams
+    from src.core.config import download_config, config_manager
+    from src.core.exceptions import DownloadError
+    from src.utils.file_utils import safe_filename, ensure_directory
+    from src.utils.range_utils import parse_time_range, format_timestamp
+    
+    start, end = parse_time_range(section)
+    
+    with console.status("[bold green]Getting video information..."):
+        video_info = bilibili_service.get_video_info(url)
+    
+    display_video_info(video_info)
+    
+    streams = select_streams(video_info.get('formats', []), quality)
+    if not streams or not all(fmt.get('segment_base') for fmt in streams):
+        raise DownloadError("Time-range download needs DASH streams with a SegmentBase index")
+    
+    if not output:
+        label = f"{format_timestamp(start)}-{format_timestamp(end) if end is not None else 'end'}"
+        safe_title = safe_filename(f"{video_info['title']} {label}")
+        output_dir = Path(config_manager.get('download_dir', download_config.default_download_dir))
+        ensure_directory(output_dir)
+        output = str(output_dir / f"{safe_title}.mp4")
+    
+    clipper = DashClipper(threads)
+    with console.status(f"[bold green]Downloading section {section}..."):
+        clip_start, clip_end = asyncio.run(clipper.clip(streams, start, end, output))
+    
+    total = sum(fmt.get('filesize') or 0 for fmt in streams)
+    console.print(f"\n[bold green]✓ Section downloaded successfully![/bold green]")
+    console.print(f"[blue]Saved to: {output}[/blue]")
+    console.print(
+        f"Covered {format_timestamp(clip_start)}-{format_timestamp(clip_end)} "
+        f"({clipper.bytes_downloaded / 1024 / 1024:.1f} MB"
+        + (f" of {total / 1024 / 1024:.1f} MB" if total else "") + ")"
+    )
+
+
+def download_pages(url: str, video_info: dict, pages: str, output: Optional[str], quality: str, threads: int,
+                   force: bool = False):
+    """Download the selected pages of a multi-part video as one job group."""
+    import asyncio
+    from rich.progress import Progress, SpinnerColumn, TextColumn, BarColumn, TimeRemainingColumn
+    from src.services.mover import drain_background_mover
+    from src.services.pipeline import download_video_pages
+    
+    with Progress(
+        SpinnerColumn(),
+        TextColumn("[progress.description]{task.description}"),
+        BarColumn(),
+        TextColumn("{task.percentage:>3.0f}%"),
+        TimeRemainingColumn(),
+        console=get_console()
+    ) as progress:
+        task_id = progress.add_task(f"[cyan]Downloading pages of {video_info['title'][:40]}...", total=100)
+        
+        async def _download():
+            # For page groups the output option names a directory
+            results = await download_video_pages(
+                url, pages, quality, Path(output) if output else None, threads, force,
+                video_info=video_info, progress_callback=ProgressCallback(progress, task_id)
+            )
+            await drain_background_mover()
+            return results
+        
+        results = asyncio.run(_download())
+    
+    archived = [result for result in results if result.status == 'archived']
+    for result in archived:
+        console.print(f"[yellow]Already downloaded: {result.path}[/yellow]")
+    if archived:
+        console.print("(use --force to download again)")
+    
+    downloaded = [result for result in results if result.status in ('downloaded', 'linked')]
+    failed = [result for result in results if result.status == 'failed']
+    if downloaded:
+        console.print(f"\n[bold green]✓ Downloaded {len(downloaded)} page(s) successfully![/bold green]")
+        console.print(f"[blue]Saved to: {downloaded[0].path.parent}[/blue]")
+    if failed:
+        pages = ', '.join(f"P{result.page}" for result in failed)
+        console.print(f"[red]✗ {len(failed)} page(s) could not be downloaded: {pages}[/red]")
+        sys.exit(1)
+
+
+@cli.command()
+@click.argument('url')
+@click.option('--output', '-o', help='Output file path')
+@click.option('--quality', '-q', default='best', help='Quality expression, e.g. "best", "<=1080p codec=hevc>avc", "br<=3M", "audio" or a format ID')
+@click.option('--threads', '-t', default=4, help='Number of download connections')
+@click.option('--port', default=0, help='Local port of the streaming server (0 picks a free one)')
+@click.option('--player', help='Player command to launch with the stream URL, e.g. "mpv"')
+def stream(url: str, output: Optional[str], quality: str, threads: int, port: int, player: Optional[str]):
+    """Watch a video while it downloads."""
+    import asyncio
+    from src.core.logger import logger
+    
+    try:
+        output = asyncio.run(stream_single(url, output, quality, threads, port, player))
+        console.print(f"[blue]Saved to: {output}[/blue]")
+    except KeyboardInterrupt:
+        console.print("\n[yellow]Streaming stopped[/yellow]")
+    except VideoDownloaderError as e:
+        console.print(f"[red]Error: {e}[/red]")
+        sys.exit(1)
+    except Exception as e:
+        logger.error(f"Unexpected error: {e}")
+        console.print(f"[red]Unexpected error: {e}[/red]")
+        sys.exit(1)
+
+
+async def stream_single(url: str, output: Optional[str], quality: str, threads: int,
+                        port: int, player: Optional[str]) -> str:
+    """Download a video in playback order while serving it to a local player."""
+    import asyncio
+    import shlex
+    from rich.progress import Progress, SpinnerColumn, TextColumn, BarColumn, DownloadColumn, TimeRemainingColumn
+    from src.services.prefetch import SpeculativePrefetcher
+    from src.services.streaming import RangeServer, StreamingDownload
+    from src.core.config import download_config, config_manager
+    from src.core.exceptions import DownloadError
+    from src.utils.file_utils import safe_filename, ensure_directory
+    
+    async with SpeculativePrefetcher(warm_connections=threads) as prefetcher:
+        handle = prefetcher.start(url, quality)
+        
+        with console.status("[bold green]Getting video information..."):
+            video_info = await handle.info()
+        
+        display_video_info(video_info)
         
-        # Determine output path
         if not output:
             safe_title = safe_filename(video_info['title'])
             output_dir = Path(config_manager.get('download_dir', download_config.default_download_dir))
             ensure_directory(output_dir)
             output = str(output_dir / f"{safe_title}.mp4")
         
-        # Get download URL
-        with console.status("[bold green]Preparing download..."):
-            download_url = bilibili_service.get_download_url(url, quality)
+        with console.status("[bold green]Preparing stream..."):
+            target = await handle.target()
+        if not target.accepts_ranges or not target.size:
+            raise DownloadError("The server does not support range requests, streaming is not possible")
         
-        # Start download with progress bar
+        download = StreamingDownload(target.url, output, target.size, threads, session=prefetcher.session)
+        async with RangeServer(download, port=port) as server:
+            console.print(f"\n[green]Streaming at: {server.url}[/green]")
+            process = None
+            if player:
+                process = await asyncio.create_subprocess_exec(*shlex.split(player), server.url)
+            
+            with Progress(
+                SpinnerColumn(),
+                TextColumn("[progress.description]{task.description}"),
+                BarColumn(),
+                DownloadColumn(),
+                TextColumn("{task.percentage:>3.0f}%"),
+                TimeRemainingColumn(),
+                console=get_console()
+            ) as progress:
+                task_id = progress.add_task(f"[cyan]Downloading {video_info['title'][:50]}...", total=100)
+                await download.download(ProgressCallback(progress, task_id))
+            
+            console.print(f"\n[bold green]✓ Download completed successfully![/bold green]")
+            
+            # Keep serving until the player is closed (or Ctrl+C)
+            if process is not None:
+                await process.wait()
+            else:
+                console.print("[yellow]Still serving the file, press Ctrl+C to stop[/yellow]")
+                await asyncio.Event().wait()
+    
+    return output
+
+
+@cli.command()
+@click.argument('rooms', nargs=-1, required=True)
+@click.option('--output', '-o', help='Output directory')
+@click.option('--quality', '-q', default='original', help='Live quality: original, blu-ray, super, high, smooth or a qn number')
+@click.option('--hls', is_flag=True, help='Prefer HLS over FLV')
+@click.option('--segment-duration', help='Start a new file after this duration, e.g. "01:00:00"')
+@click.option('--segment-size', help='Start a new file after this size, e.g. "2G"')
+@click.option('--wait', is_flag=True, help='Keep waiting for the rooms to go live again')
+def record(rooms: tuple, output: Optional[str], quality: str, hls: bool, segment_duration: Optional[str],
+           segment_size: Optional[str], wait: bool):
+    """Record Bilibili live rooms (URLs or room ids)."""
+    import asyncio
+    from src.services.live import LIVE_QUALITIES, record_rooms
+    from src.core.config import download_config, config_manager
+    from src.core.logger import logger
+    from src.utils.file_utils import parse_filesize, format_filesize
+    from src.utils.range_utils import parse_timestamp
+    
+    try:
+        qn = LIVE_QUALITIES[quality] if quality in LIVE_QUALITIES else int(quality)
+        output_dir = output or str(Path(config_manager.get('download_dir', download_config.default_download_dir)) / 'live')
+        
+        console.print(f"[green]Recording {len(rooms)} room(s) to: {output_dir} (Ctrl+C to stop)[/green]")
+        stats = asyncio.run(record_rooms(
+            list(rooms),
+            output_dir,
+            quality=qn,
+            prefer='hls' if hls else 'flv',
+            max_duration=parse_timestamp(segment_duration) if segment_duration else None,
+            max_size=parse_filesize(segment_size) if segment_size else None,
+            wait_for_live=wait,
+        ))
+        
+        for room_id, room_stats in stats.items():
+            console.print(
+                f"[blue]Room {room_id}: {len(room_stats.segments)} file(s), "
+                f"{format_filesize(room_stats.bytes_written)}, {room_stats.reconnects} reconnect(s)[/blue]"
+            )
+    except KeyboardInterrupt:
+        console.print("\n[yellow]Recording stopped, segments finalized[/yellow]")
+    except VideoDownloaderError as e:
+        console.print(f"[red]Error: {e}[/red]")
+        sys.exit(1)
+    except ValueError as e:
+        console.print(f"[red]Error: {e}[/red]")
+        sys.exit(1)
+    except Exception as e:
+        logger.error(f"Unexpected error: {e}")
+        console.print(f"[red]Unexpected error: {e}[/red]")
+        sys.exit(1)
+
+
+@cli.command('download-list')
+@click.argument('url')
+@click.option('--output', '-o', help='Output directory')
+@click.option('--quality', '-q', default='best', help='Quality expression, e.g. "best", "<=1080p codec=hevc>avc", "br<=3M", "audio" or a format ID')
+@click.option('--threads', '-t', default=4, help='Number of download threads per video')
+@click.option('--jobs', '-j', default=3, help='Number of videos downloaded concurrently')
+@click.option('--since-last-run', is_flag=True, help='Only download entries added since the last successful run')
+@click.option('--limit', type=int, help='Maximum number of entries to download')
+@click.option('--force', is_flag=True, help='Download entries even if the archive has them')
+@click.option('--dedupe/--no-dedupe', default=None, help='Link identical media already downloaded under another URL')
+def download_list(url: str, output: Optional[str], quality: str, threads: int, jobs: int,
+                  since_last_run: bool, limit: Optional[int], force: bool, dedupe: Optional[bool]):
+    """Download a favorites folder, collection, series or uploader space."""
+    import asyncio
+    from src.services.archive import get_download_archive
+    from src.services.content_store import ContentStore
+    from src.services.listings import BilibiliListingEnumerator, parse_listing_url
+    from src.services.mover import drain_background_mover
+    from src.services.pipeline import download_video
+    from src.services.prefetch import SpeculativePrefetcher
+    from src.services.scheduler import DownloadScheduler
+    from src.core.config import download_config, config_manager
+    from src.utils.file_utils import video_filename, ensure_directory, format_filesize
+    
+    ref = parse_listing_url(url)
+    if not ref:
+        console.print(f"[red]Unsupported listing URL: {url}[/red]")
+        sys.exit(1)
+    
+    output_dir = Path(output or config_manager.get('download_dir', download_config.default_download_dir))
+    ensure_directory(output_dir)
+    
+    enumerator = BilibiliListingEnumerator(ref, since_last_run=since_last_run, limit=limit)
+    
+    archive = get_download_archive()
+    archived = []
+    store = ContentStore(archive, download_config.dedupe_link_mode)
+    if dedupe is None:
+        dedupe = download_config.dedupe
+    # One pooled session for every entry, sized for all concurrent downloads
+    prefetcher = SpeculativePrefetcher(warm_connections=threads * jobs, fingerprint=dedupe)
+    
+    async def _download_entry(entry: dict) -> Path:
+        result = await download_video(
+            prefetcher, entry['url'], quality, str(output_dir / video_filename(entry['title'], entry['bvid'])),
+            threads, archive_id=entry['bvid'], force=force, archive=archive, store=store
+        )
+        if result.status == 'archived':
+            archived.append(entry)
+        return result.path
+    
+    scheduler = DownloadScheduler(
+        _download_entry,
+        concurrency=jobs,
+        on_complete=lambda entry, path: None if entry in archived else console.print(f"[green]✓ {entry['title']}[/green]"),
+        on_error=lambda entry, e: console.print(f"[red]✗ {entry['title']}: {e}[/red]"),
+    )
+    
+    async def _run():
+        async with prefetcher:
+            result = await scheduler.run(enumerator)
+        # Downloads do not wait for their staged files; the run does, once
+        await drain_background_mover()
+        return result
+    
+    console.print(f"[green]Downloading {ref.kind} {ref.listing_id} to: {output_dir}[/green]")
+    try:
+        result = asyncio.run(_run())
+    except VideoDownloaderError as e:
+        console.print(f"[red]Error: {e}[/red]")
+        sys.exit(1)
+    
+    console.print(
+        f"\n[bold]{len(result.completed) - len(archived)} downloaded, {len(archived)} already archived, "
+        f"{len(result.failed)} failed[/bold]"
+    )
+    if store.saved_bytes:
+        console.print(f"[blue]Deduplication saved {format_filesize(store.saved_bytes)}[/blue]")
+    
+    if result.source_error:
+        console.print(f"[red]Listing stopped early: {result.source_error}[/red]")
+        sys.exit(1)
+    
+    # Only advance the incremental cursor when nothing was missed
+    if not result.failed:
+        enumerator.commit()
+        if since_last_run and enumerator.truncated:
+            console.print("[yellow]Stopped at --limit; the remaining new entries are downloaded next run[/yellow]")
+    else:
+        sys.exit(1)
+
+
+@cli.command()
+@click.option('--host', default='127.0.0.1', help='Interface to listen on')
+@click.option('--port', default=9310, help='Port of the job API')
+@click.option('--jobs', '-j', default=3, help='Number of videos downloaded concurrently')
+@click.option('--threads', '-t', default=4, help='Number of download threads per video')
+def serve(host: str, port: int, jobs: int, threads: int):
+    """Run the download daemon with a local HTTP/WebSocket job API."""
+    import asyncio
+    from src.services.daemon import DownloadDaemon
+    
+    if host not in ('127.0.0.1', 'localhost', '::1'):
+        console.print("[yellow]Warning: the job API has no authentication; anyone who can reach it can "
+                      "download files to this machine[/yellow]")
+    
+    daemon = DownloadDaemon(host, port, concurrency=jobs, threads=threads)
+    console.print(f"[green]Download daemon listening at http://{host}:{port} (Ctrl+C to stop)[/green]")
+    try:
+        asyncio.run(daemon.serve_forever())
+    except KeyboardInterrupt:
+        console.print("[yellow]Daemon stopped[/yellow]")
+    except OSError as e:
+        console.print(f"[red]Cannot listen on {host}:{port}: {e}[/red]")
+        sys.exit(1)
+
+
+@cli.command()
+@click.argument('urls', nargs=-1, required=True)
+@click.option('--output', '-o', help='Output file path (single URL only)')
+@click.option('--quality', '-q', default='best', help='Quality expression, e.g. "best", "<=1080p codec=hevc>avc", "br<=3M", "audio" or a format ID')
+@click.option('--threads', '-t', type=int, help='Number of download threads (default: the daemon\'s)')
+@click.option('--wait', '-w', is_flag=True, help='Show the progress until the download finishes (single URL only)')
+@click.pass_obj
+def submit(obj: dict, urls: tuple, output: Optional[str], quality: str, threads: Optional[int], wait: bool):
+    """Queue downloads on the running daemon."""
+    from src.services.daemon_client import DaemonClient
+    
+    if len(urls) > 1 and (output or wait):
+        console.print("[red]--output and --wait need a single URL[/red]")
+        sys.exit(1)
+    
+    client = DaemonClient(obj['daemon_url'])
+    try:
+        if wait:
+            run_daemon_job(client, urls[0], output, quality, threads)
+            return
+        for url in urls:
+            job = client.submit(url, quality, output, threads)
+            console.print(f"[green]Queued job {job['id']}:[/green] {url}")
+    except VideoDownloaderError as e:
+        console.print(f"[red]Error: {e}[/red]")
+        sys.exit(1)
+
+
+@cli.command('jobs')
+@click.pass_obj
+def list_jobs(obj: dict):
+    """List the jobs of the running daemon."""
+    from rich.table import Table
+    from src.services.daemon_client import DaemonClient
+    
+    try:
+        jobs = DaemonClient(obj['daemon_url']).jobs()
+    except VideoDownloaderError as e:
+        console.print(f"[red]Error: {e}[/red]")
+        sys.exit(1)
+    
+    if not jobs:
+        console.print("[yellow]No jobs[/yellow]")
+        return
+    
+    table = Table(title="Daemon Jobs", show_header=True, header_style="bold blue")
+    table.add_column("ID", style="cyan")
+    table.add_column("State", style="white")
+    table.add_column("Progress", style="green")
+    table.add_column("Title / URL", style="white")
+    table.add_column("Path / Error", style="white")
+    for job in jobs:
+        table.add_row(
+            job['id'],
+            job['state'],
+            f"{job['progress']:.0f}%",
+            (job.get('title') or job['url'])[:60],
+            (job.get('error') or job.get('path') or '')[:80],
+        )
+    console.print(table)
+
+
+@cli.command()
+@click.argument('job_ids', nargs=-1, required=True)
+@click.pass_obj
+def cancel(obj: dict, job_ids: tuple):
+    """Cancel queued or running daemon jobs."""
+    from src.services.daemon_client import DaemonClient
+    
+    client = DaemonClient(obj['daemon_url'])
+    failed = False
+    for job_id in job_ids:
+        try:
+            job = client.cancel(job_id)
+            console.print(f"[green]Job {job_id}: {job['state']}[/green]")
+        except VideoDownloaderError as e:
+            console.print(f"[red]Job {job_id}: {e}[/red]")
+            failed = True
+    if failed:
+        sys.exit(1)
+
+
+def run_daemon_job(client, url: str, output: Optional[str], quality: str, threads: Optional[int]):
+    """Submit a download to the daemon and show its progress until it finishes.
+    
+    Interrupting only stops watching; the daemon keeps downloading.
+    """
+    import asyncio
+    from rich.progress import Progress, SpinnerColumn, TextColumn, BarColumn, TimeRemainingColumn
+    
+    job = None
+    try:
+        job = client.submit(url, quality, output, threads)
         with Progress(
             SpinnerColumn(),
             TextColumn("[progress.description]{task.description}"),
             BarColumn(),
-            DownloadColumn(),
             TextColumn("{task.percentage:>3.0f}%"),
             TimeRemainingColumn(),
-            console=console
+            console=get_console()
         ) as progress:
+            task_id = progress.add_task(f"[cyan]Job {job['id']} queued...", total=100)
             
-            task_id = progress.add_task(
-                f"[cyan]Downloading {video_info['title'][:50]}...", 
-                total=100
-            )
-            
-            progress_callback = ProgressCallback(progress, task_id)
+            def _update(update: dict):
+                title = (update.get('title') or update['url'])[:50]
+                progress.update(task_id, completed=update['progress'], description=f"[cyan]{title}")
             
-            console.print(f"\n[green]Starting download to: {output}[/green]")
-            
-            # Run download
-            import asyncio
-            asyncio.run(
-                AsyncDownloader.download_file(
-                    download_url, 
-                    output, 
-                    progress_callback,
-                    threads
-                )
-            )
-        
-        console.print(f"\n[bold green]✓ Download completed successfully![/bold green]")
-        console.print(f"[blue]Saved to: {output}[/blue]")
-        
+            job = asyncio.run(client.follow(job['id'], _update))
+    except KeyboardInterrupt:
+        if job:
+            console.print(f"\n[yellow]Stopped watching; job {job['id']} continues in the daemon[/yellow]")
+        return
     except VideoDownloaderError as e:
         console.print(f"[red]Error: {e}[/red]")
         sys.exit(1)
-    except Exception as e:
-        logger.error(f"Unexpected error: {e}")
-        console.print(f"[red]Unexpected error: {e}[/red]")
+    
+    if job['state'] != 'completed':
+        console.print(f"[red]Job {job['id']} {job['state']}: {job.get('error') or ''}[/red]")
         sys.exit(1)
+    console.print(f"\n[bold green]✓ Download completed successfully![/bold green]")
+    console.print(f"[blue]Saved to: {job['path']}[/blue]")
+
+
+@cli.group()
+def archive():
+    """Manage the download archive."""
+
+
+@archive.command('rebuild')
+@click.argument('directory', required=False)
+def archive_rebuild(directory: Optional[str]):
+    """Re-index downloaded files named "{title} [{id}].ext"."""
+    from src.services.archive import get_download_archive
+    from src.core.config import download_config, config_manager
+    
+    directory = directory or config_manager.get('download_dir', download_config.default_download_dir)
+    if not Path(directory).is_dir():
+        console.print(f"[red]Not a directory: {directory}[/red]")
+        sys.exit(1)
+    
+    with console.status(f"[bold green]Scanning {directory}..."):
+        stats = get_download_archive().rebuild(Path(directory))
+    
+    console.print(
+        f"[green]{stats['added']} added, {stats['updated']} updated, "
+        f"{stats['unchanged']} unchanged, {stats['removed']} removed[/green]"
+    )
 
 
 @cli.command()
 @click.argument('url')
 def info(url: str):
     """Show video information."""
+    from src.services.bilibili import bilibili_service
+    from src.core.logger import logger
+    from src.utils.url_utils import is_valid_url
+    
     try:
         if not is_valid_url(url):
             console.print(f"[red]Invalid URL: {url}[/red]")
@@ -141,6 +724,7 @@ def info(url: str):
             video_info = bilibili_service.get_video_info(url)
         
         display_video_info(video_info)
+        display_pages(video_info.get('pages') or [])
         
         # Show available formats
         try:
@@ -157,6 +741,10 @@ def info(url: str):
 @cli.command()
 def config():
     """Show current configuration."""
+    from rich.table import Table
+    from src.core.config import download_config, config_manager
+    from src.utils.file_utils import format_filesize
+    
     config_table = Table(title="Current Configuration")
     config_table.add_column("Setting", style="cyan")
     config_table.add_column("Value", style="green")
@@ -183,6 +771,8 @@ def config():
 @click.argument('value')
 def set_config(key: str, value: str):
     """Set configuration value."""
+    from src.core.config import config_manager
+    
     try:
         # Convert value to appropriate type
         if key in ['max_threads', 'timeout', 'retry_times']:
@@ -199,6 +789,8 @@ def set_config(key: str, value: str):
 
 def display_video_info(video_info: dict):
     """Display video information in a formatted table."""
+    from rich.table import Table
+    
     info_table = Table(title="Video Information", show_header=True, header_style="bold magenta")
     info_table.add_column("Property", style="cyan", width=15)
     info_table.add_column("Value", style="white")
@@ -238,8 +830,30 @@ def display_video_info(video_info: dict):
     console.print(info_table)
 
 
+def display_pages(pages: list):
+    """Display the page (分P) list of a multi-part video."""
+    from rich.table import Table
+    
+    if len(pages) < 2:
+        return
+    
+    page_table = Table(title=f"Pages ({len(pages)})", show_header=True, header_style="bold blue")
+    page_table.add_column("Page", style="cyan")
+    page_table.add_column("Title", style="white")
+    page_table.add_column("Duration", style="green")
+    
+    for page in pages:
+        minutes, seconds = divmod(int(page.get('duration', 0)), 60)
+        page_table.add_row(f"P{page['page']}", str(page.get('part', ''))[:50], f"{minutes:02d}:{seconds:02d}")
+    
+    console.print(page_table)
+
+
 def display_formats(formats: list):
     """Display available video formats."""
+    from rich.table import Table
+    from src.utils.file_utils import format_filesize
+    
     if not formats:
         return
     
@@ -248,6 +862,8 @@ def display_formats(formats: list):
     format_table.add_column("Extension", style="white")
     format_table.add_column("Resolution", style="white")
     format_table.add_column("FPS", style="white")
+    format_table.add_column("Codec", style="white")
+    format_table.add_column("Bitrate", style="white")
     format_table.add_column("File Size", style="green")
     
     for fmt in formats[:10]:  # Show top 10 formats
@@ -259,6 +875,8 @@ def display_formats(formats: list):
             fmt.get('ext', 'N/A'),
             fmt.get('resolution', 'N/A'),
             str(fmt.get('fps', 'N/A')),
+            str(fmt.get('vcodec') if fmt.get('vcodec') not in (None, '', 'none') else fmt.get('acodec', 'N/A')),
+            f"{fmt['bitrate'] / 1000:.0f}k" if fmt.get('bitrate') else "Unknown",
             size_str
         )
     
@@ -21,10 +21,24 @@ class DownloadConfig(BaseSettings):
     timeout: int = Field(default=30, ge=5)
     retry_times: int = Field(default=3, ge=0)
     
+    # yt-dlp extractor worker pool (0 runs extraction in-process)
+    ytdlp_workers: int = Field(default=2, ge=0, le=16)
+    ytdlp_max_tasks_per_worker: int = Field(default=100, ge=1)
+    ytdlp_timeout: int = Field(default=60, ge=5)
+    
+    # Link identical media already in the archive instead of downloading it
+    dedupe: bool = Field(default=False)
+    dedupe_link_mode: str = Field(default="auto", pattern="^(auto|reflink|hardlink|copy)$")
+    
     # Path settings
     default_download_dir: str = Field(default="./downloads")
     temp_dir: str = Field(default="./temp")
     
+    # Stage downloads in temp_dir and move finished files in the background
+    staging: bool = Field(default=False)
+    mover_workers: int = Field(default=2, ge=1, le=16)
+    mover_bandwidth: int = Field(default=0, ge=0)  # bytes/s, 0 = unlimited
+    
     # Quality settings
     video_quality: str = Field(default="best")
     audio_only: bool = Field(default=False)
@@ -84,10 +98,23 @@ class ConfigManager:
             "max_threads": 4,
             "video_quality": "best",
             "subtitle": True,
-            "theme": "dark"
+            "theme": "dark",
+            "api_priority": "auto"
         }
 
 
-# Global configuration instances
-download_config = DownloadConfig()
-config_manager = ConfigManager()
\ No newline at end of file
+# Global configuration instances, built on first access so that importing
+# this module does not read the environment or touch ~/.video_downloader
+_GLOBAL_FACTORIES = {
+    "download_config": DownloadConfig,
+    "config_manager": ConfigManager,
+}
+
+
+def __getattr__(name: str) -> Any:
+    """Create the global configuration instances lazily."""
+    factory = _GLOBAL_FACTORIES.get(name)
+    if factory is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    instance = globals()[name] = factory()
+    return instance
\ No newline at end of file
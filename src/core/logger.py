@@ -3,7 +3,6 @@
 import sys
 from pathlib import Path
 from loguru import logger
-from .config import config_manager
 
 
 def setup_logger(log_level: str = "INFO", log_file: Path = None) -> None:
@@ -34,7 +33,8 @@ def setup_logger(log_level: str = "INFO", log_file: Path = None) -> None:
                    "{message}",
             rotation="10 MB",
             retention="7 days",
-            compression="zip"
+            compression="zip",
+            delay=True  # Open the file on the first record, not at import
         )
 
 
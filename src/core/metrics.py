@@ -0,0 +1,452 @@
+"""Download engine metrics in the Prometheus text format.
+
+Counters, gauges and histograms live in a :class:`MetricsRegistry`. They are
+plain Python objects guarded by a lock, cheap enough for the chunk loop:
+hot paths bind their label values once (``metric.labels(...)``) and then
+only pay for an ``inc``/``observe`` call. :meth:`MetricsRegistry.snapshot`
+exports the current values as a dict, and :func:`start_metrics_server`
+serves them on a local ``/metrics`` endpoint for Prometheus to scrape.
+
+Only the standard library is used, so importing this module stays cheap.
+"""
+
+import bisect
+import threading
+import time
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+
+# Seconds; covers API calls and TTFB (ms) up to slow multi-MB segments
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+def status_class(status: int) -> str:
+    """HTTP status class label, e.g. 206 -> "2xx"."""
+    return f"{status // 100}xx"
+
+
+def _format_value(value: float) -> str:
+    """Format a sample value."""
+    if value == float('inf'):
+        return '+Inf'
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    """Format a label set, e.g. {status_class="2xx"}."""
+    if not names:
+        return ''
+    pairs = []
+    for name, value in zip(names, values):
+        escaped = str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+        pairs.append(f'{name}="{escaped}"')
+    return '{' + ','.join(pairs) + '}'
+
+
+class _CounterChild:
+    """Value of a counter for one label set."""
+
+    def __init__(self):
+        self._value = 0.0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1) -> None:
+        """Increase the counter."""
+        with self._lock:
+            self._value += amount
+
+    @property
+    def value(self) -> float:
+        return self._value
+
+
+class _GaugeChild:
+    """Value of a gauge for one label set."""
+
+    def __init__(self):
+        self._value = 0.0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1) -> None:
+        """Increase the gauge."""
+        with self._lock:
+            self._value += amount
+
+    def dec(self, amount: float = 1) -> None:
+        """Decrease the gauge."""
+        with self._lock:
+            self._value -= amount
+
+    def set(self, value: float) -> None:
+        """Set the gauge."""
+        with self._lock:
+            self._value = value
+
+    @property
+    def value(self) -> float:
+        return self._value
+
+
+class _HistogramChild:
+    """Bucket counts, sum and count of a histogram for one label set."""
+
+    def __init__(self, buckets: Tuple[float, ...]):
+        self._buckets = buckets
+        self._counts = [0] * (len(buckets) + 1)
+        self._sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        """Record one observation."""
+        index = bisect.bisect_left(self._buckets, value)
+        with self._lock:
+            self._counts[index] += 1
+            self._sum += value
+
+    @contextmanager
+    def time(self) -> Iterator[None]:
+        """Observe the duration of a block."""
+        start = time.monotonic()
+        try:
+            yield
+        finally:
+            self.observe(time.monotonic() - start)
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Estimate the ``q`` quantile (0..1), None without observations.
+
+        Interpolates linearly inside the bucket holding the rank, like
+        Prometheus' ``histogram_quantile``. Ranks in the overflow bucket
+        return the highest finite bound.
+        """
+        with self._lock:
+            counts = list(self._counts)
+        total = sum(counts)
+        if not total:
+            return None
+        rank = q * total
+        running = 0
+        for index, count in enumerate(counts):
+            if count and running + count >= rank:
+                if index == len(self._buckets):
+                    return self._buckets[-1] if self._buckets else None
+                lower = self._buckets[index - 1] if index else 0.0
+                upper = self._buckets[index]
+                return lower + (upper - lower) * max(0.0, rank - running) / count
+            running += count
+        return self._buckets[-1] if self._buckets else None
+
+    @property
+    def count(self) -> int:
+        """Number of observations."""
+        return sum(self._counts)
+
+    @property
+    def sum(self) -> float:
+        """Sum of the observations."""
+        return self._sum
+
+    def reset(self) -> None:
+        """Drop every observation."""
+        with self._lock:
+            self._counts = [0] * (len(self._buckets) + 1)
+            self._sum = 0.0
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Cumulative bucket counts, sum and count."""
+        with self._lock:
+            counts, total = list(self._counts), self._sum
+        cumulative, running = {}, 0
+        for bound, count in zip(self._buckets + (float('inf'),), counts):
+            running += count
+            cumulative[_format_value(bound)] = running
+        return {'buckets': cumulative, 'sum': total, 'count': running}
+
+
+class CallStatistics:
+    """Calls, failures and latency histograms per operation.
+
+    Per-object statistics for display in the app, e.g. the usage of one
+    platform plugin. Unlike registry metrics they can be reset.
+    """
+
+    def __init__(self, buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self._buckets = tuple(sorted(buckets))
+        self._latencies: Dict[str, _HistogramChild] = {}
+        self._failures: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self.last_used: Optional[float] = None
+
+    def record(self, operation: str, seconds: float, success: bool) -> None:
+        """Record one call."""
+        latency = self._latencies.get(operation)
+        if latency is None:
+            with self._lock:
+                latency = self._latencies.setdefault(operation, _HistogramChild(self._buckets))
+        latency.observe(seconds)
+        with self._lock:
+            if not success:
+                self._failures[operation] = self._failures.get(operation, 0) + 1
+            self.last_used = time.time()
+
+    def reset(self) -> None:
+        """Drop every recorded call."""
+        with self._lock:
+            self._latencies.clear()
+            self._failures.clear()
+            self.last_used = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Totals and, per operation, calls, failures and latency percentiles in seconds."""
+        with self._lock:
+            latencies, failures = dict(self._latencies), dict(self._failures)
+        operations = {}
+        for operation, latency in latencies.items():
+            count = latency.count
+            operations[operation] = {
+                'calls': count,
+                'failures': failures.get(operation, 0),
+                'average': latency.sum / count if count else None,
+                'p50': latency.quantile(0.5),
+                'p95': latency.quantile(0.95),
+                'p99': latency.quantile(0.99),
+            }
+        total = sum(stats['calls'] for stats in operations.values())
+        failed = sum(stats['failures'] for stats in operations.values())
+        elapsed = sum(latency.sum for latency in latencies.values())
+        return {
+            'total_requests': total,
+            'successful_requests': total - failed,
+            'failed_requests': failed,
+            'average_response_time': elapsed / total if total else 0,
+            'last_used': self.last_used,
+            'operations': operations,
+        }
+
+
+class _Metric(ABC):
+    """A named metric with a fixed set of label names."""
+
+    type_name = ''
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children: Dict[Tuple[str, ...], Any] = {}
+        self._lock = threading.Lock()
+
+    @abstractmethod
+    def _new_child(self) -> Any:
+        """Create the value holder for one label set."""
+
+    def labels(self, *values: str, **labels: str) -> Any:
+        """Get the child for a label set; bind it once outside hot loops."""
+        if labels:
+            values = tuple(str(labels[name]) for name in self.labelnames)
+        else:
+            values = tuple(str(value) for value in values)
+        if len(values) != len(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}")
+
+        child = self._children.get(values)
+        if child is None:
+            with self._lock:
+                child = self._children.setdefault(values, self._new_child())
+        return child
+
+    def _samples(self) -> List[Tuple[Tuple[str, ...], Any]]:
+        with self._lock:
+            return list(self._children.items())
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Current values of every label set."""
+        return {
+            'type': self.type_name,
+            'help': self.documentation,
+            'samples': [
+                {'labels': dict(zip(self.labelnames, values)), 'value': self._child_value(child)}
+                for values, child in self._samples()
+            ],
+        }
+
+    def _child_value(self, child: Any) -> Any:
+        return child.value
+
+    def render(self) -> List[str]:
+        """Lines in the Prometheus text format."""
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type_name}"]
+        for values, child in self._samples():
+            lines.append(f"{self.name}{_format_labels(self.labelnames, values)} {_format_value(child.value)}")
+        return lines
+
+
+class Counter(_Metric):
+    """Monotonically increasing count."""
+
+    type_name = 'counter'
+
+    def _new_child(self) -> _CounterChild:
+        return _CounterChild()
+
+    def inc(self, amount: float = 1) -> None:
+        """Increase the counter of a metric without labels."""
+        self.labels().inc(amount)
+
+
+class Gauge(_Metric):
+    """Value that goes up and down, e.g. a queue depth."""
+
+    type_name = 'gauge'
+
+    def _new_child(self) -> _GaugeChild:
+        return _GaugeChild()
+
+
+class Histogram(_Metric):
+    """Distribution of observations in cumulative buckets."""
+
+    type_name = 'histogram'
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def _new_child(self) -> _HistogramChild:
+        return _HistogramChild(self.buckets)
+
+    def _child_value(self, child: _HistogramChild) -> Dict[str, Any]:
+        return child.snapshot()
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type_name}"]
+        for values, child in self._samples():
+            data = child.snapshot()
+            for bound, count in data['buckets'].items():
+                labels = _format_labels(self.labelnames + ('le',), values + (bound,))
+                lines.append(f"{self.name}_bucket{labels} {count}")
+            labels = _format_labels(self.labelnames, values)
+            lines.append(f"{self.name}_sum{labels} {_format_value(data['sum'])}")
+            lines.append(f"{self.name}_count{labels} {data['count']}")
+        return lines
+
+
+class MetricsRegistry:
+    """Collection of metrics rendered together."""
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def _register(self, metric: _Metric) -> Any:
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                if type(existing) is not type(metric) or existing.labelnames != metric.labelnames:
+                    raise ValueError(f"Metric {metric.name} is already registered differently")
+                return existing
+            self._metrics[metric.name] = metric
+            return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        """Get or create a counter."""
+        return self._register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+        """Get or create a gauge."""
+        return self._register(Gauge(name, documentation, labelnames))
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        """Get or create a histogram."""
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        """Current values of every metric."""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        return {metric.name: metric.snapshot() for metric in metrics}
+
+    def render(self) -> str:
+        """Every metric in the Prometheus text exposition format."""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines: List[str] = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+
+registry = MetricsRegistry()
+
+# Download engine
+DOWNLOAD_BYTES = registry.counter(
+    'video_downloader_download_bytes_total', 'Media bytes downloaded', ['engine'])
+SEGMENT_SECONDS = registry.histogram(
+    'video_downloader_segment_seconds', 'Time to download one chunk, piece or fragment', ['engine'])
+TTFB_SECONDS = registry.histogram(
+    'video_downloader_ttfb_seconds', 'Time to the response headers of a media request', ['engine'])
+RETRIES = registry.counter(
+    'video_downloader_retries_total', 'Retried operations', ['operation'])
+HTTP_RESPONSES = registry.counter(
+    'video_downloader_http_responses_total', 'HTTP responses by status class', ['client', 'status_class'])
+
+# Platform APIs and extraction
+API_REQUEST_SECONDS = registry.histogram(
+    'video_downloader_api_request_seconds', 'Platform API request latency', ['endpoint'])
+EXTRACTIONS = registry.counter(
+    'video_downloader_extractions_total', 'Extraction attempts by source and outcome', ['source', 'outcome'])
+EXTRACTION_SECONDS = registry.histogram(
+    'video_downloader_extraction_seconds', 'Extraction latency by source', ['source'])
+PLATFORM_CALLS = registry.counter(
+    'video_downloader_platform_calls_total', 'GUI platform plugin calls by outcome',
+    ['platform', 'operation', 'outcome'])
+PLATFORM_CALL_SECONDS = registry.histogram(
+    'video_downloader_platform_call_seconds', 'GUI platform plugin call latency', ['platform', 'operation'])
+
+# Queues
+QUEUE_WAIT_SECONDS = registry.histogram(
+    'video_downloader_queue_wait_seconds', 'Time jobs and requests wait in a queue', ['queue'])
+QUEUE_DEPTH = registry.gauge(
+    'video_downloader_queue_depth', 'Jobs and requests waiting in a queue', ['queue'])
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    """Serves ``/metrics`` of the server's registry."""
+
+    def do_GET(self) -> None:
+        if self.path.split('?', 1)[0] != '/metrics':
+            self.send_error(404)
+            return
+        body = self.server.registry.render().encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', CONTENT_TYPE)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format: str, *args: Any) -> None:
+        # Scrapes are not worth a log line
+        pass
+
+
+def start_metrics_server(port: int, host: str = '127.0.0.1',
+                         metrics_registry: Optional[MetricsRegistry] = None) -> ThreadingHTTPServer:
+    """Serve ``/metrics`` on a daemon thread; port 0 picks a free port.
+
+    Call ``shutdown()`` on the returned server to stop it.
+    """
+    server = ThreadingHTTPServer((host, port), _MetricsHandler)
+    server.daemon_threads = True
+    server.registry = metrics_registry or registry
+    thread = threading.Thread(target=server.serve_forever, name='metrics-server', daemon=True)
+    thread.start()
+    return server
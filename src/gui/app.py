@@ -31,6 +31,8 @@ class VideoDownloaderApp:
         # 应用状态
         self.current_route = "/"
         self.downloads: List[Dict[str, Any]] = []
+        # 正在播放器中边下边播的下载项
+        self.playing: Optional[Dict[str, Any]] = None
         
     async def main(self, page: Page):
         """Flet主入口"""
@@ -67,6 +69,9 @@ class VideoDownloaderApp:
         page.title = "Video Downloader"
         page.theme_mode = ft.ThemeMode.DARK
         
+        # 断开连接时清理已初始化的平台插件（关闭会话）
+        page.on_disconnect = self.on_disconnect
+        
         # 响应式布局
         if page.web:
             # Web端适配
@@ -88,6 +93,13 @@ class VideoDownloaderApp:
             use_material3=True
         )
     
+    async def on_disconnect(self, e=None):
+        """页面断开连接"""
+        self.playing = None
+        for download_item in self.downloads:
+            await self.stop_stream(download_item)
+        await self.platform_manager.cleanup()
+    
     async def setup_navigation(self, page: Page):
         """配置导航"""
         self.appbar = AppBar(
@@ -142,7 +154,9 @@ class VideoDownloaderApp:
         """显示下载页面"""
         download_page = DownloadPage(
             gui_service=self.gui_service,
-            downloads=self.downloads
+            downloads=self.downloads,
+            on_download_play=self.play_stream,
+            on_download_delete=self.remove_download
         )
         
         self.current_route = "/downloads"
@@ -154,9 +168,11 @@ class VideoDownloaderApp:
             )
         )
     
-    async def show_player(self, e=None):
+    async def show_player(self, e=None, stream_url: Optional[str] = None, video_info: Optional[Dict[str, Any]] = None):
         """显示播放器页面"""
         player_page = PlayerPage()
+        if stream_url:
+            player_page.load_stream(stream_url, video_info, on_completed=self.end_playback)
         
         self.current_route = "/player"
         await self._navigate_to_view(
@@ -170,7 +186,8 @@ class VideoDownloaderApp:
     async def show_settings(self, e=None):
         """显示设置页面"""
         settings_page = SettingsPage(
-            gui_service=self.gui_service
+            gui_service=self.gui_service,
+            platform_manager=self.platform_manager
         )
         
         self.current_route = "/settings"
@@ -187,13 +204,17 @@ class VideoDownloaderApp:
         if not self.page:
             return
         
+        if view.route != "/player":
+            # 离开播放器即结束边下边播
+            await self.end_playback()
+        
         self.page.views.clear()
         self.page.views.append(view)
         self.page.route = view.route
         
         self.page.update()
     
-    async def handle_url_submit(self, url: str):
+    async def handle_url_submit(self, url: str, pages: Optional[str] = None):
         """处理URL提交"""
         if not url or not url.strip():
             await self.show_error("请输入有效的视频链接")
@@ -205,24 +226,42 @@ class VideoDownloaderApp:
             self.page.update()
             
             # 验证并解析视频信息
-            platform = self.platform_manager.get_platform_by_url(url)
+            platform = await self.platform_manager.get_platform_by_url_async(url)
             if not platform:
                 await self.show_error("不支持的视频平台")
                 return
             
-            # 异步获取视频信息
-            video_info = await platform.extract_video_info(url)
+            # B站单视频：有下载守护进程时交给它下载（共享其缓存和连接），
+            # 否则解析信息的同时预取播放地址、探测大小并预热CDN连接
+            prefetch = None
+            daemon = None
+            if platform.name == 'bilibili' and not pages:
+                daemon = await self._daemon_client()
+                if daemon is None:
+                    prefetch = await self._start_prefetch(url)
+            
+            # 异步获取视频信息（与预取共享同一次解析）
+            try:
+                video_info = await platform.extract_video_info(url)
+            except Exception:
+                await self._close_prefetch(prefetch)
+                raise
             
             if not video_info:
+                await self._close_prefetch(prefetch)
                 await self.show_error("解析失败，请检查视频链接")
                 return
             
-            # 添加到下载列表
+            # 添加到下载列表（紧凑记录，丢弃分片列表等不需要的字段）
+            from src.services.models import VideoInfo
             download_item = {
                 'id': len(self.downloads) + 1,
                 'url': url,
                 'platform': platform.name,
-                'video_info': video_info,
+                'video_info': VideoInfo.from_dict(video_info),
+                'pages': pages,
+                'prefetch': prefetch,
+                'daemon': daemon,
                 'status': 'pending',
                 'progress': 0,
                 'created_at': _datetime.datetime.now()
@@ -253,12 +292,22 @@ class VideoDownloaderApp:
             download_item['status'] = 'downloading'
             self.page.update()
             
-            # 这里会调用实际的下载逻辑
-            # 暂时模拟下载进度
-            for progress in range(0, 101, 10):
-                download_item['progress'] = progress
-                await asyncio.sleep(0.1)  # 模拟下载时间
-                self.page.update()
+            if download_item.get('pages') and download_item['platform'] == 'bilibili':
+                # 多P视频：选中的分P作为一个任务组下载
+                await self._download_page_group(download_item)
+            elif download_item.get('prefetch'):
+                # 已预取的B站视频：直接在预热的连接上下载
+                await self._download_prefetched(download_item)
+            elif download_item.get('daemon'):
+                # 由下载守护进程下载，订阅其进度推送
+                await self._download_via_daemon(download_item)
+            else:
+                # 这里会调用实际的下载逻辑
+                # 暂时模拟下载进度
+                for progress in range(0, 101, 10):
+                    download_item['progress'] = progress
+                    await asyncio.sleep(0.1)  # 模拟下载时间
+                    self.page.update()
             
             download_item['status'] = 'completed'
             await self.show_success("下载完成！")
@@ -270,6 +319,196 @@ class VideoDownloaderApp:
         
         self.page.update()
     
+    async def _start_prefetch(self, url: str):
+        """启动投机预取，返回(prefetcher, handle)"""
+        from src.services.prefetch import SpeculativePrefetcher
+        
+        prefetcher = SpeculativePrefetcher()
+        await prefetcher.open()
+        return prefetcher, prefetcher.start(url, self.gui_service.get_default_quality())
+    
+    async def _close_prefetch(self, prefetch):
+        """关闭预取会话"""
+        if prefetch:
+            prefetch[1].cancel()
+            await prefetch[0].close()
+    
+    async def _archive_id(self, download_item: Dict[str, Any]) -> str:
+        """下载记录(archive)中的视频ID，无法从链接解析时使用视频信息中的ID（短链需联网解析）"""
+        from src.core.exceptions import URLParseError
+        from src.services.bilibili import bilibili_service
+        
+        try:
+            return await asyncio.to_thread(bilibili_service.get_archive_id, download_item['url'])
+        except URLParseError:
+            return download_item['video_info'].get('id') or 'unknown'
+    
+    async def _download_prefetched(self, download_item: Dict[str, Any]):
+        """使用预取结果下载单个视频"""
+        from pathlib import Path
+        from src.services.archive import get_download_archive
+        from src.services.pipeline import download_video
+        from src.utils.file_utils import ensure_directory, video_filename
+        
+        prefetcher, handle = download_item.pop('prefetch')
+        quality = self.gui_service.get_default_quality()
+        archive = get_download_archive()
+        try:
+            archive_id = await self._archive_id(download_item)
+            entry = await asyncio.to_thread(archive.get, 'bilibili', archive_id, quality)
+            if entry:
+                # 已下载过：直接使用记录中的文件
+                download_item['output_path'] = entry['path']
+                return
+            
+            target = await handle.target()
+            
+            output_dir = Path(self.gui_service.get_download_dir())
+            ensure_directory(output_dir)
+            output = output_dir / video_filename(download_item['video_info'].get('title', ''), archive_id)
+            
+            def _on_progress(progress: float):
+                download_item['progress'] = int(progress)
+                if self.page:
+                    self.page.update()
+            
+            if target.accepts_ranges and target.size:
+                # 支持Range：按播放顺序下载，同时提供本地流地址以便边下边播
+                await self._download_streaming(download_item, target, str(output), prefetcher.session, _on_progress)
+                await asyncio.to_thread(
+                    archive.record, 'bilibili', archive_id, output, quality, target.format.get('format_id')
+                )
+            else:
+                result = await download_video(
+                    prefetcher, download_item['url'], quality, str(output),
+                    archive_id=archive_id, archive=archive, handle=handle,
+                    on_download=lambda _: _on_progress
+                )
+                if result.moving is not None:
+                    await result.moving
+            download_item['output_path'] = str(output)
+        finally:
+            await self._close_prefetch((prefetcher, handle))
+    
+    async def _daemon_client(self):
+        """正在运行的下载守护进程的客户端，没有运行时返回None"""
+        from src.services.daemon_client import DaemonClient
+        
+        client = DaemonClient(timeout=1.0)
+        return client if await asyncio.to_thread(client.is_running) else None
+    
+    async def _download_via_daemon(self, download_item: Dict[str, Any]):
+        """提交给下载守护进程，并通过WebSocket订阅下载进度"""
+        from pathlib import Path
+        from src.core.exceptions import DownloadError
+        from src.utils.file_utils import video_filename
+        
+        daemon = download_item.pop('daemon')
+        output = Path(self.gui_service.get_download_dir()) / video_filename(
+            download_item['video_info'].get('title', ''), await self._archive_id(download_item)
+        )
+        job = await asyncio.to_thread(
+            daemon.submit, download_item['url'], self.gui_service.get_default_quality(), str(output)
+        )
+        download_item['daemon_job'] = job['id']
+        
+        def _on_update(update: Dict[str, Any]):
+            download_item['progress'] = int(update['progress'])
+            if self.page:
+                self.page.update()
+        
+        job = await daemon.follow(job['id'], _on_update)
+        if job['state'] != 'completed':
+            raise DownloadError(job.get('error') or f"下载任务已{'取消' if job['state'] == 'cancelled' else '失败'}")
+        download_item['output_path'] = job['path']
+    
+    async def _download_streaming(self, download_item: Dict[str, Any], target, output: str, session, on_progress):
+        """边下边播：优先下载文件头和播放位置附近的分片，并通过本地服务器提供Range访问"""
+        from src.services.streaming import RangeServer, StreamingDownload
+        
+        download = StreamingDownload(target.url, output, target.size, session=session)
+        server = RangeServer(download)
+        await server.start()
+        download_item['stream_server'] = server
+        download_item['stream_url'] = server.url
+        if self.current_route == "/downloads":
+            # 显示“边下边播”按钮
+            await self.show_downloads()
+        try:
+            await download.download(on_progress)
+        except Exception:
+            if self.playing is download_item:
+                self.playing = None
+            await self.stop_stream(download_item)
+            raise
+        
+        # 下载完成后，本地服务器只为正在进行的播放保留
+        if self.playing is not download_item:
+            await self.stop_stream(download_item)
+    
+    async def play_stream(self, download_item: Dict[str, Any]):
+        """打开播放器播放正在下载的视频"""
+        stream_url = download_item.get('stream_url')
+        if not stream_url:
+            await self.show_error("该任务不支持边下边播")
+            return
+        if self.playing is not download_item:
+            await self.end_playback()
+        self.playing = download_item
+        await self.show_player(stream_url=stream_url, video_info=download_item.get('video_info'))
+    
+    async def end_playback(self, e=None):
+        """结束边下边播，下载已完成时关闭其本地服务器"""
+        download_item, self.playing = self.playing, None
+        server = download_item.get('stream_server') if download_item else None
+        if server and server.download.completed:
+            await self.stop_stream(download_item)
+    
+    async def remove_download(self, download_item: Dict[str, Any]):
+        """从下载列表移除任务并关闭其本地服务器"""
+        if self.playing is download_item:
+            self.playing = None
+        await self.stop_stream(download_item)
+        if download_item in self.downloads:
+            self.downloads.remove(download_item)
+        if self.current_route == "/downloads":
+            await self.show_downloads()
+    
+    async def stop_stream(self, download_item: Dict[str, Any]):
+        """关闭边下边播的本地服务器"""
+        server = download_item.pop('stream_server', None)
+        download_item.pop('stream_url', None)
+        if server:
+            await server.stop()
+    
+    async def _download_page_group(self, download_item: Dict[str, Any]):
+        """下载多P视频的选中分P（共享连接数上限），跳过已下载的分P"""
+        from pathlib import Path
+        from src.core.exceptions import DownloadError
+        from src.services.pipeline import download_video_pages
+        from src.utils.file_utils import safe_filename
+        
+        video_info = download_item['video_info']
+        output_dir = Path(self.gui_service.get_download_dir()) / safe_filename(video_info.get('title', ''))
+        
+        def _on_progress(progress: float):
+            download_item['progress'] = int(progress)
+            if self.page:
+                self.page.update()
+        
+        results = await download_video_pages(
+            download_item['url'],
+            download_item['pages'],
+            self.gui_service.get_default_quality(),
+            output_dir=output_dir,
+            video_info=video_info,
+            progress_callback=_on_progress
+        )
+        download_item['output_dir'] = str(output_dir)
+        failed = [f"P{result.page}" for result in results if result.status == 'failed']
+        if failed:
+            raise DownloadError(f"以下分P无法下载: {', '.join(failed)}")
+    
     def show_loading(self, message: str = "加载中..."):
         """显示加载对话框"""
         self.loading_dialog = ft.AlertDialog(
@@ -14,7 +14,8 @@ class DownloadItem(ft.Container):
                  on_resume: Optional[Callable] = None,
                  on_cancel: Optional[Callable] = None,
                  on_retry: Optional[Callable] = None,
-                 on_select: Optional[Callable] = None):
+                 on_select: Optional[Callable] = None,
+                 on_play: Optional[Callable] = None):
         
         self.download = download
         self.on_pause = on_pause
@@ -22,6 +23,7 @@ class DownloadItem(ft.Container):
         self.on_cancel = on_cancel
         self.on_retry = on_retry
         self.on_select = on_select
+        self.on_play = on_play
         
         # 下载状态
         self.status = download.get('status', 'pending')
@@ -178,6 +180,16 @@ class DownloadItem(ft.Container):
             )
         
         elif self.status == 'downloading':
+            if self.download.get('stream_url'):
+                buttons.append(
+                    ft.IconButton(
+                        icon="smart_display",
+                        icon_size=20,
+                        tooltip="边下边播",
+                        on_click=self.handle_play,
+                        icon_color=ft.Colors.WHITE
+                    )
+                )
             buttons.append(
                 ft.IconButton(
                     icon="pause",
@@ -303,7 +315,8 @@ class DownloadItem(ft.Container):
     
     async def handle_play(self, e):
         """处理播放视频"""
-        print("播放视频")
+        if self.on_play:
+            await self.on_play(self.download)
     
     async def show_more_options(self, e):
         """显示更多选项"""
@@ -455,6 +468,15 @@ class CompactDownloadItem(DownloadItem):
                 )
             )
         elif self.status == 'downloading':
+            if self.download.get('stream_url'):
+                buttons.append(
+                    ft.IconButton(
+                        icon="smart_display",
+                        icon_size=16,
+                        tooltip="边下边播",
+                        on_click=self.handle_play
+                    )
+                )
             buttons.append(
                 ft.IconButton(
                     icon="pause",
@@ -26,6 +26,18 @@ class URLInput(ft.Container):
             on_submit=self.handle_submit
         )
         
+        # 分P选择输入框（多P视频）
+        self.pages_field = ft.TextField(
+            label="分P选择",
+            hint_text="如 1-5,9，留空为当前P",
+            value="",
+            width=160,
+            height=50,
+            border_radius=8,
+            filled=True,
+            on_submit=self.handle_submit
+        )
+        
         # 解析按钮
         self.submit_button = ft.ElevatedButton(
             content=ft.Row([
@@ -82,6 +94,7 @@ class URLInput(ft.Container):
                 ft.Column([
                     ft.Row([
                         self.url_field,
+                        self.pages_field,
                         self.submit_button
                     ]),
                     
@@ -225,7 +238,8 @@ class URLInput(ft.Container):
         
         # 调用回调函数
         try:
-            await self.on_submit(url.strip())
+            pages = (self.pages_field.value or "").strip() or None
+            await self.on_submit(url.strip(), pages)
         except Exception as e:
             await self.show_error(f"处理失败: {str(e)}")
         finally:
@@ -1,7 +1,7 @@
 """下载页 - 显示和管理下载任务"""
 
 import flet as ft
-from typing import List, Dict, Any, Callable
+from typing import List, Dict, Any, Callable, Optional
 from datetime import datetime
 
 from ..components.download_item import DownloadItem
@@ -12,13 +12,14 @@ class DownloadPage:
     """下载页面"""
     
     def __init__(self, 
-                 on_download_complete: Callable,
-                 on_download_delete: Callable,
-                 gui_service: GUIService):
-        self.on_download_complete = on_download_complete,
-        self.on_download_delete = on_download_delete,
-        self.gui_service = gui_service,
-        self.downloads: List[Dict[str, Any]] = []
+                 gui_service: GUIService,
+                 downloads: Optional[List[Dict[str, Any]]] = None,
+                 on_download_play: Optional[Callable] = None,
+                 on_download_delete: Optional[Callable] = None):
+        self.on_download_play = on_download_play
+        self.on_download_delete = on_download_delete
+        self.gui_service = gui_service
+        self.downloads: List[Dict[str, Any]] = downloads if downloads is not None else []
         self.selected_download: str = None
     
     def build(self) -> ft.Column:
@@ -37,10 +38,10 @@ class DownloadPage:
             self.build_stats_section(),
             
             # 下载列表
-            self.build_download_list(),
+            *self.build_download_list(),
             
             # 操作按钮
-            self.build_action_buttons()], spacing=10, scroll=ft.ScrollMode.AUTO),
+            self.build_action_buttons()], spacing=10, scroll=ft.ScrollMode.AUTO)
     
     def build_stats_section(self) -> ft.Container:
         """构建统计信息区域"""
@@ -102,19 +103,11 @@ class DownloadPage:
             ]
         
         return [
-            ft.Container(
-                content=ft.Column([
-                    ft.ListTile(
-                        leading=ft.Icon("play_arrow"),
-                        title=ft.Text(download['title']),
-                        subtitle=ft.Text(
-                            f"状态: {download.get('status', 'unknown')} | "
-                            f"进度: {download.get('progress', 0)}%"
-                        ),
-                        on_click=lambda e, d=download: self.select_download(d)
-                    ),
-                    ft.Divider(color=ft.Colors.GREY_600)]),
-                margin=ft.margin.symmetric(vertical=5)
+            DownloadItem(
+                download,
+                on_cancel=self.delete_download,
+                on_select=self.select_download,
+                on_play=self.on_download_play
             ) for download in self.downloads
         ]
     
@@ -140,17 +133,22 @@ class DownloadPage:
             padding=ft.padding.all(15)
         )
     
-    def select_download(self, download: Dict[str, Any]):
+    async def select_download(self, download: Dict[str, Any]):
         """选择下载项"""
         self.selected_download = download['id']
     
-    def clear_completed(self, e):
+    async def delete_download(self, download: Dict[str, Any]):
+        """删除下载项（同时关闭其边下边播服务器）"""
+        if self.on_download_delete:
+            await self.on_download_delete(download)
+        elif download in self.downloads:
+            self.downloads.remove(download)
+    
+    async def clear_completed(self, e):
         """清理已完成的下载"""
         completed_downloads = [d for d in self.downloads if d.get('status') == 'completed']
-        if completed_downloads:
-            for download in completed_downloads:
-                self.downloads.remove(download)
-                self.on_download_delete(download)
+        for download in completed_downloads:
+            await self.delete_download(download)
     
     def start_all(self, e):
         """开始所有下载"""
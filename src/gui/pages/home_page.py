@@ -14,8 +14,8 @@ class HomePage:
     def __init__(self, 
                  on_url_submit: Callable[[str], None],
                  platform_manager: PlatformManager):
-        self.on_url_submit = on_url_submit,
-        self.platform_manager = platform_manager,
+        self.on_url_submit = on_url_submit
+        self.platform_manager = platform_manager
         self.current_video_info = None
     
     def build(self) -> ft.Column:
@@ -90,7 +90,8 @@ class HomePage:
     
     def build_supported_platforms(self) -> ft.Row:
         """构建支持的平台展示"""
-        platforms = self.platform_manager.get_all_platforms()
+        # 只读取平台清单，不导入插件模块
+        platforms = self.platform_manager.get_platform_specs()
         
         platform_cards = []
         for platform in platforms:
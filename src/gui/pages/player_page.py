@@ -1,7 +1,7 @@
 """播放器页面 - 视频播放界面"""
 
 import flet as ft
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Callable
 import os
 
 
@@ -14,6 +14,8 @@ class PlayerPage:
         self.is_playing = False
         self.current_time = 0
         self.total_time = 0
+        # 流播放结束时的回调
+        self.on_completed: Optional[Callable] = None
         
     def build(self) -> ft.Column:
         """构建播放器页面UI"""
@@ -88,7 +90,16 @@ class PlayerPage:
     
     def get_video_display(self) -> ft.Control:
         """获取视频显示控件"""
-        if self.current_video and self.video_path:
+        if self.video_path and self.video_path.startswith('http') and hasattr(ft, 'Video'):
+            # 边下边播：播放本地流媒体服务器提供的地址
+            return ft.Video(
+                playlist=[ft.VideoMedia(self.video_path)],
+                width=800,
+                height=450,
+                autoplay=True,
+                on_completed=self.on_completed
+            )
+        elif self.current_video and self.video_path:
             # 如果有视频文件，这里应该使用视频播放器组件
             # Flet目前没有内置的视频播放器，需要使用WebView或自定义组件
             return ft.Image(
@@ -310,6 +321,21 @@ class PlayerPage:
         # 这里需要重新构建播放器界面
         # 由于Flet的限制，实际实现可能需要使用WebView组件
     
+    def load_stream(self, stream_url: str, video_info: Optional[Dict[str, Any]] = None,
+                    on_completed: Optional[Callable] = None):
+        """加载边下边播的本地流地址，播放结束时调用on_completed"""
+        video_info = video_info or {}
+        self.video_path = stream_url
+        self.on_completed = on_completed
+        self.current_video = {
+            'title': video_info.get('title', stream_url),
+            'path': stream_url,
+            'thumbnail': video_info.get('thumbnail', ''),
+            'duration': video_info.get('duration', 0)
+        }
+        self.total_time = video_info.get('duration', 0)
+        self.is_playing = True
+    
     async def toggle_playback(self, e):
         """切换播放/暂停"""
         self.is_playing = not self.is_playing
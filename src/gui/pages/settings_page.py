@@ -1,16 +1,19 @@
 """设置页面 - 应用设置界面"""
 
 import flet as ft
-from typing import Dict, Any
+from typing import Dict, Any, Optional
 
+from src.core.config import config_manager
 from ..services.gui_service import GUIService
+from ..plugins.platform_manager import PlatformManager
 
 
 class SettingsPage:
     """设置页面"""
     
-    def __init__(self, gui_service: GUIService):
+    def __init__(self, gui_service: GUIService, platform_manager: Optional[PlatformManager] = None):
         self.gui_service = gui_service
+        self.platform_manager = platform_manager
         
         # 设置项默认值
         self.settings = {
@@ -22,7 +25,7 @@ class SettingsPage:
             'video_quality': 'best',
             'audio_only': False,
             'subtitle': True,
-            'api_priority': 'official',  # 'official' or 'ytdlp'
+            'api_priority': config_manager.get('api_priority', 'auto'),  # 'auto', 'official' or 'ytdlp'
             'theme_mode': 'dark',
             'auto_check_update': True,
             'enable_notifications': True
@@ -56,6 +59,7 @@ class SettingsPage:
                     self.build_api_settings(),
                     self.build_appearance_settings(),
                     self.build_advanced_settings(),
+                    self.build_platform_statistics(),
                     
                     # 操作按钮
                     ft.Container(
@@ -233,13 +237,17 @@ class SettingsPage:
                         value=self.settings['api_priority'],
                         content=ft.Column([
                             ft.Radio(
-                                value="official",
-                                label="官方API (推荐)",
+                                value="auto",
+                                label="自动 (推荐，按延迟和成功率自适应)",
                                 label_style=ft.TextStyle(weight=ft.FontWeight.BOLD)
                             ),
+                            ft.Radio(
+                                value="official",
+                                label="官方API优先"
+                            ),
                             ft.Radio(
                                 value="ytdlp",
-                                label="yt-dlp (备用)"
+                                label="yt-dlp优先"
                             )
                         ]),
                         on_change=self.change_api_priority
@@ -247,7 +255,7 @@ class SettingsPage:
                 ]),
                 
                 ft.Text(
-                    "官方API解析速度快但可能受限，yt-dlp兼容性好但速度较慢",
+                    "优先来源超过其P95延迟仍未返回时会同时启动另一来源，采用先返回的有效结果",
                     size=12,
                     italic=True
                 )
@@ -336,6 +344,56 @@ class SettingsPage:
             border_radius=12
         )
     
+    def build_platform_statistics(self) -> ft.Container:
+        """构建平台调用统计（次数、失败数和延迟分位数）"""
+        def _ms(seconds: Optional[float]) -> str:
+            return "-" if seconds is None else f"{seconds * 1000:.0f}ms"
+        
+        rows = []
+        usage = self.platform_manager.get_usage_statistics() if self.platform_manager else {}
+        for platform_name, stats in usage.items():
+            for operation, op_stats in stats['operations'].items():
+                rows.append(ft.DataRow(cells=[
+                    ft.DataCell(ft.Text(platform_name)),
+                    ft.DataCell(ft.Text(operation)),
+                    ft.DataCell(ft.Text(str(op_stats['calls']))),
+                    ft.DataCell(ft.Text(str(op_stats['failures']))),
+                    ft.DataCell(ft.Text(_ms(op_stats['p50']))),
+                    ft.DataCell(ft.Text(_ms(op_stats['p95']))),
+                    ft.DataCell(ft.Text(_ms(op_stats['p99']))),
+                ]))
+        
+        content = ft.DataTable(
+            columns=[ft.DataColumn(ft.Text(title)) for title in
+                     ("平台", "操作", "调用", "失败", "P50", "P95", "P99")],
+            rows=rows
+        ) if rows else ft.Text("暂无平台调用记录", size=12, italic=True)
+        
+        return ft.Container(
+            content=ft.Column([
+                ft.Row([
+                    ft.Icon(ft.icons.QUERY_STATS_ROUNDED),
+                    ft.Text(
+                        "平台调用统计",
+                        size=20,
+                        weight=ft.FontWeight.BOLD
+                    )
+                ]),
+                ft.Divider(height=1),
+                content,
+                ft.TextButton("重置统计", on_click=self.reset_platform_statistics)
+            ], spacing=15),
+            padding=ft.padding.all(20),
+            border_radius=12
+        )
+    
+    async def reset_platform_statistics(self, e):
+        """重置平台调用统计"""
+        if self.platform_manager:
+            self.platform_manager.reset_statistics()
+        if e.control.page:
+            await self.show_message("平台调用统计已重置", e.control.page)
+    
     async def browse_download_dir(self, e):
         """浏览下载目录"""
         # 实际实现需要调用文件选择器
@@ -350,8 +408,9 @@ class SettingsPage:
         self.settings['subtitle'] = e.control.value
     
     async def change_api_priority(self, e):
-        """更改API优先级"""
+        """更改API优先级（立即生效）"""
         self.settings['api_priority'] = e.control.value
+        config_manager.set('api_priority', e.control.value)
     
     async def change_theme_mode(self, e):
         """更改主题模式"""
@@ -388,7 +447,7 @@ class SettingsPage:
             'video_quality': 'best',
             'audio_only': False,
             'subtitle': True,
-            'api_priority': 'official',
+            'api_priority': 'auto',
             'theme_mode': 'dark',
             'auto_check_update': True,
             'enable_notifications': True
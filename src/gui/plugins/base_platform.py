@@ -1,13 +1,18 @@
 """平台基类 - 所有视频平台插件的基础接口"""
 
 from abc import ABC, abstractmethod
-from typing import Dict, List, Optional, Any
+from typing import AsyncIterator, Dict, List, Optional, Any, Tuple
 import asyncio
 
+from src.core.metrics import CallStatistics
+
 
 class BasePlatform(ABC):
     """视频平台基类，定义所有平台插件必须实现的接口"""
     
+    # 视频URL正则（命名分组 id 捕获视频ID），由PlatformManager编译进URL路由索引
+    url_patterns: Tuple[str, ...] = ()
+    
     def __init__(self):
         self._name = ""
         self._supported_domains = []
@@ -17,6 +22,7 @@ class BasePlatform(ABC):
         self._platform_type = "video"
         self._requires_auth = False
         self._rate_limit = None
+        self._statistics = CallStatistics()
     
     @property
     @abstractmethod
@@ -69,6 +75,14 @@ class BasePlatform(ABC):
         """请求频率限制（每秒请求数）"""
         return self._rate_limit
     
+    def get_rate_limit(self, endpoint: Optional[str] = None):
+        """获取请求限流器（平台级+接口级，按声明的rate_limit自适应调整）"""
+        from src.services.rate_limiter import rate_limiters
+        
+        if self.rate_limit and rate_limiters.platform_rates.get(self.name) != self.rate_limit:
+            rate_limiters.configure(self.name, self.rate_limit)
+        return rate_limiters.limit(self.name, endpoint)
+    
     @abstractmethod
     def is_supported_url(self, url: str) -> bool:
         """检查URL是否支持"""
@@ -97,6 +111,12 @@ class BasePlatform(ABC):
             raise NotImplementedError(f"平台 {self.name} 不支持播放列表下载")
         raise NotImplementedError(f"平台 {self.name} 需要实现播放列表接口")
     
+    async def iter_playlist_entries(self, url: str) -> AsyncIterator[Dict[str, Any]]:
+        """逐条产出播放列表条目（可选，默认基于get_playlist_info）"""
+        playlist = await self.get_playlist_info(url)
+        for entry in playlist.get('entries', []):
+            yield entry
+    
     async def get_subtitle_info(self, video_info: Dict[str, Any]) -> List[Dict[str, Any]]:
         """获取字幕信息（可选）"""
         if not self.features.get('subtitle_download', False):
@@ -124,6 +144,10 @@ class BasePlatform(ABC):
         """从URL提取视频ID（可选实现）"""
         return None
     
+    def canonical_video_id(self, video_id: str) -> str:
+        """标准化URL正则匹配到的视频ID（可选实现）"""
+        return video_id
+    
     def normalize_url(self, url: str) -> str:
         """标准化URL（可选实现）"""
         return url
@@ -133,19 +157,17 @@ class BasePlatform(ABC):
         return quality
     
     # 统计和监控方法
+    def record_call(self, operation: str, seconds: float, success: bool):
+        """记录一次插件调用（由PlatformManager自动计时）"""
+        self._statistics.record(operation, seconds, success)
+    
     def get_usage_statistics(self) -> Dict[str, Any]:
-        """获取使用统计（可选实现）"""
-        return {
-            'total_requests': 0,
-            'successful_requests': 0,
-            'failed_requests': 0,
-            'average_response_time': 0,
-            'last_used': None
-        }
+        """获取使用统计：调用次数、失败次数和各操作的延迟分位数（秒）"""
+        return self._statistics.to_dict()
     
     def reset_statistics(self):
-        """重置统计信息（可选实现）"""
-        pass
+        """重置统计信息"""
+        self._statistics.reset()
     
     # 配置相关方法
     def get_config(self) -> Dict[str, Any]:
@@ -252,6 +274,7 @@ class APIBasedPlatform(BasePlatform):
         self._headers = {}
         self._timeout = 30
         self._session = None
+        self._max_throttle_retries = 3
     
     @property
     def base_url(self) -> str:
@@ -278,19 +301,40 @@ class APIBasedPlatform(BasePlatform):
             await self._session.close()
             self._session = None
     
+    def is_throttled_response(self, data: Dict[str, Any]) -> bool:
+        """检查API返回内容是否表示被限流（由子类按平台错误码实现）"""
+        return False
+    
     async def make_request(self, method: str, endpoint: str, **kwargs) -> Dict[str, Any]:
-        """发送API请求"""
+        """发送API请求（限流排队，被限流时降速后重试）"""
+        from src.services.rate_limiter import THROTTLE_STATUS_CODES, parse_retry_after
+        
         if not self._session:
             await self.initialize()
         
         url = f"{self.base_url}{endpoint}"
+        limit = self.get_rate_limit(endpoint)
+        
+        for _ in range(self._max_throttle_retries + 1):
+            await limit.acquire_async()
+            try:
+                async with self._session.request(method, url, **kwargs) as response:
+                    if response.status in THROTTLE_STATUS_CODES:
+                        limit.on_throttle(parse_retry_after(response.headers.get('Retry-After')))
+                        continue
+                    response.raise_for_status()
+                    data = await response.json()
+            except Exception as e:
+                raise Exception(f"API请求失败 {url}: {str(e)}")
+            
+            if self.is_throttled_response(data):
+                limit.on_throttle()
+                continue
+            
+            limit.on_success()
+            return data
         
-        try:
-            async with self._session.request(method, url, **kwargs) as response:
-                response.raise_for_status()
-                return await response.json()
-        except Exception as e:
-            raise Exception(f"API请求失败 {url}: {str(e)}")
+        raise Exception(f"API请求失败 {url}: 多次重试后仍被限流")
     
     async def get(self, endpoint: str, params: Dict = None) -> Dict[str, Any]:
         """GET请求"""
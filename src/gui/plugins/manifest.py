@@ -0,0 +1,117 @@
+"""平台清单 - 不导入插件模块即可注册的平台描述
+
+PlatformManager 启动时只读取清单：平台名称、域名和URL正则进入URL路由索引，
+插件模块（以及它依赖的服务、yt-dlp等）在第一次匹配到该平台的URL时才导入。
+
+第三方平台通过 ``video_downloader.platforms`` 入口点注册，入口点指向一个
+:class:`PlatformSpec` 或同样字段的字典（与外部平台配置文件格式相同）::
+
+    [project.entry-points."video_downloader.platforms"]
+    vimeo = "vd_vimeo.manifest:PLATFORM"
+
+入口点应指向不导入重量级依赖的轻量模块。
+"""
+
+from typing import Any, Callable, List, Mapping, NamedTuple, Optional, Sequence, Tuple, Union
+
+
+ENTRY_POINT_GROUP = 'video_downloader.platforms'
+
+
+class PlatformSpec(NamedTuple):
+    """平台描述"""
+
+    name: str
+    # 插件类路径，如 ``src.gui.plugins.platforms.bilibili_platform.BilibiliPlatform``
+    class_path: str
+    supported_domains: Tuple[str, ...]
+    # 视频URL正则（命名分组 id 捕获视频ID）
+    url_patterns: Tuple[str, ...] = ()
+    # 标准化匹配到的视频ID
+    canonical_video_id: Optional[Callable[[str], str]] = None
+    description: str = ''
+
+    @classmethod
+    def from_config(cls, config: Union['PlatformSpec', Mapping[str, Any]]) -> 'PlatformSpec':
+        """从入口点对象或配置字典创建"""
+        if isinstance(config, PlatformSpec):
+            return config
+        return cls(
+            name=config['name'],
+            class_path=config['class_path'],
+            supported_domains=tuple(config['supported_domains']),
+            url_patterns=tuple(config.get('url_patterns', ())),
+            description=config.get('description', ''),
+        )
+
+
+def canonical_bilibili_id(video_id: str) -> str:
+    """标准化B站视频ID：BV前缀大写，av号保持不变，番剧编号小写"""
+    prefix, rest = video_id[:2].lower(), video_id[2:]
+    if prefix in ('ep', 'ss'):
+        return video_id.lower()
+    if prefix == 'av' and rest.isdigit():
+        return f"av{rest}"
+    if prefix == 'bv':
+        return f"BV{rest}"
+    return f"BV{video_id}"
+
+
+# 视频页、番剧页和短链接（短链接需要跳转后才能得到视频ID）
+BILIBILI_URL_PATTERNS = (
+    r'bilibili\.com/video/(?P<id>[a-zA-Z0-9]+)',
+    r'bilibili\.com/bangumi/play/(?P<id>(?:ep|ss)[0-9]+)',
+    r'b23\.tv/[a-zA-Z0-9]+',
+)
+
+YOUTUBE_URL_PATTERNS = (
+    r'youtube\.com/watch\?(?:[^#]*?&)?v=(?P<id>[a-zA-Z0-9_-]+)',
+    r'youtu\.be/(?P<id>[a-zA-Z0-9_-]+)',
+    r'youtube\.com/(?:embed|shorts)/(?P<id>[a-zA-Z0-9_-]+)',
+)
+
+# 视频页带数字ID；短链接和其他页面需要跳转后才能得到
+DOUYIN_URL_PATTERNS = (
+    r'(?:ies)?douyin\.com/(?:share/)?video/(?P<id>[0-9]+)',
+    r'(?:ies)?douyin\.com/[a-zA-Z0-9_/]+',
+)
+
+BUILTIN_PLATFORMS = (
+    PlatformSpec(
+        'bilibili', 'src.gui.plugins.platforms.bilibili_platform.BilibiliPlatform',
+        ('bilibili.com', 'b23.tv'), BILIBILI_URL_PATTERNS, canonical_bilibili_id,
+        "Bilibili - 中国领先的视频分享网站",
+    ),
+    PlatformSpec(
+        'youtube', 'src.gui.plugins.platforms.youtube_platform.YouTubePlatform',
+        ('youtube.com', 'youtu.be'), YOUTUBE_URL_PATTERNS, None,
+        "YouTube - 全球最大的视频分享平台",
+    ),
+    PlatformSpec(
+        'douyin', 'src.gui.plugins.platforms.douyin_platform.DouyinPlatform',
+        ('douyin.com', 'v.douyin.com', 'iesdouyin.com'), DOUYIN_URL_PATTERNS, None,
+        "抖音 - 短视频分享平台",
+    ),
+)
+
+
+def _entry_points(group: str) -> Sequence[Any]:
+    """某个入口点组的所有入口点"""
+    from importlib.metadata import entry_points
+
+    points = entry_points()
+    if hasattr(points, 'select'):
+        return list(points.select(group=group))
+    # Python 3.8/3.9 返回按组分类的字典
+    return list(points.get(group, []))
+
+
+def discover_platforms(group: str = ENTRY_POINT_GROUP) -> List[PlatformSpec]:
+    """内置平台和通过入口点注册的第三方平台（只加载入口点指向的清单对象）"""
+    specs = list(BUILTIN_PLATFORMS)
+    for entry_point in _entry_points(group):
+        try:
+            specs.append(PlatformSpec.from_config(entry_point.load()))
+        except Exception as e:
+            print(f"加载平台入口点失败 {entry_point.name}: {e}")
+    return specs
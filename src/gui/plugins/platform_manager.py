@@ -1,96 +1,226 @@
-"""平台管理器 - 管理所有视频平台插件"""
+"""平台管理器 - 管理所有视频平台插件
 
-from typing import Dict, List, Optional
+启动时只注册平台清单（名称、域名和URL正则），插件模块在第一次匹配到
+该平台的URL时才导入并创建实例，平台的共享客户端在首次异步使用时初始化。
+"""
+
+import asyncio
+import functools
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, List, Optional
+from src.core.metrics import PLATFORM_CALL_SECONDS, PLATFORM_CALLS
 from .base_platform import BasePlatform
-from .platforms.bilibili_platform import BilibiliPlatform
-from .platforms.youtube_platform import YouTubePlatform
-from .platforms.douyin_platform import DouyinPlatform
+from .manifest import PlatformSpec, discover_platforms
+from .url_router import Route, URLRouter
+
+
+# 由管理器自动计时和计数的插件方法
+TIMED_OPERATIONS = (
+    'extract_video_info',
+    'get_download_urls',
+    'get_playlist_info',
+    'get_subtitle_info',
+    'get_live_info',
+)
+
+
+def _timed_call(platform: BasePlatform, operation: str, method: Callable) -> Callable:
+    """包装插件方法，把耗时和成败记录到插件统计和指标中"""
+    succeeded = PLATFORM_CALLS.labels(platform.name, operation, 'success')
+    failed = PLATFORM_CALLS.labels(platform.name, operation, 'failure')
+    latency = PLATFORM_CALL_SECONDS.labels(platform.name, operation)
+    
+    def _record(started: float, success: bool):
+        seconds = time.monotonic() - started
+        platform.record_call(operation, seconds, success)
+        (succeeded if success else failed).inc()
+        latency.observe(seconds)
+    
+    if asyncio.iscoroutinefunction(method):
+        @functools.wraps(method)
+        async def wrapper(*args, **kwargs):
+            started = time.monotonic()
+            try:
+                result = await method(*args, **kwargs)
+            except Exception:
+                _record(started, False)
+                raise
+            _record(started, True)
+            return result
+    else:
+        @functools.wraps(method)
+        def wrapper(*args, **kwargs):
+            started = time.monotonic()
+            try:
+                result = method(*args, **kwargs)
+            except Exception:
+                _record(started, False)
+                raise
+            _record(started, True)
+            return result
+    
+    wrapper.timed_operation = operation
+    return wrapper
+
+
+def instrument_platform(platform: BasePlatform) -> BasePlatform:
+    """为插件实例的调用加上计时和计数（重复调用无副作用）"""
+    for operation in TIMED_OPERATIONS:
+        method = getattr(platform, operation, None)
+        if method is not None and not hasattr(method, 'timed_operation'):
+            setattr(platform, operation, _timed_call(platform, operation, method))
+    return platform
 
 
 class PlatformManager:
     """平台管理器"""
     
     def __init__(self):
+        self.specs: Dict[str, PlatformSpec] = {}
+        # 已导入并创建的插件实例
         self.platforms: Dict[str, BasePlatform] = {}
-        self.domain_mapping: Dict[str, BasePlatform] = {}
+        # 域名 -> 平台名称
+        self.domain_mapping: Dict[str, str] = {}
+        self.router = URLRouter()
+        self._load_lock = threading.Lock()
+        self._initializing: Dict[str, asyncio.Future] = {}
         self.load_platforms()
     
     def load_platforms(self):
-        """加载所有平台插件"""
-        platforms = [
-            BilibiliPlatform(),
-            YouTubePlatform(),
-            DouyinPlatform(),
-        ]
-        
-        for platform in platforms:
-            self.register_platform(platform)
+        """注册内置平台和通过入口点发现的平台（不导入插件模块）"""
+        for spec in discover_platforms():
+            self.register_spec(spec)
+    
+    def register_spec(self, spec: PlatformSpec):
+        """注册平台清单，插件模块在第一次使用时导入"""
+        self._register(spec)
     
     def register_platform(self, platform: BasePlatform):
-        """注册平台"""
+        """注册已创建的平台实例"""
+        platform_class = type(platform)
+        spec = PlatformSpec(
+            name=platform.name,
+            class_path=f"{platform_class.__module__}.{platform_class.__qualname__}",
+            supported_domains=tuple(platform.supported_domains),
+            url_patterns=tuple(platform.url_patterns),
+            canonical_video_id=platform.canonical_video_id,
+            description=platform.description,
+        )
+        self._register(spec, platform)
+    
+    def _register(self, spec: PlatformSpec, platform: Optional[BasePlatform] = None):
         # 检查平台名称是否已存在
-        if platform.name in self.platforms:
-            print(f"警告: 平台 {platform.name} 已存在，将被覆盖")
+        if spec.name in self.specs:
+            print(f"警告: 平台 {spec.name} 已存在，将被覆盖")
+            self.unregister_platform(spec.name)
         
         # 注册平台
-        self.platforms[platform.name] = platform
+        self.specs[spec.name] = spec
+        if platform is not None:
+            self.platforms[spec.name] = instrument_platform(platform)
         
         # 注册域名映射
-        for domain in platform.supported_domains:
+        for domain in spec.supported_domains:
             if domain in self.domain_mapping:
-                print(f"警告: 域名 {domain} 已被平台 {self.domain_mapping[domain].name} 使用")
+                print(f"警告: 域名 {domain} 已被平台 {self.domain_mapping[domain]} 使用")
             else:
-                self.domain_mapping[domain] = platform
+                self.domain_mapping[domain] = spec.name
         
-        print(f"已注册平台: {platform.name} (支持域名: {platform.supported_domains})")
+        # 注册到URL路由索引；没有URL正则的已加载平台退回到插件自己的判断方法
+        patterns = spec.url_patterns
+        fallback = platform if platform is not None and not patterns else None
+        self.router.add(
+            spec.name,
+            spec.supported_domains,
+            patterns,
+            spec.canonical_video_id,
+            supports=fallback.is_supported_url if fallback else None,
+            extract_id=fallback.extract_video_id if fallback else None,
+        )
+        
+        print(f"已注册平台: {spec.name} (支持域名: {list(spec.supported_domains)})")
     
     def unregister_platform(self, platform_name: str) -> bool:
         """注销平台"""
-        if platform_name not in self.platforms:
+        if platform_name not in self.specs:
             return False
         
-        platform = self.platforms[platform_name]
-        
         # 从域名映射中移除
-        for domain in platform.supported_domains:
-            if domain in self.domain_mapping:
+        for domain in self.specs[platform_name].supported_domains:
+            if self.domain_mapping.get(domain) == platform_name:
                 del self.domain_mapping[domain]
         
-        # 从平台列表中移除
-        del self.platforms[platform_name]
+        # 从平台列表和URL路由索引中移除
+        del self.specs[platform_name]
+        self.platforms.pop(platform_name, None)
+        self._initializing.pop(platform_name, None)
+        self.router.remove(platform_name)
         print(f"已注销平台: {platform_name}")
         return True
     
+    def _load_platform(self, name: str) -> Optional[BasePlatform]:
+        """导入插件模块并创建实例（只创建一次）"""
+        platform = self.platforms.get(name)
+        if platform is not None or name not in self.specs:
+            return platform
+        
+        with self._load_lock:
+            platform = self.platforms.get(name)
+            if platform is None:
+                module_path, class_name = self.specs[name].class_path.rsplit('.', 1)
+                module = __import__(module_path, fromlist=[class_name])
+                platform = instrument_platform(getattr(module, class_name)())
+                self.platforms[name] = platform
+        return platform
+    
+    async def load_platform(self, name: str) -> Optional[BasePlatform]:
+        """在线程中导入插件，并在首次使用时初始化平台（会话等共享客户端）"""
+        platform = self.platforms.get(name)
+        if platform is None:
+            platform = await asyncio.to_thread(self._load_platform, name)
+        if platform is None:
+            return None
+        
+        initializing = self._initializing.get(name)
+        if initializing is None:
+            initializing = self._initializing[name] = asyncio.ensure_future(platform.initialize())
+        try:
+            await initializing
+        except Exception:
+            self._initializing.pop(name, None)
+            raise
+        return platform
+    
     def get_platform_by_name(self, name: str) -> Optional[BasePlatform]:
         """根据名称获取平台"""
-        return self.platforms.get(name)
+        return self._load_platform(name)
     
     def get_platform_by_url(self, url: str) -> Optional[BasePlatform]:
         """根据URL获取对应平台"""
-        # 提取域名
-        from urllib.parse import urlparse
-        parsed_url = urlparse(url.lower())
-        hostname = parsed_url.netloc
-        
-        # 移除www前缀
-        if hostname.startswith('www.'):
-            hostname = hostname[4:]
-        
-        # 查找匹配的域名
-        for domain, platform in self.domain_mapping.items():
-            if domain in hostname:
-                return platform
-        
-        # 如果没有直接匹配，尝试URL模式匹配
-        for platform in self.platforms.values():
-            if platform.is_supported_url(url):
-                return platform
-        
-        return None
+        route = self.router.route(url)
+        return self._load_platform(route.platform) if route else None
+    
+    async def get_platform_by_url_async(self, url: str) -> Optional[BasePlatform]:
+        """根据URL获取对应平台（不阻塞事件循环）"""
+        route = self.router.route(url)
+        return await self.load_platform(route.platform) if route else None
+    
+    def route_url(self, url: str) -> Optional[Route]:
+        """一次匹配得到URL所属平台名称和标准化视频ID"""
+        return self.router.route(url)
+    
+    def classify_urls(self, urls: Iterable[str]) -> List[Optional[Route]]:
+        """批量分类URL，不支持的URL对应None"""
+        return list(self.router.classify(urls))
+    
+    def get_platform_specs(self) -> List[PlatformSpec]:
+        """获取所有平台清单（不导入插件模块）"""
+        return list(self.specs.values())
     
     def get_all_platforms(self) -> List[BasePlatform]:
-        """获取所有平台"""
-        return list(self.platforms.values())
+        """获取所有平台（会导入全部插件模块）"""
+        return [self._load_platform(name) for name in self.specs]
     
     def get_supported_domains(self) -> List[str]:
         """获取所有支持的域名"""
@@ -98,24 +228,26 @@ class PlatformManager:
     
     def is_url_supported(self, url: str) -> bool:
         """检查URL是否被支持"""
-        return self.get_platform_by_url(url) is not None
+        return self.router.route(url) is not None
     
     def get_platform_info(self) -> Dict[str, Dict]:
-        """获取所有平台信息"""
+        """获取所有平台信息（未加载的平台只有清单中的信息）"""
         info = {}
-        for name, platform in self.platforms.items():
+        for name, spec in self.specs.items():
+            platform = self.platforms.get(name)
             info[name] = {
-                'name': platform.name,
-                'supported_domains': platform.supported_domains,
+                'name': name,
+                'supported_domains': list(spec.supported_domains),
                 'supported_qualities': getattr(platform, 'supported_qualities', []),
                 'features': getattr(platform, 'features', {}),
-                'description': getattr(platform, 'description', '')
+                'description': getattr(platform, 'description', spec.description),
+                'loaded': platform is not None
             }
         return info
     
     async def extract_video_info(self, url: str) -> Optional[Dict]:
         """提取视频信息"""
-        platform = self.get_platform_by_url(url)
+        platform = await self.get_platform_by_url_async(url)
         if not platform:
             raise ValueError(f"不支持的视频平台或URL: {url}")
         
@@ -123,17 +255,36 @@ class PlatformManager:
     
     async def get_download_urls(self, url: str, quality: str = 'best') -> List[Dict]:
         """获取下载链接"""
-        platform = self.get_platform_by_url(url)
+        platform = await self.get_platform_by_url_async(url)
         if not platform:
             raise ValueError(f"不支持的视频平台或URL: {url}")
         
         video_info = await platform.extract_video_info(url)
         return platform.get_download_urls(video_info, quality)
     
+    async def cleanup(self):
+        """清理已初始化平台的资源"""
+        initialized, self._initializing = self._initializing, {}
+        for name in initialized:
+            platform = self.platforms.get(name)
+            if platform is not None:
+                await platform.cleanup()
+    
+    def get_usage_statistics(self) -> Dict[str, Dict[str, Any]]:
+        """已加载平台的调用统计"""
+        return {name: platform.get_usage_statistics() for name, platform in self.platforms.items()}
+    
+    def reset_statistics(self, platform_name: Optional[str] = None):
+        """重置某个平台（默认所有已加载平台）的调用统计"""
+        for name, platform in self.platforms.items():
+            if platform_name is None or name == platform_name:
+                platform.reset_statistics()
+    
     def get_platform_statistics(self) -> Dict[str, int]:
         """获取平台统计信息"""
         stats = {
-            'total_platforms': len(self.platforms),
+            'total_platforms': len(self.specs),
+            'loaded_platforms': len(self.platforms),
             'total_domains': len(self.domain_mapping),
             'platforms_by_type': {}
         }
@@ -163,6 +314,11 @@ class PlatformManager:
             if not isinstance(domains, list) or not domains:
                 errors.append("supported_domains 必须是非空列表")
         
+        if 'url_patterns' in platform_config:
+            patterns = platform_config['url_patterns']
+            if not isinstance(patterns, list) or not all(isinstance(pattern, str) for pattern in patterns):
+                errors.append("url_patterns 必须是正则表达式字符串列表")
+        
         return errors
     
     async def load_external_platforms(self, config_file: str) -> bool:
@@ -183,15 +339,9 @@ class PlatformManager:
                     print(f"平台配置错误: {platform_config.get('name', 'unknown')}: {errors}")
                     continue
                 
-                # 动态导入平台类
+                # 只注册清单，平台类在第一次使用时导入
                 try:
-                    module_path, class_name = platform_config['class_path'].rsplit('.', 1)
-                    module = __import__(module_path, fromlist=[class_name])
-                    platform_class = getattr(module, class_name)
-                    
-                    # 创建平台实例
-                    platform = platform_class()
-                    self.register_platform(platform)
+                    self.register_spec(PlatformSpec.from_config(platform_config))
                     loaded_count += 1
                     
                 except Exception as e:
@@ -205,5 +355,14 @@ class PlatformManager:
             return False
 
 
-# 全局平台管理器实例
-platform_manager = PlatformManager()
\ No newline at end of file
+_manager: Optional[PlatformManager] = None
+_manager_lock = threading.Lock()
+
+
+def get_platform_manager() -> PlatformManager:
+    """获取全局平台管理器，首次使用时创建"""
+    global _manager
+    with _manager_lock:
+        if _manager is None:
+            _manager = PlatformManager()
+        return _manager
\ No newline at end of file
@@ -1,14 +1,24 @@
 """B站平台实现"""
 
 import asyncio
-from typing import Dict, List, Any, Optional
+from typing import AsyncIterator, Dict, List, Any, Optional
 from ..base_platform import BasePlatform, VideoPlatformMixin, APIBasedPlatform
-from src.services.bilibili import bilibili_service
+from src.services.bilibili import BILIBILI_HEADERS, bilibili_service
+from src.services.format_selector import select_streams
+from src.services.listings import BilibiliListingEnumerator, parse_listing_url
+from src.services.rate_limiter import BILIBILI_THROTTLE_CODES
+from ..manifest import BILIBILI_URL_PATTERNS as URL_PATTERNS, canonical_bilibili_id
+from ..url_router import compile_url_patterns, matched_id
+
+
+_URL_RE = compile_url_patterns(URL_PATTERNS)
 
 
 class BilibiliPlatform(APIBasedPlatform, VideoPlatformMixin):
     """B站平台实现"""
     
+    url_patterns = URL_PATTERNS
+    
     def __init__(self):
         super().__init__()
         self._name = "bilibili"
@@ -18,8 +28,8 @@ class BilibiliPlatform(APIBasedPlatform, VideoPlatformMixin):
             'video_download': True,
             'audio_download': True,
             'subtitle_download': True,
-            'playlist_download': False,
-            'live_download': False,
+            'playlist_download': True,
+            'live_download': True,
             'dash_support': True,
             'chunked_download': True,
             'resume_download': True
@@ -27,68 +37,32 @@ class BilibiliPlatform(APIBasedPlatform, VideoPlatformMixin):
         self._description = "Bilibili - 中国领先的视频分享网站"
         self._platform_type = "video"
         self._requires_auth = False
-        self._rate_limit = None
+        self._base_url = "https://api.bilibili.com"
+        self._headers = dict(BILIBILI_HEADERS)
+        self._rate_limit = 2  # 每秒最多2个请求
     
     @property
     def name(self) -> str:
         """平台名称"""
         return self._name
-        self._supported_qualities = ["4K", "1080P+", "1080P", "720P", "480P", "360P"]
-        self._features = {
-            'video_download': True,
-            'audio_download': True,
-            'subtitle_download': True,
-            'playlist_download': False,
-            'live_download': False,
-            'dash_support': True,
-            'chunked_download': True,
-            'resume_download': True
-        }
-        self._description = "哔哩哔哩 (B站) - 中国最大的二次元文化社区"
-        self._platform_type = "video"
-        self._base_url = "https://api.bilibili.com"
-        self._headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
-            'Referer': 'https://www.bilibili.com/',
-            'Accept': 'application/json, text/plain, */*',
-            'Accept-Language': 'zh-CN,zh;q=0.9,en;q=0.8',
-        }
-        self._rate_limit = 2  # 每秒最多2个请求
+    
+    def is_throttled_response(self, data: Dict[str, Any]) -> bool:
+        """B站以-412/-509/-799等错误码表示请求被限流"""
+        return data.get('code') in BILIBILI_THROTTLE_CODES
     
     def is_supported_url(self, url: str) -> bool:
         """检查URL是否支持"""
-        if not url:
-            return False
-        
-        url = url.lower()
-        patterns = [
-            r'bilibili\.com/video/[a-zA-Z0-9]+',
-            r'bilibili\.com/bangumi/play/[a-zA-Z]+[0-9]+',
-            r'b23\.tv/[a-zA-Z0-9]+',
-        ]
-        
-        import re
-        return any(re.search(pattern, url) for pattern in patterns)
+        return bool(url) and _URL_RE.search(url) is not None
     
     def extract_video_id(self, url: str) -> Optional[str]:
-        """从URL提取视频ID"""
-        import re
-        
-        patterns = [
-            r'/video/([a-zA-Z0-9]+)',
-            r'BV([a-zA-Z0-9]+)',
-            r'b23\.tv/([a-zA-Z0-9]+)',
-        ]
-        
-        for pattern in patterns:
-            match = re.search(pattern, url)
-            if match:
-                video_id = match.group(1)
-                if not video_id.startswith('BV'):
-                    video_id = f"BV{video_id}"
-                return video_id
-        
-        return None
+        """从URL提取视频ID（BV号、av号或番剧ep/ss编号，短链接返回None）"""
+        match = _URL_RE.search(url or '')
+        video_id = matched_id(match) if match else None
+        return self.canonical_video_id(video_id) if video_id else None
+    
+    def canonical_video_id(self, video_id: str) -> str:
+        """标准化视频ID：BV前缀大写，番剧编号小写"""
+        return canonical_bilibili_id(video_id)
     
     async def extract_video_info(self, url: str) -> Dict[str, Any]:
         """提取视频信息"""
@@ -116,6 +90,8 @@ class BilibiliPlatform(APIBasedPlatform, VideoPlatformMixin):
                 'subtitles': video_info.get('subtitles', {}),
                 'cid': video_info.get('cid'),
                 'bvid': video_info.get('bvid'),
+                'page': video_info.get('page', 1),
+                'pages': video_info.get('pages', []),
             }
             
         except Exception as e:
@@ -152,6 +128,38 @@ class BilibiliPlatform(APIBasedPlatform, VideoPlatformMixin):
         except Exception as e:
             raise Exception(f"B站下载链接获取失败: {str(e)}")
     
+    def get_listing_enumerator(self, url: str, since_last_run: bool = False,
+                               limit: Optional[int] = None) -> BilibiliListingEnumerator:
+        """获取收藏夹/合集/系列/UP主空间的分页枚举器"""
+        ref = parse_listing_url(url)
+        if not ref:
+            raise ValueError(f"不支持的B站列表链接: {url}")
+        
+        return BilibiliListingEnumerator(
+            ref,
+            since_last_run=since_last_run,
+            limit=limit
+        )
+    
+    async def iter_playlist_entries(self, url: str) -> AsyncIterator[Dict[str, Any]]:
+        """逐页产出收藏夹/合集/系列/UP主空间中的视频"""
+        async for entry in self.get_listing_enumerator(url):
+            yield {**entry, 'platform': self.name}
+    
+    async def get_playlist_info(self, url: str) -> Dict[str, Any]:
+        """获取列表信息（一次性加载全部条目）"""
+        enumerator = self.get_listing_enumerator(url)
+        entries = [entry async for entry in enumerator]
+        
+        return {
+            'id': enumerator.ref.listing_id,
+            'url': url,
+            'platform': self.name,
+            'type': enumerator.ref.kind,
+            'entries': entries,
+            'entry_count': len(entries),
+        }
+    
     async def get_subtitle_info(self, video_info: Dict[str, Any]) -> List[Dict[str, Any]]:
         """获取字幕信息"""
         try:
@@ -181,59 +189,27 @@ class BilibiliPlatform(APIBasedPlatform, VideoPlatformMixin):
             print(f"获取B站字幕失败: {e}")
             return []
     
-    def _select_formats_by_quality(self, formats: List[Dict], quality: str) -> List[Dict]:
-        """根据质量选择格式"""
-        if not formats:
-            return []
-        
-        # 分离视频和音频格式
-        video_formats = [f for f in formats if f.get('vcodec') != 'none']
-        audio_formats = [f for f in formats if f.get('acodec') != 'none']
+    async def get_live_info(self, url: str) -> Dict[str, Any]:
+        """获取直播间信息及当前直播流地址"""
+        import aiohttp
+        from src.services.live import BilibiliLiveClient, parse_room_id
         
-        if quality == 'best':
-            # 选择最高质量
-            selected = []
-            
-            if video_formats:
-                # 按分辨率排序
-                video_formats.sort(key=lambda x: (x.get('height', 0), x.get('filesize', 0)), reverse=True)
-                selected.append(video_formats[0])
-            
-            if audio_formats:
-                # 选择最好的音频
-                audio_formats.sort(key=lambda x: x.get('filesize', 0), reverse=True)
-                selected.append(audio_formats[0])
-            
-            return selected
-        
-        elif quality == 'worst':
-            # 选择最低质量
-            selected = []
-            
-            if video_formats:
-                video_formats.sort(key=lambda x: (x.get('height', 0), x.get('filesize', 0)))
-                selected.append(video_formats[0])
-            
-            if audio_formats:
-                audio_formats.sort(key=lambda x: x.get('filesize', 0))
-                selected.append(audio_formats[0])
-            
-            return selected
+        async with aiohttp.ClientSession(headers=self._headers) as session:
+            client = BilibiliLiveClient(session)
+            room = await client.get_room_info(parse_room_id(url))
+            stream = await client.get_stream(room['room_id']) if room['is_live'] else None
         
-        else:
-            # 指定质量
-            # 首先尝试精确匹配
-            for fmt in video_formats:
-                if quality.lower() in fmt.get('format_note', '').lower():
-                    selected = [fmt]
-                    # 添加最佳音频
-                    if audio_formats:
-                        audio_formats.sort(key=lambda x: x.get('filesize', 0), reverse=True)
-                        selected.append(audio_formats[0])
-                    return selected
-            
-            # 如果没有精确匹配，返回best
-            return self._select_formats_by_quality(formats, 'best')
+        return {
+            **room,
+            'url': url,
+            'platform': self.name,
+            'stream_url': stream.url if stream else None,
+            'stream_format': stream.format if stream else None,
+        }
+    
+    def _select_formats_by_quality(self, formats: List[Dict], quality: str) -> List[Dict]:
+        """根据质量表达式选择视频流和音频流"""
+        return select_streams(formats, quality)
     
     async def get_video_stats(self, video_info: Dict[str, Any]) -> Dict[str, Any]:
         """获取视频统计信息"""
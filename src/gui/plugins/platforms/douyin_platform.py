@@ -3,11 +3,18 @@
 import asyncio
 from typing import Dict, List, Any, Optional
 from ..base_platform import BasePlatform, VideoPlatformMixin
+from ..manifest import DOUYIN_URL_PATTERNS as URL_PATTERNS
+from ..url_router import compile_url_patterns, matched_id
+
+
+_URL_RE = compile_url_patterns(URL_PATTERNS)
 
 
 class DouyinPlatform(BasePlatform, VideoPlatformMixin):
     """抖音平台实现"""
     
+    url_patterns = URL_PATTERNS
+    
     def __init__(self):
         super().__init__()
         self._name = "douyin"
@@ -26,53 +33,29 @@ class DouyinPlatform(BasePlatform, VideoPlatformMixin):
         self._description = "抖音 - 短视频分享平台"
         self._platform_type = "video"
         self._requires_auth = False
-        self._rate_limit = None
+        self._rate_limit = 3  # 限制频率避免被限制
     
     @property
     def name(self) -> str:
         """平台名称"""
         return self._name
-        self._supported_qualities = ["原画", "高清", "标清"]
-        self._features = {
-            'video_download': True,
-            'audio_download': True,
-            'subtitle_download': False,
-            'playlist_download': False,
-            'live_download': False,
-            'dash_support': False,
-            'chunked_download': True,
-            'resume_download': True
-        }
-        self._description = "抖音 - 短视频平台"
-        self._platform_type = "video"
-        self._requires_auth = False
-        self._rate_limit = 3  # 限制频率避免被限制
     
     def is_supported_url(self, url: str) -> bool:
         """检查URL是否支持"""
-        if not url:
-            return False
-        
-        url = url.lower()
-        patterns = [
-            r'douyin\.com/[a-zA-Z0-9_/]+',
-            r'v\.douyin\.com/[a-zA-Z0-9]+',
-            r'iesdouyin\.com/[a-zA-Z0-9_/]+',
-        ]
-        
-        import re
-        return any(re.search(pattern, url) for pattern in patterns)
+        return bool(url) and _URL_RE.search(url) is not None
     
     def extract_video_id(self, url: str) -> Optional[str]:
         """从URL提取视频ID"""
-        # 抖音的URL比较复杂，通常需要重定向后获取
-        # 这里先返回URL作为标识
-        import hashlib
-        
-        if self.is_supported_url(url):
-            return hashlib.md5(url.encode()).hexdigest()[:16]
+        match = _URL_RE.search(url or '')
+        if not match:
+            return None
         
-        return None
+        # 视频页直接带数字ID；短链接等需要重定向后获取，这里先返回URL哈希作为标识
+        video_id = matched_id(match)
+        if video_id:
+            return video_id
+        import hashlib
+        return hashlib.md5(url.encode()).hexdigest()[:16]
     
     async def extract_video_info(self, url: str) -> Dict[str, Any]:
         """提取视频信息"""
@@ -111,6 +94,7 @@ class DouyinPlatform(BasePlatform, VideoPlatformMixin):
         try:
             import aiohttp
             
+            await self.get_rate_limit().acquire_async()
             async with aiohttp.ClientSession() as session:
                 async with session.get(url, allow_redirects=False, timeout=10) as response:
                     if response.status in (301, 302, 303, 307, 308):
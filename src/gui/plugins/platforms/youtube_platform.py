@@ -1,13 +1,24 @@
 """YouTube平台实现"""
 
 import asyncio
-from typing import Dict, List, Any, Optional
+import threading
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from typing import AsyncIterator, Dict, List, Any, Optional
 from ..base_platform import BasePlatform, VideoPlatformMixin
+from src.services.format_selector import select_format
+from src.services.ytdlp_pool import get_ytdlp_pool
+from ..manifest import YOUTUBE_URL_PATTERNS as URL_PATTERNS
+from ..url_router import compile_url_patterns, matched_id
+
+
+_URL_RE = compile_url_patterns(URL_PATTERNS)
 
 
 class YouTubePlatform(BasePlatform, VideoPlatformMixin):
     """YouTube平台实现"""
     
+    url_patterns = URL_PATTERNS
+    
     def __init__(self):
         super().__init__()
         self._name = "youtube"
@@ -49,69 +60,24 @@ class YouTubePlatform(BasePlatform, VideoPlatformMixin):
     
     def is_supported_url(self, url: str) -> bool:
         """检查URL是否支持"""
-        if not url:
-            return False
-        
-        url = url.lower()
-        patterns = [
-            r'youtube\.com/watch\?v=[a-zA-Z0-9_-]+',
-            r'youtu\.be/[a-zA-Z0-9_-]+',
-            r'youtube\.com/embed/[a-zA-Z0-9_-]+',
-            r'youtube\.com/shorts/[a-zA-Z0-9_-]+',
-        ]
-        
-        import re
-        return any(re.search(pattern, url) for pattern in patterns)
+        return bool(url) and _URL_RE.search(url) is not None
     
     def extract_video_id(self, url: str) -> Optional[str]:
-        """从URL提取视频ID"""
-        import re
-        from urllib.parse import urlparse, parse_qs
-        
-        # 标准格式：youtube.com/watch?v=VIDEO_ID
-        if 'youtube.com/watch' in url:
-            parsed = urlparse(url)
-            query = parse_qs(parsed.query)
-            if 'v' in query and query['v']:
-                return query['v'][0]
-        
-        # 短格式：youtu.be/VIDEO_ID
-        elif 'youtu.be/' in url:
-            match = re.search(r'youtu\.be/([a-zA-Z0-9_-]+)', url)
-            if match:
-                return match.group(1)
-        
-        # 嵌入格式：youtube.com/embed/VIDEO_ID
-        elif 'youtube.com/embed/' in url:
-            match = re.search(r'youtube\.com/embed/([a-zA-Z0-9_-]+)', url)
-            if match:
-                return match.group(1)
-        
-        # Shorts格式：youtube.com/shorts/VIDEO_ID
-        elif 'youtube.com/shorts/' in url:
-            match = re.search(r'youtube\.com/shorts/([a-zA-Z0-9_-]+)', url)
-            if match:
-                return match.group(1)
-        
-        return None
+        """从URL提取视频ID（watch?v=、youtu.be、embed和shorts格式）"""
+        match = _URL_RE.search(url or '')
+        return matched_id(match) if match else None
     
     async def extract_video_info(self, url: str) -> Dict[str, Any]:
         """提取视频信息"""
         try:
-            # 使用yt-dlp获取YouTube信息
-            import yt_dlp
-            
+            # 使用常驻的yt-dlp工作进程获取YouTube信息
             ydl_opts = {
                 'quiet': True,
                 'no_warnings': False,
                 'extract_flat': False,
             }
             
-            def _extract_info():
-                with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-                    return ydl.extract_info(url, download=False)
-            
-            info = await asyncio.to_thread(_extract_info)
+            info = await asyncio.to_thread(get_ytdlp_pool().extract_info, url, ydl_opts)
             
             return {
                 'id': info.get('id', ''),
@@ -200,19 +166,13 @@ class YouTubePlatform(BasePlatform, VideoPlatformMixin):
     async def get_playlist_info(self, url: str) -> Dict[str, Any]:
         """获取播放列表信息"""
         try:
-            import yt_dlp
-            
             ydl_opts = {
                 'quiet': True,
                 'no_warnings': False,
                 'extract_flat': True,
             }
             
-            def _extract_playlist():
-                with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-                    return ydl.extract_info(url, download=False)
-            
-            playlist_info = await asyncio.to_thread(_extract_playlist)
+            playlist_info = await asyncio.to_thread(get_ytdlp_pool().extract_info, url, ydl_opts)
             
             return {
                 'id': playlist_info.get('id', ''),
@@ -231,38 +191,71 @@ class YouTubePlatform(BasePlatform, VideoPlatformMixin):
         except Exception as e:
             raise Exception(f"YouTube播放列表信息提取失败: {str(e)}")
     
-    def _select_best_format(self, formats: List[Dict], quality: str = 'best') -> Optional[Dict]:
-        """选择最佳格式"""
-        # 过滤出包含视频和音频的格式
-        valid_formats = [f for f in formats if 
-                        f.get('vcodec') != 'none' and 
-                        f.get('acodec') != 'none' and
-                        f.get('url')]
+    async def iter_playlist_entries(self, url: str) -> AsyncIterator[Dict[str, Any]]:
+        """逐条产出播放列表条目（边翻页边产出，不一次性加载全部）"""
+        import yt_dlp
         
-        if not valid_formats:
-            # 如果没有完整的格式，选择视频格式
-            valid_formats = [f for f in formats if 
-                           f.get('vcodec') != 'none' and 
-                           f.get('url')]
+        ydl_opts = {
+            'quiet': True,
+            'no_warnings': False,
+            'extract_flat': 'in_playlist',
+            'lazy_playlist': True,
+        }
         
-        if not valid_formats:
-            return None
+        loop = asyncio.get_running_loop()
+        queue: asyncio.Queue = asyncio.Queue(maxsize=100)
+        stop = threading.Event()
+        done = object()
         
-        if quality == 'best':
-            # 选择分辨率最高的
-            valid_formats.sort(key=lambda x: (x.get('height', 0), x.get('filesize', 0)), reverse=True)
-        elif quality == 'worst':
-            # 选择分辨率最低的
-            valid_formats.sort(key=lambda x: (x.get('height', 0), x.get('filesize', 0)))
-        else:
-            # 尝试匹配指定质量
-            for fmt in valid_formats:
-                if quality.lower() in fmt.get('format_note', '').lower():
-                    return fmt
-            # 如果没有匹配，选择最佳
-            valid_formats.sort(key=lambda x: (x.get('height', 0), x.get('filesize', 0)), reverse=True)
+        def _put(item):
+            # 阻塞等待队列有空位，实现背压；消费者停止时放弃
+            future = asyncio.run_coroutine_threadsafe(queue.put(item), loop)
+            while not stop.is_set():
+                try:
+                    future.result(timeout=0.5)
+                    return True
+                except FutureTimeoutError:
+                    continue
+            future.cancel()
+            return False
         
-        return valid_formats[0]
+        def _produce():
+            try:
+                with yt_dlp.YoutubeDL(ydl_opts) as ydl:
+                    info = ydl.extract_info(url, download=False, process=False)
+                    for entry in info.get('entries') or []:
+                        if entry and not _put(entry):
+                            return
+            except Exception as e:
+                _put(e)
+            finally:
+                _put(done)
+        
+        producer = threading.Thread(target=_produce, daemon=True)
+        producer.start()
+        
+        try:
+            while True:
+                item = await queue.get()
+                if item is done:
+                    return
+                if isinstance(item, Exception):
+                    raise Exception(f"YouTube播放列表信息提取失败: {str(item)}")
+                
+                video_id = item.get('id', '')
+                yield {
+                    'id': video_id,
+                    'title': item.get('title', ''),
+                    'url': item.get('url') or f"https://www.youtube.com/watch?v={video_id}",
+                    'duration': item.get('duration', 0),
+                    'platform': self.name,
+                }
+        finally:
+            stop.set()
+    
+    def _select_best_format(self, formats: List[Dict], quality: str = 'best') -> Optional[Dict]:
+        """根据质量表达式选择格式（优先音视频合一的格式）"""
+        return select_format(formats, quality, require_audio=True)
     
     def get_quality_mapping(self) -> Dict[str, str]:
         """获取质量映射"""
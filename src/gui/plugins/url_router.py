@@ -0,0 +1,213 @@
+"""URL路由索引 - 一次遍历得到URL所属平台和标准化视频ID
+
+主机名按域名标签倒序存入后缀字典树，只在标签边界上匹配，
+``www.bilibili.com``、``m.bilibili.com`` 命中 ``bilibili.com``，
+而 ``notyoutube.com`` 不会命中 ``youtube.com``；多个后缀都匹配时取最长的一个。
+每个平台的URL正则在注册时合并编译为一个正则，命名分组 ``id`` 捕获视频ID。
+"""
+
+import re
+from typing import Callable, Dict, Iterable, Iterator, List, NamedTuple, Optional, Pattern, Sequence
+
+
+# scheme://[userinfo@]host[:port]
+_HOST_RE = re.compile(r'^[A-Za-z][A-Za-z0-9+.-]*://(?:[^/?#@]*@)?([^/?#:]+)')
+
+_ID_GROUP_RE = re.compile(r'\(\?P<id>')
+
+# 正则只在域名标签边界上开始匹配
+_BOUNDARY = r'(?<![a-z0-9-])'
+
+
+class Route(NamedTuple):
+    """路由结果：平台名称和标准化视频ID（非视频页或短链接为None）"""
+
+    platform: str
+    video_id: Optional[str]
+
+
+def compile_url_patterns(patterns: Sequence[str]) -> Optional[Pattern]:
+    """将多个URL正则合并编译为一个（忽略大小写）
+
+    每个正则可以包含一个命名分组 ``id``，合并时重命名为 ``id0``、``id1``…
+    合并后的正则只在域名标签边界上开始匹配，``notyoutube.com/watch`` 不会被 ``youtube.com/watch`` 的正则匹配。
+    """
+    if not patterns:
+        return None
+    alternatives = '|'.join(
+        f"(?:{_ID_GROUP_RE.sub(f'(?P<id{index}>', pattern)})"
+        for index, pattern in enumerate(patterns)
+    )
+    return re.compile(f"{_BOUNDARY}(?:{alternatives})", re.IGNORECASE)
+
+
+def matched_id(match: re.Match) -> Optional[str]:
+    """合并正则匹配到的视频ID（``id`` 是正则中唯一的命名分组）"""
+    return match.group(match.lastgroup) if match.lastgroup else None
+
+
+def extract_hostname(url: str) -> Optional[str]:
+    """提取小写主机名（不含端口和末尾的点）"""
+    match = _HOST_RE.match(url)
+    if not match:
+        return None
+    return match.group(1).lower().rstrip('.')
+
+
+class HostTrie:
+    """域名后缀字典树"""
+
+    __slots__ = ('_root',)
+
+    def __init__(self):
+        self._root: Dict[str, dict] = {}
+
+    def insert(self, domain: str, value: str) -> None:
+        """添加域名（匹配该域名及其所有子域名）"""
+        node = self._root
+        for label in reversed(domain.lower().strip('.').split('.')):
+            node = node.setdefault(label, {})
+        node[''] = value
+
+    def get(self, domain: str) -> Optional[str]:
+        """精确注册了该域名的值（不考虑父域名）"""
+        node = self._root
+        for label in reversed(domain.lower().strip('.').split('.')):
+            node = node.get(label)
+            if node is None:
+                return None
+        return node.get('')
+
+    def remove_value(self, value: str) -> None:
+        """删除指向某个值的所有域名"""
+        def _prune(node: dict) -> None:
+            if node.get('') == value:
+                del node['']
+            for label in [label for label in node if label]:
+                _prune(node[label])
+                if not node[label]:
+                    del node[label]
+
+        _prune(self._root)
+
+    def lookup(self, hostname: str) -> Optional[str]:
+        """查找主机名最长的匹配后缀"""
+        node = self._root
+        found = None
+        for label in reversed(hostname.split('.')):
+            node = node.get(label)
+            if node is None:
+                break
+            found = node.get('', found)
+        return found
+
+
+class _PlatformRoute:
+    """单个平台的路由数据"""
+
+    __slots__ = ('name', 'patterns', 'regex', 'canonical', 'supports', 'extract_id')
+
+    def __init__(self, name: str, patterns: Sequence[str], canonical: Callable[[str], str],
+                 supports: Optional[Callable[[str], bool]], extract_id: Optional[Callable[[str], Optional[str]]]):
+        self.name = name
+        self.patterns = tuple(patterns)
+        self.regex = compile_url_patterns(self.patterns)
+        self.canonical = canonical
+        self.supports = supports
+        self.extract_id = extract_id
+
+    def _id_of(self, match: re.Match) -> Optional[str]:
+        video_id = matched_id(match)
+        return self.canonical(video_id) if video_id else None
+
+    def video_id(self, url: str) -> Optional[str]:
+        """URL中的标准化视频ID"""
+        if self.regex is None:
+            return self.extract_id(url) if self.extract_id else None
+        match = self.regex.search(url)
+        return self._id_of(match) if match else None
+
+    def match(self, url: str, pos: int = 0) -> Optional[Route]:
+        """URL（从 ``pos`` 开始）是该平台的视频URL时返回路由结果"""
+        if self.regex is None:
+            if self.supports and self.supports(url):
+                return Route(self.name, self.video_id(url))
+            return None
+        match = self.regex.search(url, pos)
+        return Route(self.name, self._id_of(match)) if match else None
+
+
+class URLRouter:
+    """预编译的URL路由：主机名后缀字典树 + 每个平台一个合并正则"""
+
+    def __init__(self):
+        self._hosts = HostTrie()
+        self._routes: Dict[str, _PlatformRoute] = {}
+        # 主机名不匹配时使用的所有平台合并正则，分组 p0、p1… 对应 _fallback_names 中的平台
+        self._fallback: Optional[Pattern] = None
+        self._fallback_names: List[str] = []
+
+    def add(self, name: str, domains: Iterable[str], patterns: Sequence[str] = (),
+            canonical: Optional[Callable[[str], str]] = None,
+            supports: Optional[Callable[[str], bool]] = None,
+            extract_id: Optional[Callable[[str], Optional[str]]] = None) -> None:
+        """注册平台
+
+        ``canonical`` 将匹配到的ID标准化；没有URL正则的平台用 ``supports(url)``
+        判断是否支持，用 ``extract_id(url)`` 提取ID。
+        已被其他平台注册的域名保持不变，其他平台域名的子域名可以单独注册。
+        """
+        for domain in domains:
+            if self._hosts.get(domain) in (None, name):
+                self._hosts.insert(domain, name)
+        self._routes[name] = _PlatformRoute(
+            name, patterns, canonical or (lambda video_id: video_id), supports, extract_id
+        )
+        self._build_fallback()
+
+    def remove(self, name: str) -> None:
+        """注销平台"""
+        self._routes.pop(name, None)
+        self._hosts.remove_value(name)
+        self._build_fallback()
+
+    def _build_fallback(self) -> None:
+        """将所有平台的URL正则合并为一个，一次搜索找到URL中任意平台的视频链接"""
+        self._fallback_names = [name for name, platform_route in self._routes.items() if platform_route.patterns]
+        groups = '|'.join(
+            f"(?P<p{index}>{'|'.join(_ID_GROUP_RE.sub('(?:', pattern) for pattern in self._routes[name].patterns)})"
+            for index, name in enumerate(self._fallback_names)
+        )
+        self._fallback = re.compile(f"{_BOUNDARY}(?:{groups})", re.IGNORECASE) if groups else None
+
+    def route(self, url: str) -> Optional[Route]:
+        """URL所属平台和视频ID，不支持的URL返回None"""
+        if not url:
+            return None
+        hostname = extract_hostname(url)
+        name = self._hosts.lookup(hostname) if hostname else None
+        if name is not None:
+            return Route(name, self._routes[name].video_id(url))
+
+        # 主机名不匹配时（如跳转链接中嵌入的视频URL）按平台正则查找
+        match = self._fallback.search(url) if self._fallback else None
+        if match:
+            platform_route = self._routes[self._fallback_names[int(match.lastgroup[1:])]]
+            return platform_route.match(url, match.start())
+        for platform_route in self._routes.values():
+            if not platform_route.patterns:
+                result = platform_route.match(url)
+                if result:
+                    return result
+        return None
+
+    def classify(self, urls: Iterable[str]) -> Iterator[Optional[Route]]:
+        """批量路由"""
+        route = self.route
+        for url in urls:
+            yield route(url.strip())
+
+    @property
+    def platforms(self) -> List[str]:
+        """已注册的平台名称"""
+        return list(self._routes)
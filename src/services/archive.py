@@ -0,0 +1,257 @@
+"""Download archive: what was already downloaded, and where.
+
+The archive maps ``platform:video_id:format`` to the file path, size,
+modification time, content hash and content fingerprint (see
+:mod:`.content_store`). It lives in memory as a dict, so a
+lookup is O(1), and is persisted as an append-only JSON Lines journal, so
+recording an entry is a single appended line. The journal is compacted
+when superseded lines pile up.
+
+:meth:`DownloadArchive.rebuild` scans a download directory and re-indexes
+files named ``{title} [{id}].ext``; files whose size and mtime did not
+change are not hashed again. A file name does not tell the quality it was
+downloaded in, so rebuilt entries are recorded under :data:`ANY_FORMAT` and
+match a lookup in any format.
+"""
+
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterator, Optional
+
+from ..core.exceptions import FileOperationError
+from ..core.logger import logger
+from .content_store import file_fingerprint
+
+
+MEDIA_EXTENSIONS = ('.mp4', '.flv', '.mkv', '.webm', '.m4a', '.mp3', '.ts')
+
+# "{title} [{id}].ext", as produced by file_utils.video_filename
+_ID_IN_NAME_RE = re.compile(r'\[([A-Za-z0-9_-]+)\]$')
+
+HASH_CHUNK_SIZE = 1024 * 1024
+
+# Format of entries whose quality is unknown, such as rebuilt ones
+ANY_FORMAT = '*'
+
+
+def file_hash(path: Path) -> str:
+    """SHA-256 of a file, read in chunks."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def video_id_from_filename(path: Path) -> Optional[str]:
+    """Get the video id from a ``{title} [{id}].ext`` file name."""
+    match = _ID_IN_NAME_RE.search(path.stem)
+    return match.group(1) if match else None
+
+
+class DownloadArchive:
+    """Persistent index of downloaded videos."""
+
+    def __init__(self, archive_file: Optional[Path] = None, compact_ratio: float = 2.0):
+        self.archive_file = archive_file or Path.home() / ".video_downloader" / "archive.jsonl"
+        self.compact_ratio = compact_ratio
+        self._entries: Dict[str, Dict[str, Any]] = {}
+        self._by_fingerprint: Dict[str, str] = {}
+        self._journal_lines = 0
+        self._lock = threading.Lock()
+        self.load()
+
+    @staticmethod
+    def make_key(platform: str, video_id: str, fmt: str = 'best') -> str:
+        """Archive key of a video in one format."""
+        return f"{platform}:{video_id}:{fmt or 'best'}"
+
+    def load(self) -> None:
+        """Replay the journal."""
+        self._entries = {}
+        self._by_fingerprint = {}
+        self._journal_lines = 0
+        if not self.archive_file.exists():
+            return
+
+        with open(self.archive_file, 'r', encoding='utf-8') as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    # A torn last line after a crash
+                    logger.warning(f"Skipping corrupt archive line in {self.archive_file}")
+                    continue
+                self._journal_lines += 1
+                if record.get('deleted'):
+                    self._drop(record['key'])
+                else:
+                    self._put(record)
+
+        if self._journal_lines > max(len(self._entries) * self.compact_ratio, 100):
+            self.compact()
+
+    def _put(self, record: Dict[str, Any]) -> None:
+        """Index a record by key and content fingerprint."""
+        self._entries[record['key']] = record
+        if record.get('fingerprint'):
+            self._by_fingerprint[record['fingerprint']] = record['key']
+
+    def _drop(self, key: str) -> Optional[Dict[str, Any]]:
+        """Remove a record from both indexes."""
+        record = self._entries.pop(key, None)
+        if record and self._by_fingerprint.get(record.get('fingerprint')) == key:
+            del self._by_fingerprint[record['fingerprint']]
+        return record
+
+    def _append(self, record: Dict[str, Any]) -> None:
+        """Append one record to the journal."""
+        try:
+            self.archive_file.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.archive_file, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(record, ensure_ascii=False) + '\n')
+        except OSError as e:
+            raise FileOperationError(f"Failed to write download archive: {e}")
+        self._journal_lines += 1
+
+    def compact(self) -> None:
+        """Rewrite the journal with only the live entries."""
+        with self._lock:
+            temp_file = self.archive_file.with_suffix('.tmp')
+            try:
+                with open(temp_file, 'w', encoding='utf-8') as f:
+                    for record in self._entries.values():
+                        f.write(json.dumps(record, ensure_ascii=False) + '\n')
+                os.replace(temp_file, self.archive_file)
+            except OSError as e:
+                raise FileOperationError(f"Failed to compact download archive: {e}")
+            self._journal_lines = len(self._entries)
+
+    def get(self, platform: str, video_id: str, fmt: str = 'best') -> Optional[Dict[str, Any]]:
+        """Get the entry of a video whose file still exists with the recorded size.
+
+        Falls back to an entry of unknown quality when there is none in ``fmt``.
+        """
+        for key in (self.make_key(platform, video_id, fmt), self.make_key(platform, video_id, ANY_FORMAT)):
+            entry = self._existing(self._entries.get(key))
+            if entry is not None:
+                return entry
+        return None
+
+    def find_content(self, fingerprint: str) -> Optional[Dict[str, Any]]:
+        """Get an entry whose file has the given content fingerprint."""
+        return self._existing(self._entries.get(self._by_fingerprint.get(fingerprint, '')))
+
+    @staticmethod
+    def _existing(entry: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        """The entry if its file still exists with the recorded size."""
+        if entry is None:
+            return None
+        try:
+            if Path(entry['path']).stat().st_size != entry['size']:
+                return None
+        except OSError:
+            return None
+        return entry
+
+    def contains(self, platform: str, video_id: str, fmt: str = 'best') -> bool:
+        """Check whether a video was already downloaded."""
+        return self.get(platform, video_id, fmt) is not None
+
+    def record(self, platform: str, video_id: str, path: Path, fmt: str = 'best',
+               format_id: Optional[str] = None, sha256: Optional[str] = None) -> Dict[str, Any]:
+        """Record a finished download."""
+        path = Path(path)
+        stat = path.stat()
+        record = {
+            'key': self.make_key(platform, video_id, fmt),
+            'platform': platform,
+            'video_id': video_id,
+            'format': fmt or 'best',
+            'format_id': format_id,
+            'path': str(path.resolve()),
+            'size': stat.st_size,
+            'mtime': stat.st_mtime,
+            'sha256': sha256 or file_hash(path),
+            'fingerprint': file_fingerprint(path),
+            'recorded_at': time.time(),
+        }
+        with self._lock:
+            self._put(record)
+            self._append(record)
+        return record
+
+    def remove(self, key: str) -> None:
+        """Forget an entry."""
+        with self._lock:
+            if self._drop(key) is not None:
+                self._append({'key': key, 'deleted': True})
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        return iter(list(self._entries.values()))
+
+    def rebuild(self, directory: Path, platform: str = 'bilibili', fmt: str = ANY_FORMAT) -> Dict[str, int]:
+        """Re-index a download directory incrementally.
+
+        Files are matched by their ``[id]`` suffix. Unchanged files (same
+        size and mtime as recorded) are skipped, changed and new ones are
+        hashed, and entries under ``directory`` whose file is gone are
+        removed. New files are recorded in ``fmt``, by default as of unknown
+        quality.
+        """
+        directory = Path(directory).resolve()
+        by_path = {entry['path']: entry for entry in self}
+        stats = {'added': 0, 'updated': 0, 'unchanged': 0, 'removed': 0}
+        seen = set()
+
+        for path in directory.rglob('*'):
+            if path.suffix.lower() not in MEDIA_EXTENSIONS or not path.is_file():
+                continue
+            video_id = video_id_from_filename(path)
+            if not video_id:
+                continue
+
+            resolved = str(path.resolve())
+            seen.add(resolved)
+            stat = path.stat()
+            entry = by_path.get(resolved)
+            if entry and entry['size'] == stat.st_size and entry['mtime'] == stat.st_mtime:
+                stats['unchanged'] += 1
+                continue
+
+            if entry:
+                self.record(entry['platform'], entry['video_id'], path, entry['format'], entry.get('format_id'))
+                stats['updated'] += 1
+            else:
+                self.record(platform, video_id, path, fmt)
+                stats['added'] += 1
+
+        for resolved, entry in by_path.items():
+            if resolved not in seen and resolved.startswith(str(directory) + os.sep) and not Path(resolved).exists():
+                self.remove(entry['key'])
+                stats['removed'] += 1
+
+        logger.info(f"Archive rebuilt from {directory}: {stats}")
+        return stats
+
+
+_archive: Optional[DownloadArchive] = None
+
+
+def get_download_archive() -> DownloadArchive:
+    """Get the shared download archive, loaded on first use."""
+    global _archive
+    if _archive is None:
+        _archive = DownloadArchive()
+    return _archive
@@ -2,12 +2,30 @@
 
 import re
 import json
-from typing import Dict, Any, Optional, List
-from urllib.parse import urlparse, quote
-import requests
-import yt_dlp
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, Optional, List, Tuple
+from urllib.parse import urlparse, quote, parse_qs
+from ..core.config import config_manager
 from ..core.exceptions import URLParseError, NetworkError, DownloadError
 from ..core.logger import logger
+from ..core.metrics import API_REQUEST_SECONDS, HTTP_RESPONSES, RETRIES, status_class
+from ..utils.range_utils import parse_page_selection
+from .extraction import HedgedExtractor, SingleFlightCache
+from .format_selector import format_bitrate, normalize_codec, select_format
+from .models import compact_formats
+from .rate_limiter import BILIBILI_THROTTLE_CODES, THROTTLE_STATUS_CODES, parse_retry_after, rate_limiters
+from .ytdlp_pool import get_ytdlp_pool
+
+
+# Browser-like headers expected by the Bilibili web API
+BILIBILI_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
+    'Referer': 'https://www.bilibili.com/',
+    'Accept': 'application/json, text/plain, */*',
+    'Accept-Language': 'zh-CN,zh;q=0.9,en;q=0.8',
+}
 
 
 class BilibiliService:
@@ -22,16 +40,36 @@ class BilibiliService:
         
         # Official API settings
         self.api_base = "https://api.bilibili.com"
-        self.headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
-            'Referer': 'https://www.bilibili.com/',
-            'Accept': 'application/json, text/plain, */*',
-            'Accept-Language': 'zh-CN,zh;q=0.9,en;q=0.8',
-        }
+        self.headers = dict(BILIBILI_HEADERS)
+        
+        # Request session for API calls, created on first use
+        self._api_session = None
+        
+        # Upper bound for concurrent playurl requests (multi-page videos)
+        self.max_parallel_requests = 8
+        
+        # Adaptive pacing shared by every Bilibili API caller
+        self.rate_limiters = rate_limiters
+        self.max_throttle_retries = 3
+        
+        # Hedged official API / yt-dlp extraction
+        self.extractor = HedgedExtractor(['official', 'ytdlp'])
+        
+        # Recent info results (play URLs stay valid well beyond the TTL)
+        self.info_cache = SingleFlightCache(ttl=120.0)
         
-        # Request session for API calls
-        self.api_session = requests.Session()
-        self.api_session.headers.update(self.headers)
+        # Warm yt-dlp worker processes (spawned on first use)
+        self.ytdlp_pool = get_ytdlp_pool()
+    
+    @property
+    def api_session(self):
+        """Get the requests session, importing requests on first use."""
+        if self._api_session is None:
+            import requests
+            
+            self._api_session = requests.Session()
+            self._api_session.headers.update(self.headers)
+        return self._api_session
     
     def is_valid_url(self, url: str) -> bool:
         """Check if URL is a valid Bilibili URL."""
@@ -69,37 +107,84 @@ class BilibiliService:
         return None
     
     def _call_bilibili_api(self, endpoint: str, params: Dict[str, Any]) -> Optional[Dict]:
-        """Make API call to Bilibili."""
-        try:
-            url = f"{self.api_base}{endpoint}"
-            response = self.api_session.get(url, params=params, timeout=15)
-            response.raise_for_status()
+        """Make a rate-limited API call to Bilibili.
+        
+        Throttled requests (HTTP 412/429, codes -412/-509/-799) slow the
+        limiters down and are queued again instead of failing straight into
+        the yt-dlp fallback.
+        """
+        url = f"{self.api_base}{endpoint}"
+        limit = self.rate_limiters.limit('bilibili', endpoint)
+        
+        latency = API_REQUEST_SECONDS.labels(endpoint=endpoint)
+        
+        for attempt in range(self.max_throttle_retries + 1):
+            if attempt:
+                RETRIES.labels(operation='api_throttle').inc()
+            limit.acquire()
+            try:
+                started = time.monotonic()
+                response = self.api_session.get(url, params=params, timeout=15)
+                latency.observe(time.monotonic() - started)
+                HTTP_RESPONSES.labels('api', status_class(response.status_code)).inc()
+                if response.status_code in THROTTLE_STATUS_CODES:
+                    limit.on_throttle(parse_retry_after(response.headers.get('Retry-After')))
+                    continue
+                response.raise_for_status()
+                
+                data = response.json()
+            except Exception as e:
+                logger.error(f"API call failed: {e}")
+                return None
             
-            data = response.json()
             if data.get('code') == 0:
-                return data.get('data')
-            else:
-                logger.warning(f"API returned error: {data.get('message', 'Unknown error')}")
-                return None
-                
-        except Exception as e:
-            logger.error(f"API call failed: {e}")
+                limit.on_success()
+                # PGC (bangumi) endpoints return their payload as "result"
+                return data['data'] if 'data' in data else data.get('result')
+            
+            if data.get('code') in BILIBILI_THROTTLE_CODES:
+                limit.on_throttle()
+                continue
+            
+            logger.warning(f"API returned error: {data.get('message', 'Unknown error')}")
             return None
+        
+        logger.error(f"API still throttled after {self.max_throttle_retries} retries: {endpoint}")
+        return None
     
-    def _get_video_info_via_api(self, bvid: str) -> Optional[Dict[str, Any]]:
-        """Get video info using Bilibili official API."""
-        # Get basic video information
-        video_info = self._call_bilibili_api('/x/web-interface/view', {'bvid': bvid})
-        if not video_info:
-            return None
+    def _get_page_from_url(self, url: str) -> int:
+        """Extract the 1-based page number (?p=N) from a Bilibili URL."""
+        try:
+            page = int(parse_qs(urlparse(url).query).get('p', ['1'])[0])
+        except ValueError:
+            return 1
+        return max(page, 1)
+    
+    def _get_pages_from_view(self, video_info: Dict) -> List[Dict[str, Any]]:
+        """Extract the page (分P) list from a view API response."""
+        pages = []
+        for page in video_info.get('pages') or []:
+            pages.append({
+                'page': page.get('page', len(pages) + 1),
+                'cid': page.get('cid'),
+                'part': page.get('part', ''),
+                'duration': page.get('duration', 0),
+            })
         
-        # Get play URL for each part
-        cid = video_info.get('cid')
-        if not cid:
-            logger.error(f"No CID found for video {bvid}")
-            return None
+        # Single-part videos may omit the page list
+        if not pages and video_info.get('cid'):
+            pages.append({
+                'page': 1,
+                'cid': video_info['cid'],
+                'part': video_info.get('title', ''),
+                'duration': video_info.get('duration', 0),
+            })
         
-        play_info = self._call_bilibili_api('/x/player/playurl', {
+        return pages
+    
+    def _get_play_info(self, bvid: str, cid: int) -> Optional[Dict]:
+        """Get play URL information for a single page."""
+        return self._call_bilibili_api('/x/player/playurl', {
             'bvid': bvid,
             'cid': cid,
             'fourk': 1,
@@ -107,7 +192,24 @@ class BilibiliService:
             'fnver': 0,
             'fnval': 976  # Support DASH format
         })
+    
+    def _get_video_info_via_api(self, bvid: str, page: int = 1) -> Optional[Dict[str, Any]]:
+        """Get video info using Bilibili official API."""
+        # Get basic video information
+        video_info = self._call_bilibili_api('/x/web-interface/view', {'bvid': bvid})
+        if not video_info:
+            return None
+        
+        pages = self._get_pages_from_view(video_info)
+        if not pages:
+            logger.error(f"No CID found for video {bvid}")
+            return None
         
+        # Get play URL for the requested part, falling back to P1
+        current = next((p for p in pages if p['page'] == page), pages[0])
+        cid = current['cid']
+        
+        play_info = self._get_play_info(bvid, cid)
         if not play_info:
             return None
         
@@ -127,8 +229,175 @@ class BilibiliService:
             'api_source': 'official',  # Mark as API source
             'cid': cid,
             'bvid': bvid,
+            'page': current['page'],
+            'pages': pages,
+        }
+    
+    def _get_bangumi_ids(self, url: str) -> Optional[Tuple[str, str]]:
+        """Extract ('ep', id) or ('ss', id) from a bangumi URL."""
+        match = re.search(r'/bangumi/play/(ep|ss)(\d+)', url)
+        if match:
+            return match.group(1), match.group(2)
+        return None
+    
+    def _get_season_info(self, kind: str, bangumi_id: str) -> Optional[Dict]:
+        """Get PGC season information (with its episode list)."""
+        param = 'ep_id' if kind == 'ep' else 'season_id'
+        return self._call_bilibili_api('/pgc/view/web/season', {param: bangumi_id})
+    
+    def _get_episodes_from_season(self, season: Dict) -> List[Dict[str, Any]]:
+        """Map the episodes of a season to the page list format."""
+        episodes = []
+        for episode in season.get('episodes') or []:
+            title = ' '.join(
+                part for part in (str(episode.get('title', '')), episode.get('long_title', '')) if part
+            )
+            episodes.append({
+                'page': len(episodes) + 1,
+                'cid': episode.get('cid'),
+                'part': title,
+                # PGC durations are reported in milliseconds
+                'duration': (episode.get('duration') or 0) // 1000,
+                'ep_id': episode.get('ep_id') or episode.get('id'),
+                'bvid': episode.get('bvid', ''),
+            })
+        return episodes
+    
+    def _get_pgc_play_info(self, ep_id: int, cid: int) -> Optional[Dict]:
+        """Get play URL information for a bangumi episode."""
+        return self._call_bilibili_api('/pgc/player/web/playurl', {
+            'ep_id': ep_id,
+            'cid': cid,
+            'fourk': 1,
+            'otype': 'json',
+            'fnver': 0,
+            'fnval': 976  # Support DASH format
+        })
+    
+    def _get_bangumi_info_via_api(self, kind: str, bangumi_id: str) -> Optional[Dict[str, Any]]:
+        """Get bangumi episode info natively through the PGC API."""
+        season = self._get_season_info(kind, bangumi_id)
+        if not season:
+            return None
+        
+        episodes = self._get_episodes_from_season(season)
+        if not episodes:
+            logger.error(f"No episodes found for {kind}{bangumi_id}")
+            return None
+        
+        # ep URLs select their episode, ss URLs start at the first one
+        current = episodes[0]
+        if kind == 'ep':
+            current = next((e for e in episodes if str(e['ep_id']) == bangumi_id), current)
+        
+        play_info = self._get_pgc_play_info(current['ep_id'], current['cid'])
+        if not play_info:
+            return None
+        
+        return {
+            'id': f"ep{current['ep_id']}",
+            'title': f"{season.get('title', '')} {current['part']}".strip(),
+            'description': season.get('evaluate', ''),
+            'duration': current['duration'],
+            'uploader': (season.get('up_info') or {}).get('uname', ''),
+            'upload_date': '',
+            'view_count': (season.get('stat') or {}).get('views', 0),
+            'like_count': (season.get('stat') or {}).get('likes', 0),
+            'thumbnail': season.get('cover', ''),
+            'formats': self._extract_formats_from_api(play_info),
+            'subtitles': {},
+            'api_source': 'official',
+            'cid': current['cid'],
+            'bvid': current['bvid'],
+            'season_id': season.get('season_id'),
+            'ep_id': current['ep_id'],
+            'page': current['page'],
+            'pages': episodes,
         }
     
+    def _get_page_play_info(self, bvid: str, page: Dict[str, Any]) -> Optional[Dict]:
+        """Get play URL information for a page or bangumi episode."""
+        if page.get('ep_id'):
+            return self._get_pgc_play_info(page['ep_id'], page['cid'])
+        return self._get_play_info(bvid, page['cid'])
+    
+    def resolve_pages(self, bvid: str, pages: List[Dict[str, Any]]) -> Dict[int, List[Dict]]:
+        """Resolve the formats of several pages concurrently.
+        
+        Returns a mapping of page number to formats. Pages whose playurl
+        request failed are left out of the result.
+        """
+        if not pages:
+            return {}
+        
+        def _resolve(page: Dict[str, Any]) -> Optional[List[Dict]]:
+            play_info = self._get_page_play_info(bvid, page)
+            return self._extract_formats_from_api(play_info) if play_info else None
+        
+        workers = min(len(pages), self.max_parallel_requests)
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(_resolve, pages))
+        
+        resolved = {}
+        for page, formats in zip(pages, results):
+            if formats:
+                resolved[page['page']] = formats
+            else:
+                logger.warning(f"Failed to resolve P{page['page']} of {bvid}")
+        
+        return resolved
+    
+    def get_page_download_urls(self, url: str, selection: Optional[str] = None,
+                               quality: str = 'best') -> List[Dict[str, Any]]:
+        """Get download URLs for the selected pages of a multi-part video.
+        
+        ``selection`` uses the ``1-5,9`` syntax; when omitted every page is
+        selected.
+        """
+        video_info = self.get_video_info(url)
+        pages = video_info.get('pages') or []
+        
+        # yt-dlp results carry no page list, treat them as a single part
+        if not pages:
+            selected_format = self._select_format(video_info.get('formats', []), quality)
+            if not selected_format:
+                raise DownloadError("No valid format URL found")
+            return [{
+                'page': 1,
+                'part': video_info.get('title', ''),
+                'cid': video_info.get('cid'),
+                'url': selected_format['url'],
+                'format_id': selected_format.get('format_id', ''),
+                'filesize': selected_format.get('filesize', 0),
+            }]
+        
+        page_numbers = set(parse_page_selection(selection, len(pages)))
+        selected_pages = [p for p in pages if p['page'] in page_numbers]
+        
+        logger.info(f"Resolving {len(selected_pages)} page(s) of {video_info['id']}")
+        resolved = self.resolve_pages(video_info.get('bvid', ''), selected_pages)
+        
+        downloads = []
+        for page in selected_pages:
+            selected_format = self._select_format(resolved.get(page['page'], []), quality)
+            if not selected_format:
+                logger.warning(f"No valid format for P{page['page']}, skipping")
+                continue
+            
+            downloads.append({
+                'page': page['page'],
+                'part': page['part'],
+                'cid': page['cid'],
+                'url': selected_format['url'],
+                'format_id': selected_format.get('format_id', ''),
+                'filesize': selected_format.get('filesize', 0),
+            })
+        
+        if not downloads:
+            raise DownloadError("No downloadable pages found")
+        
+        return downloads
+    
     def _extract_formats_from_api(self, play_info: Dict) -> List[Dict]:
         """Extract video formats from Bilibili API response."""
         formats = []
@@ -145,11 +414,15 @@ class BilibiliService:
                     'format_note': f"{video['width']}x{video['height']} {video.get('id', '')}",
                     'width': video.get('width', 0),
                     'height': video.get('height', 0),
-                    'fps': video.get('frame_rate', 0),
+                    'fps': self._parse_frame_rate(video.get('frame_rate')),
                     'filesize': video.get('size', 0),
-                    'vcodec': video.get('codecid', ''),
+                    'vcodec': video.get('codecs') or normalize_codec(video.get('codecid')),
+                    'codecid': video.get('codecid'),
+                    'bandwidth': video.get('bandwidth', 0),
                     'acodec': 'none',  # Video only stream
                     'url': video.get('baseUrl', ''),
+                    'backup_urls': video.get('backupUrl') or [],
+                    'segment_base': video.get('SegmentBase') or video.get('segment_base'),
                     'protocol': 'https_dash',
                 })
             
@@ -161,8 +434,11 @@ class BilibiliService:
                     'format_note': f"Audio {audio.get('id', '')}",
                     'filesize': audio.get('size', 0),
                     'vcodec': 'none',
-                    'acodec': audio.get('codecid', ''),
+                    'acodec': audio.get('codecs') or str(audio.get('codecid', '')),
+                    'bandwidth': audio.get('bandwidth', 0),
                     'url': audio.get('baseUrl', ''),
+                    'backup_urls': audio.get('backupUrl') or [],
+                    'segment_base': audio.get('SegmentBase') or audio.get('segment_base'),
                     'protocol': 'https_dash',
                 })
         
@@ -180,53 +456,84 @@ class BilibiliService:
         
         return formats
     
-    def get_video_info(self, url: str) -> Dict[str, Any]:
-        """Get video information from Bilibili URL with API priority."""
-        if not self.is_valid_url(url):
-            raise URLParseError(f"Invalid Bilibili URL: {url}")
+    @staticmethod
+    def _parse_frame_rate(frame_rate: Any) -> float:
+        """Parse a DASH frame rate such as "29.970" or "30000/1001"."""
+        try:
+            if isinstance(frame_rate, str) and '/' in frame_rate:
+                numerator, denominator = frame_rate.split('/', 1)
+                return round(float(numerator) / float(denominator), 3)
+            return float(frame_rate or 0)
+        except (TypeError, ValueError, ZeroDivisionError):
+            return 0.0
+    
+    def _get_info_via_official(self, url: str) -> Optional[Dict[str, Any]]:
+        """Get video info through the official (or PGC) API."""
+        # Bangumi episodes and seasons resolve natively through the PGC API
+        bangumi_ids = self._get_bangumi_ids(url)
+        if bangumi_ids:
+            logger.info(f"Trying official PGC API for {''.join(bangumi_ids)}")
+            return self._get_bangumi_info_via_api(*bangumi_ids)
         
         bvid = self._get_bvid_from_url(url)
+        if not bvid:
+            return None
         
-        # First try official API
-        if bvid:
-            logger.info(f"Trying official Bilibili API for {bvid}")
-            try:
-                api_info = self._get_video_info_via_api(bvid)
-                if api_info:
-                    logger.info("Successfully retrieved video info via official API")
-                    return api_info
-                else:
-                    logger.warning("Official API failed, falling back to yt-dlp")
-            except Exception as e:
-                logger.warning(f"Official API error: {e}, falling back to yt-dlp")
+        logger.info(f"Trying official Bilibili API for {bvid}")
+        return self._get_video_info_via_api(bvid, self._get_page_from_url(url))
+    
+    def _get_info_via_ytdlp(self, url: str, api_source: str = 'ytdlp',
+                            cancel: Optional[threading.Event] = None) -> Dict[str, Any]:
+        """Get video info through yt-dlp; setting ``cancel`` abandons the extraction."""
+        info = self.ytdlp_pool.extract_info(url, self.session_options, cancel=cancel)
+        
+        return {
+            'id': info.get('id', ''),
+            'title': info.get('title', ''),
+            'description': info.get('description', ''),
+            'duration': info.get('duration', 0),
+            'uploader': info.get('uploader', ''),
+            'upload_date': info.get('upload_date', ''),
+            'view_count': info.get('view_count', 0),
+            'like_count': info.get('like_count', 0),
+            'thumbnail': info.get('thumbnail', ''),
+            # yt-dlp formats carry fragments and headers the download never needs
+            'formats': compact_formats(info.get('formats')),
+            'subtitles': info.get('subtitles', {}),
+            'api_source': api_source,  # Mark as yt-dlp source
+        }
+    
+    def get_video_info(self, url: str) -> Dict[str, Any]:
+        """Get video information from Bilibili URL.
+        
+        The official API and yt-dlp run as hedged requests: the preferred
+        source (``api_priority`` setting, or adaptive when ``auto``) starts
+        first and the other one joins once it exceeds its latency budget or
+        fails. The first valid result wins.
+        """
+        if not self.is_valid_url(url):
+            raise URLParseError(f"Invalid Bilibili URL: {url}")
         
-        # Fallback to yt-dlp
-        logger.info("Using yt-dlp as fallback")
+        # Concurrent and back-to-back lookups of one URL share a single fetch
+        return self.info_cache.get_or_call(url, lambda: self._fetch_video_info(url))
+    
+    def _fetch_video_info(self, url: str) -> Dict[str, Any]:
+        """Run the hedged official API / yt-dlp extraction."""
+        priority = config_manager.get('api_priority', 'auto')
         try:
-            with yt_dlp.YoutubeDL(self.session_options) as ydl:
-                info = ydl.extract_info(url, download=False)
-                
-                result = {
-                    'id': info.get('id', ''),
-                    'title': info.get('title', ''),
-                    'description': info.get('description', ''),
-                    'duration': info.get('duration', 0),
-                    'uploader': info.get('uploader', ''),
-                    'upload_date': info.get('upload_date', ''),
-                    'view_count': info.get('view_count', 0),
-                    'like_count': info.get('like_count', 0),
-                    'thumbnail': info.get('thumbnail', ''),
-                    'formats': info.get('formats', []),
-                    'subtitles': info.get('subtitles', {}),
-                    'api_source': 'ytdlp',  # Mark as yt-dlp source
-                }
-                
-                logger.info("Successfully retrieved video info via yt-dlp")
-                return result
-                
+            source, info = self.extractor.extract(
+                {
+                    'official': lambda cancelled: self._get_info_via_official(url),
+                    'ytdlp': lambda cancelled: self._get_info_via_ytdlp(url, cancel=cancelled),
+                },
+                priority=priority,
+            )
         except Exception as e:
             logger.error(f"Both API and yt-dlp failed: {e}")
             raise NetworkError(f"Failed to retrieve video information: {e}")
+        
+        logger.info(f"Successfully retrieved video info via {source}")
+        return info
     
     def get_download_url(self, url: str, quality: str = 'best') -> str:
         """Get direct download URL for video with API priority."""
@@ -254,47 +561,8 @@ class BilibiliService:
             raise DownloadError(f"Failed to get download URL: {e}")
     
     def _select_format(self, formats: List[Dict], quality: str = 'best') -> Optional[Dict]:
-        """Select the best format based on quality preference."""
-        if not formats:
-            return None
-        
-        # Filter out formats without URLs
-        valid_formats = [f for f in formats if 'url' in f and f['url']]
-        if not valid_formats:
-            return None
-        
-        # Preference: DASH video > legacy formats > audio only
-        video_formats = [f for f in valid_formats if f.get('vcodec') != 'none']
-        audio_formats = [f for f in valid_formats if f.get('acodec') != 'none']
-        
-        if quality == 'best':
-            # Select highest quality video format
-            if video_formats:
-                # Sort by resolution (height) then by file size
-                video_formats.sort(key=lambda x: (x.get('height', 0), x.get('filesize', 0)), reverse=True)
-                return video_formats[0]
-            elif valid_formats:
-                return valid_formats[0]
-        elif quality == 'worst':
-            # Select lowest quality
-            if video_formats:
-                video_formats.sort(key=lambda x: (x.get('height', 0), x.get('filesize', 0)))
-                return video_formats[0]
-            elif valid_formats:
-                return valid_formats[0]
-        elif quality.startswith('dash'):
-            # Handle specific DASH quality requests
-            # quality format: "dash-120", "dash-116", etc.
-            for fmt in valid_formats:
-                if fmt.get('format_id') == quality:
-                    return fmt
-            # Fallback to best video
-            if video_formats:
-                video_formats.sort(key=lambda x: x.get('height', 0), reverse=True)
-                return video_formats[0]
-        
-        # Default: return first valid format
-        return valid_formats[0]
+        """Select the format matching a quality expression (see format_selector)."""
+        return select_format(formats, quality)
     
     def get_available_formats(self, url: str) -> List[Dict[str, Any]]:
         """Get available video formats with API priority."""
@@ -318,6 +586,7 @@ class BilibiliService:
                     'width': fmt.get('width', 0),
                     'height': fmt.get('height', 0),
                     'protocol': fmt.get('protocol', ''),
+                    'bitrate': format_bitrate(fmt),
                     'source': api_source,  # Add source info
                 }
                 
@@ -372,12 +641,29 @@ class BilibiliService:
         if not self.is_valid_url(url):
             raise URLParseError(f"Invalid Bilibili URL: {url}")
         
+        bangumi_ids = self._get_bangumi_ids(url)
+        if bangumi_ids:
+            return ''.join(bangumi_ids)
+        
         bvid = self._get_bvid_from_url(url)
         if bvid:
             return bvid
         
         raise URLParseError(f"Cannot extract video ID from URL: {url}")
     
+    def get_archive_id(self, url: str, page: Optional[int] = None) -> str:
+        """Video id used by the download archive, including the page (分P).
+        
+        ``page`` overrides the page given in the URL.
+        """
+        video_id = self.get_video_id(url)
+        page = page or self._get_page_from_url(url)
+        return f"{video_id}_p{page}" if page > 1 else video_id
+    
+    def get_extraction_statistics(self) -> Dict[str, Dict[str, Any]]:
+        """Get latency and success statistics of each extraction source."""
+        return self.extractor.get_statistics()
+    
     def test_api_availability(self) -> Dict[str, Any]:
         """Test if Bilibili official API is available."""
         try:
@@ -409,26 +695,9 @@ class BilibiliService:
         
         logger.info("Force using yt-dlp")
         try:
-            with yt_dlp.YoutubeDL(self.session_options) as ydl:
-                info = ydl.extract_info(url, download=False)
-                
-                result = {
-                    'id': info.get('id', ''),
-                    'title': info.get('title', ''),
-                    'description': info.get('description', ''),
-                    'duration': info.get('duration', 0),
-                    'uploader': info.get('uploader', ''),
-                    'upload_date': info.get('upload_date', ''),
-                    'view_count': info.get('view_count', 0),
-                    'like_count': info.get('like_count', 0),
-                    'thumbnail': info.get('thumbnail', ''),
-                    'formats': info.get('formats', []),
-                    'subtitles': info.get('subtitles', {}),
-                    'api_source': 'ytdlp_forced',
-                }
-                
-                logger.info("Successfully retrieved video info via forced yt-dlp")
-                return result
+            result = self._get_info_via_ytdlp(url, api_source='ytdlp_forced')
+            logger.info("Successfully retrieved video info via forced yt-dlp")
+            return result
                 
         except Exception as e:
             logger.error(f"Force yt-dlp failed: {e}")
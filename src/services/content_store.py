@@ -0,0 +1,163 @@
+"""Content-addressed deduplication of downloaded media.
+
+The same media is often reachable through several URLs (b23.tv links,
+reuploads, bangumi episodes and their BV ids). Media is identified by a
+fingerprint of its size plus a hash of its first bytes, which a single
+small range request can probe before downloading. When the archive
+already holds a file with that fingerprint, the new target is reflinked
+(copy-on-write clone) or hard-linked to it instead of being downloaded
+again.
+"""
+
+import hashlib
+import os
+import re
+import shutil
+from pathlib import Path
+from typing import Any, Dict, NamedTuple, Optional, Tuple
+
+import aiohttp
+
+from ..core.config import download_config
+from ..core.logger import logger
+
+
+# Bytes hashed at the start of the file: covers the container header
+# (ftyp/moov/sidx), which differs between any two encodes
+FINGERPRINT_BYTES = 64 * 1024
+
+# Linux FICLONE ioctl (reflink on btrfs, xfs, ...)
+_FICLONE = 0x40049409
+
+_CONTENT_RANGE_RE = re.compile(r'bytes\s+\d+-\d+/(\d+)')
+
+
+class RemoteProbe(NamedTuple):
+    """What one small range request tells about remote media."""
+
+    size: Optional[int]
+    accepts_ranges: bool
+    fingerprint: Optional[str]
+
+
+def content_fingerprint(size: int, head: bytes) -> str:
+    """Fingerprint of media of ``size`` bytes starting with ``head``."""
+    return f"{size}:{hashlib.sha256(head[:FINGERPRINT_BYTES]).hexdigest()[:32]}"
+
+
+def file_fingerprint(path: Path) -> str:
+    """Fingerprint of a local file."""
+    path = Path(path)
+    with open(path, 'rb') as f:
+        head = f.read(FINGERPRINT_BYTES)
+    return content_fingerprint(path.stat().st_size, head)
+
+
+async def probe_fingerprint(session: aiohttp.ClientSession, url: str,
+                            headers: Optional[Dict[str, str]] = None,
+                            timeout: Optional[float] = None,
+                            fingerprint: bool = True) -> RemoteProbe:
+    """Probe remote media with one small range request.
+
+    Gets the size, whether byte ranges are served and the fingerprint
+    (None when unknown). With ``fingerprint=False`` only the first byte
+    is requested, for the size and range support alone.
+    """
+    last_byte = FINGERPRINT_BYTES - 1 if fingerprint else 0
+    try:
+        async with session.get(
+            url,
+            headers={**(headers or {}), 'Range': f'bytes=0-{last_byte}'},
+            timeout=aiohttp.ClientTimeout(total=timeout or download_config.timeout)
+        ) as response:
+            if response.status == 206:
+                head = await response.read()
+                match = _CONTENT_RANGE_RE.match(response.headers.get('Content-Range', ''))
+                size = int(match.group(1)) if match else None
+                return RemoteProbe(size, True, content_fingerprint(size, head) if fingerprint and size else None)
+
+            # Range ignored (or an error): take the length and drop the connection
+            length = response.headers.get('Content-Length') if response.status == 200 else None
+            response.close()
+            return RemoteProbe(int(length) if length else None, False, None)
+    except Exception as e:
+        logger.warning(f"Media probe failed: {e}")
+        return RemoteProbe(None, False, None)
+
+
+def _reflink(source: Path, target: Path) -> None:
+    """Clone a file with copy-on-write (Linux FICLONE)."""
+    import fcntl
+
+    with open(source, 'rb') as src, open(target, 'wb') as dst:
+        try:
+            fcntl.ioctl(dst.fileno(), _FICLONE, src.fileno())
+        except OSError:
+            dst.close()
+            target.unlink(missing_ok=True)
+            raise
+
+
+def link_file(source: Path, target: Path, mode: str = 'auto') -> str:
+    """Materialize ``source`` at ``target`` without downloading it again.
+
+    ``mode`` is 'reflink', 'hardlink', 'copy' or 'auto' (reflink, then
+    hard link, then copy). Returns the method used.
+    """
+    source, target = Path(source), Path(target)
+    target.parent.mkdir(parents=True, exist_ok=True)
+    if target.exists():
+        if target.samefile(source):
+            return 'hardlink'
+        target.unlink()
+
+    methods = ['reflink', 'hardlink', 'copy'] if mode == 'auto' else [mode]
+    last_error: Optional[Exception] = None
+    for method in methods:
+        try:
+            if method == 'reflink':
+                _reflink(source, target)
+            elif method == 'hardlink':
+                os.link(source, target)
+            else:
+                shutil.copy2(source, target)
+            return method
+        except (OSError, ImportError) as e:
+            last_error = e
+    raise OSError(f"Cannot link {source} to {target}: {last_error}")
+
+
+class ContentStore:
+    """Finds and links media already present in the download archive."""
+
+    def __init__(self, archive: Any, link_mode: str = 'auto'):
+        self.archive = archive
+        self.link_mode = link_mode
+        self.saved_bytes = 0
+
+    def find(self, fingerprint: Optional[str]) -> Optional[Dict[str, Any]]:
+        """Archive entry of a file with this content, if any."""
+        if not fingerprint:
+            return None
+        return self.archive.find_content(fingerprint)
+
+    def materialize(self, fingerprint: Optional[str], target: Path) -> Optional[Tuple[Dict[str, Any], str]]:
+        """Link existing content to ``target``.
+
+        Returns the archive entry of the source and the link method, or
+        None if the content is unknown.
+        """
+        entry = self.find(fingerprint)
+        if entry is None:
+            return None
+
+        source = Path(entry['path'])
+        try:
+            method = link_file(source, target, self.link_mode)
+        except OSError as e:
+            logger.warning(f"Deduplication failed, downloading instead: {e}")
+            return None
+
+        self.saved_bytes += entry['size']
+        logger.info(f"Deduplicated {target.name} from {source} ({method})")
+        return entry, method
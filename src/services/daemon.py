@@ -0,0 +1,373 @@
+"""Headless download daemon.
+
+:class:`DownloadDaemon` keeps one :class:`DownloadScheduler`, one pooled
+HTTP session and the warm service caches alive for all frontends and
+exposes them over a local HTTP/WebSocket API:
+
+- ``GET /api/health`` -- daemon status
+- ``POST /api/jobs`` -- submit ``{"url", "quality", "output", "threads"}``
+- ``GET /api/jobs``, ``GET /api/jobs/{id}`` -- job status
+- ``DELETE /api/jobs/{id}`` -- cancel a job
+- ``GET /api/events[?job=id]`` -- WebSocket with a snapshot of the jobs,
+  then one message per state or progress change
+
+The API binds to the loopback interface and has no authentication;
+requests carrying an ``Origin`` header are refused so web pages open in
+a browser cannot submit jobs. :mod:`.daemon_client` is the matching
+client used by the CLI and the GUI.
+"""
+
+import asyncio
+import itertools
+import time
+from dataclasses import asdict, dataclass, field
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Optional, Set
+
+from aiohttp import WSMsgType, web
+
+from ..core.config import download_config
+from ..core.exceptions import FileOperationError
+from ..core.logger import logger
+from .daemon_client import DEFAULT_HOST, DEFAULT_PORT, TERMINAL_STATES
+from .mover import drain_background_mover
+from .scheduler import DownloadScheduler
+
+
+# Events buffered per WebSocket subscriber; the oldest are dropped for slow readers
+SUBSCRIBER_QUEUE_SIZE = 256
+
+# Finished jobs are forgotten after this many seconds, or oldest first beyond the count
+FINISHED_JOB_TTL = 24 * 3600
+MAX_FINISHED_JOBS = 1000
+
+_ids = itertools.count(1)
+
+
+@dataclass
+class DaemonJob:
+    """A download submitted to the daemon."""
+
+    url: str
+    quality: str = 'best'
+    output: Optional[str] = None
+    threads: Optional[int] = None
+    id: str = field(default_factory=lambda: str(next(_ids)))
+    state: str = 'queued'
+    progress: float = 0.0
+    title: Optional[str] = None
+    path: Optional[str] = None
+    error: Optional[str] = None
+    created: float = field(default_factory=time.time)
+    started: Optional[float] = None
+    finished: Optional[float] = None
+
+    @property
+    def done(self) -> bool:
+        """Whether the job has reached a terminal state."""
+        return self.state in TERMINAL_STATES
+
+    def to_dict(self) -> Dict[str, Any]:
+        """JSON representation of the job."""
+        return asdict(self)
+
+
+# ``runner(job, report)`` downloads a job, calling ``report()`` after updating it, and returns the path
+JobRunner = Callable[[DaemonJob, Callable[[], None]], Awaitable[str]]
+
+
+class DownloadDaemon:
+    """Long-running download service shared by the CLI and the GUI.
+
+    Use as an async context manager (or call :meth:`start`/:meth:`stop`).
+    ``runner`` replaces the default Bilibili download, e.g. in tests.
+    Finished jobs stay listed for ``job_ttl`` seconds, at most
+    ``max_finished_jobs`` of them.
+    """
+
+    def __init__(self, host: str = DEFAULT_HOST, port: int = DEFAULT_PORT, concurrency: int = 3,
+                 threads: Optional[int] = None, runner: Optional[JobRunner] = None,
+                 job_ttl: float = FINISHED_JOB_TTL, max_finished_jobs: int = MAX_FINISHED_JOBS):
+        self.host = host
+        self.port = port
+        self.threads = threads or download_config.max_threads
+        # The job source never ends, so job outcomes live only in self.jobs
+        self.scheduler = DownloadScheduler(self._run_job, concurrency=concurrency, collect_results=False)
+        self.jobs: Dict[str, DaemonJob] = {}
+        self.job_ttl = job_ttl
+        self.max_finished_jobs = max_finished_jobs
+        self._runner = runner or self._download
+        self._pending: Optional[asyncio.Queue] = None
+        self._tasks: Dict[str, asyncio.Task] = {}
+        self._cancel_requested: Set[str] = set()
+        self._subscribers: Set[asyncio.Queue] = set()
+        self._scheduler_task: Optional[asyncio.Task] = None
+        self._web_runner: Optional[web.AppRunner] = None
+        self._prefetcher = None
+
+    @property
+    def url(self) -> str:
+        """Base URL of the API."""
+        return f"http://{self.host}:{self.port}"
+
+    async def start(self) -> None:
+        """Start the scheduler and the API server."""
+        if self._runner == self._download:
+            from .prefetch import SpeculativePrefetcher
+
+            # One pooled session for every job, sized for the whole scheduler
+            self._prefetcher = SpeculativePrefetcher(
+                warm_connections=self.threads * self.scheduler.concurrency, fingerprint=download_config.dedupe
+            )
+            await self._prefetcher.open()
+
+        self._pending = asyncio.Queue()
+        self._scheduler_task = asyncio.ensure_future(self.scheduler.run(self._job_source()))
+
+        app = web.Application(middlewares=[self._reject_browsers])
+        app.router.add_get('/api/health', self._handle_health)
+        app.router.add_get('/api/jobs', self._handle_list)
+        app.router.add_post('/api/jobs', self._handle_submit)
+        app.router.add_get('/api/jobs/{id}', self._handle_get)
+        app.router.add_delete('/api/jobs/{id}', self._handle_cancel)
+        app.router.add_get('/api/events', self._handle_events)
+        self._web_runner = web.AppRunner(app)
+        await self._web_runner.setup()
+        site = web.TCPSite(self._web_runner, self.host, self.port)
+        await site.start()
+        self.port = self._web_runner.addresses[0][1]
+        logger.info(f"Download daemon listening at {self.url}")
+
+    async def stop(self) -> None:
+        """Stop accepting jobs, abort running downloads and close the connections."""
+        # Wake the event streams so the server can close them
+        for queue in list(self._subscribers):
+            self._offer(queue, None)
+        if self._web_runner is not None:
+            await self._web_runner.cleanup()
+            self._web_runner = None
+        if self._scheduler_task is not None:
+            self._scheduler_task.cancel()
+            await asyncio.gather(self._scheduler_task, return_exceptions=True)
+            self._scheduler_task = None
+        # Finished downloads may still be moving out of the staging directory
+        try:
+            await drain_background_mover()
+        except FileOperationError as e:
+            logger.error(str(e))
+        if self._prefetcher is not None:
+            await self._prefetcher.close()
+            self._prefetcher = None
+
+    async def __aenter__(self) -> "DownloadDaemon":
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.stop()
+
+    async def serve_forever(self) -> None:
+        """Run until cancelled (e.g. by Ctrl+C)."""
+        async with self:
+            await asyncio.Event().wait()
+
+    # Jobs
+
+    def submit(self, url: str, quality: str = 'best', output: Optional[str] = None,
+               threads: Optional[int] = None) -> DaemonJob:
+        """Queue a download."""
+        if self._pending is None:
+            raise RuntimeError("DownloadDaemon is not started")
+        self._prune()
+        job = DaemonJob(url, quality, output, threads)
+        self.jobs[job.id] = job
+        self._pending.put_nowait(job)
+        self._publish(job)
+        return job
+
+    def cancel(self, job_id: str) -> Optional[DaemonJob]:
+        """Cancel a queued or running job; returns None for unknown ids."""
+        job = self.jobs.get(job_id)
+        if job is None or job.done:
+            return job
+        task = self._tasks.get(job_id)
+        if task is not None:
+            # The worker marks the job once the download has unwound
+            self._cancel_requested.add(job_id)
+            task.cancel()
+        else:
+            self._finish(job, 'cancelled')
+        return job
+
+    async def _job_source(self) -> AsyncIterator[DaemonJob]:
+        """Feed submitted jobs to the scheduler until the daemon stops."""
+        while True:
+            yield await self._pending.get()
+
+    async def _run_job(self, job: DaemonJob) -> Optional[str]:
+        """Scheduler worker: run one job and keep its state up to date."""
+        if job.done:
+            return None
+        job.state, job.started = 'running', time.time()
+        self._publish(job)
+
+        task = asyncio.ensure_future(self._runner(job, lambda: self._publish(job)))
+        self._tasks[job.id] = task
+        try:
+            job.path = await task
+        except asyncio.CancelledError:
+            self._finish(job, 'cancelled')
+            if job.id not in self._cancel_requested:
+                # The daemon is stopping
+                task.cancel()
+                raise
+            return None
+        except Exception as e:
+            job.error = str(e)
+            self._finish(job, 'failed')
+            raise
+        finally:
+            self._tasks.pop(job.id, None)
+            self._cancel_requested.discard(job.id)
+
+        job.progress = 100.0
+        self._finish(job, 'completed')
+        return job.path
+
+    def _finish(self, job: DaemonJob, state: str) -> None:
+        job.state, job.finished = state, time.time()
+        self._publish(job)
+        self._prune()
+
+    def _prune(self) -> None:
+        """Forget expired finished jobs, and the oldest beyond the count limit."""
+        finished = sorted((job for job in self.jobs.values() if job.done), key=lambda job: job.finished)
+        excess = len(finished) - self.max_finished_jobs
+        expired = time.time() - self.job_ttl
+        for index, job in enumerate(finished):
+            if index < excess or job.finished < expired:
+                del self.jobs[job.id]
+
+    async def _download(self, job: DaemonJob, report: Callable[[], None]) -> str:
+        """Download a Bilibili video on the shared session, skipping archived ones."""
+        from .pipeline import download_video
+
+        def _on_info(info: Dict[str, Any]) -> None:
+            job.title = info.get('title')
+            report()
+
+        def _on_progress(progress: float) -> None:
+            # Only whole percents go out to the subscribers
+            if int(progress) != int(job.progress):
+                job.progress = progress
+                report()
+            job.progress = progress
+
+        result = await download_video(
+            self._prefetcher, job.url, job.quality, job.output, job.threads or self.threads,
+            on_info=_on_info, on_download=lambda output: _on_progress
+        )
+        return str(result.path)
+
+    # Events
+
+    @staticmethod
+    def _offer(queue: asyncio.Queue, message: Optional[Dict[str, Any]]) -> None:
+        """Queue a message for a subscriber, dropping its oldest one when full."""
+        if queue.full():
+            queue.get_nowait()
+        queue.put_nowait(message)
+
+    def _publish(self, job: DaemonJob) -> None:
+        message = {'type': 'job', 'job': job.to_dict()}
+        for queue in self._subscribers:
+            self._offer(queue, message)
+
+    # HTTP handlers
+
+    @web.middleware
+    async def _reject_browsers(self, request: web.Request, handler) -> web.StreamResponse:
+        """Refuse cross-site requests from web pages."""
+        if 'Origin' in request.headers:
+            return web.json_response({'error': 'Cross-origin requests are not allowed'}, status=403)
+        return await handler(request)
+
+    def _job_or_404(self, request: web.Request) -> DaemonJob:
+        job = self.jobs.get(request.match_info['id'])
+        if job is None:
+            raise web.HTTPNotFound(text='{"error": "Unknown job"}', content_type='application/json')
+        return job
+
+    async def _handle_health(self, request: web.Request) -> web.Response:
+        states: Dict[str, int] = {}
+        for job in self.jobs.values():
+            states[job.state] = states.get(job.state, 0) + 1
+        return web.json_response({
+            'status': 'ok',
+            'concurrency': self.scheduler.concurrency,
+            'jobs': states,
+            'subscribers': len(self._subscribers),
+        })
+
+    async def _handle_list(self, request: web.Request) -> web.Response:
+        return web.json_response([job.to_dict() for job in self.jobs.values()])
+
+    async def _handle_submit(self, request: web.Request) -> web.Response:
+        # A JSON body cannot be sent cross-site without a preflight
+        if request.content_type != 'application/json':
+            return web.json_response({'error': 'Expected application/json'}, status=415)
+        try:
+            body = await request.json()
+        except ValueError:
+            return web.json_response({'error': 'Invalid JSON'}, status=400)
+        if not isinstance(body, dict) or not isinstance(body.get('url'), str) or not body['url']:
+            return web.json_response({'error': 'Missing url'}, status=400)
+        threads = body.get('threads')
+        if threads is not None and (not isinstance(threads, int) or threads < 1):
+            return web.json_response({'error': 'threads must be a positive integer'}, status=400)
+
+        job = self.submit(body['url'], body.get('quality') or 'best', body.get('output'), threads)
+        return web.json_response(job.to_dict(), status=201)
+
+    async def _handle_get(self, request: web.Request) -> web.Response:
+        return web.json_response(self._job_or_404(request).to_dict())
+
+    async def _handle_cancel(self, request: web.Request) -> web.Response:
+        job = self._job_or_404(request)
+        self.cancel(job.id)
+        return web.json_response(job.to_dict())
+
+    async def _handle_events(self, request: web.Request) -> web.WebSocketResponse:
+        job_id = request.query.get('job')
+        ws = web.WebSocketResponse(heartbeat=30)
+        await ws.prepare(request)
+
+        queue: asyncio.Queue = asyncio.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+        self._subscribers.add(queue)
+        jobs = [job for job in self.jobs.values() if job_id in (None, job.id)]
+        reader = asyncio.ensure_future(self._drain(ws))
+        try:
+            await ws.send_json({'type': 'snapshot', 'jobs': [job.to_dict() for job in jobs]})
+            while not reader.done():
+                getter = asyncio.ensure_future(queue.get())
+                await asyncio.wait([getter, reader], return_when=asyncio.FIRST_COMPLETED)
+                if not getter.done():
+                    getter.cancel()
+                    break
+                message = getter.result()
+                if message is None:
+                    break
+                if job_id is None or message['job']['id'] == job_id:
+                    await ws.send_json(message)
+        finally:
+            self._subscribers.discard(queue)
+            reader.cancel()
+            await ws.close()
+        return ws
+
+    @staticmethod
+    async def _drain(ws: web.WebSocketResponse) -> None:
+        """Read (and ignore) client messages until the client disconnects."""
+        async for message in ws:
+            if message.type == WSMsgType.ERROR:
+                return
+
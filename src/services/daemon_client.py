@@ -0,0 +1,125 @@
+"""Client of the download daemon API.
+
+Only the standard library is imported, so CLI commands that talk to a
+running daemon start without loading aiohttp, yt-dlp or the services;
+:meth:`DaemonClient.events` imports aiohttp when progress is streamed.
+"""
+
+import json
+import os
+import urllib.error
+import urllib.request
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional
+
+from ..core.exceptions import NetworkError
+
+
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 9310
+
+# Environment variable with the daemon URL used by the CLI and the GUI
+DAEMON_URL_ENV = 'VIDEO_DOWNLOADER_DAEMON'
+
+TERMINAL_STATES = ('completed', 'failed', 'cancelled')
+
+# The daemon is local; never send its requests through a configured proxy
+_opener = urllib.request.build_opener(urllib.request.ProxyHandler({}))
+
+
+class DaemonError(NetworkError):
+    """The daemon is unreachable or rejected a request."""
+
+    def __init__(self, message: str, status: Optional[int] = None):
+        super().__init__(message)
+        self.status = status
+
+
+class DaemonClient:
+    """Submit and watch jobs of a download daemon."""
+
+    def __init__(self, url: Optional[str] = None, timeout: float = 5.0):
+        self.url = (url or os.environ.get(DAEMON_URL_ENV) or f"http://{DEFAULT_HOST}:{DEFAULT_PORT}").rstrip('/')
+        self.timeout = timeout
+
+    def _request(self, method: str, path: str, body: Optional[Dict[str, Any]] = None) -> Any:
+        data = json.dumps(body).encode('utf-8') if body is not None else None
+        request = urllib.request.Request(f"{self.url}{path}", data=data, method=method)
+        if data is not None:
+            request.add_header('Content-Type', 'application/json')
+        try:
+            with _opener.open(request, timeout=self.timeout) as response:
+                return json.loads(response.read().decode('utf-8'))
+        except urllib.error.HTTPError as e:
+            try:
+                message = json.loads(e.read().decode('utf-8')).get('error', e.reason)
+            except ValueError:
+                message = e.reason
+            raise DaemonError(f"Daemon request failed: {message}", e.code) from e
+        except (urllib.error.URLError, OSError) as e:
+            raise DaemonError(f"Download daemon not reachable at {self.url}: {e}") from e
+
+    def health(self) -> Dict[str, Any]:
+        """Daemon status and job counts."""
+        return self._request('GET', '/api/health')
+
+    def is_running(self) -> bool:
+        """Whether a daemon answers at the URL."""
+        try:
+            return self.health().get('status') == 'ok'
+        except DaemonError:
+            return False
+
+    def submit(self, url: str, quality: str = 'best', output: Optional[str] = None,
+               threads: Optional[int] = None) -> Dict[str, Any]:
+        """Queue a download and return the job."""
+        body: Dict[str, Any] = {'url': url, 'quality': quality}
+        if output:
+            body['output'] = os.path.abspath(output)
+        if threads:
+            body['threads'] = threads
+        return self._request('POST', '/api/jobs', body)
+
+    def jobs(self) -> List[Dict[str, Any]]:
+        """All jobs of the daemon."""
+        return self._request('GET', '/api/jobs')
+
+    def job(self, job_id: str) -> Dict[str, Any]:
+        """One job."""
+        return self._request('GET', f'/api/jobs/{job_id}')
+
+    def cancel(self, job_id: str) -> Dict[str, Any]:
+        """Cancel a queued or running job."""
+        return self._request('DELETE', f'/api/jobs/{job_id}')
+
+    async def events(self, job_id: Optional[str] = None) -> AsyncIterator[Dict[str, Any]]:
+        """Stream the snapshot and job updates (of one job when ``job_id`` is given)."""
+        import aiohttp
+
+        url = f"{self.url}/api/events" + (f"?job={job_id}" if job_id else '')
+        try:
+            async with aiohttp.ClientSession() as session:
+                async with session.ws_connect(url, heartbeat=30) as ws:
+                    async for message in ws:
+                        if message.type != aiohttp.WSMsgType.TEXT:
+                            break
+                        yield json.loads(message.data)
+        except aiohttp.ClientError as e:
+            raise DaemonError(f"Download daemon not reachable at {self.url}: {e}") from e
+
+    async def follow(self, job_id: str,
+                     on_update: Optional[Callable[[Dict[str, Any]], None]] = None) -> Dict[str, Any]:
+        """Report the updates of a job until it finishes and return its final state."""
+        events = self.events(job_id)
+        try:
+            async for event in events:
+                jobs = event['jobs'] if event['type'] == 'snapshot' else [event['job']]
+                if not jobs:
+                    raise DaemonError(f"Unknown job: {job_id}", 404)
+                for job in jobs:
+                    if on_update:
+                        on_update(job)
+                    if job['state'] in TERMINAL_STATES:
+                        return job
+        finally:
+            await events.aclose()
+        raise DaemonError(f"Download daemon closed the event stream of job {job_id}")
@@ -0,0 +1,257 @@
+"""Time-range clips of DASH streams.
+
+Bilibili DASH streams are fragmented MP4 files with a ``SegmentBase``: the
+``initialization`` range holds the ``ftyp``/``moov`` boxes and the
+``indexRange`` holds a ``sidx`` box listing the byte size and duration of
+every fragment. A clip only needs the init segment plus the fragments that
+overlap the requested time range, which is a fraction of the stream.
+Separate video and audio clips are muxed with ffmpeg when it is available.
+"""
+
+import asyncio
+import shutil
+import struct
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import aiohttp
+import aiofiles
+
+from ..core.config import download_config
+from ..core.exceptions import DownloadError, FileOperationError
+from ..core.logger import logger
+from ..core.metrics import (
+    DOWNLOAD_BYTES, HTTP_RESPONSES, RETRIES, SEGMENT_SECONDS, TTFB_SECONDS, status_class,
+)
+from .bilibili import BILIBILI_HEADERS
+from .format_selector import has_video
+
+
+_BYTES = DOWNLOAD_BYTES.labels(engine='clip')
+_SEGMENT_SECONDS = SEGMENT_SECONDS.labels(engine='clip')
+_TTFB_SECONDS = TTFB_SECONDS.labels(engine='clip')
+
+
+@dataclass
+class SidxReference:
+    """One fragment listed in a ``sidx`` box."""
+
+    offset: int
+    size: int
+    start_time: float
+    duration: float
+
+    @property
+    def end(self) -> int:
+        """Last byte of the fragment (inclusive)."""
+        return self.offset + self.size - 1
+
+
+def parse_byte_range(value: str) -> Tuple[int, int]:
+    """Parse an inclusive "start-end" byte range."""
+    start, end = value.split('-', 1)
+    return int(start), int(end)
+
+
+def parse_segment_base(segment_base: Optional[Dict[str, Any]]) -> Tuple[Tuple[int, int], Tuple[int, int]]:
+    """Get the init and index byte ranges of a DASH ``SegmentBase``."""
+    if not segment_base:
+        raise DownloadError("Stream has no SegmentBase index")
+
+    init = segment_base.get('initialization') or segment_base.get('Initialization')
+    index = segment_base.get('index_range') or segment_base.get('indexRange')
+    if not init or not index:
+        raise DownloadError("Stream has no SegmentBase index")
+    return parse_byte_range(init), parse_byte_range(index)
+
+
+def parse_sidx(data: bytes, offset: int) -> List[SidxReference]:
+    """Parse the first ``sidx`` box in ``data``.
+
+    ``offset`` is the file position of ``data[0]``; fragment offsets are
+    returned as absolute file positions.
+    """
+    position = 0
+    while position + 8 <= len(data):
+        size, box_type = struct.unpack_from('>I4s', data, position)
+        header = 8
+        if size == 1:
+            size = struct.unpack_from('>Q', data, position + 8)[0]
+            header = 16
+        if size < header:
+            break
+        if box_type == b'sidx':
+            return _parse_sidx_body(data[position + header:position + size], offset + position + size)
+        position += size
+
+    raise DownloadError("No sidx box found in the index range")
+
+
+def _parse_sidx_body(body: bytes, anchor: int) -> List[SidxReference]:
+    """Parse the payload of a ``sidx`` box that ends at file position ``anchor``."""
+    version = body[0]
+    timescale = struct.unpack_from('>I', body, 8)[0]
+    if version == 0:
+        earliest, first_offset = struct.unpack_from('>II', body, 12)
+        position = 20
+    else:
+        earliest, first_offset = struct.unpack_from('>QQ', body, 12)
+        position = 28
+    count = struct.unpack_from('>H', body, position + 2)[0]
+    position += 4
+
+    references = []
+    offset = anchor + first_offset
+    time = earliest
+    for _ in range(count):
+        reference, duration, _ = struct.unpack_from('>III', body, position)
+        position += 12
+        if reference >> 31:
+            raise DownloadError("Hierarchical sidx indexes are not supported")
+        size = reference & 0x7FFFFFFF
+        references.append(SidxReference(offset, size, time / timescale, duration / timescale))
+        offset += size
+        time += duration
+    return references
+
+
+def select_fragments(references: List[SidxReference], start: float,
+                     end: Optional[float] = None) -> List[SidxReference]:
+    """Select the fragments overlapping the [start, end) time range."""
+    selected = [
+        ref for ref in references
+        if ref.start_time + ref.duration > start and (end is None or ref.start_time < end)
+    ]
+    if not selected:
+        raise DownloadError("The time range is outside the video")
+    return selected
+
+
+class DashClipper:
+    """Downloads a time range of DASH streams via their sidx index."""
+
+    def __init__(self, num_threads: Optional[int] = None, headers: Optional[Dict[str, str]] = None):
+        self.num_threads = num_threads or download_config.max_threads
+        self.headers = headers or {
+            'User-Agent': download_config.user_agent,
+            'Referer': BILIBILI_HEADERS['Referer'],
+        }
+        self.bytes_downloaded = 0
+
+    async def _fetch_range(self, session: aiohttp.ClientSession, urls: List[str], start: int, end: int) -> bytes:
+        """Fetch an inclusive byte range, trying the backup URLs in turn."""
+        last_error: Optional[Exception] = None
+        for attempt, url in enumerate(urls):
+            if attempt:
+                RETRIES.labels(operation='backup_url').inc()
+            try:
+                started = time.monotonic()
+                async with session.get(
+                    url,
+                    headers={'Range': f'bytes={start}-{end}'},
+                    timeout=aiohttp.ClientTimeout(total=download_config.timeout * 2)
+                ) as response:
+                    _TTFB_SECONDS.observe(time.monotonic() - started)
+                    HTTP_RESPONSES.labels('media', status_class(response.status)).inc()
+                    if response.status != 206:
+                        raise DownloadError(f"HTTP {response.status}: Range request not honoured")
+                    data = await response.read()
+                    self.bytes_downloaded += len(data)
+                    _SEGMENT_SECONDS.observe(time.monotonic() - started)
+                    _BYTES.inc(len(data))
+                    return data
+            except Exception as e:
+                logger.warning(f"Range request {start}-{end} failed: {e}")
+                last_error = e
+        raise DownloadError(f"Failed to download byte range {start}-{end}: {last_error}")
+
+    async def _fetch_span(self, session: aiohttp.ClientSession, urls: List[str], start: int, end: int) -> bytes:
+        """Fetch a large byte range in parallel parts."""
+        part_size = max((end - start + 1) // self.num_threads, download_config.chunk_size)
+        parts = [(p, min(p + part_size - 1, end)) for p in range(start, end + 1, part_size)]
+        data = await asyncio.gather(*(self._fetch_range(session, urls, s, e) for s, e in parts))
+        return b''.join(data)
+
+    async def clip_stream(self, session: aiohttp.ClientSession, fmt: Dict[str, Any], start: float,
+                          end: Optional[float], save_path: Path) -> Tuple[float, float]:
+        """Write the init segment and the overlapping fragments of one stream.
+
+        Returns the time range actually covered, which is aligned to
+        fragment boundaries.
+        """
+        urls = [fmt['url']] + list(fmt.get('backup_urls') or [])
+        (init_start, init_end), (index_start, index_end) = parse_segment_base(fmt.get('segment_base'))
+
+        # The init segment and the index are adjacent: fetch them in one request
+        head_start, head_end = min(init_start, index_start), max(init_end, index_end)
+        head = await self._fetch_range(session, urls, head_start, head_end)
+        init = head[init_start - head_start:init_end - head_start + 1]
+        references = parse_sidx(head[index_start - head_start:index_end - head_start + 1], index_start)
+
+        fragments = select_fragments(references, start, end)
+        body = await self._fetch_span(session, urls, fragments[0].offset, fragments[-1].end)
+
+        try:
+            async with aiofiles.open(save_path, 'wb') as f:
+                await f.write(init)
+                await f.write(body)
+        except Exception as e:
+            raise FileOperationError(f"Failed to write clip: {e}")
+
+        logger.debug(f"Clipped {fmt.get('format_id', '')}: {len(fragments)} of {len(references)} fragments")
+        return fragments[0].start_time, fragments[-1].start_time + fragments[-1].duration
+
+    async def clip(self, streams: List[Dict[str, Any]], start: float, end: Optional[float],
+                   save_path: str) -> Tuple[float, float]:
+        """Download a clip of the selected streams (video and/or audio) to ``save_path``."""
+        output = Path(save_path)
+        output.parent.mkdir(parents=True, exist_ok=True)
+
+        if len(streams) == 1:
+            paths = [output]
+        else:
+            paths = [
+                output.with_suffix('.video.m4s' if has_video(fmt) else '.audio.m4s')
+                for fmt in streams
+            ]
+
+        async with aiohttp.ClientSession(headers=self.headers) as session:
+            covered = await asyncio.gather(*(
+                self.clip_stream(session, fmt, start, end, path)
+                for fmt, path in zip(streams, paths)
+            ))
+
+        if len(paths) > 1:
+            await self.mux(paths, output)
+
+        return covered[0]
+
+    async def mux(self, inputs: List[Path], output: Path) -> None:
+        """Mux separate streams into ``output`` with ffmpeg (stream copy)."""
+        ffmpeg = shutil.which('ffmpeg')
+        if not ffmpeg:
+            logger.warning(f"ffmpeg not found, keeping separate streams: {', '.join(map(str, inputs))}")
+            return
+
+        command = [ffmpeg, '-y', '-v', 'error']
+        for path in inputs:
+            command += ['-i', str(path)]
+        for index in range(len(inputs)):
+            command += ['-map', f'{index}:0']
+        command += ['-c', 'copy', '-movflags', '+faststart', str(output)]
+
+        process = await asyncio.create_subprocess_exec(*command, stderr=asyncio.subprocess.PIPE)
+        _, stderr = await process.communicate()
+        if process.returncode != 0:
+            raise FileOperationError(f"ffmpeg failed to mux the clip: {stderr.decode(errors='replace').strip()}")
+
+        for path in inputs:
+            path.unlink(missing_ok=True)
+
+
+async def download_clip(streams: List[Dict[str, Any]], start: float, end: Optional[float],
+                        save_path: str, num_threads: Optional[int] = None) -> Tuple[float, float]:
+    """Convenience function to download a time-range clip."""
+    return await DashClipper(num_threads).clip(streams, start, end, save_path)
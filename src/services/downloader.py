@@ -1,16 +1,42 @@
 """Multi-threaded downloader service."""
 
 import os
+import time
 import asyncio
 import aiofiles
 import aiohttp
+from contextlib import asynccontextmanager
+from functools import partial
 from pathlib import Path
-from typing import List, Optional, Callable
+from typing import Any, AsyncIterator, Awaitable, List, Optional, Callable, Tuple, TypeVar
 from concurrent.futures import ThreadPoolExecutor, as_completed
 from tenacity import retry, stop_after_attempt, wait_exponential
 from ..core.config import download_config
 from ..core.exceptions import DownloadError, FileOperationError
 from ..core.logger import logger
+from ..core.metrics import (
+    DOWNLOAD_BYTES, HTTP_RESPONSES, QUEUE_DEPTH, QUEUE_WAIT_SECONDS, RETRIES, SEGMENT_SECONDS,
+    TTFB_SECONDS, status_class,
+)
+from ..utils.range_utils import parse_content_range
+from .mover import BackgroundMover, get_background_mover, staging_path
+
+
+T = TypeVar('T')
+
+_BYTES = DOWNLOAD_BYTES.labels(engine='multithread')
+_SEGMENT_SECONDS = SEGMENT_SECONDS.labels(engine='multithread')
+_TTFB_SECONDS = TTFB_SECONDS.labels(engine='multithread')
+_CONNECTION_WAIT = QUEUE_WAIT_SECONDS.labels(queue='connections')
+_CONNECTION_QUEUE = QUEUE_DEPTH.labels(queue='connections')
+
+
+async def _stall_guard(awaitable: Awaitable[T]) -> T:
+    """Await a network read, failing if no data arrives within the timeout."""
+    try:
+        return await asyncio.wait_for(awaitable, download_config.timeout)
+    except asyncio.TimeoutError:
+        raise DownloadError(f"Connection stalled for {download_config.timeout}s")
 
 
 class DownloadProgress:
@@ -36,33 +62,100 @@ class DownloadProgress:
 class MultiThreadDownloader:
     """Enhanced multi-threaded downloader."""
     
-    def __init__(self, url: str, save_path: str, num_threads: Optional[int] = None):
+    def __init__(
+        self,
+        url: str,
+        save_path: str,
+        num_threads: Optional[int] = None,
+        session: Optional[aiohttp.ClientSession] = None,
+        connection_limiter: Optional[asyncio.Semaphore] = None,
+        total_size: Optional[int] = None,
+        staging: Optional[bool] = None,
+        mover: Optional[BackgroundMover] = None,
+        on_saved: Optional[Callable[[], Any]] = None
+    ):
         self.url = url
         self.save_path = Path(save_path)
         self.num_threads = num_threads or download_config.max_threads
         self.temp_files: List[Path] = []
         self.progress = DownloadProgress(0)
         
+        # Size already known from a probe (skips the HEAD request)
+        self.total_size = total_size
+        
+        # Chunk retries resume after the bytes already received
+        self.retry_delay = 1.0
+        self.retries = 0
+        
+        # Optional shared session and connection budget (job groups)
+        self.session = session
+        self.connection_limiter = connection_limiter
+        
+        # Parts are written and merged in the staging directory (fast local
+        # disk) and the finished file is moved to save_path in the background
+        if download_config.staging if staging is None else staging:
+            self.work_path = staging_path(self.save_path)
+        else:
+            self.work_path = self.save_path
+        self.mover = mover
+        self.moving: Optional[asyncio.Future] = None
+        
+        # Called (on a worker thread) once the file is at save_path
+        self.on_saved = on_saved
+        
         # Ensure directories exist
         self.save_path.parent.mkdir(parents=True, exist_ok=True)
+        self.work_path.parent.mkdir(parents=True, exist_ok=True)
         
         # Session configuration
         self.headers = {
             "User-Agent": download_config.user_agent,
         }
     
+    @asynccontextmanager
+    async def _connection_slot(self) -> AsyncIterator[None]:
+        """Hold one slot of the shared connection budget, if any."""
+        if self.connection_limiter is None:
+            yield
+            return
+        
+        start = time.monotonic()
+        _CONNECTION_QUEUE.inc()
+        try:
+            await self.connection_limiter.acquire()
+        finally:
+            _CONNECTION_QUEUE.dec()
+        _CONNECTION_WAIT.observe(time.monotonic() - start)
+        try:
+            yield
+        finally:
+            self.connection_limiter.release()
+    
+    @asynccontextmanager
+    async def _client_session(self) -> AsyncIterator[aiohttp.ClientSession]:
+        """Yield the shared session or a private one closed on exit."""
+        if self.session is not None:
+            yield self.session
+            return
+        
+        async with aiohttp.ClientSession(headers=self.headers) as session:
+            yield session
+    
     @retry(
         stop=stop_after_attempt(download_config.retry_times),
-        wait=wait_exponential(multiplier=1, min=4, max=10)
+        wait=wait_exponential(multiplier=1, min=4, max=10),
+        before_sleep=lambda _: RETRIES.labels(operation='size_probe').inc()
     )
     async def get_file_size(self) -> int:
         """Get total file size with retry logic."""
         try:
-            async with aiohttp.ClientSession(headers=self.headers) as session:
+            async with self._client_session() as session, self._connection_slot():
                 async with session.head(
                     self.url, 
+                    headers=self.headers,
                     timeout=aiohttp.ClientTimeout(total=download_config.timeout)
                 ) as response:
+                    HTTP_RESPONSES.labels('media', status_class(response.status)).inc()
                     if response.status == 200 and 'Content-Length' in response.headers:
                         return int(response.headers['Content-Length'])
                     else:
@@ -71,27 +164,90 @@ class MultiThreadDownloader:
             logger.error(f"Failed to get file size: {e}")
             raise DownloadError(f"Failed to retrieve file size: {e}")
     
+    def _check_range_response(self, response: aiohttp.ClientResponse, start: int, end: int) -> None:
+        """Verify that a response carries exactly the requested byte range."""
+        response.raise_for_status()
+        if response.status == 200 and start == 0 and end == self.progress.total_size - 1:
+            return  # Whole file requested: a 200 is fine
+        if response.status != 206:
+            raise DownloadError(f"HTTP {response.status}: Range request not honoured")
+        
+        try:
+            range_start, range_end, total = parse_content_range(response.headers.get('Content-Range'))
+        except ValueError as e:
+            raise DownloadError(str(e))
+        if range_start != start or range_end > end or (total is not None and total != self.progress.total_size):
+            raise DownloadError(
+                f"Content-Range mismatch: asked for {start}-{end}, got {response.headers['Content-Range']}"
+            )
+    
     async def download_chunk(self, session: aiohttp.ClientSession, start: int, end: int, chunk_index: int) -> Path:
-        """Download a specific chunk of the file."""
-        headers = {**self.headers, 'Range': f'bytes={start}-{end}'}
-        temp_file = self.save_path.with_suffix(f'.part{chunk_index}')
+        """Download a specific chunk of the file.
+        
+        A failed request (reset, truncated body, stall, wrong Content-Range,
+        error status) is retried with backoff and resumes after the bytes
+        already written instead of starting the chunk over.
+        """
+        temp_file = self.work_path.with_suffix(f'.part{chunk_index}')
         self.temp_files.append(temp_file)
+        expected = end - start + 1
+        received = 0
+        attempts = max(1, download_config.retry_times)
         
         try:
-            async with session.get(
-                self.url,
-                headers=headers,
-                timeout=aiohttp.ClientTimeout(total=download_config.timeout * 2)
-            ) as response:
-                response.raise_for_status()
-                
-                async with aiofiles.open(temp_file, 'wb') as f:
-                    async for chunk in response.content.iter_chunked(download_config.chunk_size):
-                        await f.write(chunk)
-                        self.progress.update(len(chunk))
-                
-                logger.debug(f"Downloaded chunk {chunk_index}: {start}-{end}")
-                return temp_file
+            async with aiofiles.open(temp_file, 'wb') as f:
+                for attempt in range(attempts):
+                    position = start + received
+                    try:
+                        async with self._connection_slot():
+                            started = time.monotonic()
+                            # A stalled connection fails fast and resumes; a slow one is fine.
+                            # Reads are timed out here rather than with aiohttp's sock_read,
+                            # whose timer can fire later on the idle pooled connection.
+                            response = await _stall_guard(session.get(
+                                self.url,
+                                headers={**self.headers, 'Range': f'bytes={position}-{end}'},
+                                timeout=aiohttp.ClientTimeout(total=None, sock_connect=download_config.timeout)
+                            ))
+                            async with response:
+                                _TTFB_SECONDS.observe(time.monotonic() - started)
+                                HTTP_RESPONSES.labels('media', status_class(response.status)).inc()
+                                try:
+                                    self._check_range_response(response, position, end)
+                                    
+                                    while True:
+                                        chunk = await _stall_guard(response.content.read(download_config.chunk_size))
+                                        if not chunk:
+                                            break
+                                        if received + len(chunk) > expected:
+                                            raise DownloadError(f"Chunk {chunk_index} received more data than requested")
+                                        await f.write(chunk)
+                                        received += len(chunk)
+                                        self.progress.update(len(chunk))
+                                        _BYTES.inc(len(chunk))
+                                except BaseException:
+                                    # Never return a half-read connection to the pool
+                                    response.close()
+                                    raise
+                            _SEGMENT_SECONDS.observe(time.monotonic() - started)
+                        
+                        if received != expected:
+                            raise DownloadError(f"Truncated response: {received} of {expected} bytes")
+                        break
+                    except Exception as e:
+                        if attempt + 1 == attempts:
+                            raise
+                        RETRIES.labels(operation='chunk').inc()
+                        self.retries += 1
+                        delay = self.retry_delay * 2 ** attempt
+                        logger.warning(
+                            f"Chunk {chunk_index} failed at byte {start + received} "
+                            f"(attempt {attempt + 1}): {e!r}, resuming in {delay:.1f}s"
+                        )
+                        await asyncio.sleep(delay)
+            
+            logger.debug(f"Downloaded chunk {chunk_index}: {start}-{end}")
+            return temp_file
                 
         except Exception as e:
             logger.error(f"Failed to download chunk {chunk_index}: {e}")
@@ -100,7 +256,7 @@ class MultiThreadDownloader:
     async def merge_chunks(self) -> None:
         """Merge all downloaded chunks into final file."""
         try:
-            async with aiofiles.open(self.save_path, 'wb') as final_file:
+            async with aiofiles.open(self.work_path, 'wb') as final_file:
                 for temp_file in self.temp_files:
                     async with aiofiles.open(temp_file, 'rb') as part_file:
                         while True:
@@ -112,20 +268,25 @@ class MultiThreadDownloader:
                     # Clean up temp file
                     temp_file.unlink()
             
-            logger.info(f"Successfully merged chunks to {self.save_path}")
+            logger.info(f"Successfully merged chunks to {self.work_path}")
             
         except Exception as e:
             logger.error(f"Failed to merge chunks: {e}")
             raise FileOperationError(f"Failed to merge downloaded chunks: {e}")
     
-    async def download(self, progress_callback: Optional[Callable[[float], None]] = None) -> None:
-        """Download file using multiple threads."""
+    async def download(self, progress_callback: Optional[Callable[[float], None]] = None) -> Optional[asyncio.Future]:
+        """Download file using multiple threads.
+        
+        A staged download returns as soon as the file is merged, with the
+        move to ``save_path`` still running in the background; the move
+        future is returned (and kept in ``moving``). Otherwise returns None.
+        """
         if progress_callback:
             self.progress.set_progress_callback(progress_callback)
         
         try:
             # Get file size
-            total_size = await self.get_file_size()
+            total_size = self.total_size or await self.get_file_size()
             self.progress.total_size = total_size
             logger.info(f"File size: {total_size / (1024*1024):.2f} MB")
             
@@ -134,7 +295,7 @@ class MultiThreadDownloader:
             tasks = []
             
             # Create download tasks
-            async with aiohttp.ClientSession(headers=self.headers) as session:
+            async with self._client_session() as session:
                 for i in range(self.num_threads):
                     start = i * chunk_size
                     end = start + chunk_size - 1 if i < self.num_threads - 1 else total_size - 1
@@ -149,10 +310,25 @@ class MultiThreadDownloader:
             # Merge all chunks
             await self.merge_chunks()
             
+            merged_size = self.work_path.stat().st_size
+            if merged_size != total_size:
+                self.work_path.unlink()
+                raise DownloadError(f"Downloaded {merged_size} bytes, expected {total_size}")
+            
+            # The connections are released; the move to slow storage runs on its own
+            if self.work_path != self.save_path:
+                mover = self.mover or get_background_mover()
+                self.moving = mover.submit(self.work_path, self.save_path, self.on_saved)
+                logger.info(f"Download complete, moving to {self.save_path}")
+                return self.moving
+            
+            if self.on_saved is not None:
+                await asyncio.to_thread(self.on_saved)
             logger.info(f"Download complete: {self.save_path}")
+            return None
             
-        except Exception as e:
-            # Clean up on failure
+        except BaseException:
+            # Clean up on failure and on cancellation
             await self.cleanup()
             raise
     
@@ -174,11 +350,77 @@ class AsyncDownloader:
         url: str, 
         save_path: str, 
         progress_callback: Optional[Callable[[float], None]] = None,
-        num_threads: Optional[int] = None
-    ) -> None:
-        """Download file asynchronously."""
-        downloader = MultiThreadDownloader(url, save_path, num_threads)
-        await downloader.download(progress_callback)
+        num_threads: Optional[int] = None,
+        session: Optional[aiohttp.ClientSession] = None,
+        total_size: Optional[int] = None,
+        on_saved: Optional[Callable[[], Any]] = None
+    ) -> Optional[asyncio.Future]:
+        """Download file asynchronously.
+        
+        Pass the ``session`` and ``total_size`` of a prefetch to reuse its
+        warm connections and skip the size probe. ``on_saved`` runs once
+        the file is at ``save_path``, which for a staged download is after
+        the background move; its future is returned.
+        """
+        downloader = MultiThreadDownloader(
+            url, save_path, num_threads, session=session, total_size=total_size, on_saved=on_saved
+        )
+        return await downloader.download(progress_callback)
+    
+    @staticmethod
+    async def download_group(
+        jobs: List[Tuple[str, str]],
+        progress_callback: Optional[Callable[[float], None]] = None,
+        num_threads: Optional[int] = None,
+        max_connections: Optional[int] = None,
+        on_saved: Optional[Callable[[Path], Any]] = None
+    ) -> List[Path]:
+        """Download several files as one job group.
+        
+        All ``(url, save_path)`` jobs share a single HTTP session and a
+        connection budget of ``max_connections`` concurrent requests, so a
+        100-part upload does not open 100 × ``num_threads`` connections.
+        Progress is reported for the group as a whole. Staged files may
+        still be moving to their paths when this returns; ``on_saved(path)``
+        runs once each file is in place.
+        """
+        if not jobs:
+            return []
+        
+        max_connections = max_connections or download_config.max_threads
+        limiter = asyncio.Semaphore(max_connections)
+        connector = aiohttp.TCPConnector(limit=max_connections)
+        headers = {"User-Agent": download_config.user_agent}
+        downloaders: List[MultiThreadDownloader] = []
+        
+        def _report(_: float) -> None:
+            total = sum(d.progress.total_size for d in downloaders)
+            if progress_callback and total:
+                done = sum(d.progress.downloaded_size for d in downloaders)
+                progress_callback(done / total * 100)
+        
+        async with aiohttp.ClientSession(headers=headers, connector=connector) as session:
+            for url, save_path in jobs:
+                downloaders.append(MultiThreadDownloader(
+                    url,
+                    save_path,
+                    num_threads,
+                    session=session,
+                    connection_limiter=limiter,
+                    on_saved=partial(on_saved, Path(save_path)) if on_saved else None
+                ))
+            
+            logger.info(f"Downloading group of {len(jobs)} files with {max_connections} connections")
+            results = await asyncio.gather(
+                *(d.download(_report) for d in downloaders),
+                return_exceptions=True
+            )
+        
+        failures = [r for r in results if isinstance(r, Exception)]
+        if failures:
+            raise DownloadError(f"{len(failures)} of {len(jobs)} downloads failed: {failures[0]}")
+        
+        return [d.save_path for d in downloaders]
 
 
 # Convenience function for synchronous usage
@@ -189,4 +431,8 @@ def download_file(
     num_threads: Optional[int] = None
 ) -> None:
     """Download file (synchronous wrapper)."""
-    asyncio.run(AsyncDownloader.download_file(url, save_path, progress_callback, num_threads))
\ No newline at end of file
+    async def _download() -> None:
+        await AsyncDownloader.download_file(url, save_path, progress_callback, num_threads)
+        await get_background_mover().drain()
+    
+    asyncio.run(_download())
\ No newline at end of file
@@ -0,0 +1,266 @@
+"""Hedged extraction across several video info sources."""
+
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+
+from ..core.exceptions import NetworkError
+from ..core.logger import logger
+from ..core.metrics import EXTRACTION_SECONDS, EXTRACTIONS
+
+
+class SourceStats:
+    """Rolling latency and success statistics of one extraction source."""
+
+    def __init__(self, window: int = 50, min_samples: int = 5):
+        self.min_samples = min_samples
+        self._latencies: Deque[float] = deque(maxlen=window)
+        self._outcomes: Deque[bool] = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def record(self, latency: float, success: bool) -> None:
+        """Record one attempt."""
+        with self._lock:
+            self._outcomes.append(success)
+            if success:
+                self._latencies.append(latency)
+
+    @property
+    def samples(self) -> int:
+        """Number of recorded attempts."""
+        return len(self._outcomes)
+
+    @property
+    def success_rate(self) -> float:
+        """Share of successful attempts (optimistic before any sample)."""
+        with self._lock:
+            if not self._outcomes:
+                return 1.0
+            return sum(self._outcomes) / len(self._outcomes)
+
+    def percentile(self, q: float) -> Optional[float]:
+        """Latency percentile of successful attempts, None without enough data."""
+        with self._lock:
+            if len(self._latencies) < self.min_samples:
+                return None
+            ordered = sorted(self._latencies)
+        index = min(len(ordered) - 1, int(round(q * (len(ordered) - 1))))
+        return ordered[index]
+
+    def expected_cost(self, default_latency: float) -> float:
+        """Expected time to a valid result, used to rank sources."""
+        latency = self.percentile(0.5)
+        if latency is None:
+            latency = default_latency
+        return latency / max(self.success_rate, 0.05)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Export statistics."""
+        return {
+            'samples': self.samples,
+            'success_rate': round(self.success_rate, 3),
+            'p50': self.percentile(0.5),
+            'p95': self.percentile(0.95),
+        }
+
+
+class HedgedExtractor:
+    """Runs extraction sources as hedged requests.
+
+    The preferred source starts first. If it has not produced a valid result
+    within its p95 latency budget (or fails), the next source is started as
+    well and the first valid result wins. Each source is called with a
+    :class:`threading.Event` that is set when another source has won, so a
+    slower attempt can abort (a yt-dlp extraction kills its worker); one
+    that ignores it finishes in the background with its result discarded.
+    In ``auto`` mode the preferred order adapts to the observed latency and
+    success rate of each source.
+    """
+
+    def __init__(
+        self,
+        source_order: List[str],
+        default_budget: float = 3.0,
+        min_budget: float = 0.5,
+        max_budget: float = 10.0,
+        max_workers: int = 8,
+    ):
+        self.source_order = list(source_order)
+        self.default_budget = default_budget
+        self.min_budget = min_budget
+        self.max_budget = max_budget
+        self.stats: Dict[str, SourceStats] = {name: SourceStats() for name in source_order}
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="extract")
+
+    def get_order(self, priority: str = 'auto') -> List[str]:
+        """Get the source order for a priority setting."""
+        if priority in self.source_order:
+            return [priority] + [s for s in self.source_order if s != priority]
+
+        # Stable sort keeps the configured order for untested sources
+        return sorted(
+            self.source_order,
+            key=lambda name: self.stats[name].expected_cost(self.default_budget)
+        )
+
+    def get_budget(self, source: str) -> float:
+        """Latency budget before hedging to the next source."""
+        p95 = self.stats[source].percentile(0.95)
+        if p95 is None:
+            return self.default_budget
+        return min(max(p95, self.min_budget), self.max_budget)
+
+    def extract(
+        self,
+        sources: Dict[str, Callable[[threading.Event], Optional[Dict[str, Any]]]],
+        priority: str = 'auto',
+        is_valid: Optional[Callable[[Dict[str, Any]], bool]] = None,
+    ) -> Tuple[str, Dict[str, Any]]:
+        """Run the sources hedged and return ``(source_name, result)``."""
+        is_valid = is_valid or (lambda result: bool(result))
+        order = [name for name in self.get_order(priority) if name in sources]
+        pending: Dict[Future, str] = {}
+        cancel_events: Dict[Future, threading.Event] = {}
+        errors: List[str] = []
+
+        def _start(name: str) -> None:
+            logger.debug(f"Starting extraction source {name}")
+            cancelled = threading.Event()
+            future = self._executor.submit(self._attempt, name, sources[name], is_valid, cancelled)
+            pending[future] = name
+            cancel_events[future] = cancelled
+
+        _start(order.pop(0))
+        while pending:
+            timeout = self.get_budget(next(iter(pending.values()))) if order else None
+            done, _ = wait(list(pending), timeout=timeout, return_when=FIRST_COMPLETED)
+
+            if not done:
+                # Primary is slower than its budget: hedge with the next source
+                logger.info(f"Extraction exceeded {timeout:.1f}s budget, hedging with {order[0]}")
+                _start(order.pop(0))
+                continue
+
+            for future in done:
+                name = pending.pop(future)
+                try:
+                    result = future.result()
+                except Exception as e:
+                    errors.append(f"{name}: {e}")
+                    continue
+
+                for other in pending:
+                    other.cancel()
+                    cancel_events[other].set()
+                return name, result
+
+            # Every finished attempt failed: start the next source right away
+            if order:
+                _start(order.pop(0))
+
+        raise NetworkError(f"All extraction sources failed: {'; '.join(errors)}")
+
+    def _attempt(
+        self,
+        name: str,
+        source: Callable[[threading.Event], Optional[Dict[str, Any]]],
+        is_valid: Callable[[Dict[str, Any]], bool],
+        cancelled: threading.Event,
+    ) -> Dict[str, Any]:
+        """Run one source, recording its latency and outcome."""
+        start = time.monotonic()
+        try:
+            result = source(cancelled)
+        except Exception:
+            if cancelled.is_set():
+                # Lost the race: neither a failure nor a latency sample
+                EXTRACTIONS.labels(source=name, outcome='cancelled').inc()
+                raise
+            self._record(name, time.monotonic() - start, 'error')
+            raise
+
+        valid = result is not None and is_valid(result)
+        self._record(name, time.monotonic() - start, 'success' if valid else 'invalid')
+        if not valid:
+            raise NetworkError("no valid result")
+        return result
+
+    def _record(self, name: str, latency: float, outcome: str) -> None:
+        """Record one attempt in the source statistics and the metrics."""
+        self.stats[name].record(latency, outcome == 'success')
+        EXTRACTIONS.labels(source=name, outcome=outcome).inc()
+        EXTRACTION_SECONDS.labels(source=name).observe(latency)
+
+    def get_statistics(self) -> Dict[str, Dict[str, Any]]:
+        """Export per-source statistics."""
+        return {name: stats.to_dict() for name, stats in self.stats.items()}
+
+
+class SingleFlightCache:
+    """Short-lived result cache that coalesces concurrent calls.
+    
+    Callers asking for a key that is already being computed wait for that
+    computation instead of starting their own, so the info fetched for
+    display is reused when the download URL is resolved a moment later.
+    Failures are not cached.
+    """
+    
+    def __init__(self, ttl: float = 60.0, max_entries: int = 128):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries: Dict[Any, Future] = {}
+        self._completed_at: Dict[Any, float] = {}
+        self._lock = threading.Lock()
+    
+    def get_or_call(self, key: Any, func: Callable[[], Any]) -> Any:
+        """Return the cached or in-flight result for ``key``, or compute it."""
+        with self._lock:
+            future = self._entries.get(key)
+            fresh = future is not None and (
+                not future.done() or time.monotonic() - self._completed_at.get(key, 0) < self.ttl
+            )
+            if not fresh:
+                future = self._entries[key] = Future()
+                self._completed_at.pop(key, None)
+                owner = True
+            else:
+                owner = False
+        
+        if not owner:
+            return future.result()
+        
+        try:
+            result = func()
+        except BaseException as e:
+            with self._lock:
+                if self._entries.get(key) is future:
+                    del self._entries[key]
+            future.set_exception(e)
+            raise
+        
+        with self._lock:
+            self._completed_at[key] = time.monotonic()
+            self._evict()
+        future.set_result(result)
+        return result
+    
+    def invalidate(self, key: Any = None) -> None:
+        """Drop one key, or every key."""
+        with self._lock:
+            if key is None:
+                self._entries.clear()
+                self._completed_at.clear()
+            else:
+                self._entries.pop(key, None)
+                self._completed_at.pop(key, None)
+    
+    def _evict(self) -> None:
+        """Drop the oldest completed entries beyond ``max_entries``."""
+        overflow = len(self._completed_at) - self.max_entries
+        if overflow <= 0:
+            return
+        for key in sorted(self._completed_at, key=self._completed_at.get)[:overflow]:
+            self._entries.pop(key, None)
+            del self._completed_at[key]
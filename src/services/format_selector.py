@@ -0,0 +1,272 @@
+"""Format selection engine shared by every platform.
+
+A quality preference is a short expression of space or comma separated
+tokens, for example::
+
+    best
+    worst
+    1080p                  best format up to 1080p
+    <=720p fps<=30         resolution and frame rate caps
+    1080P60                quality labels: 1080p at up to 60 fps
+    1080P+                 1080p, highest bitrate first
+    codec=hevc>av1>avc     codec preference, most preferred first
+    br<=3M                 maximum bitrate (k/M suffixes, bits per second)
+    audio                  audio only
+    dash-80                an exact format id
+
+Within the constraints the highest resolution (or lowest, for ``worst``) is
+chosen, and among formats of that resolution the one with the lowest
+bandwidth wins, so an efficient codec is preferred over a larger encode of
+the same picture. A ``+`` label (Bilibili's high bitrate tiers) reverses
+that and prefers the largest encode.
+"""
+
+import re
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+
+# Bilibili DASH codec ids
+BILIBILI_CODEC_IDS = {7: 'avc', 12: 'hevc', 13: 'av1'}
+
+_CODEC_ALIASES = {
+    'avc': 'avc', 'avc1': 'avc', 'h264': 'avc', 'h.264': 'avc',
+    'hevc': 'hevc', 'hev1': 'hevc', 'hvc1': 'hevc', 'h265': 'hevc', 'h.265': 'hevc',
+    'av1': 'av1', 'av01': 'av1',
+    'vp9': 'vp9', 'vp09': 'vp9',
+}
+
+_RESOLUTION_ALIASES = {'8k': 4320, '4k': 2160, '2k': 1440}
+
+_RESOLUTION_RE = re.compile(r'^(<=|<)?(\d{3,4})p(\d{2,3})?(\+)?$')
+_CAP_RE = re.compile(r'^(height|res|fps|br|bitrate|tbr)(<=|<|=)(.+)$')
+_BITRATE_RE = re.compile(r'^(\d+(?:\.\d+)?)([kKmM]?)(?:bps)?$')
+
+
+def normalize_codec(codec: Any) -> str:
+    """Normalize a codec id or codec string to 'avc', 'hevc', 'av1', 'vp9'..."""
+    if codec is None or codec == '':
+        return ''
+    if isinstance(codec, int) or (isinstance(codec, str) and codec.isdigit()):
+        return BILIBILI_CODEC_IDS.get(int(codec), str(codec))
+
+    name = str(codec).lower()
+    if name == 'none':
+        return 'none'
+    return _CODEC_ALIASES.get(name.split('.')[0], name.split('.')[0])
+
+
+def parse_bitrate(value: str) -> int:
+    """Parse a bitrate like "2500k" or "3M" into bits per second."""
+    match = _BITRATE_RE.match(value.strip())
+    if not match:
+        raise ValueError(f"Invalid bitrate: {value!r}")
+    number, unit = float(match.group(1)), match.group(2).lower()
+    return int(number * {'': 1, 'k': 1000, 'm': 1000 * 1000}[unit])
+
+
+@dataclass
+class FormatPreference:
+    """Parsed quality preference."""
+
+    order: str = 'best'
+    audio_only: bool = False
+    max_height: Optional[int] = None
+    max_fps: Optional[float] = None
+    max_bitrate: Optional[int] = None
+    high_bitrate: bool = False
+    codecs: List[str] = field(default_factory=list)
+    format_id: Optional[str] = None
+
+
+def parse_preference(expression: Optional[str]) -> FormatPreference:
+    """Parse a quality preference expression.
+
+    A token that is not part of the expression syntax is taken as an exact
+    format id; a malformed resolution label raises :class:`ValueError`.
+    """
+    preference = FormatPreference()
+    if not expression:
+        return preference
+
+    for token in re.split(r'[\s,]+', expression.strip()):
+        lowered = token.lower()
+        if not lowered:
+            continue
+
+        if lowered in ('best', 'worst'):
+            preference.order = lowered
+        elif lowered in ('audio', 'audio-only', 'audioonly', 'bestaudio'):
+            preference.audio_only = True
+        elif lowered == 'worstaudio':
+            preference.audio_only = True
+            preference.order = 'worst'
+        elif lowered.startswith(('codec=', 'codec:', 'vcodec=')):
+            names = re.split(r'[>/|]', lowered.split('=', 1)[-1].split(':', 1)[-1])
+            preference.codecs = [normalize_codec(name) for name in names if name]
+        elif lowered in _CODEC_ALIASES:
+            preference.codecs.append(normalize_codec(lowered))
+        elif lowered.lstrip('<=').rstrip('+') in _RESOLUTION_ALIASES:
+            preference.max_height = _RESOLUTION_ALIASES[lowered.lstrip('<=').rstrip('+')]
+            preference.high_bitrate = lowered.endswith('+')
+        elif _RESOLUTION_RE.match(lowered):
+            match = _RESOLUTION_RE.match(lowered)
+            height = int(match.group(2))
+            preference.max_height = height - 1 if match.group(1) == '<' else height
+            if match.group(3):
+                preference.max_fps = float(match.group(3))
+            preference.high_bitrate = bool(match.group(4))
+        elif re.match(r'^(<=|<)?\d{3,4}p', lowered):
+            raise ValueError(f"Invalid quality: {token!r}")
+        elif _CAP_RE.match(lowered):
+            name, operator, value = _CAP_RE.match(lowered).groups()
+            if name in ('height', 'res'):
+                preference.max_height = int(value.rstrip('p')) - (1 if operator == '<' else 0)
+            elif name == 'fps':
+                preference.max_fps = float(value)
+            else:
+                preference.max_bitrate = parse_bitrate(value) - (1 if operator == '<' else 0)
+        else:
+            preference.format_id = token
+
+    return preference
+
+
+def format_bitrate(fmt: Dict[str, Any]) -> Optional[float]:
+    """Estimated bitrate of a format in bits per second, None if unknown."""
+    if fmt.get('bandwidth'):
+        return float(fmt['bandwidth'])
+    for key in ('tbr', 'vbr', 'abr'):
+        if fmt.get(key):
+            return float(fmt[key]) * 1000
+    if fmt.get('filesize') and fmt.get('duration'):
+        return fmt['filesize'] * 8 / fmt['duration']
+    return None
+
+
+def has_video(fmt: Dict[str, Any]) -> bool:
+    """Check if a format carries video (legacy formats without codec info do)."""
+    return fmt.get('vcodec') != 'none'
+
+
+def has_audio(fmt: Dict[str, Any]) -> bool:
+    """Check if a format carries audio."""
+    return fmt.get('acodec') != 'none'
+
+
+class FormatSelector:
+    """Ranks formats against a :class:`FormatPreference`."""
+
+    def __init__(self, preference: FormatPreference):
+        self.preference = preference
+
+    def _within_caps(self, fmt: Dict[str, Any]) -> bool:
+        """Check the resolution, frame rate and bitrate caps."""
+        pref = self.preference
+        if pref.max_height and (fmt.get('height') or 0) > pref.max_height:
+            return False
+        if pref.max_fps and (fmt.get('fps') or 0) > pref.max_fps:
+            return False
+        bitrate = format_bitrate(fmt)
+        if pref.max_bitrate and bitrate is not None and bitrate > pref.max_bitrate:
+            return False
+        return True
+
+    def _codec_rank(self, fmt: Dict[str, Any], key: str) -> int:
+        """Position of the format codec in the preference list."""
+        codecs = self.preference.codecs
+        if not codecs:
+            return 0
+        codec = normalize_codec(fmt.get(key))
+        return codecs.index(codec) if codec in codecs else len(codecs)
+
+    def _cost(self, fmt: Dict[str, Any]) -> Tuple[float, float]:
+        """Bandwidth cost used to pick between formats of equal quality."""
+        bitrate = format_bitrate(fmt)
+        if self.preference.high_bitrate:
+            return (-(bitrate or 0), -(fmt.get('filesize') or 0))
+        return (bitrate if bitrate is not None else float('inf'), fmt.get('filesize') or 0)
+
+    def rank_video(self, formats: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Rank video formats, best match first."""
+        candidates = [f for f in formats if f.get('url') and has_video(f)]
+        within = [f for f in candidates if self._within_caps(f)]
+        if not within:
+            # Nothing satisfies the caps: fall back to the smallest formats
+            return sorted(candidates, key=lambda f: ((f.get('height') or 0), self._cost(f)))
+
+        sign = -1 if self.preference.order == 'best' else 1
+        return sorted(within, key=lambda f: (
+            sign * (f.get('height') or 0),
+            sign * (f.get('fps') or 0),
+            self._codec_rank(f, 'vcodec'),
+            self._cost(f),
+        ))
+
+    def rank_audio(self, formats: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Rank audio-only formats, best match first."""
+        candidates = [f for f in formats if f.get('url') and has_audio(f) and not has_video(f)]
+        within = [f for f in candidates if self._within_caps(f)] or candidates
+
+        # For audio the bitrate is the quality measure itself
+        sign = -1 if self.preference.order == 'best' else 1
+        return sorted(within, key=lambda f: (
+            self._codec_rank(f, 'acodec'),
+            sign * (format_bitrate(f) or f.get('filesize') or 0),
+        ))
+
+    def _by_id(self, formats: List[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        """Find the format requested by id."""
+        for fmt in formats:
+            if fmt.get('url') and fmt.get('format_id') == self.preference.format_id:
+                return fmt
+        return None
+
+    def select(self, formats: List[Dict[str, Any]], require_audio: bool = False) -> Optional[Dict[str, Any]]:
+        """Select a single format.
+
+        With ``require_audio`` muxed formats (video with audio) are preferred,
+        as needed by downloaders that cannot merge separate streams.
+        """
+        if self.preference.format_id:
+            fmt = self._by_id(formats)
+            if fmt:
+                return fmt
+
+        if self.preference.audio_only:
+            ranked = self.rank_audio(formats)
+            return ranked[0] if ranked else None
+
+        if require_audio:
+            muxed = self.rank_video([f for f in formats if has_audio(f)])
+            if muxed:
+                return muxed[0]
+
+        ranked = self.rank_video(formats)
+        if ranked:
+            return ranked[0]
+
+        valid = [f for f in formats if f.get('url')]
+        return valid[0] if valid else None
+
+    def select_streams(self, formats: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Select the streams to download: video plus audio for split formats."""
+        selected = self.select(formats)
+        if not selected:
+            return []
+        if self.preference.audio_only or has_audio(selected):
+            return [selected]
+
+        audio = self.rank_audio(formats)
+        return [selected, audio[0]] if audio else [selected]
+
+
+def select_format(formats: List[Dict[str, Any]], quality: Optional[str] = 'best',
+                  require_audio: bool = False) -> Optional[Dict[str, Any]]:
+    """Select the format matching a quality expression."""
+    return FormatSelector(parse_preference(quality)).select(formats, require_audio)
+
+
+def select_streams(formats: List[Dict[str, Any]], quality: Optional[str] = 'best') -> List[Dict[str, Any]]:
+    """Select the video (and separate audio) streams matching a quality expression."""
+    return FormatSelector(parse_preference(quality)).select_streams(formats)
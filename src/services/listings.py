@@ -0,0 +1,387 @@
+"""Streaming enumerators for Bilibili listings.
+
+Favorites folders, collections (合集), series and uploader spaces are paged
+lazily through async generators, so downloads can start while later pages
+are still being fetched.
+"""
+
+import hashlib
+import json
+import re
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, AsyncIterator, Dict, List, Optional, Set, Tuple
+from urllib.parse import parse_qs, urlencode, urlparse
+
+import aiohttp
+
+from ..core.exceptions import NetworkError, URLParseError
+from ..core.logger import logger
+from .bilibili import BILIBILI_HEADERS
+from .rate_limiter import (
+    BILIBILI_THROTTLE_CODES, THROTTLE_STATUS_CODES, RateLimiterRegistry, parse_retry_after,
+    rate_limiters as shared_rate_limiters,
+)
+
+
+# Permutation used to derive the WBI mixin key from the nav image keys
+WBI_MIXIN_KEY_TABLE = [
+    46, 47, 18, 2, 53, 8, 23, 32, 15, 50, 10, 31, 58, 3, 45, 35, 27, 43, 5, 49,
+    33, 9, 42, 19, 29, 28, 14, 39, 12, 38, 41, 13, 37, 48, 7, 16, 24, 55, 40,
+    61, 26, 17, 0, 1, 60, 51, 30, 4, 22, 25, 54, 21, 56, 59, 6, 63, 57, 62, 11,
+    36, 20, 34, 44, 52,
+]
+
+
+# Listings paged newest first by time; the others (collections and series)
+# follow the uploader's own order, so a timestamp says nothing about
+# which of their entries are new
+TIME_ORDERED_KINDS = ('space', 'favorites')
+
+
+@dataclass(frozen=True)
+class ListingRef:
+    """Reference to a pageable Bilibili listing."""
+
+    kind: str  # 'space', 'favorites', 'collection' or 'series'
+    listing_id: str
+    mid: Optional[str] = None
+
+    @property
+    def key(self) -> str:
+        """Stable key used for incremental cursors."""
+        return f"{self.kind}:{self.listing_id}"
+
+
+def parse_listing_url(url: str) -> Optional[ListingRef]:
+    """Parse a favorites, collection, series or uploader space URL."""
+    parsed = urlparse(url)
+    host = parsed.netloc.lower()
+    path = parsed.path.rstrip('/')
+    query = {k: v[0] for k, v in parse_qs(parsed.query).items()}
+
+    if host.endswith('bilibili.com') and path.startswith('/medialist/detail/ml'):
+        return ListingRef('favorites', path[len('/medialist/detail/ml'):])
+
+    if host != 'space.bilibili.com':
+        return None
+
+    match = re.match(r'^/(\d+)(/.*)?$', path)
+    if not match:
+        return None
+    mid, rest = match.group(1), match.group(2) or ''
+
+    if rest.startswith('/favlist'):
+        if 'fid' in query:
+            return ListingRef('favorites', query['fid'], mid)
+        return None
+
+    if rest == '/channel/collectiondetail' and 'sid' in query:
+        return ListingRef('collection', query['sid'], mid)
+
+    if rest == '/channel/seriesdetail' and 'sid' in query:
+        return ListingRef('series', query['sid'], mid)
+
+    list_match = re.match(r'^/lists/(\d+)$', rest)
+    if list_match:
+        kind = 'series' if query.get('type') == 'series' else 'collection'
+        return ListingRef(kind, list_match.group(1), mid)
+
+    if rest in ('', '/video', '/upload/video'):
+        return ListingRef('space', mid, mid)
+
+    return None
+
+
+class ListingCursorStore:
+    """Persistent cursors for incremental runs.
+
+    Time ordered listings keep the newest entry seen, the others the ids of
+    every entry seen.
+    """
+
+    def __init__(self, cursor_file: Optional[Path] = None):
+        self.cursor_file = cursor_file or Path.home() / ".video_downloader" / "listing_cursors.json"
+        self._cursors: Dict[str, Dict[str, Any]] = {}
+        self.load()
+
+    def load(self) -> None:
+        """Load cursors from file."""
+        if self.cursor_file.exists():
+            try:
+                with open(self.cursor_file, 'r', encoding='utf-8') as f:
+                    self._cursors = json.load(f)
+            except (json.JSONDecodeError, IOError):
+                self._cursors = {}
+
+    def save(self) -> None:
+        """Save cursors to file."""
+        self.cursor_file.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.cursor_file, 'w', encoding='utf-8') as f:
+            json.dump(self._cursors, f, indent=2, ensure_ascii=False)
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Get the cursor of a listing."""
+        return self._cursors.get(key)
+
+    def set(self, key: str, timestamp: int, bvid: str) -> None:
+        """Advance the cursor of a listing."""
+        current = self._cursors.get(key)
+        if current and current.get('timestamp', 0) >= timestamp:
+            return
+        self._cursors[key] = {'timestamp': timestamp, 'bvid': bvid}
+        self.save()
+
+    def get_seen(self, key: str) -> Set[str]:
+        """Get the ids of the entries of a listing seen so far."""
+        return set((self._cursors.get(key) or {}).get('seen') or [])
+
+    def add_seen(self, key: str, bvids: List[str]) -> None:
+        """Record entries of a listing as seen."""
+        seen = self.get_seen(key)
+        if seen.issuperset(bvids):
+            return
+        self._cursors[key] = {'seen': sorted(seen.union(bvids))}
+        self.save()
+
+
+class BilibiliListingEnumerator:
+    """Lazily pages through one Bilibili listing.
+
+    Iterate with ``async for``; entries are yielded in listing order as
+    soon as their page arrives. With ``since_last_run`` only entries not
+    seen by a previous run are yielded, and :meth:`commit` records them once
+    the caller has processed the batch. Time ordered listings stop at the
+    first entry behind the stored newest one; collections and series are
+    walked in full and skip the ids already seen. Either way the entries a
+    run cut short by ``limit`` did not reach are still new next time.
+    """
+
+    def __init__(
+        self,
+        ref: ListingRef,
+        since_last_run: bool = False,
+        cursor_store: Optional[ListingCursorStore] = None,
+        page_size: int = 30,
+        rate_limiters: Optional[RateLimiterRegistry] = None,
+        limit: Optional[int] = None,
+        max_throttle_retries: int = 5,
+        api_base: str = "https://api.bilibili.com",
+    ):
+        self.ref = ref
+        self.since_last_run = since_last_run
+        self.cursor_store = cursor_store or ListingCursorStore()
+        self.page_size = page_size
+        self.rate_limiters = rate_limiters if rate_limiters is not None else shared_rate_limiters
+        self.limit = limit
+        self.max_throttle_retries = max_throttle_retries
+        self.api_base = api_base
+        self.newest: Optional[Dict[str, Any]] = None
+        self.yielded: List[str] = []
+        self.truncated = False
+        self.total: Optional[int] = None
+        self._wbi_key: Optional[str] = None
+
+    def __aiter__(self) -> AsyncIterator[Dict[str, Any]]:
+        return self.iter_entries()
+
+    async def iter_entries(self) -> AsyncIterator[Dict[str, Any]]:
+        """Yield listing entries page by page."""
+        time_ordered = self.ref.kind in TIME_ORDERED_KINDS
+        cursor = self.cursor_store.get(self.ref.key) if self.since_last_run and time_ordered else None
+        seen = self.cursor_store.get_seen(self.ref.key) if self.since_last_run and not time_ordered else set()
+        page = 1
+
+        async with aiohttp.ClientSession(headers=BILIBILI_HEADERS) as session:
+            while True:
+                entries, has_more = await self._fetch_page(session, page)
+
+                for index, entry in enumerate(entries):
+                    if cursor and self._is_seen(entry, cursor):
+                        logger.info(f"Reached entries seen in last run of {self.ref.key}")
+                        return
+                    if entry['bvid'] in seen:
+                        continue
+
+                    if self.newest is None:
+                        self.newest = entry
+
+                    yield entry
+                    self.yielded.append(entry['bvid'])
+                    if self.limit and len(self.yielded) >= self.limit:
+                        rest = [e for e in entries[index + 1:] if e['bvid'] not in seen]
+                        if rest:
+                            self.truncated = not (cursor and self._is_seen(rest[0], cursor))
+                        else:
+                            self.truncated = has_more
+                        return
+
+                if not has_more or not entries:
+                    return
+                page += 1
+
+    def commit(self) -> None:
+        """Record the yielded entries as seen for the next run.
+
+        Time ordered listings store the newest entry, which is skipped when
+        the limit cut the listing off before the entries already seen: the
+        cursor would make the next run skip the rest. Other listings store
+        the ids themselves, so a limited run records just what it reached.
+        """
+        if self.ref.kind not in TIME_ORDERED_KINDS:
+            self.cursor_store.add_seen(self.ref.key, self.yielded)
+        elif self.newest and not self.truncated:
+            self.cursor_store.set(self.ref.key, self.newest['timestamp'], self.newest['bvid'])
+
+    def _is_seen(self, entry: Dict[str, Any], cursor: Dict[str, Any]) -> bool:
+        """Check if an entry is at or behind the stored cursor."""
+        return entry['bvid'] == cursor.get('bvid') or entry['timestamp'] <= cursor.get('timestamp', 0)
+
+    async def _get(self, session: aiohttp.ClientSession, endpoint: str, params: Dict[str, Any]) -> Dict:
+        """Make a rate-limited API call and return its data payload.
+        
+        Throttled requests slow the shared Bilibili limiter down and are
+        queued again instead of failing the listing.
+        """
+        limit = self.rate_limiters.limit('bilibili', endpoint)
+        url = f"{self.api_base}{endpoint}"
+        
+        for _ in range(self.max_throttle_retries + 1):
+            await limit.acquire_async()
+            try:
+                async with session.get(url, params=params, timeout=aiohttp.ClientTimeout(total=15)) as response:
+                    if response.status in THROTTLE_STATUS_CODES:
+                        limit.on_throttle(parse_retry_after(response.headers.get('Retry-After')))
+                        continue
+                    response.raise_for_status()
+                    data = await response.json(content_type=None)
+            except Exception as e:
+                raise NetworkError(f"Listing request failed {endpoint}: {e}")
+            
+            if data.get('code') in BILIBILI_THROTTLE_CODES:
+                limit.on_throttle()
+                continue
+            
+            if data.get('code') != 0:
+                raise NetworkError(f"Listing API returned error {data.get('code')}: {data.get('message', '')}")
+            
+            limit.on_success()
+            return data.get('data') or {}
+        
+        raise NetworkError(f"Listing request still throttled after {self.max_throttle_retries} retries: {endpoint}")
+    
+    async def _fetch_page(self, session: aiohttp.ClientSession, page: int) -> Tuple[List[Dict[str, Any]], bool]:
+        """Fetch one page of the listing."""
+        kind = self.ref.kind
+
+        if kind == 'favorites':
+            data = await self._get(session, '/x/v3/fav/resource/list', {
+                'media_id': self.ref.listing_id,
+                'pn': page,
+                'ps': min(self.page_size, 20),
+                'order': 'mtime',
+                'platform': 'web',
+            })
+            self.total = (data.get('info') or {}).get('media_count', self.total)
+            entries = [
+                self._make_entry(m['bvid'], m.get('title', ''), m.get('fav_time') or m.get('pubtime', 0),
+                                 m.get('duration', 0), m.get('cover', ''))
+                for m in data.get('medias') or [] if m.get('bvid')
+            ]
+            return entries, bool(data.get('has_more'))
+
+        if kind == 'collection':
+            data = await self._get(session, '/x/polymer/web-space/seasons_archives_list', {
+                'mid': self.ref.mid,
+                'season_id': self.ref.listing_id,
+                'page_num': page,
+                'page_size': self.page_size,
+                'sort_reverse': 'true',
+            })
+            return self._archive_page(data, page)
+
+        if kind == 'series':
+            data = await self._get(session, '/x/series/archives', {
+                'mid': self.ref.mid,
+                'series_id': self.ref.listing_id,
+                'pn': page,
+                'ps': self.page_size,
+                'sort': 'desc',
+            })
+            return self._archive_page(data, page)
+
+        if kind == 'space':
+            params = await self._sign_wbi(session, {
+                'mid': self.ref.mid,
+                'pn': page,
+                'ps': self.page_size,
+                'order': 'pubdate',
+            })
+            data = await self._get(session, '/x/space/wbi/arc/search', params)
+            self.total = (data.get('page') or {}).get('count', self.total)
+            entries = [
+                self._make_entry(v['bvid'], v.get('title', ''), v.get('created', 0),
+                                 self._parse_length(v.get('length', '')), v.get('pic', ''))
+                for v in (data.get('list') or {}).get('vlist') or [] if v.get('bvid')
+            ]
+            return entries, bool(self.total) and page * self.page_size < self.total
+
+        raise URLParseError(f"Unsupported listing type: {kind}")
+
+    def _archive_page(self, data: Dict, page: int) -> Tuple[List[Dict[str, Any]], bool]:
+        """Parse a collection or series archive page."""
+        page_info = data.get('page') or {}
+        self.total = page_info.get('total', self.total)
+        entries = [
+            self._make_entry(a['bvid'], a.get('title', ''), a.get('pubdate', 0),
+                             a.get('duration', 0), a.get('pic', ''))
+            for a in data.get('archives') or [] if a.get('bvid')
+        ]
+        return entries, bool(self.total) and page * self.page_size < self.total
+
+    async def _sign_wbi(self, session: aiohttp.ClientSession, params: Dict[str, Any]) -> Dict[str, Any]:
+        """Add the WBI signature required by the space search API."""
+        if self._wbi_key is None:
+            # The nav endpoint answers with code -101 for guests but still carries the keys
+            await self.rate_limiters.limit('bilibili', '/x/web-interface/nav').acquire_async()
+            async with session.get(f"{self.api_base}/x/web-interface/nav",
+                                   timeout=aiohttp.ClientTimeout(total=15)) as response:
+                nav = await response.json(content_type=None)
+            wbi_img = (nav.get('data') or {}).get('wbi_img') or {}
+            img_key = wbi_img.get('img_url', '').rsplit('/', 1)[-1].split('.')[0]
+            sub_key = wbi_img.get('sub_url', '').rsplit('/', 1)[-1].split('.')[0]
+            raw_key = img_key + sub_key
+            if len(raw_key) < 64:
+                raise NetworkError("Failed to obtain WBI keys")
+            self._wbi_key = ''.join(raw_key[i] for i in WBI_MIXIN_KEY_TABLE)[:32]
+
+        signed = dict(params, wts=int(time.time()))
+        signed = {
+            k: ''.join(c for c in str(v) if c not in "!'()*")
+            for k, v in sorted(signed.items())
+        }
+        query = urlencode(signed)
+        signed['w_rid'] = hashlib.md5((query + self._wbi_key).encode()).hexdigest()
+        return signed
+
+    @staticmethod
+    def _parse_length(length: str) -> int:
+        """Parse a "mm:ss" or "hh:mm:ss" duration string."""
+        seconds = 0
+        for part in str(length).split(':'):
+            if part.isdigit():
+                seconds = seconds * 60 + int(part)
+        return seconds
+
+    @staticmethod
+    def _make_entry(bvid: str, title: str, timestamp: int, duration: int, cover: str) -> Dict[str, Any]:
+        """Build a listing entry."""
+        return {
+            'bvid': bvid,
+            'title': title,
+            'url': f"https://www.bilibili.com/video/{bvid}",
+            'timestamp': int(timestamp or 0),
+            'duration': duration,
+            'thumbnail': cover,
+        }
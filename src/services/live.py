@@ -0,0 +1,598 @@
+"""Bilibili live stream recording.
+
+Streams are written straight to disk chunk by chunk, so memory stays
+bounded however long a recording runs: the FLV reader buffers at most one
+tag and HLS segments are streamed as they are downloaded.
+
+Every output segment is written to ``<name>.part`` and renamed once it is
+complete; :func:`recover_partial_segments` finalizes segments left behind
+by a crash (a truncated FLV or TS file is still playable). Output rotates
+by duration or size at a keyframe, and each new segment starts with the
+stream headers so it plays on its own. Dropped connections are retried
+with backoff and the gaps are recorded.
+"""
+
+import asyncio
+import os
+import re
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import urljoin
+
+import aiohttp
+import aiofiles
+
+from ..core.config import download_config
+from ..core.exceptions import FileOperationError, NetworkError, URLParseError
+from ..core.logger import logger
+from ..core.metrics import DOWNLOAD_BYTES, HTTP_RESPONSES, RETRIES, status_class
+from ..utils.file_utils import safe_filename
+from .bilibili import BILIBILI_HEADERS
+from .rate_limiter import RateLimiterRegistry, rate_limiters as shared_rate_limiters
+
+
+LIVE_API_BASE = "https://api.live.bilibili.com"
+
+_BYTES = DOWNLOAD_BYTES.labels(engine='live')
+
+# Bilibili live quality numbers (qn)
+LIVE_QUALITIES = {'original': 10000, 'blu-ray': 400, 'super': 250, 'high': 150, 'smooth': 80}
+
+READ_CHUNK_SIZE = 64 * 1024
+
+PART_SUFFIX = '.part'
+
+_ROOM_URL_RE = re.compile(r'live\.bilibili\.com/(?:h5/|blanc/)?(\d+)')
+
+
+def parse_room_id(room: str) -> int:
+    """Get the room id from a live room URL or a bare id."""
+    room = str(room).strip()
+    if room.isdigit():
+        return int(room)
+    match = _ROOM_URL_RE.search(room)
+    if not match:
+        raise URLParseError(f"Not a Bilibili live room: {room}")
+    return int(match.group(1))
+
+
+@dataclass
+class LiveStream:
+    """A resolved live stream URL."""
+
+    url: str
+    format: str  # 'flv', 'ts' or 'fmp4'
+    quality: int
+    codec: str = 'avc'
+
+    @property
+    def is_hls(self) -> bool:
+        return self.format != 'flv'
+
+    @property
+    def extension(self) -> str:
+        return {'flv': '.flv', 'ts': '.ts'}.get(self.format, '.mp4')
+
+
+@dataclass
+class RecordingStats:
+    """Counters of one recorder."""
+
+    bytes_written: int = 0
+    reconnects: int = 0
+    segments: List[Path] = field(default_factory=list)
+    gaps: List[Tuple[str, float]] = field(default_factory=list)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'bytes_written': self.bytes_written,
+            'reconnects': self.reconnects,
+            'segments': [str(path) for path in self.segments],
+            'gaps': list(self.gaps),
+        }
+
+
+class BilibiliLiveClient:
+    """Minimal client for the Bilibili live room APIs."""
+
+    def __init__(self, session: aiohttp.ClientSession, rate_limiters: Optional[RateLimiterRegistry] = None):
+        self.session = session
+        self.rate_limiters = rate_limiters or shared_rate_limiters
+
+    async def _get(self, endpoint: str, params: Dict[str, Any]) -> Dict[str, Any]:
+        """Call a live API endpoint and return its data."""
+        await self.rate_limiters.limit('bilibili', endpoint).acquire_async()
+        try:
+            async with self.session.get(
+                f"{LIVE_API_BASE}{endpoint}",
+                params=params,
+                timeout=aiohttp.ClientTimeout(total=download_config.timeout)
+            ) as response:
+                payload = await response.json(content_type=None)
+        except (aiohttp.ClientError, asyncio.TimeoutError, ValueError) as e:
+            raise NetworkError(f"Live API request failed: {e}")
+
+        if payload.get('code') != 0:
+            raise NetworkError(f"Live API error {payload.get('code')}: {payload.get('message')}")
+        return payload.get('data') or {}
+
+    async def get_room_info(self, room_id: int) -> Dict[str, Any]:
+        """Get the real room id, live status and title of a room."""
+        data = await self._get('/room/v1/Room/get_info', {'room_id': room_id})
+        return {
+            'room_id': data.get('room_id', room_id),
+            'short_id': data.get('short_id', 0),
+            'uid': data.get('uid'),
+            'title': data.get('title', ''),
+            'live_status': data.get('live_status', 0),
+            'is_live': data.get('live_status') == 1,
+            'live_time': data.get('live_time'),
+            'cover': data.get('user_cover', ''),
+        }
+
+    async def get_stream(self, room_id: int, quality: int = 10000, prefer: str = 'flv') -> Optional[LiveStream]:
+        """Resolve a stream URL, preferring ``prefer`` ('flv' or 'hls')."""
+        data = await self._get('/xlive/web-room/v2/index/getRoomPlayInfo', {
+            'room_id': room_id,
+            'protocol': '0,1',
+            'format': '0,1,2',
+            'codec': '0,1',
+            'qn': quality,
+            'platform': 'web',
+            'ptype': 8,
+        })
+        streams = ((data.get('playurl_info') or {}).get('playurl') or {}).get('stream') or []
+
+        candidates = []
+        for stream in streams:
+            for fmt in stream.get('format', []):
+                for codec in fmt.get('codec', []):
+                    for url_info in codec.get('url_info', []):
+                        candidates.append(LiveStream(
+                            url=f"{url_info['host']}{codec['base_url']}{url_info.get('extra', '')}",
+                            format=fmt.get('format_name', 'flv'),
+                            quality=codec.get('current_qn', quality),
+                            codec=codec.get('codec_name', 'avc'),
+                        ))
+        if not candidates:
+            return None
+
+        def _rank(stream: LiveStream) -> Tuple[bool, bool, bool]:
+            preferred = stream.is_hls == (prefer == 'hls')
+            return (not preferred, stream.codec != 'avc', stream.format == 'ts')
+
+        return sorted(candidates, key=_rank)[0]
+
+
+class SegmentWriter:
+    """One output file, written as ``.part`` and renamed when finalized.
+
+    Small writes (single FLV tags) are coalesced into a bounded buffer so a
+    stream costs one disk write per ``buffer_size`` bytes.
+    """
+
+    def __init__(self, path: Path, buffer_size: int = 256 * 1024):
+        self.path = path
+        self.part_path = path.with_name(path.name + PART_SUFFIX)
+        self.buffer_size = buffer_size
+        self.size = 0
+        self.started = time.monotonic()
+        self._file = None
+        self._buffer = bytearray()
+
+    async def open(self) -> None:
+        try:
+            self._file = await aiofiles.open(self.part_path, 'wb')
+        except OSError as e:
+            raise FileOperationError(f"Failed to create {self.part_path}: {e}")
+
+    async def write(self, data: bytes) -> None:
+        self._buffer += data
+        self.size += len(data)
+        if len(self._buffer) >= self.buffer_size:
+            await self._flush_buffer()
+
+    async def _flush_buffer(self) -> None:
+        if self._buffer:
+            await self._file.write(bytes(self._buffer))
+            self._buffer.clear()
+
+    @property
+    def duration(self) -> float:
+        return time.monotonic() - self.started
+
+    async def finalize(self) -> Optional[Path]:
+        """Flush, fsync and atomically rename to the final name."""
+        if self._file is None:
+            return None
+        await self._flush_buffer()
+        await self._file.flush()
+        await asyncio.to_thread(os.fsync, self._file.fileno())
+        await self._file.close()
+        self._file = None
+
+        if self.size == 0:
+            self.part_path.unlink(missing_ok=True)
+            return None
+        os.replace(self.part_path, self.path)
+        return self.path
+
+
+def recover_partial_segments(directory: Path) -> List[Path]:
+    """Finalize ``.part`` segments left behind by an interrupted recording."""
+    recovered = []
+    for part_path in Path(directory).glob(f"*{PART_SUFFIX}"):
+        if part_path.stat().st_size == 0:
+            part_path.unlink()
+            continue
+        path = part_path.with_name(part_path.name[:-len(PART_SUFFIX)])
+        os.replace(part_path, path)
+        recovered.append(path)
+        logger.info(f"Recovered interrupted segment: {path}")
+    return recovered
+
+
+FLV_HEADER_SIZE = 13  # 9-byte header plus PreviousTagSize0
+
+TAG_AUDIO, TAG_VIDEO, TAG_SCRIPT = 8, 9, 18
+
+
+@dataclass
+class FlvTag:
+    """One FLV tag including its trailing PreviousTagSize field."""
+
+    tag_type: int
+    timestamp: int
+    data: bytes
+
+    @property
+    def is_keyframe(self) -> bool:
+        return self.tag_type == TAG_VIDEO and len(self.data) > 11 and self.data[11] >> 4 == 1
+
+    @property
+    def is_sequence_header(self) -> bool:
+        """AVC/HEVC decoder config, AAC config or metadata."""
+        if self.tag_type == TAG_SCRIPT:
+            return True
+        if len(self.data) < 13:
+            return False
+        if self.tag_type == TAG_VIDEO:
+            return self.data[12] == 0 and self.data[11] & 0x0F in (7, 12)
+        return self.data[11] >> 4 == 10 and self.data[12] == 0
+
+
+class FlvReader:
+    """Incremental FLV parser holding at most one partial tag in memory."""
+
+    def __init__(self):
+        self.header: Optional[bytes] = None
+        self._buffer = bytearray()
+
+    def feed(self, chunk: bytes) -> List[FlvTag]:
+        """Add received bytes and return the complete tags."""
+        self._buffer += chunk
+        tags = []
+        position = 0
+
+        if self.header is None:
+            if len(self._buffer) < FLV_HEADER_SIZE:
+                return tags
+            if bytes(self._buffer[:3]) != b'FLV':
+                raise NetworkError("Live stream is not FLV")
+            self.header = bytes(self._buffer[:FLV_HEADER_SIZE])
+            position = FLV_HEADER_SIZE
+
+        while len(self._buffer) - position >= 11:
+            data_size = int.from_bytes(self._buffer[position + 1:position + 4], 'big')
+            total = 11 + data_size + 4
+            if len(self._buffer) - position < total:
+                break
+            tag_type = self._buffer[position] & 0x1F
+            timestamp = int.from_bytes(self._buffer[position + 4:position + 7], 'big') | (self._buffer[position + 7] << 24)
+            tags.append(FlvTag(tag_type, timestamp, bytes(self._buffer[position:position + total])))
+            position += total
+
+        del self._buffer[:position]
+        return tags
+
+
+_EXTINF_RE = re.compile(r'#EXTINF:([\d.]+)')
+_MAP_RE = re.compile(r'#EXT-X-MAP:.*URI="([^"]+)"')
+
+
+def parse_m3u8(text: str, base_url: str) -> Dict[str, Any]:
+    """Parse a live media playlist into its sequence numbers and segment URLs."""
+    playlist: Dict[str, Any] = {'target_duration': 1.0, 'map': None, 'segments': [], 'ended': False}
+    sequence = 0
+    duration = 0.0
+    for line in text.splitlines():
+        line = line.strip()
+        if line.startswith('#EXT-X-TARGETDURATION:'):
+            playlist['target_duration'] = float(line.split(':', 1)[1])
+        elif line.startswith('#EXT-X-MEDIA-SEQUENCE:'):
+            sequence = int(line.split(':', 1)[1])
+        elif line.startswith('#EXT-X-MAP:'):
+            match = _MAP_RE.match(line)
+            if match:
+                playlist['map'] = urljoin(base_url, match.group(1))
+        elif line.startswith('#EXTINF:'):
+            match = _EXTINF_RE.match(line)
+            duration = float(match.group(1)) if match else 0.0
+        elif line == '#EXT-X-ENDLIST':
+            playlist['ended'] = True
+        elif line and not line.startswith('#'):
+            playlist['segments'].append((sequence, duration, urljoin(base_url, line)))
+            sequence += 1
+    return playlist
+
+
+class LiveRecorder:
+    """Records one live room to rotating output segments."""
+
+    def __init__(
+        self,
+        room: str,
+        output_dir: str,
+        session: Optional[aiohttp.ClientSession] = None,
+        quality: int = 10000,
+        prefer: str = 'flv',
+        max_duration: Optional[float] = None,
+        max_size: Optional[int] = None,
+        wait_for_live: bool = False,
+        poll_interval: float = 30.0,
+        reconnect_delay: float = 1.0,
+        max_reconnect_delay: float = 60.0,
+        read_timeout: float = 30.0,
+        client: Optional[BilibiliLiveClient] = None,
+    ):
+        self.room_id = parse_room_id(room)
+        self.output_dir = Path(output_dir)
+        self.session = session
+        self.quality = quality
+        self.prefer = prefer
+        self.max_duration = max_duration
+        self.max_size = max_size
+        self.wait_for_live = wait_for_live
+        self.poll_interval = poll_interval
+        self.reconnect_delay = reconnect_delay
+        self.max_reconnect_delay = max_reconnect_delay
+        self.read_timeout = read_timeout
+        self.client = client
+        self.stats = RecordingStats()
+        self.title = ''
+
+        self._segment: Optional[SegmentWriter] = None
+        self._header_tags: Dict[Tuple[int, bool], FlvTag] = {}
+        self._has_video = False
+        self._disconnected_at: Optional[float] = None
+        self._stop = asyncio.Event()
+
+    def stop(self) -> None:
+        """Ask the recorder to finish the current segment and return."""
+        self._stop.set()
+
+    @property
+    def stopped(self) -> bool:
+        return self._stop.is_set()
+
+    async def record(self) -> List[Path]:
+        """Record until the stream ends (or :meth:`stop` is called)."""
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        recover_partial_segments(self.output_dir)
+
+        if self.session is not None:
+            return await self._record(self.session)
+        async with aiohttp.ClientSession(headers=self._headers()) as session:
+            return await self._record(session)
+
+    def _headers(self) -> Dict[str, str]:
+        return {
+            'User-Agent': BILIBILI_HEADERS['User-Agent'],
+            'Referer': 'https://live.bilibili.com/',
+        }
+
+    async def _record(self, session: aiohttp.ClientSession) -> List[Path]:
+        client = self.client or BilibiliLiveClient(session)
+        delay = self.reconnect_delay
+        try:
+            while not self.stopped:
+                try:
+                    room = await client.get_room_info(self.room_id)
+                    self.room_id, self.title = room['room_id'], room['title']
+                    if not room['is_live']:
+                        if not self.wait_for_live:
+                            logger.info(f"Room {self.room_id} is not live")
+                            break
+                        await self._finish_segment()
+                        await self._sleep(self.poll_interval)
+                        continue
+
+                    stream = await client.get_stream(self.room_id, self.quality, self.prefer)
+                    if stream is None:
+                        raise NetworkError("No live stream URL available")
+
+                    self._note_reconnect()
+                    received = self.stats.bytes_written
+                    try:
+                        if stream.is_hls:
+                            await self._record_hls(session, stream)
+                        else:
+                            await self._record_flv(session, stream)
+                    finally:
+                        if self.stats.bytes_written > received:
+                            # The connection worked for a while: reconnect quickly
+                            self._disconnected_at = time.monotonic()
+                            delay = self.reconnect_delay
+                except (NetworkError, aiohttp.ClientError, asyncio.TimeoutError) as e:
+                    logger.warning(f"Room {self.room_id}: {e}, reconnecting in {delay:.0f}s")
+                    await self._sleep(delay)
+                    delay = min(delay * 2, self.max_reconnect_delay)
+        finally:
+            await self._finish_segment()
+        return self.stats.segments
+
+    async def _sleep(self, seconds: float) -> None:
+        """Sleep, waking up early when stopped."""
+        try:
+            await asyncio.wait_for(self._stop.wait(), timeout=seconds)
+        except asyncio.TimeoutError:
+            pass
+
+    def _note_reconnect(self) -> None:
+        """Record the gap since the last disconnect."""
+        if self._disconnected_at is None:
+            return
+        gap = time.monotonic() - self._disconnected_at
+        self._disconnected_at = None
+        self.stats.reconnects += 1
+        RETRIES.labels(operation='live_reconnect').inc()
+        self.stats.gaps.append((datetime.now().isoformat(timespec='seconds'), round(gap, 1)))
+        logger.warning(f"Room {self.room_id}: reconnected after a {gap:.1f}s gap")
+
+    def _should_rotate(self) -> bool:
+        segment = self._segment
+        if segment is None:
+            return False
+        if self.max_duration and segment.duration >= self.max_duration:
+            return True
+        return bool(self.max_size and segment.size >= self.max_size)
+
+    async def _start_segment(self, extension: str) -> SegmentWriter:
+        """Finalize the current segment and open the next one."""
+        await self._finish_segment()
+        stamp = datetime.now().strftime('%Y%m%d-%H%M%S')
+        name = safe_filename(f"{self.room_id}_{stamp}_{self.title}"[:120])
+        path = self.output_dir / f"{name}{extension}"
+        counter = 1
+        while path.exists() or path.with_name(path.name + PART_SUFFIX).exists():
+            path = self.output_dir / f"{name}_{counter}{extension}"
+            counter += 1
+
+        self._segment = SegmentWriter(path)
+        await self._segment.open()
+        logger.info(f"Room {self.room_id}: recording to {path}")
+        return self._segment
+
+    async def _write(self, data: bytes) -> None:
+        await self._segment.write(data)
+        self.stats.bytes_written += len(data)
+        _BYTES.inc(len(data))
+
+    async def _finish_segment(self) -> None:
+        if self._segment is None:
+            return
+        path = await self._segment.finalize()
+        self._segment = None
+        if path:
+            self.stats.segments.append(path)
+
+    async def _open_stream(self, session: aiohttp.ClientSession, url: str) -> aiohttp.ClientResponse:
+        response = await session.get(
+            url,
+            timeout=aiohttp.ClientTimeout(total=None, sock_connect=download_config.timeout, sock_read=self.read_timeout)
+        )
+        HTTP_RESPONSES.labels('media', status_class(response.status)).inc()
+        if response.status != 200:
+            response.release()
+            raise NetworkError(f"HTTP {response.status} from live stream")
+        return response
+
+    async def _record_flv(self, session: aiohttp.ClientSession, stream: LiveStream) -> None:
+        """Stream an FLV live stream to disk, rotating at keyframes."""
+        reader = FlvReader()
+        self._header_tags.clear()
+        self._has_video = False
+        # A new connection restarts the timestamps: always start a new segment
+        await self._finish_segment()
+
+        response = await self._open_stream(session, stream.url)
+        try:
+            async for chunk in response.content.iter_chunked(READ_CHUNK_SIZE):
+                for tag in reader.feed(chunk):
+                    await self._write_flv_tag(reader, tag)
+                if self.stopped:
+                    return
+        finally:
+            response.release()
+        raise NetworkError("Live stream connection closed")
+
+    async def _write_flv_tag(self, reader: FlvReader, tag: FlvTag) -> None:
+        if tag.is_sequence_header:
+            self._header_tags[(tag.tag_type, tag.tag_type == TAG_SCRIPT)] = tag
+            if self._segment is not None:
+                await self._write(tag.data)
+            return
+
+        if tag.tag_type == TAG_VIDEO:
+            self._has_video = True
+        at_cut_point = tag.is_keyframe or not self._has_video
+
+        if self._segment is None or (self._should_rotate() and at_cut_point):
+            if self._segment is None and self._has_video and not tag.is_keyframe:
+                return  # Start on a keyframe
+            await self._start_segment('.flv')
+            # Every segment starts with the headers so it decodes on its own
+            await self._write(reader.header)
+            for header_tag in self._header_tags.values():
+                await self._write(header_tag.data)
+
+        await self._write(tag.data)
+
+    async def _record_hls(self, session: aiohttp.ClientSession, stream: LiveStream) -> None:
+        """Poll an HLS playlist and append new segments, detecting gaps."""
+        last_sequence: Optional[int] = None
+        init_data: Optional[bytes] = None
+        await self._finish_segment()
+
+        while not self.stopped:
+            async with session.get(stream.url, timeout=aiohttp.ClientTimeout(total=self.read_timeout)) as response:
+                if response.status != 200:
+                    raise NetworkError(f"HTTP {response.status} from live playlist")
+                playlist = parse_m3u8(await response.text(), str(response.url))
+
+            if playlist['map'] and init_data is None:
+                async with session.get(playlist['map'], timeout=aiohttp.ClientTimeout(total=self.read_timeout)) as response:
+                    init_data = await response.read()
+
+            for sequence, _, url in playlist['segments']:
+                if last_sequence is not None and sequence <= last_sequence:
+                    continue
+                if last_sequence is not None and sequence > last_sequence + 1:
+                    missed = sequence - last_sequence - 1
+                    self.stats.gaps.append((datetime.now().isoformat(timespec='seconds'), float(missed)))
+                    logger.warning(f"Room {self.room_id}: {missed} HLS segment(s) missed")
+
+                if self._segment is None or self._should_rotate():
+                    await self._start_segment(stream.extension)
+                    if init_data:
+                        await self._write(init_data)
+
+                response = await self._open_stream(session, url)
+                try:
+                    async for chunk in response.content.iter_chunked(READ_CHUNK_SIZE):
+                        await self._write(chunk)
+                finally:
+                    response.release()
+                last_sequence = sequence
+
+            if playlist['ended']:
+                return
+            await self._sleep(max(playlist['target_duration'] / 2, 0.5))
+
+
+async def record_rooms(rooms: List[str], output_dir: str, **options: Any) -> Dict[int, RecordingStats]:
+    """Record several rooms concurrently over one connection pool."""
+    async with aiohttp.ClientSession(headers={
+        'User-Agent': BILIBILI_HEADERS['User-Agent'],
+        'Referer': 'https://live.bilibili.com/',
+    }) as session:
+        recorders = [LiveRecorder(room, output_dir, session=session, **options) for room in rooms]
+        try:
+            await asyncio.gather(*(recorder.record() for recorder in recorders))
+        finally:
+            for recorder in recorders:
+                recorder.stop()
+    return {recorder.room_id: recorder.stats for recorder in recorders}
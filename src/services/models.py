@@ -0,0 +1,181 @@
+"""Compact records of extracted video info and formats.
+
+Extractors return plain dicts, and yt-dlp formats also carry fragment
+lists, HTTP headers and downloader options. A queue keeps the info of every
+queued video alive, so :class:`VideoInfo` and :class:`Format` store only
+the fields that selection, download and the UI read, in ``__slots__``.
+Nested fields they do not know are dropped when the record is built, and
+identical HTTP header dicts are shared between formats.
+
+Both records are read-only mappings, so code written for the dicts
+(``fmt.get('height')``, ``info['formats']``) works unchanged. A field
+that is None counts as absent, like a missing key. The original payload
+can be kept zlib-compressed and is decoded on first access to ``raw``.
+"""
+
+import json
+import sys
+import zlib
+from collections.abc import Mapping
+from types import MappingProxyType
+from typing import Any, Dict, FrozenSet, Iterable, Iterator, List, Optional, Tuple
+
+
+FORMAT_FIELDS = (
+    'format_id', 'url', 'ext', 'protocol', 'format_note', 'resolution', 'language',
+    'width', 'height', 'fps', 'dynamic_range', 'vcodec', 'acodec', 'codecid', 'asr', 'audio_channels',
+    'filesize', 'filesize_approx', 'tbr', 'vbr', 'abr', 'bandwidth', 'duration',
+    'backup_urls', 'segment_base', 'http_headers',
+)
+
+VIDEO_INFO_FIELDS = (
+    'id', 'title', 'description', 'duration', 'uploader', 'upload_date', 'view_count', 'like_count',
+    'thumbnail', 'url', 'webpage_url', 'platform', 'api_source', 'formats', 'subtitles',
+    'cid', 'bvid', 'page', 'pages',
+)
+
+# Short strings repeated across thousands of formats
+_INTERNED_FIELDS = frozenset({'ext', 'protocol', 'vcodec', 'acodec', 'dynamic_range', 'language'})
+
+_SCALARS = (str, int, float, bool)
+
+# Shared read-only copies of identical header dicts
+_HEADERS: Dict[Tuple[Tuple[str, str], ...], Mapping] = {}
+_MAX_SHARED_HEADERS = 1024
+
+
+def share_headers(headers: Optional[Mapping]) -> Optional[Mapping]:
+    """Read-only copy of ``headers``, shared with every identical dict."""
+    if not headers:
+        return None
+    key = tuple(sorted((str(k), str(v)) for k, v in headers.items()))
+    shared = _HEADERS.get(key)
+    if shared is None:
+        if len(_HEADERS) >= _MAX_SHARED_HEADERS:
+            _HEADERS.clear()
+        shared = _HEADERS[key] = MappingProxyType(dict(key))
+    return shared
+
+
+def _compress(data: Mapping) -> bytes:
+    return zlib.compress(json.dumps(data, ensure_ascii=False, default=str).encode('utf-8'))
+
+
+class _Record(Mapping):
+    """Read-only mapping over ``__slots__`` fields."""
+
+    __slots__ = ('_raw',)
+    _fields: Tuple[str, ...] = ()
+    _field_set: FrozenSet[str] = frozenset()
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls._fields = tuple(name for name in cls.__slots__ if not name.startswith('_'))
+        cls._field_set = frozenset(cls._fields)
+
+    def __getitem__(self, key: str) -> Any:
+        if key in self._field_set:
+            value = getattr(self, key)
+            if value is not None:
+                return value
+        raise KeyError(key)
+
+    def __iter__(self) -> Iterator[str]:
+        return (name for name in self._fields if getattr(self, name) is not None)
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self)
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({dict(self)!r})"
+
+    @property
+    def raw(self) -> Optional[Dict[str, Any]]:
+        """The original payload, if it was kept."""
+        return json.loads(zlib.decompress(self._raw)) if self._raw else None
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Plain dict of the stored fields."""
+        return dict(self)
+
+
+class Format(_Record):
+    """One downloadable format (stream) of a video."""
+
+    __slots__ = FORMAT_FIELDS
+
+    @classmethod
+    def from_dict(cls, data: Mapping, keep_raw: bool = False) -> "Format":
+        """Build a format from an extractor dict, dropping unknown fields."""
+        if isinstance(data, Format):
+            return data
+
+        record = cls.__new__(cls)
+        for name in cls._fields:
+            value = data.get(name)
+            if name in _INTERNED_FIELDS and isinstance(value, str):
+                value = sys.intern(value)
+            setattr(record, name, value)
+        record.http_headers = share_headers(data.get('http_headers'))
+        if record.backup_urls is not None:
+            record.backup_urls = tuple(record.backup_urls)
+        record._raw = _compress(data) if keep_raw else None
+        return record
+
+
+def compact_formats(formats: Optional[Iterable[Mapping]]) -> List[Format]:
+    """Compact a list of extractor format dicts."""
+    return [Format.from_dict(fmt) for fmt in formats or []]
+
+
+class VideoInfo(_Record):
+    """Extracted information of one video.
+
+    Scalar fields beyond the common ones (``ep_id``, ``season_id``,
+    platform-specific ids...) are kept; unknown nested data is dropped.
+    """
+
+    __slots__ = VIDEO_INFO_FIELDS + ('_extra',)
+
+    def __getitem__(self, key: str) -> Any:
+        if key not in self._field_set and self._extra and key in self._extra:
+            return self._extra[key]
+        return super().__getitem__(key)
+
+    def __iter__(self) -> Iterator[str]:
+        yield from super().__iter__()
+        if self._extra:
+            yield from self._extra
+
+    @classmethod
+    def from_dict(cls, data: Mapping, keep_raw: bool = False) -> "VideoInfo":
+        """Build video info from an extractor dict.
+
+        With ``keep_raw`` the complete original dict stays available,
+        compressed, through :attr:`raw`.
+        """
+        if isinstance(data, VideoInfo):
+            return data
+
+        record = cls.__new__(cls)
+        for name in cls._fields:
+            setattr(record, name, data.get(name))
+        record.formats = tuple(compact_formats(record.formats))
+        if record.pages is not None:
+            record.pages = tuple(record.pages)
+
+        extra = {
+            key: value for key, value in data.items()
+            if key not in cls._field_set and isinstance(value, _SCALARS)
+        }
+        record._extra = extra or None
+        record._raw = _compress(data) if keep_raw else None
+        return record
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Plain dict, with formats and pages as lists of dicts."""
+        data = dict(self)
+        data['formats'] = [fmt.to_dict() for fmt in self.formats]
+        if self.pages is not None:
+            data['pages'] = list(self.pages)
+        return data
@@ -0,0 +1,204 @@
+"""Background mover from fast staging storage to the final destination.
+
+With ``staging`` enabled, downloads are written and merged in ``temp_dir``
+(a fast local disk) instead of next to the final path, so the network side
+never waits on the write latency of slow storage such as a NAS mount.
+:class:`BackgroundMover` then transfers finished files on its own worker
+threads with a concurrency and bandwidth limit: a rename when staging and
+destination share a file system, otherwise an in-kernel
+``os.copy_file_range`` copy in throttled chunks, falling back to a
+buffered copy where that is not supported.
+
+Downloads only :meth:`BackgroundMover.submit` their move, so a scheduler
+slot is free for the next download while the copy runs; whatever needs
+the file at its destination (e.g. the archive record) is chained on the
+move. Call :meth:`BackgroundMover.drain` once before the event loop ends.
+"""
+
+import asyncio
+import errno
+import hashlib
+import os
+import shutil
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Callable, List, Optional, Set
+
+from ..core.config import download_config
+from ..core.exceptions import FileOperationError
+from ..core.logger import logger
+
+
+MOVE_CHUNK_SIZE = 8 * 1024 * 1024
+
+# copy_file_range errors that mean "not supported here", not "copy failed"
+_COPY_UNSUPPORTED = {errno.EXDEV, errno.ENOSYS, errno.EINVAL, errno.EOPNOTSUPP, errno.EPERM}
+
+
+def staging_path(save_path: Path, staging_dir: Optional[str] = None) -> Path:
+    """Path in the staging directory for a file finally saved at ``save_path``.
+
+    The name is prefixed with a hash of the full destination, so files with
+    the same name in different directories do not collide.
+    """
+    save_path = Path(save_path)
+    digest = hashlib.sha1(str(save_path.resolve()).encode('utf-8')).hexdigest()[:10]
+    return Path(staging_dir or download_config.temp_dir) / f"{digest}_{save_path.name}"
+
+
+class BandwidthLimiter:
+    """Paces byte transfers to ``rate`` bytes per second across threads (0 = unlimited)."""
+
+    def __init__(self, rate: int = 0):
+        self.rate = rate
+        self._next_slot = 0.0
+        self._lock = threading.Lock()
+
+    def consume(self, amount: int) -> None:
+        """Wait until ``amount`` bytes may be transferred."""
+        if self.rate <= 0:
+            return
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next_slot)
+            self._next_slot = start + amount / self.rate
+        if start > now:
+            time.sleep(start - now)
+
+
+def _copy_data(source: Path, target: Path, limiter: Optional[BandwidthLimiter]) -> None:
+    """Copy file contents in chunks, in-kernel where possible."""
+    use_copy_file_range = hasattr(os, 'copy_file_range')
+    with open(source, 'rb') as src, open(target, 'wb') as dst:
+        remaining = os.fstat(src.fileno()).st_size
+        while remaining > 0:
+            count = min(MOVE_CHUNK_SIZE, remaining)
+            if limiter:
+                limiter.consume(count)
+
+            copied = 0
+            if use_copy_file_range:
+                try:
+                    copied = os.copy_file_range(src.fileno(), dst.fileno(), count)
+                except OSError as e:
+                    if e.errno not in _COPY_UNSUPPORTED:
+                        raise
+                    use_copy_file_range = False
+            if not use_copy_file_range:
+                data = src.read(count)
+                dst.write(data)
+                copied = len(data)
+
+            if copied == 0:
+                raise OSError(f"Unexpected end of file while copying {source}")
+            remaining -= copied
+    shutil.copystat(source, target)
+
+
+def move_file(source: Path, target: Path, limiter: Optional[BandwidthLimiter] = None) -> str:
+    """Move a finished file to its destination; returns 'rename' or 'copy'.
+
+    A copy is written next to the target under a temporary name and renamed
+    into place, so the target never appears half-written.
+    """
+    source, target = Path(source), Path(target)
+    try:
+        target.parent.mkdir(parents=True, exist_ok=True)
+        try:
+            os.replace(source, target)
+            return 'rename'
+        except OSError as e:
+            if e.errno != errno.EXDEV:
+                raise
+
+        temp_target = target.with_name(target.name + '.moving')
+        try:
+            _copy_data(source, temp_target, limiter)
+            os.replace(temp_target, target)
+        except BaseException:
+            temp_target.unlink(missing_ok=True)
+            raise
+        source.unlink()
+        return 'copy'
+    except OSError as e:
+        raise FileOperationError(f"Failed to move {source} to {target}: {e}")
+
+
+class BackgroundMover:
+    """Moves staged files to their destination on dedicated worker threads."""
+
+    def __init__(self, concurrency: Optional[int] = None, bandwidth: Optional[int] = None):
+        self.concurrency = concurrency or download_config.mover_workers
+        self.limiter = BandwidthLimiter(download_config.mover_bandwidth if bandwidth is None else bandwidth)
+        self._executor = ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix='mover')
+        self._pending: Set[asyncio.Future] = set()
+        self._errors: List[BaseException] = []
+        self._stats_lock = threading.Lock()
+        self.bytes_moved = 0
+
+    def _move(self, source: Path, target: Path, then: Optional[Callable[[], Any]]) -> str:
+        """Move one file, then run ``then`` (runs on a worker thread)."""
+        size = Path(source).stat().st_size
+        started = time.monotonic()
+        method = move_file(source, target, self.limiter)
+        with self._stats_lock:
+            self.bytes_moved += size
+        logger.debug(f"Moved {target.name} ({method}, {size / (1024 * 1024):.1f} MB "
+                     f"in {time.monotonic() - started:.1f}s)")
+        if then is not None:
+            then()
+        return method
+
+    def submit(self, source: Path, target: Path, then: Optional[Callable[[], Any]] = None) -> "asyncio.Future[str]":
+        """Schedule a move without waiting for it.
+
+        ``then`` runs on the worker thread once the file is at ``target``.
+        Failures are logged and raised again by :meth:`drain`.
+        """
+        future = asyncio.get_running_loop().run_in_executor(self._executor, self._move, source, target, then)
+        self._pending.add(future)
+
+        def _done(done: asyncio.Future) -> None:
+            self._pending.discard(done)
+            if not done.cancelled() and done.exception() is not None:
+                logger.error(f"Failed to move {Path(target).name} to final storage: {done.exception()}")
+                self._errors.append(done.exception())
+
+        future.add_done_callback(_done)
+        return future
+
+    @property
+    def pending(self) -> int:
+        """Number of moves not finished yet."""
+        return len(self._pending)
+
+    async def drain(self) -> None:
+        """Wait for every scheduled move; raises if any of them failed."""
+        while self._pending:
+            await asyncio.gather(*list(self._pending), return_exceptions=True)
+        if self._errors:
+            errors, self._errors = self._errors, []
+            raise FileOperationError(f"{len(errors)} file(s) could not be moved to final storage: {errors[0]}")
+
+    def shutdown(self) -> None:
+        """Finish pending moves and stop the worker threads."""
+        self._executor.shutdown(wait=True)
+
+
+_mover: Optional[BackgroundMover] = None
+
+
+def get_background_mover() -> BackgroundMover:
+    """Get the shared background mover, created on first use."""
+    global _mover
+    if _mover is None:
+        _mover = BackgroundMover()
+    return _mover
+
+
+async def drain_background_mover() -> None:
+    """Wait for the moves of the shared mover, if it was used at all."""
+    if _mover is not None:
+        await _mover.drain()
@@ -0,0 +1,226 @@
+"""Video downloads shared by the CLI, the list downloader, the daemon and the GUI.
+
+:func:`download_video` runs the whole flow for a URL: skip it when the
+download archive already has it, resolve the play URL speculatively on the
+prefetcher's warm session, link identical content already on disk (when
+the prefetcher fingerprints), download, and record the file in the archive.
+:func:`download_video_pages` does the same for selected pages (分P) of a
+multi-part video as one job group. Frontends only render what the hooks
+report.
+"""
+
+import asyncio
+from dataclasses import dataclass
+from functools import partial
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+from ..core.config import config_manager, download_config
+from ..core.exceptions import URLParseError
+from ..core.logger import logger
+from ..utils.file_utils import ensure_directory, page_filename, safe_filename, video_filename
+from ..utils.range_utils import parse_page_selection
+from .archive import DownloadArchive, get_download_archive
+from .bilibili import BilibiliService, bilibili_service
+from .content_store import ContentStore
+from .downloader import AsyncDownloader
+from .prefetch import PrefetchHandle, SpeculativePrefetcher
+
+
+ProgressCallback = Callable[[float], None]
+
+
+@dataclass
+class VideoDownloadResult:
+    """Outcome of :func:`download_video`."""
+
+    path: Path
+    archive_id: str
+    # 'archived' (skipped), 'linked' (deduplicated), 'downloaded', or 'failed'
+    # for a page whose play URL did not resolve (``path`` is where it would go)
+    status: str
+    info: Optional[Dict[str, Any]] = None
+    # Archive entry of the identical file and the link method, for 'linked'
+    source: Optional[Dict[str, Any]] = None
+    method: Optional[str] = None
+    # Move of a staged download to ``path``, still running when returned
+    moving: Optional[asyncio.Future] = None
+    error: Optional[str] = None
+    # Page number, for the results of download_video_pages
+    page: Optional[int] = None
+
+
+async def download_video(
+    prefetcher: SpeculativePrefetcher,
+    url: str,
+    quality: str = 'best',
+    output: Optional[str] = None,
+    threads: Optional[int] = None,
+    archive_id: Optional[str] = None,
+    output_dir: Optional[Path] = None,
+    force: bool = False,
+    archive: Optional[DownloadArchive] = None,
+    store: Optional[ContentStore] = None,
+    on_info: Optional[Callable[[Dict[str, Any]], None]] = None,
+    on_download: Optional[Callable[[str], Optional[ProgressCallback]]] = None,
+    handle: Optional[PrefetchHandle] = None,
+) -> VideoDownloadResult:
+    """Download one video unless the archive already has it.
+
+    ``archive_id`` defaults to the id parsed from ``url`` (or, failing
+    that, the one in the video info); ``output`` defaults to
+    ``{title} [{id}].mp4`` in ``output_dir`` or the download directory.
+    ``on_info(info)`` is called once the video info is known and
+    ``on_download(output)`` right before the transfer starts; it may
+    return a progress callback. ``handle`` is a prefetch of ``url`` the
+    caller already started. Deduplication follows
+    ``prefetcher.fingerprint``. A staged download returns while its file
+    is still being moved (see ``moving``); it is recorded in the archive
+    after the move, so drain the background mover before the loop ends.
+    """
+    if archive is None:
+        archive = get_download_archive()
+    # Short links resolve over the network, and the archive reads its index file
+    if archive_id is None:
+        try:
+            archive_id = await asyncio.to_thread(prefetcher.service.get_archive_id, url)
+        except URLParseError:
+            archive_id = None
+
+    entry = None
+    if archive_id and not force:
+        entry = await asyncio.to_thread(archive.get, 'bilibili', archive_id, quality)
+    if entry:
+        logger.info(f"Already downloaded: {entry['path']}")
+        if handle is not None:
+            handle.cancel()
+        return VideoDownloadResult(Path(entry['path']), archive_id, 'archived')
+
+    if handle is None:
+        handle = prefetcher.start(url, quality)
+    try:
+        info = await handle.info()
+        if on_info:
+            # Let the probe send its requests before rendering blocks the loop
+            await asyncio.sleep(0)
+            on_info(info)
+
+        archive_id = archive_id or info.get('id') or 'unknown'
+        if not output:
+            output_dir = Path(output_dir or config_manager.get('download_dir', download_config.default_download_dir))
+            ensure_directory(output_dir)
+            output = str(output_dir / video_filename(info['title'], archive_id))
+        target = await handle.target()
+    except BaseException:
+        handle.cancel()
+        raise
+
+    if prefetcher.fingerprint:
+        if store is None:
+            store = ContentStore(archive, download_config.dedupe_link_mode)
+        linked = await asyncio.to_thread(store.materialize, target.fingerprint, Path(output))
+        if linked:
+            source, method = linked
+            await asyncio.to_thread(
+                archive.record, 'bilibili', archive_id, Path(output), quality,
+                target.format.get('format_id'), source['sha256']
+            )
+            return VideoDownloadResult(Path(output), archive_id, 'linked', info, source, method)
+
+    progress_callback = on_download(output) if on_download else None
+    # The record stats the file, so a staged download records it after the move
+    moving = await AsyncDownloader.download_file(
+        target.url,
+        output,
+        progress_callback,
+        (threads or download_config.max_threads) if target.accepts_ranges else 1,
+        session=prefetcher.session,
+        total_size=target.size,
+        on_saved=partial(archive.record, 'bilibili', archive_id, Path(output), quality, target.format.get('format_id'))
+    )
+    return VideoDownloadResult(Path(output), archive_id, 'downloaded', info, moving=moving)
+
+
+async def download_video_pages(
+    url: str,
+    selection: Optional[str] = None,
+    quality: str = 'best',
+    output_dir: Optional[Path] = None,
+    threads: Optional[int] = None,
+    force: bool = False,
+    video_info: Optional[Dict[str, Any]] = None,
+    service: Optional[BilibiliService] = None,
+    archive: Optional[DownloadArchive] = None,
+    progress_callback: Optional[ProgressCallback] = None,
+) -> List[VideoDownloadResult]:
+    """Download the selected pages of a multi-part video as one job group.
+
+    Each page is archived under its own id (``{id}_p{page}`` after the
+    first page) and saved as ``P{page}_{part} [{id}].mp4`` in
+    ``output_dir`` (default: a directory named after the video). Pages
+    already in the archive are skipped unless ``force`` is set, before
+    their play URLs are resolved. Returns one result per selected page;
+    pages whose play URL could not be resolved are ``'failed'``.
+    """
+    service = service or bilibili_service
+    if archive is None:
+        archive = get_download_archive()
+    if video_info is None:
+        video_info = await asyncio.to_thread(service.get_video_info, url)
+    title = video_info.get('title', '')
+
+    pages = video_info.get('pages') or []
+    numbers = parse_page_selection(selection, len(pages)) if pages else [1]
+    try:
+        page_ids = await asyncio.to_thread(
+            lambda: {number: service.get_archive_id(url, number) for number in numbers}
+        )
+    except URLParseError:
+        base_id = video_info.get('id') or 'unknown'
+        page_ids = {number: f"{base_id}_p{number}" if number > 1 else base_id for number in numbers}
+
+    results: Dict[int, VideoDownloadResult] = {}
+    entries = {} if force else await asyncio.to_thread(
+        lambda: {number: archive.get('bilibili', page_ids[number], quality) for number in numbers}
+    )
+    for number, entry in entries.items():
+        if entry:
+            results[number] = VideoDownloadResult(Path(entry['path']), page_ids[number], 'archived', video_info,
+                                                  page=number)
+    remaining = [number for number in numbers if number not in results]
+
+    if remaining:
+        page_urls = await asyncio.to_thread(
+            service.get_page_download_urls, url, ','.join(map(str, remaining)), quality
+        )
+        output_dir = Path(output_dir or Path(
+            config_manager.get('download_dir', download_config.default_download_dir)
+        ) / safe_filename(title))
+        ensure_directory(output_dir)
+
+        width = len(str(max(numbers)))
+        jobs, saved_pages = [], {}
+        for page in page_urls:
+            page_id = page_ids[page['page']]
+            path = output_dir / page_filename(title, page['page'], page['part'], width, video_id=page_id)
+            jobs.append((page['url'], str(path)))
+            saved_pages[path] = (page_id, page.get('format_id'))
+            results[page['page']] = VideoDownloadResult(path, page_id, 'downloaded', video_info, page=page['page'])
+
+        parts = {page['page']: page.get('part', '') for page in pages}
+        for number in remaining:
+            if number not in results:
+                logger.warning(f"P{number} of {page_ids[number]} has no downloadable format")
+                path = output_dir / page_filename(title, number, parts.get(number, ''), width,
+                                                  video_id=page_ids[number])
+                results[number] = VideoDownloadResult(path, page_ids[number], 'failed', video_info,
+                                                      error="no downloadable format", page=number)
+
+        def _record(path: Path) -> None:
+            page_id, format_id = saved_pages[path]
+            archive.record('bilibili', page_id, path, quality, format_id)
+
+        await AsyncDownloader.download_group(jobs, progress_callback, threads, max_connections=threads,
+                                             on_saved=_record)
+
+    return [results[number] for number in sorted(results)]
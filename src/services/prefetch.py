@@ -0,0 +1,151 @@
+"""Speculative download preparation.
+
+As soon as a URL is submitted the prefetcher starts resolving the video
+info and play URL. When the format is known it probes the size and range
+support and opens warm keep-alive connections to the CDN host. All of this
+overlaps with the caller rendering the metadata, so the download can start
+on connections that have already finished their TLS handshake.
+"""
+
+import asyncio
+from dataclasses import dataclass
+from typing import Any, Dict, Optional
+
+import aiohttp
+
+from ..core.config import download_config
+from ..core.exceptions import DownloadError
+from ..core.logger import logger
+from .bilibili import BILIBILI_HEADERS, BilibiliService, bilibili_service
+from .content_store import probe_fingerprint
+
+
+@dataclass
+class PrefetchTarget:
+    """A download URL whose size and range support are already probed."""
+
+    url: str
+    format: Dict[str, Any]
+    size: Optional[int]
+    accepts_ranges: bool
+    fingerprint: Optional[str] = None
+
+
+class PrefetchHandle:
+    """Futures of one speculative prefetch."""
+
+    def __init__(self, info_task: "asyncio.Future[Dict[str, Any]]",
+                 target_task: "asyncio.Future[PrefetchTarget]"):
+        self._info_task = info_task
+        self._target_task = target_task
+
+    async def info(self) -> Dict[str, Any]:
+        """Wait for the video information."""
+        return await asyncio.shield(self._info_task)
+
+    async def target(self) -> PrefetchTarget:
+        """Wait for the probed download target."""
+        return await asyncio.shield(self._target_task)
+
+    def cancel(self) -> None:
+        """Abandon the speculative work."""
+        self._target_task.cancel()
+
+
+class SpeculativePrefetcher:
+    """Overlaps play URL resolution, size probing and connection warm-up.
+
+    Use as an async context manager (or call :meth:`open`/:meth:`close`);
+    its session holds the warm connections and must be passed to the
+    downloader.
+    """
+
+    def __init__(
+        self,
+        service: Optional[BilibiliService] = None,
+        warm_connections: Optional[int] = None,
+        headers: Optional[Dict[str, str]] = None,
+        probe_timeout: float = 10.0,
+        fingerprint: bool = False,
+    ):
+        self.service = service or bilibili_service
+        self.warm_connections = warm_connections or download_config.max_threads
+        self.headers = headers or {
+            'User-Agent': download_config.user_agent,
+            'Referer': BILIBILI_HEADERS['Referer'],
+        }
+        self.probe_timeout = probe_timeout
+        # Probe the first bytes too, to fingerprint the content for deduplication
+        self.fingerprint = fingerprint
+        self._session: Optional[aiohttp.ClientSession] = None
+
+    async def open(self) -> None:
+        """Create the session that holds the warm connections."""
+        if self._session is None:
+            connector = aiohttp.TCPConnector(limit_per_host=max(self.warm_connections, 1))
+            self._session = aiohttp.ClientSession(headers=self.headers, connector=connector)
+
+    async def close(self) -> None:
+        """Close the session and its connections."""
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    async def __aenter__(self) -> "SpeculativePrefetcher":
+        await self.open()
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.close()
+
+    @property
+    def session(self) -> aiohttp.ClientSession:
+        """The session holding the warm connections."""
+        if self._session is None:
+            raise RuntimeError("SpeculativePrefetcher is not open")
+        return self._session
+
+    def start(self, url: str, quality: str = 'best') -> PrefetchHandle:
+        """Start resolving ``url`` in the background."""
+        info_task = asyncio.ensure_future(asyncio.to_thread(self.service.get_video_info, url))
+        target_task = asyncio.ensure_future(self._prepare(info_task, quality))
+        # The caller may never await the target (e.g. info only)
+        target_task.add_done_callback(lambda task: task.cancelled() or task.exception())
+        return PrefetchHandle(info_task, target_task)
+
+    async def _prepare(self, info_task: "asyncio.Future[Dict[str, Any]]", quality: str) -> PrefetchTarget:
+        """Select the format, then probe it while warming extra connections."""
+        info = await asyncio.shield(info_task)
+        selected = self.service._select_format(info.get('formats', []), quality)
+        if not selected or not selected.get('url'):
+            raise DownloadError("No valid format URL found")
+
+        url = selected['url']
+        probe, _ = await asyncio.gather(
+            probe_fingerprint(self.session, url, timeout=self.probe_timeout, fingerprint=self.fingerprint),
+            self._warm_up(url, self.warm_connections - 1),
+        )
+        size, accepts_ranges, fingerprint = probe
+        logger.debug(f"Prefetched {selected.get('format_id', '')}: {size} bytes, ranges={accepts_ranges}")
+        return PrefetchTarget(url, selected, size, accepts_ranges, fingerprint)
+
+    async def _warm_up(self, url: str, count: int) -> None:
+        """Open ``count`` additional keep-alive connections to the host."""
+        if count <= 0:
+            return
+
+        async def _open() -> None:
+            try:
+                async with self.session.get(
+                    url,
+                    headers={'Range': 'bytes=0-0'},
+                    timeout=aiohttp.ClientTimeout(total=self.probe_timeout),
+                ) as response:
+                    if response.status == 206:
+                        await response.read()
+                    else:
+                        response.close()
+            except Exception as e:
+                logger.debug(f"Connection warm-up failed: {e}")
+
+        await asyncio.gather(*(_open() for _ in range(count)))
@@ -0,0 +1,204 @@
+"""Adaptive request rate limiting for platform APIs."""
+
+import asyncio
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from ..core.logger import logger
+
+
+# Bilibili API codes returned when a client is being throttled or blocked
+BILIBILI_THROTTLE_CODES = frozenset({-412, -509, -799})
+
+# HTTP statuses that signal throttling
+THROTTLE_STATUS_CODES = frozenset({412, 429})
+
+# Declared request rates (requests per second) of the platforms
+DEFAULT_PLATFORM_RATES = {
+    'bilibili': 2.0,
+    'douyin': 3.0,
+}
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Parse a Retry-After header given in seconds."""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        return None
+
+
+class AdaptiveRateLimiter:
+    """Paces requests and adapts the rate to throttling (AIMD).
+
+    Callers reserve evenly spaced slots, so concurrent requests queue up
+    instead of failing. A throttling response halves the rate and pauses the
+    queue for a cool-down; every success raises the rate additively until it
+    is back at ``max_rate``. Usable from threads and from asyncio code.
+    """
+
+    def __init__(
+        self,
+        rate: float,
+        name: str = '',
+        min_rate: float = 0.2,
+        max_rate: Optional[float] = None,
+        increase_step: float = 0.05,
+        decrease_factor: float = 0.5,
+        cooldown: float = 5.0,
+    ):
+        self.name = name
+        self.max_rate = max_rate or rate
+        self.min_rate = min(min_rate, self.max_rate)
+        self.increase_step = increase_step
+        self.decrease_factor = decrease_factor
+        self.cooldown = cooldown
+        self._rate = rate
+        self._next_slot = 0.0
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.throttled = 0
+
+    @property
+    def rate(self) -> float:
+        """Current rate in requests per second."""
+        return self._rate
+
+    def reserve(self) -> float:
+        """Reserve the next request slot and return the delay until it."""
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot)
+            self._next_slot = slot + 1.0 / self._rate
+            self.requests += 1
+            return slot - now
+
+    def acquire(self) -> None:
+        """Wait (blocking) for the next request slot."""
+        delay = self.reserve()
+        if delay > 0:
+            time.sleep(delay)
+
+    async def acquire_async(self) -> None:
+        """Wait for the next request slot without blocking the event loop."""
+        delay = self.reserve()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    def on_success(self) -> None:
+        """Speed back up gradually after a successful request."""
+        with self._lock:
+            if self._rate < self.max_rate:
+                self._rate = min(self.max_rate, self._rate + self.increase_step)
+
+    def on_throttle(self, retry_after: Optional[float] = None) -> None:
+        """Slow down after a throttling response and pause the queue."""
+        with self._lock:
+            self.throttled += 1
+            self._rate = max(self.min_rate, self._rate * self.decrease_factor)
+            pause = retry_after if retry_after is not None else self.cooldown
+            self._next_slot = max(self._next_slot, time.monotonic() + pause)
+            rate = self._rate
+        logger.warning(f"Throttled on {self.name or 'API'}, slowing down to {rate:.2f} req/s")
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Export limiter state."""
+        return {
+            'rate': round(self._rate, 3),
+            'max_rate': self.max_rate,
+            'requests': self.requests,
+            'throttled': self.throttled,
+        }
+
+
+class RateLimit:
+    """The platform and endpoint limiters one request has to pass.
+
+    ``limiters`` go from the platform to the most specific one.
+    """
+
+    def __init__(self, limiters: List[AdaptiveRateLimiter]):
+        self.limiters = limiters
+
+    def acquire(self) -> None:
+        """Wait (blocking) for every limiter."""
+        for limiter in self.limiters:
+            limiter.acquire()
+
+    async def acquire_async(self) -> None:
+        """Wait for every limiter."""
+        for limiter in self.limiters:
+            await limiter.acquire_async()
+
+    def on_success(self) -> None:
+        """Report a successful request."""
+        for limiter in self.limiters:
+            limiter.on_success()
+
+    def on_throttle(self, retry_after: Optional[float] = None) -> None:
+        """Report a throttled request: only the most specific limiter backs off."""
+        if self.limiters:
+            self.limiters[-1].on_throttle(retry_after)
+
+
+class RateLimiterRegistry:
+    """Per-platform and per-endpoint adaptive rate limiters.
+
+    Every request passes its platform limiter, which bounds the overall
+    request rate, and its endpoint limiter. Throttling backs off the
+    endpoint limiter only, so a throttled endpoint slows down without
+    starving the others.
+    """
+
+    def __init__(self, platform_rates: Optional[Dict[str, float]] = None, **limiter_options: Any):
+        self.platform_rates = dict(DEFAULT_PLATFORM_RATES if platform_rates is None else platform_rates)
+        self.limiter_options = limiter_options
+        self.endpoint_rates: Dict[Tuple[str, str], float] = {}
+        self._limiters: Dict[Tuple[str, Optional[str]], AdaptiveRateLimiter] = {}
+        self._lock = threading.Lock()
+
+    def configure(self, platform: str, rate: Optional[float], endpoint: Optional[str] = None) -> None:
+        """Set the (maximum) rate of a platform or one of its endpoints."""
+        if not rate:
+            return
+        with self._lock:
+            if endpoint is None:
+                self.platform_rates[platform] = rate
+            else:
+                self.endpoint_rates[(platform, endpoint)] = rate
+            self._limiters.pop((platform, endpoint), None)
+
+    def get_limiter(self, platform: str, endpoint: Optional[str] = None) -> Optional[AdaptiveRateLimiter]:
+        """Get (or create) one limiter; None if the platform is not limited."""
+        rate = self.platform_rates.get(platform)
+        if endpoint is not None:
+            rate = self.endpoint_rates.get((platform, endpoint), rate)
+        if not rate:
+            return None
+
+        key = (platform, endpoint)
+        with self._lock:
+            limiter = self._limiters.get(key)
+            if limiter is None:
+                name = f"{platform}{endpoint or ''}"
+                limiter = self._limiters[key] = AdaptiveRateLimiter(rate, name=name, **self.limiter_options)
+            return limiter
+
+    def limit(self, platform: str, endpoint: Optional[str] = None) -> RateLimit:
+        """Get the limiters a request to ``endpoint`` has to pass."""
+        limiters = [self.get_limiter(platform)]
+        if endpoint is not None:
+            limiters.append(self.get_limiter(platform, endpoint))
+        return RateLimit([limiter for limiter in limiters if limiter is not None])
+
+    def get_statistics(self) -> Dict[str, Dict[str, Any]]:
+        """Export the state of every limiter."""
+        with self._lock:
+            return {limiter.name: limiter.to_dict() for limiter in self._limiters.values()}
+
+
+# Global registry instance
+rate_limiters = RateLimiterRegistry()
@@ -0,0 +1,114 @@
+"""Download job scheduler."""
+
+import asyncio
+import time
+from typing import Any, AsyncIterable, Awaitable, Callable, Dict, Iterable, List, Optional, Union
+
+from ..core.logger import logger
+from ..core.metrics import QUEUE_DEPTH, QUEUE_WAIT_SECONDS
+
+
+_DONE = object()
+
+
+class SchedulerResult:
+    """Outcome of a scheduler run."""
+
+    def __init__(self):
+        self.completed: List[Any] = []
+        self.failed: List[Dict[str, Any]] = []
+        self.source_error: Optional[Exception] = None
+
+    @property
+    def total(self) -> int:
+        """Number of jobs processed."""
+        return len(self.completed) + len(self.failed)
+
+
+class DownloadScheduler:
+    """Runs jobs from a (possibly still growing) source with bounded concurrency.
+
+    Jobs are consumed from an iterable or async iterable while it is being
+    produced, so the first downloads start as soon as the first listing page
+    arrives. The bounded queue applies backpressure to the producer. With
+    ``collect_results=False`` the returned result keeps no jobs, for
+    sources that never end; use the callbacks instead.
+    """
+
+    def __init__(
+        self,
+        worker: Callable[[Any], Awaitable[Any]],
+        concurrency: int = 3,
+        queue_size: Optional[int] = None,
+        on_complete: Optional[Callable[[Any, Any], None]] = None,
+        on_error: Optional[Callable[[Any, Exception], None]] = None,
+        collect_results: bool = True,
+    ):
+        self.worker = worker
+        self.concurrency = max(1, concurrency)
+        self.queue_size = queue_size if queue_size is not None else self.concurrency * 4
+        self.on_complete = on_complete
+        self.on_error = on_error
+        self.collect_results = collect_results
+
+    async def run(self, source: Union[Iterable[Any], AsyncIterable[Any]]) -> SchedulerResult:
+        """Process every job of the source and return the results."""
+        result = SchedulerResult()
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.queue_size)
+        queue_wait = QUEUE_WAIT_SECONDS.labels(queue='jobs')
+        queue_depth = QUEUE_DEPTH.labels(queue='jobs')
+
+        async def _enqueue(job: Any) -> None:
+            await queue.put((time.monotonic(), job))
+            queue_depth.inc()
+
+        async def _produce() -> None:
+            try:
+                if hasattr(source, '__aiter__'):
+                    async for job in source:
+                        await _enqueue(job)
+                else:
+                    for job in source:
+                        await _enqueue(job)
+            except Exception as e:
+                # Let queued jobs finish; the caller decides what to do
+                logger.error(f"Job source failed: {e}")
+                result.source_error = e
+            finally:
+                for _ in range(self.concurrency):
+                    await queue.put(_DONE)
+
+        async def _consume() -> None:
+            while True:
+                job = await queue.get()
+                if job is _DONE:
+                    return
+                enqueued_at, job = job
+                queue_depth.dec()
+                queue_wait.observe(time.monotonic() - enqueued_at)
+
+                try:
+                    output = await self.worker(job)
+                except Exception as e:
+                    logger.error(f"Job failed: {e}")
+                    if self.collect_results:
+                        result.failed.append({'job': job, 'error': str(e)})
+                    if self.on_error:
+                        self.on_error(job, e)
+                else:
+                    if self.collect_results:
+                        result.completed.append(job)
+                    if self.on_complete:
+                        self.on_complete(job, output)
+
+        producer = asyncio.ensure_future(_produce())
+        consumers = [asyncio.ensure_future(_consume()) for _ in range(self.concurrency)]
+
+        try:
+            await asyncio.gather(producer, *consumers)
+        except BaseException:
+            for task in [producer, *consumers]:
+                task.cancel()
+            raise
+
+        return result
@@ -0,0 +1,293 @@
+"""Watch-while-downloading.
+
+:class:`StreamingDownload` fetches a file in fixed-size pieces. Instead of
+splitting it into one chunk per thread it downloads the container header
+first (the start of the file and the tail, where a non-faststart MP4 keeps
+its ``moov`` box) and then proceeds sequentially from the playhead.
+
+:class:`RangeServer` serves the partially downloaded file over local HTTP
+with Range support. A request for bytes that have not arrived yet blocks,
+moves the playhead there and boosts those pieces to the front of the
+queue, so a player can start (and seek) within seconds.
+"""
+
+import asyncio
+import time
+from collections import deque
+from pathlib import Path
+from typing import Callable, Deque, Dict, List, Optional, Set, Tuple
+
+import aiohttp
+import aiofiles
+from aiohttp import web
+
+from ..core.config import download_config
+from ..core.exceptions import DownloadError, FileOperationError
+from ..core.logger import logger
+from ..core.metrics import (
+    DOWNLOAD_BYTES, HTTP_RESPONSES, RETRIES, SEGMENT_SECONDS, TTFB_SECONDS, status_class,
+)
+from ..utils.range_utils import parse_range_header
+
+
+DEFAULT_PIECE_SIZE = 1024 * 1024
+
+_BYTES = DOWNLOAD_BYTES.labels(engine='streaming')
+_SEGMENT_SECONDS = SEGMENT_SECONDS.labels(engine='streaming')
+_TTFB_SECONDS = TTFB_SECONDS.labels(engine='streaming')
+
+
+class StreamingDownload:
+    """Piece-based download prioritizing the header and the playhead."""
+
+    def __init__(
+        self,
+        url: str,
+        save_path: str,
+        total_size: int,
+        num_workers: Optional[int] = None,
+        piece_size: int = DEFAULT_PIECE_SIZE,
+        session: Optional[aiohttp.ClientSession] = None,
+        headers: Optional[Dict[str, str]] = None,
+        head_pieces: int = 1,
+        tail_pieces: int = 1,
+    ):
+        if total_size <= 0:
+            raise DownloadError("Streaming download needs a known file size")
+
+        self.url = url
+        self.save_path = Path(save_path)
+        self.total_size = total_size
+        self.num_workers = num_workers or download_config.max_threads
+        self.piece_size = piece_size
+        self.session = session
+        self.headers = headers or {"User-Agent": download_config.user_agent}
+        self.num_pieces = (total_size + piece_size - 1) // piece_size
+
+        self._done: List[bool] = [False] * self.num_pieces
+        self._in_flight: Set[int] = set()
+        self._playhead = 0
+        self._error: Optional[Exception] = None
+        self._condition: Optional[asyncio.Condition] = None
+        self.bytes_done = 0
+        self.progress_callback: Optional[Callable[[float], None]] = None
+
+        # The container header goes first: the start and the tail of the file
+        head = range(min(head_pieces, self.num_pieces))
+        tail = range(max(self.num_pieces - tail_pieces, len(head)), self.num_pieces)
+        self._urgent: Deque[int] = deque(list(head) + list(tail))
+
+    @property
+    def completed(self) -> bool:
+        """Whether every piece has been downloaded."""
+        return all(self._done)
+
+    def _get_condition(self) -> asyncio.Condition:
+        """Condition notified whenever a piece completes (created in the running loop)."""
+        if self._condition is None:
+            self._condition = asyncio.Condition()
+        return self._condition
+
+    def _piece_range(self, index: int) -> Tuple[int, int]:
+        """Inclusive byte range of a piece."""
+        start = index * self.piece_size
+        return start, min(start + self.piece_size, self.total_size) - 1
+
+    def _is_available(self, index: int) -> bool:
+        """Whether a piece still needs a worker."""
+        return not self._done[index] and index not in self._in_flight
+
+    def _next_piece(self) -> Optional[int]:
+        """Pick the next piece: boosted ones, then onwards from the playhead, then the rest."""
+        while self._urgent:
+            index = self._urgent.popleft()
+            if self._is_available(index):
+                return index
+
+        for index in list(range(self._playhead, self.num_pieces)) + list(range(self._playhead)):
+            if self._is_available(index):
+                return index
+        return None
+
+    def boost(self, start: int, end: int) -> None:
+        """Move the playhead to ``start`` and put the missing pieces of the range first."""
+        first, last = start // self.piece_size, min(end // self.piece_size, self.num_pieces - 1)
+        missing = [index for index in range(first, last + 1) if not self._done[index]]
+        if missing:
+            self._playhead = missing[0]
+            self._urgent.extendleft(reversed(missing))
+
+    def is_available(self, start: int, end: int) -> bool:
+        """Check whether a byte range has been downloaded."""
+        first, last = start // self.piece_size, min(end // self.piece_size, self.num_pieces - 1)
+        return all(self._done[first:last + 1])
+
+    async def wait_for_range(self, start: int, end: int) -> None:
+        """Wait until a byte range is downloaded, boosting it if needed."""
+        if self.is_available(start, end):
+            return
+
+        self.boost(start, end)
+        condition = self._get_condition()
+        async with condition:
+            await condition.wait_for(lambda: self._error is not None or self.is_available(start, end))
+        if not self.is_available(start, end):
+            raise DownloadError(f"Streaming download failed: {self._error}")
+
+    async def read(self, start: int, length: int) -> bytes:
+        """Read downloaded bytes from the file."""
+        async with aiofiles.open(self.save_path, 'rb') as f:
+            await f.seek(start)
+            return await f.read(length)
+
+    async def _fetch_piece(self, session: aiohttp.ClientSession, index: int) -> None:
+        """Download one piece and write it in place."""
+        start, end = self._piece_range(index)
+        for attempt in range(download_config.retry_times):
+            try:
+                started = time.monotonic()
+                async with session.get(
+                    self.url,
+                    headers={**self.headers, 'Range': f'bytes={start}-{end}'},
+                    timeout=aiohttp.ClientTimeout(total=download_config.timeout * 2)
+                ) as response:
+                    _TTFB_SECONDS.observe(time.monotonic() - started)
+                    HTTP_RESPONSES.labels('media', status_class(response.status)).inc()
+                    if response.status != 206:
+                        raise DownloadError(f"HTTP {response.status}: Range request not honoured")
+                    data = await response.read()
+                _SEGMENT_SECONDS.observe(time.monotonic() - started)
+                _BYTES.inc(len(data))
+                break
+            except Exception as e:
+                logger.warning(f"Piece {index} failed (attempt {attempt + 1}): {e}")
+                if attempt + 1 == download_config.retry_times:
+                    raise DownloadError(f"Failed to download piece {index}: {e}")
+                RETRIES.labels(operation='piece').inc()
+                await asyncio.sleep(2 ** attempt)
+
+        try:
+            async with aiofiles.open(self.save_path, 'r+b') as f:
+                await f.seek(start)
+                await f.write(data)
+        except Exception as e:
+            raise FileOperationError(f"Failed to write piece {index}: {e}")
+
+    async def _worker(self, session: aiohttp.ClientSession) -> None:
+        """Download pieces until none are left."""
+        condition = self._get_condition()
+        while self._error is None:
+            index = self._next_piece()
+            if index is None:
+                return
+
+            self._in_flight.add(index)
+            try:
+                await self._fetch_piece(session, index)
+                self._done[index] = True
+            except Exception as e:
+                self._error = e
+                raise
+            finally:
+                self._in_flight.discard(index)
+                async with condition:
+                    condition.notify_all()
+
+            start, end = self._piece_range(index)
+            self.bytes_done += end - start + 1
+            if self.progress_callback:
+                self.progress_callback(self.bytes_done / self.total_size * 100)
+
+    async def download(self, progress_callback: Optional[Callable[[float], None]] = None) -> None:
+        """Download the whole file, header and playhead first."""
+        self.progress_callback = progress_callback
+        self.save_path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.save_path, 'wb') as f:
+            f.truncate(self.total_size)
+
+        self._get_condition()
+        if self.session is not None:
+            await self._run_workers(self.session)
+        else:
+            async with aiohttp.ClientSession(headers=self.headers) as session:
+                await self._run_workers(session)
+
+        logger.info(f"Streaming download completed: {self.save_path}")
+
+    async def _run_workers(self, session: aiohttp.ClientSession) -> None:
+        """Run the piece workers."""
+        await asyncio.gather(*(self._worker(session) for _ in range(self.num_workers)))
+
+
+class RangeServer:
+    """Local HTTP server for a file that is still downloading."""
+
+    def __init__(self, download: StreamingDownload, host: str = '127.0.0.1', port: int = 0,
+                 content_type: str = 'video/mp4'):
+        self.download = download
+        self.host = host
+        self.port = port
+        self.content_type = content_type
+        self._runner: Optional[web.AppRunner] = None
+
+    @property
+    def url(self) -> str:
+        """URL a player can open."""
+        return f"http://{self.host}:{self.port}/{self.download.save_path.name}"
+
+    async def start(self) -> None:
+        """Start serving."""
+        app = web.Application()
+        app.router.add_get('/{name}', self._handle)
+        self._runner = web.AppRunner(app)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, self.host, self.port)
+        await site.start()
+        self.port = self._runner.addresses[0][1]
+        logger.info(f"Streaming {self.download.save_path.name} at {self.url}")
+
+    async def stop(self) -> None:
+        """Stop serving."""
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    async def __aenter__(self) -> "RangeServer":
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.stop()
+
+    async def _handle(self, request: web.Request) -> web.StreamResponse:
+        """Serve a byte range, waiting for pieces that have not arrived yet."""
+        size = self.download.total_size
+        range_header = request.headers.get('Range')
+        try:
+            start, end = parse_range_header(range_header, size)
+        except ValueError:
+            return web.Response(status=416, headers={'Content-Range': f'bytes */{size}'})
+
+        headers = {
+            'Content-Type': self.content_type,
+            'Accept-Ranges': 'bytes',
+            'Content-Length': str(end - start + 1),
+        }
+        if range_header:
+            headers['Content-Range'] = f'bytes {start}-{end}/{size}'
+        response = web.StreamResponse(status=206 if range_header else 200, headers=headers)
+        await response.prepare(request)
+        if request.method == 'HEAD':
+            return response
+
+        # Send piece by piece so playback starts before the whole range arrives
+        piece_size = self.download.piece_size
+        position = start
+        while position <= end:
+            chunk_end = min(end, (position // piece_size + 1) * piece_size - 1)
+            await self.download.wait_for_range(position, chunk_end)
+            await response.write(await self.download.read(position, chunk_end - position + 1))
+            position = chunk_end + 1
+
+        await response.write_eof()
+        return response
@@ -0,0 +1,273 @@
+"""Pool of warm yt-dlp extractor worker processes."""
+
+import atexit
+import itertools
+import json
+import multiprocessing
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+from ..core.exceptions import NetworkError
+from ..core.logger import logger
+
+
+# How often a waiting request checks its cancel event
+CANCEL_POLL_INTERVAL = 0.1
+
+
+def _options_key(options: Dict[str, Any]) -> str:
+    """Hashable key of a yt-dlp option set."""
+    return json.dumps(options, sort_keys=True, default=str)
+
+
+def _worker_main(conn, max_tasks: int, warm_options: Optional[Dict[str, Any]]) -> None:
+    """Worker process loop: serve extraction requests with cached YoutubeDL instances.
+
+    Requests are ``(request_id, url, options, process)`` tuples, responses are
+    ``(request_id, ok, payload)`` where payload is the sanitized info dict or
+    an error message. The worker exits after ``max_tasks`` requests so that
+    memory growth inside yt-dlp is bounded.
+    """
+    import yt_dlp
+
+    instances: Dict[str, Any] = {}
+
+    def _get_instance(options: Dict[str, Any]) -> Any:
+        key = _options_key(options)
+        if key not in instances:
+            instances[key] = yt_dlp.YoutubeDL(options)
+        return instances[key]
+
+    # Warm up extractor loading before the first request arrives
+    if warm_options is not None:
+        _get_instance(warm_options)
+
+    for _ in range(max_tasks):
+        try:
+            request = conn.recv()
+        except (EOFError, OSError):
+            break
+        if request is None:
+            break
+
+        request_id, url, options, process = request
+        try:
+            ydl = _get_instance(options)
+            info = ydl.extract_info(url, download=False, process=process)
+            response = (request_id, True, ydl.sanitize_info(info))
+        except Exception as e:
+            response = (request_id, False, f"{type(e).__name__}: {e}")
+
+        try:
+            conn.send(response)
+        except (EOFError, OSError):
+            break
+
+    for ydl in instances.values():
+        try:
+            ydl.close()
+        except Exception:
+            pass
+
+
+class _Worker:
+    """Parent-side handle of one worker process."""
+
+    def __init__(self, context, max_tasks: int, warm_options: Optional[Dict[str, Any]]):
+        self.conn, child_conn = context.Pipe()
+        self.process = context.Process(
+            target=_worker_main,
+            args=(child_conn, max_tasks, warm_options),
+            daemon=True,
+        )
+        self.process.start()
+        child_conn.close()
+        self.tasks_done = 0
+
+    def stop(self, timeout: float = 1.0) -> None:
+        """Ask the worker to exit, killing it if it does not."""
+        try:
+            self.conn.send(None)
+        except (EOFError, OSError):
+            pass
+        self.process.join(timeout)
+        if self.process.is_alive():
+            self.process.terminate()
+            self.process.join(timeout)
+        self.conn.close()
+
+
+class YtdlpWorkerPool:
+    """Long-lived worker processes holding warm ``YoutubeDL`` instances.
+
+    Extraction runs outside the calling process, so its CPU-heavy JSON and
+    regex work no longer competes for the GIL with the event loop, and
+    concurrent extractions (the jobs of a list download) spread across
+    cores. Each worker is recycled after ``max_tasks_per_worker`` requests,
+    and a request that exceeds ``timeout`` or is cancelled kills its
+    worker. Callers wait
+    for a free worker when all ``workers`` are busy; a recycled or killed
+    worker frees its slot for a replacement.
+
+    With ``workers=0`` extraction runs inline in the calling thread.
+    """
+
+    def __init__(
+        self,
+        workers: int = 2,
+        max_tasks_per_worker: int = 100,
+        timeout: float = 60.0,
+        warm_options: Optional[Dict[str, Any]] = None,
+    ):
+        self.workers = workers
+        self.max_tasks_per_worker = max_tasks_per_worker
+        self.timeout = timeout
+        self.warm_options = warm_options
+        self._context = multiprocessing.get_context('spawn')
+        self._idle: List[_Worker] = []
+        self._spawned = 0
+        # Guards _idle/_spawned/_closed; notified when a worker or a slot frees up
+        self._available = threading.Condition()
+        self._request_ids = itertools.count()
+        self._closed = False
+
+    def _acquire(self, cancel: Optional[threading.Event] = None) -> _Worker:
+        """Get an idle worker, spawning one when a slot is free, else wait for either."""
+        with self._available:
+            while True:
+                if self._closed:
+                    raise NetworkError("yt-dlp worker pool is shut down")
+                if cancel is not None and cancel.is_set():
+                    raise NetworkError("yt-dlp extraction cancelled")
+                if self._idle:
+                    return self._idle.pop()
+                if self._spawned < self.workers:
+                    self._spawned += 1
+                    logger.debug(f"Spawning yt-dlp worker {self._spawned}/{self.workers}")
+                    break
+                self._available.wait(CANCEL_POLL_INTERVAL if cancel is not None else None)
+
+        # Process startup takes a while; other callers keep using idle workers meanwhile
+        try:
+            return _Worker(self._context, self.max_tasks_per_worker, self.warm_options)
+        except BaseException:
+            self._free_slot()
+            raise
+
+    def _free_slot(self) -> None:
+        """Give up a worker slot and wake a waiting caller to fill it."""
+        with self._available:
+            self._spawned -= 1
+            self._available.notify()
+
+    def _release(self, worker: _Worker) -> None:
+        """Return a worker to the pool, recycling it when it is used up."""
+        if worker.tasks_done < self.max_tasks_per_worker and worker.process.is_alive():
+            with self._available:
+                if not self._closed:
+                    self._idle.append(worker)
+                    self._available.notify()
+                    return
+        worker.stop()
+        self._free_slot()
+
+    def _discard(self, worker: _Worker) -> None:
+        """Kill a misbehaving worker."""
+        worker.process.kill()
+        worker.stop(timeout=0.1)
+        self._free_slot()
+
+    def extract_info(
+        self,
+        url: str,
+        options: Dict[str, Any],
+        process: bool = True,
+        timeout: Optional[float] = None,
+        cancel: Optional[threading.Event] = None,
+    ) -> Dict[str, Any]:
+        """Extract video information (blocking, thread-safe).
+
+        Setting ``cancel`` abandons the request: its worker is killed so the
+        slot is free for the next caller.
+        """
+        if self.workers <= 0:
+            return self._extract_inline(url, options, process)
+
+        timeout = timeout or self.timeout
+        worker = self._acquire(cancel)
+        request_id = next(self._request_ids)
+
+        try:
+            worker.conn.send((request_id, url, options, process))
+            if not self._wait_response(worker, timeout, cancel):
+                self._discard(worker)
+                if cancel is not None and cancel.is_set():
+                    raise NetworkError(f"yt-dlp extraction cancelled: {url}")
+                raise NetworkError(f"yt-dlp extraction timed out after {timeout:.0f}s: {url}")
+            response_id, ok, payload = worker.conn.recv()
+        except NetworkError:
+            raise
+        except Exception as e:
+            self._discard(worker)
+            raise NetworkError(f"yt-dlp worker failed: {e}")
+
+        worker.tasks_done += 1
+        self._release(worker)
+
+        if response_id != request_id:
+            raise NetworkError("yt-dlp worker returned a mismatched response")
+        if not ok:
+            raise NetworkError(payload)
+        return payload
+
+    @staticmethod
+    def _wait_response(worker: _Worker, timeout: float, cancel: Optional[threading.Event]) -> bool:
+        """Wait for the worker's response; False on timeout or cancellation."""
+        if cancel is None:
+            return worker.conn.poll(timeout)
+        deadline = time.monotonic() + timeout
+        while not cancel.is_set():
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return False
+            if worker.conn.poll(min(remaining, CANCEL_POLL_INTERVAL)):
+                return True
+        return False
+
+    def _extract_inline(self, url: str, options: Dict[str, Any], process: bool) -> Dict[str, Any]:
+        """Extract in the calling thread."""
+        import yt_dlp
+
+        with yt_dlp.YoutubeDL(options) as ydl:
+            return ydl.extract_info(url, download=False, process=process)
+
+    def shutdown(self) -> None:
+        """Stop every worker process."""
+        with self._available:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            self._available.notify_all()
+        for worker in idle:
+            worker.stop()
+
+
+_pool: Optional[YtdlpWorkerPool] = None
+_pool_lock = threading.Lock()
+
+
+def get_ytdlp_pool() -> YtdlpWorkerPool:
+    """Get the shared worker pool, created on first use."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            from ..core.config import download_config
+
+            _pool = YtdlpWorkerPool(
+                workers=download_config.ytdlp_workers,
+                max_tasks_per_worker=download_config.ytdlp_max_tasks_per_worker,
+                timeout=download_config.ytdlp_timeout,
+                warm_options={'quiet': True, 'no_warnings': False, 'extract_flat': False},
+            )
+            atexit.register(_pool.shutdown)
+        return _pool
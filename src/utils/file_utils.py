@@ -58,6 +58,27 @@ def get_unique_filename(path: Path) -> Path:
         counter += 1
 
 
+def page_filename(title: str, page: int, part: str = "", width: int = 1, ext: str = "mp4",
+                  video_id: Optional[str] = None) -> str:
+    """Build the file name of one page (分P) of a multi-part video.
+    
+    With ``video_id`` (the page's archive id) the name ends in " [id]",
+    like :func:`video_filename`, so the archive can be rebuilt from it.
+    """
+    name = safe_filename(part) if part else safe_filename(title)
+    suffix = f" [{safe_filename(video_id)}]" if video_id else ""
+    return f"P{page:0{width}d}_{name}{suffix}.{ext.lstrip('.')}"
+
+
+def video_filename(title: str, video_id: str, ext: str = "mp4") -> str:
+    """Build the file name of a video: "{title} [{id}].ext".
+    
+    The id suffix keeps names unique per video and lets the download
+    archive be rebuilt from the files on disk.
+    """
+    return f"{safe_filename(title)} [{safe_filename(video_id)}].{ext.lstrip('.')}"
+
+
 def format_filesize(size_bytes: int) -> str:
     """Format file size in human-readable format."""
     if size_bytes == 0:
@@ -74,6 +95,16 @@ def format_filesize(size_bytes: int) -> str:
     return f"{size:.1f} {size_names[i]}"
 
 
+def parse_filesize(value: str) -> int:
+    """Parse a size like "500M", "2G" or "1.5GB" into bytes (binary units)."""
+    match = re.match(r'^\s*(\d+(?:\.\d+)?)\s*([KMGT]?)I?B?\s*$', value, re.IGNORECASE)
+    if not match:
+        raise ValueError(f"Invalid size: {value!r}")
+    
+    number, unit = float(match.group(1)), match.group(2).upper()
+    return int(number * 1024 ** ' KMGT'.index(unit or ' '))
+
+
 def get_video_extension(url: str, default_ext: str = "mp4") -> str:
     """Get video file extension from URL or format."""
     # Common video extensions
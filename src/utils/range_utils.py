@@ -0,0 +1,133 @@
+"""Range parsing utilities."""
+
+from typing import List, Optional, Tuple
+
+
+def parse_page_selection(selection: Optional[str], total: int) -> List[int]:
+    """Parse a page selection like "1-5,9" into sorted 1-based page numbers.
+
+    An empty selection, "all" or "*" selects every page. Open ranges such as
+    "3-" and "-4" run to the last and from the first page respectively.
+    """
+    if total < 1:
+        return []
+
+    if not selection or selection.strip().lower() in ('all', '*'):
+        return list(range(1, total + 1))
+
+    pages = set()
+    for token in selection.replace('，', ',').split(','):
+        token = token.strip()
+        if not token:
+            continue
+
+        try:
+            if '-' in token:
+                start_str, end_str = token.split('-', 1)
+                start = int(start_str) if start_str.strip() else 1
+                end = int(end_str) if end_str.strip() else total
+            else:
+                start = end = int(token)
+        except ValueError:
+            raise ValueError(f"Invalid page selection: {token!r}")
+
+        if start > end:
+            raise ValueError(f"Invalid page range: {token!r}")
+        if start < 1 or end > total:
+            raise ValueError(f"Page range {token!r} is outside 1-{total}")
+
+        pages.update(range(start, end + 1))
+
+    if not pages:
+        raise ValueError(f"Empty page selection: {selection!r}")
+
+    return sorted(pages)
+
+
+def parse_range_header(header: Optional[str], size: int) -> Tuple[int, int]:
+    """Parse an HTTP Range header into an inclusive (start, end) byte range.
+
+    A missing header selects the whole resource. Only the first range of a
+    multi-range request is honoured. Raises ValueError if the range cannot
+    be satisfied.
+    """
+    if not header:
+        return 0, size - 1
+
+    unit, _, spec = header.partition('=')
+    if unit.strip().lower() != 'bytes' or '-' not in spec:
+        raise ValueError(f"Invalid range: {header!r}")
+
+    start_str, end_str = spec.split(',')[0].strip().split('-', 1)
+    try:
+        if not start_str:
+            # Suffix range: the last N bytes
+            start, end = max(size - int(end_str), 0), size - 1
+        else:
+            start = int(start_str)
+            end = min(int(end_str), size - 1) if end_str else size - 1
+    except ValueError:
+        raise ValueError(f"Invalid range: {header!r}")
+
+    if start > end or start >= size:
+        raise ValueError(f"Unsatisfiable range: {header!r}")
+    return start, end
+
+
+def parse_content_range(header: Optional[str]) -> Tuple[int, int, Optional[int]]:
+    """Parse a Content-Range header like "bytes 0-99/1000" into (start, end, total).
+
+    The total is None when the server sends "*". Raises ValueError if the
+    header is missing or malformed.
+    """
+    try:
+        unit, _, spec = (header or '').strip().partition(' ')
+        byte_range, _, total = spec.partition('/')
+        start, end = (int(value) for value in byte_range.split('-', 1))
+        if unit.lower() != 'bytes' or start > end:
+            raise ValueError
+        return start, end, None if total == '*' else int(total)
+    except ValueError:
+        raise ValueError(f"Invalid Content-Range: {header!r}")
+
+
+def parse_timestamp(value: str) -> float:
+    """Parse a timestamp like "01:02:03.5", "10:00" or "90" into seconds."""
+    parts = value.strip().split(':')
+    if not value.strip() or len(parts) > 3:
+        raise ValueError(f"Invalid timestamp: {value!r}")
+
+    seconds = 0.0
+    for part in parts:
+        try:
+            number = float(part)
+        except ValueError:
+            raise ValueError(f"Invalid timestamp: {value!r}")
+        if number < 0:
+            raise ValueError(f"Invalid timestamp: {value!r}")
+        seconds = seconds * 60 + number
+    return seconds
+
+
+def format_timestamp(seconds: float) -> str:
+    """Format seconds as "HH:MM:SS"."""
+    seconds = int(seconds)
+    return f"{seconds // 3600:02d}:{seconds % 3600 // 60:02d}:{seconds % 60:02d}"
+
+
+def parse_time_range(section: str) -> Tuple[float, Optional[float]]:
+    """Parse a section like "00:10:00-00:15:00" into (start, end) seconds.
+
+    An open end ("00:10:00-") runs to the end of the video and is returned
+    as None.
+    """
+    if '-' not in section:
+        raise ValueError(f"Invalid time range: {section!r}")
+
+    start_str, end_str = section.split('-', 1)
+    start = parse_timestamp(start_str) if start_str.strip() else 0.0
+    end = parse_timestamp(end_str) if end_str.strip() else None
+
+    if end is not None and end <= start:
+        raise ValueError(f"Invalid time range: {section!r}")
+    return start, end
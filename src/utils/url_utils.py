@@ -73,6 +73,11 @@ def is_bilibili_url(url: str) -> bool:
     return domain in ['www.bilibili.com', 'bilibili.com', 'b23.tv', 'm.bilibili.com']
 
 
+def is_bangumi_season_url(url: str) -> bool:
+    """Check if URL points to a whole bangumi season rather than one episode."""
+    return re.search(r'bilibili\.com/bangumi/play/ss\d+', url, re.IGNORECASE) is not None
+
+
 def is_youtube_url(url: str) -> bool:
     """Check if URL is from YouTube."""
     domain = get_domain(url)
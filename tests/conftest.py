@@ -0,0 +1,27 @@
+"""Shared test fixtures."""
+
+from contextlib import asynccontextmanager
+from typing import AsyncIterator
+
+import pytest
+from aiohttp import web
+
+
+@asynccontextmanager
+async def _serve_app(app: web.Application) -> AsyncIterator[str]:
+    """Run an aiohttp app on a free local port and yield its base URL."""
+    runner = web.AppRunner(app)
+    await runner.setup()
+    try:
+        site = web.TCPSite(runner, '127.0.0.1', 0)
+        await site.start()
+        host, port = runner.addresses[0][:2]
+        yield f"http://{host}:{port}"
+    finally:
+        await runner.cleanup()
+
+
+@pytest.fixture
+def serve_app():
+    """``async with serve_app(app) as base_url`` serves a test app on a free port."""
+    return _serve_app
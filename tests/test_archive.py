@@ -0,0 +1,89 @@
+"""Tests for the download archive."""
+
+import os
+import tempfile
+from pathlib import Path
+
+from src.services.archive import ANY_FORMAT, DownloadArchive, video_id_from_filename
+from src.utils.file_utils import video_filename
+
+
+class TestDownloadArchive:
+    """Test cases for DownloadArchive."""
+
+    def setup_method(self):
+        """Setup test environment."""
+        self.root = Path(tempfile.mkdtemp())
+        self.archive_file = self.root / "archive.jsonl"
+        self.download_dir = self.root / "downloads"
+        self.download_dir.mkdir()
+
+    def _file(self, title, video_id, content=b'video'):
+        path = self.download_dir / video_filename(title, video_id)
+        path.write_bytes(content)
+        return path
+
+    def test_record_and_reload(self):
+        """Test that entries survive a reload and track the file."""
+        path = self._file("Test: Video", "BV1xx411c7mD")
+        archive = DownloadArchive(self.archive_file)
+        archive.record('bilibili', 'BV1xx411c7mD', path, 'best', 'dash-80')
+
+        reloaded = DownloadArchive(self.archive_file)
+        entry = reloaded.get('bilibili', 'BV1xx411c7mD', 'best')
+        assert entry['path'] == str(path.resolve())
+        assert entry['format_id'] == 'dash-80'
+        assert len(entry['sha256']) == 64
+        assert not reloaded.contains('bilibili', 'BV1xx411c7mD', '720p')
+
+        # A deleted or truncated file no longer counts as downloaded
+        path.write_bytes(b'v')
+        assert not reloaded.contains('bilibili', 'BV1xx411c7mD', 'best')
+
+    def test_journal_is_append_only_and_compacted(self):
+        """Test that records append lines and superseded lines are compacted."""
+        path = self._file("Video", "BV1")
+        archive = DownloadArchive(self.archive_file)
+        for _ in range(150):
+            archive.record('bilibili', 'BV1', path, sha256='0' * 64)
+        assert len(self.archive_file.read_text().splitlines()) == 150
+
+        reloaded = DownloadArchive(self.archive_file)
+        assert len(reloaded) == 1
+        assert len(self.archive_file.read_text().splitlines()) == 1
+
+    def test_incremental_rebuild(self):
+        """Test that rebuild hashes only new or changed files."""
+        first = self._file("First", "BV1")
+        second = self._file("Second", "BV2_p2")
+        (self.download_dir / "no id.mp4").write_bytes(b'x')
+        archive = DownloadArchive(self.archive_file)
+
+        assert archive.rebuild(self.download_dir) == {'added': 2, 'updated': 0, 'unchanged': 0, 'removed': 0}
+        assert archive.contains('bilibili', 'BV2_p2')
+
+        first.write_bytes(b'changed video')
+        os.utime(first, (1, 1))
+        second.unlink()
+        assert archive.rebuild(self.download_dir) == {'added': 0, 'updated': 1, 'unchanged': 0, 'removed': 1}
+        assert archive.rebuild(self.download_dir)['unchanged'] == 1
+
+    def test_rebuilt_entries_match_any_quality(self):
+        """Test that files of unknown quality are found whatever quality is asked for."""
+        self._file("First", "BV1")
+        archive = DownloadArchive(self.archive_file)
+        archive.rebuild(self.download_dir)
+
+        assert archive.get('bilibili', 'BV1', '1080p')['format'] == ANY_FORMAT
+        assert archive.contains('bilibili', 'BV1', 'audio')
+
+        # A download recorded with its quality takes precedence
+        recorded = self._file("First 720p", "BV1")
+        archive.record('bilibili', 'BV1', recorded, '720p')
+        assert archive.get('bilibili', 'BV1', '720p')['path'] == str(recorded.resolve())
+
+    def test_video_id_from_filename(self):
+        """Test the id suffix round trip."""
+        assert video_filename("A/B [x]", "BV1xx") == "AB [x] [BV1xx].mp4"
+        assert video_id_from_filename(Path("AB [x] [BV1xx].mp4")) == "BV1xx"
+        assert video_id_from_filename(Path("plain.mp4")) is None
@@ -0,0 +1,62 @@
+"""Tests for the benchmark harness."""
+
+import asyncio
+import tempfile
+
+import aiohttp
+from unittest.mock import patch
+from benchmarks.download_throughput import compare_results, run_case, server_process
+from benchmarks.range_server import SyntheticRangeServer, synthetic_bytes
+from src.core.config import download_config
+
+
+class TestSyntheticRangeServer:
+    """Test cases for SyntheticRangeServer."""
+
+    def test_serves_ranges_of_synthetic_content(self):
+        """Test range, HEAD and unsatisfiable requests."""
+        async def _run():
+            async with SyntheticRangeServer({'video.m4s': 3 * 1024 * 1024}) as server, \
+                    aiohttp.ClientSession() as session:
+                url = server.url('video.m4s')
+                async with session.get(url, headers={'Range': 'bytes=1000000-1999999'}) as response:
+                    partial = (response.status, response.headers['Content-Range'], await response.read())
+                async with session.head(url) as response:
+                    head = (response.status, response.headers['Content-Length'])
+                async with session.get(url, headers={'Range': 'bytes=9999999-'}) as response:
+                    unsatisfiable = response.status
+                return partial, head, unsatisfiable
+
+        (status, content_range, body), head, unsatisfiable = asyncio.run(_run())
+
+        assert status == 206
+        assert content_range == f"bytes 1000000-1999999/{3 * 1024 * 1024}"
+        assert body == synthetic_bytes(1000000, 1000000)
+        assert head == (200, str(3 * 1024 * 1024))
+        assert unsatisfiable == 416
+
+
+class TestDownloadThroughput:
+    """Test cases for the throughput benchmark."""
+
+    def test_run_case_downloads_and_measures(self):
+        """Test one small case against a server process."""
+        size = 2 * 1024 * 1024
+        with server_process({'small.bin': size}) as base_url, \
+                patch.object(download_config, 'chunk_size', download_config.chunk_size):
+            result = run_case(f"{base_url}/small.bin", size, 4, 64 * 1024, tempfile.mkdtemp(), True)
+
+        assert result['mb_per_s'] > 0
+        assert result['alloc_peak_mb'] >= 0
+        assert 'cpu_percent' in result
+
+    def test_compare_results_flags_regressions(self):
+        """Test that only drops beyond the tolerance are reported."""
+        case = {'file_size': 1, 'threads': 4, 'chunk_size': 1, 'bandwidth': 0, 'latency_ms': 0, 'jitter_ms': 0}
+        baseline = [{**case, 'mb_per_s': 100.0}, {**case, 'threads': 8, 'mb_per_s': 100.0}]
+        results = [{**case, 'mb_per_s': 95.0}, {**case, 'threads': 8, 'mb_per_s': 80.0}]
+
+        regressions = compare_results(results, baseline, 0.10)
+
+        assert len(regressions) == 1
+        assert 'threads=8' in regressions[0]
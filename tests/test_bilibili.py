@@ -3,7 +3,9 @@
 import pytest
 from unittest.mock import Mock, patch
 from src.services.bilibili import BilibiliService
+from src.services.ytdlp_pool import YtdlpWorkerPool
 from src.core.exceptions import URLParseError, NetworkError
+from src.utils.url_utils import is_bangumi_season_url
 
 
 class TestBilibiliService:
@@ -12,6 +14,7 @@ class TestBilibiliService:
     def setup_method(self):
         """Setup test environment."""
         self.service = BilibiliService()
+        self.service.ytdlp_pool = YtdlpWorkerPool(workers=0)
     
     def test_is_valid_url_valid_urls(self):
         """Test valid Bilibili URLs."""
@@ -53,7 +56,7 @@ class TestBilibiliService:
         with pytest.raises(URLParseError):
             self.service.get_video_id("https://www.youtube.com/watch?v=abc123")
     
-    @patch('src.services.bilibili.yt_dlp.YoutubeDL')
+    @patch('yt_dlp.YoutubeDL')
     def test_get_video_info_success(self, mock_ydl_class):
         """Test successful video info retrieval."""
         # Mock response
@@ -81,7 +84,7 @@ class TestBilibiliService:
         assert result['title'] == 'Test Video'
         assert result['duration'] == 300
     
-    @patch('src.services.bilibili.yt_dlp.YoutubeDL')
+    @patch('yt_dlp.YoutubeDL')
     def test_get_video_info_failure(self, mock_ydl_class):
         """Test video info retrieval failure."""
         mock_ydl = Mock()
@@ -96,7 +99,7 @@ class TestBilibiliService:
         with pytest.raises(URLParseError):
             self.service.get_video_info("invalid-url")
     
-    @patch('src.services.bilibili.yt_dlp.YoutubeDL')
+    @patch('yt_dlp.YoutubeDL')
     def test_get_download_url_success(self, mock_ydl_class):
         """Test successful download URL retrieval."""
         mock_info = {'url': 'https://example.com/video.mp4'}
@@ -111,4 +114,107 @@ class TestBilibiliService:
     def test_get_download_url_invalid_url(self):
         """Test download URL with invalid URL."""
         with pytest.raises(URLParseError):
-            self.service.get_download_url("invalid-url")
\ No newline at end of file
+            self.service.get_download_url("invalid-url")
+
+class TestBilibiliMultiPage:
+    """Test cases for multi-page (分P) videos."""
+    
+    def setup_method(self):
+        """Setup test environment."""
+        self.service = BilibiliService()
+        self.service.ytdlp_pool = YtdlpWorkerPool(workers=0)
+        self.view = {
+            'title': 'Course',
+            'cid': 100,
+            'pages': [
+                {'page': i, 'cid': 100 + i, 'part': f'Lesson {i}', 'duration': 60}
+                for i in range(1, 11)
+            ],
+        }
+    
+    def _fake_api(self, endpoint, params):
+        if endpoint == '/x/web-interface/view':
+            return self.view
+        cid = params['cid']
+        return {'durl': [{'url': f'https://example.com/{cid}.flv', 'size': cid}]}
+    
+    def test_video_info_exposes_pages(self):
+        """Test that all pages are exposed and ?p= selects the part."""
+        with patch.object(self.service, '_call_bilibili_api', side_effect=self._fake_api):
+            info = self.service.get_video_info("https://www.bilibili.com/video/BV1xx411c7mD?p=3")
+        
+        assert len(info['pages']) == 10
+        assert info['page'] == 3
+        assert info['cid'] == 103
+    
+    def test_get_page_download_urls(self):
+        """Test resolving a page selection."""
+        with patch.object(self.service, '_call_bilibili_api', side_effect=self._fake_api):
+            downloads = self.service.get_page_download_urls(
+                "https://www.bilibili.com/video/BV1xx411c7mD", "1-3,9"
+            )
+        
+        assert [d['page'] for d in downloads] == [1, 2, 3, 9]
+        assert downloads[3]['url'] == 'https://example.com/109.flv'
+        assert downloads[0]['part'] == 'Lesson 1'
+
+
+class TestBilibiliBangumi:
+    """Test cases for native bangumi (ep/ss) extraction."""
+    
+    def setup_method(self):
+        """Setup test environment."""
+        self.service = BilibiliService()
+        self.service.ytdlp_pool = YtdlpWorkerPool(workers=0)
+        self.season = {
+            'season_id': 42,
+            'title': 'Anime',
+            'episodes': [
+                {'ep_id': 1000 + i, 'cid': 2000 + i, 'bvid': f'BV{i}', 'title': str(i),
+                 'long_title': f'Episode {i}', 'duration': 1440000}
+                for i in range(1, 13)
+            ],
+        }
+        self.calls = []
+    
+    def _fake_api(self, endpoint, params):
+        self.calls.append(endpoint)
+        if endpoint == '/pgc/view/web/season':
+            return self.season
+        if endpoint == '/pgc/player/web/playurl':
+            return {'durl': [{'url': f"https://example.com/{params['ep_id']}.flv", 'size': 1}]}
+        return None
+    
+    @patch('yt_dlp.YoutubeDL')
+    def test_episode_url_uses_pgc_api(self, mock_ydl_class):
+        """Test that ep URLs resolve natively without yt-dlp."""
+        with patch.object(self.service, '_call_bilibili_api', side_effect=self._fake_api):
+            info = self.service.get_video_info("https://www.bilibili.com/bangumi/play/ep1003")
+        
+        assert info['ep_id'] == 1003
+        assert info['cid'] == 2003
+        assert info['duration'] == 1440
+        assert len(info['pages']) == 12
+        assert info['formats'][0]['url'] == 'https://example.com/1003.flv'
+        mock_ydl_class.assert_not_called()
+    
+    def test_whole_season_download_urls(self):
+        """Test resolving every episode of a season."""
+        with patch.object(self.service, '_call_bilibili_api', side_effect=self._fake_api):
+            downloads = self.service.get_page_download_urls(
+                "https://www.bilibili.com/bangumi/play/ss42", "all"
+            )
+        
+        assert len(downloads) == 12
+        assert downloads[-1]['url'] == 'https://example.com/1012.flv'
+    
+    def test_get_video_id(self):
+        """Test bangumi video IDs."""
+        assert self.service.get_video_id("https://www.bilibili.com/bangumi/play/ep1003") == "ep1003"
+        assert self.service.get_video_id("https://www.bilibili.com/bangumi/play/ss42") == "ss42"
+    
+    def test_season_url_means_whole_season(self):
+        """Test telling season links from episode links."""
+        assert is_bangumi_season_url("https://www.bilibili.com/bangumi/play/ss42")
+        assert not is_bangumi_season_url("https://www.bilibili.com/bangumi/play/ep1003")
+        assert not is_bangumi_season_url("https://www.bilibili.com/video/BV1xx411c7mD")
@@ -0,0 +1,64 @@
+"""Tests for content-addressed deduplication."""
+
+import asyncio
+import tempfile
+from pathlib import Path
+
+import aiohttp
+from benchmarks.range_server import SyntheticRangeServer
+from src.services.archive import DownloadArchive
+from src.services.content_store import ContentStore, file_fingerprint, link_file, probe_fingerprint
+
+
+MEDIA = bytes(range(256)) * 1024  # 256 KiB
+
+
+class TestContentStore:
+    """Test cases for ContentStore."""
+
+    def setup_method(self):
+        """Setup test environment."""
+        self.root = Path(tempfile.mkdtemp())
+        self.archive = DownloadArchive(self.root / "archive.jsonl")
+        self.source = self.root / "Video [BV1].mp4"
+        self.source.write_bytes(MEDIA)
+        self.archive.record('bilibili', 'BV1', self.source)
+
+    def test_remote_probe_matches_local_fingerprint(self):
+        """Test that one small range request identifies the downloaded file."""
+        server = SyntheticRangeServer({'reupload.m4s': MEDIA})
+
+        async def _run():
+            async with server, aiohttp.ClientSession() as session:
+                return await probe_fingerprint(session, server.url('reupload.m4s'))
+
+        probe = asyncio.run(_run())
+        assert probe == (len(MEDIA), True, file_fingerprint(self.source))
+        assert server.log == [('GET', 'bytes=0-65535')]
+
+    def test_materialize_links_known_content(self):
+        """Test that known content is linked instead of downloaded."""
+        store = ContentStore(self.archive)
+        target = self.root / "Reupload [BV2].mp4"
+
+        entry, method = store.materialize(file_fingerprint(self.source), target)
+
+        assert entry['video_id'] == 'BV1'
+        assert method in ('reflink', 'hardlink', 'copy')
+        assert target.read_bytes() == MEDIA
+        assert store.saved_bytes == len(MEDIA)
+        assert store.materialize("1:unknown", self.root / "other.mp4") is None
+
+    def test_missing_source_is_not_used(self):
+        """Test that a deleted source file is not linked."""
+        fingerprint = file_fingerprint(self.source)
+        self.source.unlink()
+
+        assert ContentStore(self.archive).materialize(fingerprint, self.root / "copy.mp4") is None
+
+    def test_hardlink_mode(self):
+        """Test that hard links share the inode."""
+        target = self.root / "linked.mp4"
+
+        assert link_file(self.source, target, 'hardlink') == 'hardlink'
+        assert target.stat().st_ino == self.source.stat().st_ino
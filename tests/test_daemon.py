@@ -0,0 +1,219 @@
+"""Tests for the download daemon and its client."""
+
+import asyncio
+import tempfile
+from pathlib import Path
+
+import aiohttp
+import pytest
+
+from benchmarks.range_server import SyntheticRangeServer
+from src.services.daemon import DownloadDaemon
+from src.services.downloader import AsyncDownloader
+from src.services.daemon_client import DaemonClient, DaemonError
+
+
+class FakeRunner:
+    """Reports progress in steps; URLs containing "fail" or "block" fail or wait until cancelled."""
+
+    def __init__(self):
+        self.started = asyncio.Event()
+
+    async def __call__(self, job, report):
+        job.title = f"Video {job.id}"
+        report()
+        if 'fail' in job.url:
+            raise RuntimeError('origin returned 403')
+        if 'block' in job.url:
+            self.started.set()
+            await asyncio.Event().wait()
+        for progress in (25.0, 50.0, 75.0):
+            job.progress = progress
+            report()
+            await asyncio.sleep(0)
+        return f"/downloads/{job.id}.mp4"
+
+
+def _run(scenario, concurrency=2):
+    async def _main():
+        runner = FakeRunner()
+        async with DownloadDaemon(port=0, concurrency=concurrency, runner=runner) as daemon:
+            return await scenario(daemon, DaemonClient(daemon.url), runner)
+
+    return asyncio.run(_main())
+
+
+class TestDownloadDaemon:
+    """Test job submission, status and progress streaming."""
+
+    def test_submit_and_follow_progress(self):
+        async def scenario(daemon, client, runner):
+            job = await asyncio.to_thread(client.submit, 'https://www.bilibili.com/video/BV1', '1080p')
+            updates = []
+            final = await client.follow(job['id'], updates.append)
+            return job, updates, final, await asyncio.to_thread(client.jobs)
+
+        job, updates, final, jobs = _run(scenario)
+
+        assert job['state'] == 'queued' and job['quality'] == '1080p'
+        assert final['state'] == 'completed'
+        assert final['path'] == f"/downloads/{job['id']}.mp4"
+        assert final['progress'] == 100.0
+        progress = [update['progress'] for update in updates]
+        assert progress == sorted(progress)
+        assert jobs == [final]
+
+    def test_failed_job_keeps_its_error(self):
+        async def scenario(daemon, client, runner):
+            job = await asyncio.to_thread(client.submit, 'https://www.bilibili.com/video/fail')
+            final = await client.follow(job['id'])
+            return final, await asyncio.to_thread(client.health)
+
+        final, health = _run(scenario)
+
+        assert final['state'] == 'failed'
+        assert final['error'] == 'origin returned 403'
+        assert health['jobs'] == {'failed': 1}
+
+    def test_cancel_running_and_queued_jobs(self):
+        async def scenario(daemon, client, runner):
+            running = await asyncio.to_thread(client.submit, 'https://www.bilibili.com/video/block')
+            queued = await asyncio.to_thread(client.submit, 'https://www.bilibili.com/video/next')
+            await runner.started.wait()
+
+            await asyncio.to_thread(client.cancel, queued['id'])
+            await asyncio.to_thread(client.cancel, running['id'])
+            cancelled = await client.follow(running['id'])
+
+            # The scheduler keeps serving after a cancellation
+            later = await asyncio.to_thread(client.submit, 'https://www.bilibili.com/video/later')
+            return cancelled, daemon.jobs[queued['id']].state, await client.follow(later['id'])
+
+        cancelled, queued_state, later = _run(scenario, concurrency=1)
+
+        assert cancelled['state'] == 'cancelled'
+        assert queued_state == 'cancelled'
+        assert later['state'] == 'completed'
+
+    def test_finished_jobs_are_pruned(self):
+        async def _main():
+            async with DownloadDaemon(port=0, concurrency=1, runner=FakeRunner(),
+                                      max_finished_jobs=2) as daemon:
+                client = DaemonClient(daemon.url)
+                jobs = [daemon.submit(f'https://www.bilibili.com/video/BV{i}') for i in range(4)]
+                finals = [await client.follow(job.id) for job in jobs]
+                kept = sorted(daemon.jobs)
+
+                # Expired jobs go even below the count limit
+                daemon.job_ttl = 0
+                running = daemon.submit('https://www.bilibili.com/video/block')
+                return jobs, finals, kept, sorted(daemon.jobs) == [running.id]
+
+        jobs, finals, kept, only_running = asyncio.run(_main())
+
+        assert [final['state'] for final in finals] == ['completed'] * 4
+        assert kept == sorted(job.id for job in jobs[2:])
+        assert only_running
+
+    def test_cancel_removes_partial_files(self):
+        output_dir = Path(tempfile.mkdtemp())
+
+        async def _main():
+            # 4 connections at 64 KiB/s each take far longer than the test
+            async with SyntheticRangeServer({'video.m4s': 4 * 1024 * 1024}, bandwidth=64 * 1024) as server:
+                started = asyncio.Event()
+
+                async def runner(job, report):
+                    def _on_progress(progress):
+                        started.set()
+
+                    await AsyncDownloader.download_file(server.url('video.m4s'), job.output, _on_progress, 4)
+                    return job.output
+
+                async with DownloadDaemon(port=0, runner=runner) as daemon:
+                    job = daemon.submit('https://www.bilibili.com/video/BV1', output=str(output_dir / 'v.mp4'))
+                    await started.wait()
+                    daemon.cancel(job.id)
+                    while not job.done:
+                        await asyncio.sleep(0.01)
+            return job
+
+        job = asyncio.run(_main())
+
+        assert job.state == 'cancelled'
+        assert list(output_dir.iterdir()) == []
+
+    def test_stop_cancels_running_jobs(self):
+        async def _main():
+            runner = FakeRunner()
+            async with DownloadDaemon(port=0, runner=runner) as daemon:
+                job = daemon.submit('https://www.bilibili.com/video/block')
+                await runner.started.wait()
+            return job
+
+        job = asyncio.run(_main())
+
+        assert job.state == 'cancelled'
+        assert job.finished is not None
+
+    def test_event_stream_sends_snapshot_then_updates(self):
+        async def scenario(daemon, client, runner):
+            done = daemon.submit('https://www.bilibili.com/video/BV1')
+            await client.follow(done.id)
+
+            events = client.events()
+            snapshot = await events.__anext__()
+            daemon.submit('https://www.bilibili.com/video/BV2')
+            update = await events.__anext__()
+            await events.aclose()
+            return snapshot, update
+
+        snapshot, update = _run(scenario)
+
+        assert snapshot['type'] == 'snapshot'
+        assert [job['state'] for job in snapshot['jobs']] == ['completed']
+        assert update['type'] == 'job'
+        assert update['job']['url'] == 'https://www.bilibili.com/video/BV2'
+
+    def test_slow_subscribers_drop_the_oldest_events(self):
+        queue = asyncio.Queue(maxsize=2)
+
+        for message in ('a', 'b', 'c'):
+            DownloadDaemon._offer(queue, message)
+
+        assert [queue.get_nowait(), queue.get_nowait()] == ['b', 'c']
+
+
+class TestRequestValidation:
+    """Test that the API refuses invalid and cross-site requests."""
+
+    def test_invalid_requests(self):
+        async def scenario(daemon, client, runner):
+            statuses = {}
+            async with aiohttp.ClientSession() as session:
+                async with session.post(f"{daemon.url}/api/jobs", data='url=https://b23.tv/x',
+                                        headers={'Content-Type': 'application/x-www-form-urlencoded'}) as response:
+                    statuses['form'] = response.status
+                async with session.post(f"{daemon.url}/api/jobs", json={'url': 'https://b23.tv/x'},
+                                        headers={'Origin': 'https://evil.example'}) as response:
+                    statuses['origin'] = response.status
+                async with session.post(f"{daemon.url}/api/jobs", json={'quality': 'best'}) as response:
+                    statuses['missing'] = response.status
+                async with session.post(f"{daemon.url}/api/jobs", json={'url': 'https://b23.tv/x', 'threads': 0}) as response:
+                    statuses['threads'] = response.status
+            with pytest.raises(DaemonError) as unknown:
+                await asyncio.to_thread(client.job, '999999')
+            return statuses, unknown.value.status, daemon.jobs
+
+        statuses, unknown_status, jobs = _run(scenario)
+
+        assert statuses == {'form': 415, 'origin': 403, 'missing': 400, 'threads': 400}
+        assert unknown_status == 404
+        assert jobs == {}
+
+    def test_unreachable_daemon(self):
+        client = DaemonClient('http://127.0.0.1:9', timeout=1.0)
+
+        assert not client.is_running()
+        with pytest.raises(DaemonError):
+            client.jobs()
@@ -0,0 +1,75 @@
+"""Tests for DASH time-range clips."""
+
+import asyncio
+import struct
+import tempfile
+from pathlib import Path
+
+import pytest
+from benchmarks.range_server import SyntheticRangeServer
+from src.core.exceptions import DownloadError
+from src.services.dash_clip import DashClipper, parse_sidx, select_fragments
+
+
+def _sidx(sizes, duration, timescale=1000, first_offset=0):
+    """Build a version 0 sidx box."""
+    body = struct.pack('>B3xIIIIHH', 0, 1, timescale, 0, first_offset, 0, len(sizes))
+    for size in sizes:
+        body += struct.pack('>III', size, duration, 0x90000000)
+    return struct.pack('>I4s', 8 + len(body), b'sidx') + body
+
+
+INIT = struct.pack('>I4s', 24, b'ftyp') + b'isom' * 4
+FRAGMENT_SIZES = [1000, 1200, 900, 1100, 1000]
+INDEX = _sidx(FRAGMENT_SIZES, duration=4000)
+FRAGMENTS = [bytes([i]) * size for i, size in enumerate(FRAGMENT_SIZES)]
+STREAM = INIT + INDEX + b''.join(FRAGMENTS)
+
+
+class TestSidx:
+    """Test cases for sidx parsing."""
+
+    def test_parse_sidx(self):
+        """Test fragment offsets and times."""
+        refs = parse_sidx(INDEX, len(INIT))
+
+        assert len(refs) == 5
+        assert refs[0].offset == len(INIT) + len(INDEX)
+        assert refs[1].offset == refs[0].offset + 1000
+        assert [r.start_time for r in refs] == [0, 4, 8, 12, 16]
+
+    def test_select_fragments(self):
+        """Test that fragments overlapping the range are selected."""
+        refs = parse_sidx(INDEX, len(INIT))
+
+        assert [r.start_time for r in select_fragments(refs, 5, 9)] == [4, 8]
+        assert [r.start_time for r in select_fragments(refs, 12, None)] == [12, 16]
+        with pytest.raises(DownloadError):
+            select_fragments(refs, 30, 40)
+
+
+class TestDashClipper:
+    """Test cases for DashClipper."""
+
+    def test_clip_downloads_only_needed_fragments(self):
+        """Test that the clip is the init segment plus the selected fragments."""
+        async def _run(save_path):
+            async with SyntheticRangeServer({'audio.m4s': STREAM}) as server:
+                fmt = {
+                    'format_id': 'dash-audio-30280', 'vcodec': 'none', 'acodec': 'mp4a.40.2',
+                    'url': server.url('audio.m4s'),
+                    'segment_base': {
+                        'initialization': f"0-{len(INIT) - 1}",
+                        'index_range': f"{len(INIT)}-{len(INIT) + len(INDEX) - 1}",
+                    },
+                }
+                clipper = DashClipper(num_threads=2)
+                covered = await clipper.clip([fmt], 5, 9, save_path)
+            return clipper, covered
+
+        save_path = str(Path(tempfile.mkdtemp()) / "clip.m4a")
+        clipper, covered = asyncio.run(_run(save_path))
+
+        assert covered == (4, 12)
+        assert Path(save_path).read_bytes() == INIT + FRAGMENTS[1] + FRAGMENTS[2]
+        assert clipper.bytes_downloaded < len(STREAM) / 2
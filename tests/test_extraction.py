@@ -0,0 +1,106 @@
+"""Tests for hedged extraction."""
+
+import multiprocessing
+import time
+import pytest
+from unittest.mock import Mock, patch
+from src.core.exceptions import NetworkError
+from src.services.extraction import HedgedExtractor
+from src.services.ytdlp_pool import YtdlpWorkerPool
+
+
+class TestHedgedExtractor:
+    """Test cases for HedgedExtractor."""
+    
+    def setup_method(self):
+        """Setup test environment."""
+        self.extractor = HedgedExtractor(['official', 'ytdlp'], default_budget=0.05)
+        self.started = []
+    
+    def _source(self, name, delay, result):
+        def _run(cancelled):
+            self.started.append(name)
+            time.sleep(delay)
+            if isinstance(result, Exception):
+                raise result
+            return result
+        return _run
+    
+    def test_primary_within_budget(self):
+        """Test that a fast primary does not start the secondary."""
+        source, result = self.extractor.extract({
+            'official': self._source('official', 0, {'id': 'a'}),
+            'ytdlp': self._source('ytdlp', 0, {'id': 'b'}),
+        })
+        
+        assert (source, result) == ('official', {'id': 'a'})
+        assert self.started == ['official']
+    
+    def test_hedges_slow_primary(self):
+        """Test that a slow primary is raced against the secondary."""
+        source, result = self.extractor.extract({
+            'official': self._source('official', 0.5, {'id': 'a'}),
+            'ytdlp': self._source('ytdlp', 0, {'id': 'b'}),
+        })
+        
+        assert (source, result) == ('ytdlp', {'id': 'b'})
+        assert self.started == ['official', 'ytdlp']
+    
+    def test_failed_primary_falls_back_immediately(self):
+        """Test that a failed primary starts the secondary without waiting."""
+        source, _ = self.extractor.extract({
+            'official': self._source('official', 0, None),
+            'ytdlp': self._source('ytdlp', 0, {'id': 'b'}),
+        })
+        
+        assert source == 'ytdlp'
+    
+    def test_all_sources_fail(self):
+        """Test failure of every source."""
+        with pytest.raises(NetworkError):
+            self.extractor.extract({
+                'official': self._source('official', 0, RuntimeError("api")),
+                'ytdlp': self._source('ytdlp', 0, RuntimeError("ytdlp")),
+            })
+    
+    def test_order_adapts_to_failures(self):
+        """Test that a failing source is demoted in auto mode."""
+        for _ in range(5):
+            self.extractor.extract({
+                'official': self._source('official', 0, None),
+                'ytdlp': self._source('ytdlp', 0, {'id': 'b'}),
+            })
+        
+        assert self.extractor.get_order('auto') == ['ytdlp', 'official']
+        assert self.extractor.get_order('official') == ['official', 'ytdlp']
+    
+    def test_losing_ytdlp_extraction_frees_its_worker(self):
+        """Test that the yt-dlp attempt that lost the race gives its pool worker back."""
+        workers = []
+        
+        class HungWorker:
+            """Worker that never answers."""
+            def __init__(self, *args):
+                self.conn, self._child = multiprocessing.Pipe()
+                self.process = Mock()
+                self.tasks_done = 0
+                workers.append(self)
+            
+            def stop(self, timeout=1.0):
+                self.conn.close()
+        
+        pool = YtdlpWorkerPool(workers=1, timeout=30)
+        extractor = HedgedExtractor(['ytdlp', 'official'], default_budget=0.05)
+        with patch('src.services.ytdlp_pool._Worker', HungWorker):
+            source, _ = extractor.extract({
+                'ytdlp': lambda cancelled: pool.extract_info("https://example.com/v", {}, cancel=cancelled),
+                'official': self._source('official', 0, {'id': 'a'}),
+            })
+            deadline = time.monotonic() + 5
+            while pool._spawned and time.monotonic() < deadline:
+                time.sleep(0.01)
+        
+        assert source == 'official'
+        assert pool._spawned == 0
+        workers[0].process.kill.assert_called_once()
+        assert extractor.stats['ytdlp'].samples == 0
@@ -0,0 +1,126 @@
+"""Tests for the format selection engine."""
+
+import pytest
+from src.services.format_selector import (
+    normalize_codec, parse_bitrate, parse_preference, select_format, select_streams
+)
+
+
+def _video(format_id, height, codec, bandwidth, fps=30):
+    return {
+        'format_id': format_id, 'url': f"https://example.com/{format_id}",
+        'height': height, 'fps': fps, 'vcodec': codec, 'acodec': 'none', 'bandwidth': bandwidth,
+    }
+
+
+def _audio(format_id, bandwidth):
+    return {
+        'format_id': format_id, 'url': f"https://example.com/{format_id}",
+        'vcodec': 'none', 'acodec': 'mp4a.40.2', 'bandwidth': bandwidth,
+    }
+
+
+FORMATS = [
+    _video('1080-avc', 1080, 'avc1.640032', 3000000),
+    _video('1080-hevc', 1080, 'hev1.1.6.L150.90', 1800000),
+    _video('1080-av1', 1080, 'av01.0.08M.08', 1500000),
+    _video('720-avc', 720, 'avc1.64001F', 1500000),
+    _video('720-hevc', 720, 'hev1.1.6.L120.90', 900000),
+    _video('480-avc', 480, 'avc1.64001E', 700000),
+    _audio('audio-64k', 64000),
+    _audio('audio-192k', 192000),
+]
+
+
+class TestParsePreference:
+    """Test cases for preference expression parsing."""
+
+    def test_combined_expression(self):
+        """Test parsing several constraints at once."""
+        pref = parse_preference("<=720p fps<=30 codec=hevc>avc br<=2.5M")
+
+        assert pref.max_height == 720
+        assert pref.max_fps == 30
+        assert pref.codecs == ['hevc', 'avc']
+        assert pref.max_bitrate == 2500000
+
+    def test_unknown_token_is_format_id(self):
+        """Test that an unknown token selects a format by id."""
+        assert parse_preference("dash-80").format_id == 'dash-80'
+
+    def test_quality_labels(self):
+        """Test frame rate and high bitrate labels such as 1080P60 and 1080P+."""
+        pref = parse_preference("1080P60")
+        assert (pref.max_height, pref.max_fps, pref.high_bitrate) == (1080, 60, False)
+
+        pref = parse_preference("1080P+")
+        assert (pref.max_height, pref.max_fps, pref.high_bitrate) == (1080, None, True)
+        assert parse_preference("4K").max_height == 2160
+
+    def test_malformed_label_is_rejected(self):
+        """Test that a label that is not a valid resolution raises instead of selecting 'best'."""
+        with pytest.raises(ValueError):
+            parse_preference("1080P++")
+        with pytest.raises(ValueError):
+            parse_preference("720pHD")
+
+    def test_codec_and_bitrate_helpers(self):
+        """Test codec normalization and bitrate parsing."""
+        assert normalize_codec(12) == 'hevc'
+        assert normalize_codec('avc1.640032') == 'avc'
+        assert parse_bitrate('800k') == 800000
+        with pytest.raises(ValueError):
+            parse_bitrate('fast')
+
+
+class TestSelectFormat:
+    """Test cases for format ranking."""
+
+    def test_best_picks_lowest_bandwidth_at_top_resolution(self):
+        """Test that 'best' does not mean the largest file."""
+        assert select_format(FORMATS, 'best')['format_id'] == '1080-av1'
+
+    def test_codec_preference(self):
+        """Test that the codec preference beats bandwidth."""
+        assert select_format(FORMATS, 'codec=hevc>avc')['format_id'] == '1080-hevc'
+        assert select_format(FORMATS, 'avc')['format_id'] == '1080-avc'
+
+    def test_resolution_and_bitrate_caps(self):
+        """Test resolution and bitrate caps."""
+        assert select_format(FORMATS, '720p')['format_id'] == '720-hevc'
+        assert select_format(FORMATS, 'br<=1M')['format_id'] == '720-hevc'
+
+    def test_quality_label_selection(self):
+        """Test that 1080P+ picks the largest 1080p encode and 1080P60 caps the frame rate."""
+        assert select_format(FORMATS, '1080P+')['format_id'] == '1080-avc'
+
+        formats = FORMATS + [_video('1080-av1-60', 1080, 'av01.0.09M.08', 2000000, fps=60)]
+        assert select_format(formats, '1080P60')['format_id'] == '1080-av1-60'
+        assert select_format(formats, '1080P30')['format_id'] == '1080-av1'
+        assert select_format(formats, '720P')['format_id'] == '720-hevc'
+
+    def test_caps_fall_back_to_smallest(self):
+        """Test that unsatisfiable caps fall back to the smallest format."""
+        assert select_format(FORMATS, '240p')['format_id'] == '480-avc'
+
+    def test_worst_and_audio(self):
+        """Test worst quality and audio-only selection."""
+        assert select_format(FORMATS, 'worst')['format_id'] == '480-avc'
+        assert select_format(FORMATS, 'audio')['format_id'] == 'audio-192k'
+        assert select_format(FORMATS, 'audio br<=128k')['format_id'] == 'audio-64k'
+
+    def test_format_id(self):
+        """Test exact format id selection."""
+        assert select_format(FORMATS, '720-avc')['format_id'] == '720-avc'
+
+    def test_select_streams_adds_audio(self):
+        """Test that split DASH video gets the best audio stream."""
+        streams = select_streams(FORMATS, '720p')
+
+        assert [f['format_id'] for f in streams] == ['720-hevc', 'audio-192k']
+
+    def test_require_audio_prefers_muxed(self):
+        """Test muxed format preference for single-file downloads."""
+        muxed = dict(_video('360-muxed', 360, 'avc1', 500000), acodec='mp4a.40.2')
+
+        assert select_format(FORMATS + [muxed], 'best', require_audio=True)['format_id'] == '360-muxed'
@@ -0,0 +1,171 @@
+"""Tests for listing enumerators and the download scheduler."""
+
+import asyncio
+import tempfile
+from pathlib import Path
+from unittest.mock import patch
+from src.services.listings import (
+    BilibiliListingEnumerator,
+    ListingCursorStore,
+    ListingRef,
+    parse_listing_url,
+)
+from src.services.rate_limiter import RateLimiterRegistry
+from src.services.scheduler import DownloadScheduler
+
+
+class TestParseListingUrl:
+    """Test cases for parse_listing_url."""
+    
+    def test_listing_urls(self):
+        """Test supported listing URLs."""
+        test_cases = [
+            ("https://space.bilibili.com/123/favlist?fid=456", ListingRef('favorites', '456', '123')),
+            ("https://www.bilibili.com/medialist/detail/ml456", ListingRef('favorites', '456')),
+            ("https://space.bilibili.com/123/channel/collectiondetail?sid=9", ListingRef('collection', '9', '123')),
+            ("https://space.bilibili.com/123/channel/seriesdetail?sid=9", ListingRef('series', '9', '123')),
+            ("https://space.bilibili.com/123/lists/9?type=season", ListingRef('collection', '9', '123')),
+            ("https://space.bilibili.com/123/lists/9?type=series", ListingRef('series', '9', '123')),
+            ("https://space.bilibili.com/123/video", ListingRef('space', '123', '123')),
+        ]
+        
+        for url, expected in test_cases:
+            assert parse_listing_url(url) == expected, url
+    
+    def test_non_listing_urls(self):
+        """Test URLs that are not listings."""
+        assert parse_listing_url("https://www.bilibili.com/video/BV1xx411c7mD") is None
+        assert parse_listing_url("https://space.bilibili.com/123/dynamic") is None
+
+
+class TestListingEnumerator:
+    """Test cases for BilibiliListingEnumerator."""
+    
+    def setup_method(self):
+        """Setup test environment."""
+        self.cursor_store = ListingCursorStore(Path(tempfile.mkdtemp()) / "cursors.json")
+        # Two pages, newest first
+        self.pages = {
+            1: ([self._entry(5), self._entry(4)], True),
+            2: ([self._entry(3), self._entry(2)], False),
+        }
+        self.fetched = []
+    
+    @staticmethod
+    def _entry(n):
+        return {'bvid': f'BV{n}', 'title': f'Video {n}', 'timestamp': n, 'url': f'u{n}'}
+    
+    async def _fake_fetch(self, session, page):
+        self.fetched.append(page)
+        return self.pages[page]
+    
+    def _collect(self, enumerator):
+        async def _run():
+            with patch.object(enumerator, '_fetch_page', side_effect=self._fake_fetch):
+                return [entry['bvid'] async for entry in enumerator]
+        return asyncio.run(_run())
+    
+    def test_pages_lazily(self):
+        """Test that later pages are fetched only when needed."""
+        enumerator = BilibiliListingEnumerator(
+            ListingRef('favorites', '1'), cursor_store=self.cursor_store, rate_limiters=RateLimiterRegistry({}), limit=2
+        )
+        
+        assert self._collect(enumerator) == ['BV5', 'BV4']
+        assert self.fetched == [1]
+    
+    def test_since_last_run(self):
+        """Test incremental enumeration with a stored cursor."""
+        ref = ListingRef('favorites', '1')
+        first = BilibiliListingEnumerator(ref, cursor_store=self.cursor_store, rate_limiters=RateLimiterRegistry({}))
+        assert self._collect(first) == ['BV5', 'BV4', 'BV3', 'BV2']
+        first.commit()
+        
+        # A new entry appears at the top of the listing
+        self.pages[1] = ([self._entry(6), self._entry(5)], True)
+        incremental = BilibiliListingEnumerator(
+            ref, since_last_run=True, cursor_store=self.cursor_store, rate_limiters=RateLimiterRegistry({})
+        )
+        assert self._collect(incremental) == ['BV6']
+    
+    def test_limited_run_keeps_cursor(self):
+        """Test that entries beyond the limit are still new in the next run."""
+        ref = ListingRef('favorites', '1')
+        self.cursor_store.set(ref.key, 2, 'BV2')
+        
+        limited = BilibiliListingEnumerator(
+            ref, since_last_run=True, cursor_store=self.cursor_store, rate_limiters=RateLimiterRegistry({}), limit=2
+        )
+        assert self._collect(limited) == ['BV5', 'BV4']
+        assert limited.truncated
+        limited.commit()
+        
+        complete = BilibiliListingEnumerator(
+            ref, since_last_run=True, cursor_store=self.cursor_store, rate_limiters=RateLimiterRegistry({}), limit=3
+        )
+        assert self._collect(complete) == ['BV5', 'BV4', 'BV3']
+        assert not complete.truncated
+        complete.commit()
+        assert self.cursor_store.get(ref.key)['bvid'] == 'BV5'
+
+    
+    def test_collection_remembers_seen_entries(self):
+        """Test that collections, which are not ordered by pubdate, skip by id."""
+        ref = ListingRef('collection', '9', '123')
+        limited = BilibiliListingEnumerator(ref, cursor_store=self.cursor_store, rate_limiters=RateLimiterRegistry({}), limit=3)
+        assert self._collect(limited) == ['BV5', 'BV4', 'BV3']
+        limited.commit()
+        
+        # An older upload is added to the middle of the collection
+        self.pages[2] = ([self._entry(3), self._entry(1), self._entry(2)], False)
+        incremental = BilibiliListingEnumerator(
+            ref, since_last_run=True, cursor_store=self.cursor_store, rate_limiters=RateLimiterRegistry({})
+        )
+        assert self._collect(incremental) == ['BV1', 'BV2']
+        incremental.commit()
+        assert self.cursor_store.get_seen(ref.key) == {'BV1', 'BV2', 'BV3', 'BV4', 'BV5'}
+
+
+class TestDownloadScheduler:
+    """Test cases for DownloadScheduler."""
+    
+    def test_jobs_start_while_source_is_producing(self):
+        """Test that workers consume jobs before the source is exhausted."""
+        events = []
+        
+        async def _source():
+            for i in range(3):
+                events.append(f"produced {i}")
+                yield i
+                await asyncio.sleep(0.01)
+        
+        async def _worker(job):
+            events.append(f"started {job}")
+            if job == 1:
+                raise RuntimeError("boom")
+            return job
+        
+        result = asyncio.run(DownloadScheduler(_worker, concurrency=2).run(_source()))
+        
+        assert events.index("started 0") < events.index("produced 2")
+        assert result.completed == [0, 2]
+        assert result.failed[0]['job'] == 1
+    
+    def test_results_are_not_collected_on_request(self):
+        """Test that callbacks still fire when the run keeps no results."""
+        completed, failed = [], []
+        
+        async def _worker(job):
+            if job == 1:
+                raise RuntimeError("boom")
+            return job
+        
+        scheduler = DownloadScheduler(
+            _worker, on_complete=lambda job, output: completed.append(job),
+            on_error=lambda job, e: failed.append(job), collect_results=False
+        )
+        result = asyncio.run(scheduler.run(range(3)))
+        
+        assert sorted(completed) == [0, 2]
+        assert failed == [1]
+        assert result.completed == [] and result.failed == []
@@ -0,0 +1,140 @@
+"""Tests for live stream recording."""
+
+import asyncio
+import tempfile
+from pathlib import Path
+
+import pytest
+from aiohttp import web
+from src.core.exceptions import URLParseError
+from src.services.live import (
+    FlvReader, LiveRecorder, LiveStream, TAG_AUDIO, TAG_SCRIPT, TAG_VIDEO,
+    parse_m3u8, parse_room_id, recover_partial_segments
+)
+
+
+FLV_HEADER = b'FLV\x01\x05\x00\x00\x00\x09' + b'\x00' * 4
+
+
+def _tag(tag_type, timestamp, payload):
+    """Build an FLV tag with its PreviousTagSize."""
+    header = bytes([tag_type]) + len(payload).to_bytes(3, 'big') + (timestamp & 0xFFFFFF).to_bytes(3, 'big')
+    header += bytes([timestamp >> 24]) + b'\x00' * 3
+    return header + payload + (11 + len(payload)).to_bytes(4, 'big')
+
+
+METADATA = _tag(TAG_SCRIPT, 0, b'\x02\x00\x0aonMetaData')
+AVC_CONFIG = _tag(TAG_VIDEO, 0, b'\x17\x00' + b'\x00' * 8)
+AAC_CONFIG = _tag(TAG_AUDIO, 0, b'\xaf\x00\x12\x10')
+
+
+def _stream(frames):
+    """An FLV stream with a keyframe every 5 video frames."""
+    data = FLV_HEADER + METADATA + AVC_CONFIG + AAC_CONFIG
+    for i in range(frames):
+        data += _tag(TAG_VIDEO, i * 40, (b'\x17\x01' if i % 5 == 0 else b'\x27\x01') + b'v' * 500)
+        data += _tag(TAG_AUDIO, i * 40, b'\xaf\x01' + b'a' * 100)
+    return data
+
+
+class FakeLiveClient:
+    """Reports the room live for a number of status checks."""
+
+    def __init__(self, url, live_checks):
+        self.url = url
+        self.live_checks = live_checks
+
+    async def get_room_info(self, room_id):
+        self.live_checks -= 1
+        return {'room_id': room_id, 'title': 'Test Room', 'is_live': self.live_checks >= 0}
+
+    async def get_stream(self, room_id, quality=10000, prefer='flv'):
+        return LiveStream(self.url, 'flv', quality)
+
+
+class TestParsing:
+    """Test cases for room ids, FLV and playlists."""
+
+    def test_parse_room_id(self):
+        """Test room URLs and bare ids."""
+        assert parse_room_id("https://live.bilibili.com/21452505?spm=1") == 21452505
+        assert parse_room_id("6") == 6
+        with pytest.raises(URLParseError):
+            parse_room_id("https://www.bilibili.com/video/BV1")
+
+    def test_flv_reader_handles_split_chunks(self):
+        """Test that tags are reassembled from arbitrary chunk boundaries."""
+        data = _stream(10)
+        reader = FlvReader()
+        tags = []
+        for i in range(0, len(data), 333):
+            tags.extend(reader.feed(data[i:i + 333]))
+
+        assert reader.header == FLV_HEADER
+        assert len(tags) == 3 + 20
+        assert [t.is_sequence_header for t in tags[:4]] == [True, True, True, False]
+        assert sum(t.is_keyframe for t in tags) == 3  # config tag and 2 key frames
+        assert b''.join(t.data for t in tags) == data[len(FLV_HEADER):]
+
+    def test_parse_m3u8(self):
+        """Test sequence numbers, init map and relative URLs."""
+        playlist = parse_m3u8(
+            "#EXTM3U\n#EXT-X-TARGETDURATION:2\n#EXT-X-MEDIA-SEQUENCE:41\n"
+            '#EXT-X-MAP:URI="h1.m4s"\n#EXTINF:1.00,\n41.m4s\n#EXTINF:1.00,\n42.m4s\n',
+            "https://cdn.example.com/live/index.m3u8?expires=1"
+        )
+
+        assert playlist['target_duration'] == 2
+        assert playlist['map'] == "https://cdn.example.com/live/h1.m4s"
+        assert [s[0] for s in playlist['segments']] == [41, 42]
+        assert playlist['segments'][1][2] == "https://cdn.example.com/live/42.m4s"
+
+
+class TestLiveRecorder:
+    """Test cases for LiveRecorder."""
+
+    def test_rotation_and_reconnect(self, serve_app):
+        """Test size rotation at keyframes and a new segment after a dropped connection."""
+        stream = _stream(40)
+
+        async def handler(request):
+            response = web.StreamResponse()
+            await response.prepare(request)
+            for i in range(0, len(stream), 4096):
+                await response.write(stream[i:i + 4096])
+            return response  # Connection closes as if the stream dropped
+
+        async def _run(output_dir):
+            app = web.Application()
+            app.router.add_get('/live.flv', handler)
+            async with serve_app(app) as base_url:
+                recorder = LiveRecorder(
+                    "123", output_dir, max_size=8 * 1024, reconnect_delay=0.01,
+                    client=FakeLiveClient(f"{base_url}/live.flv", live_checks=2),
+                )
+                await recorder.record()
+            return recorder
+
+        output_dir = tempfile.mkdtemp()
+        recorder = asyncio.run(_run(output_dir))
+        segments = recorder.stats.segments
+
+        assert len(segments) > 4
+        assert recorder.stats.reconnects == 1
+        assert len(recorder.stats.gaps) == 1
+        assert not list(Path(output_dir).glob("*.part"))
+        for segment in segments:
+            data = segment.read_bytes()
+            # Every file is self-contained: header, configs, then a keyframe
+            assert data.startswith(FLV_HEADER + METADATA + AVC_CONFIG + AAC_CONFIG)
+            assert data[len(FLV_HEADER) + len(METADATA + AVC_CONFIG + AAC_CONFIG) + 11] == 0x17
+        assert recorder.stats.bytes_written == sum(s.stat().st_size for s in segments)
+
+    def test_recover_partial_segments(self):
+        """Test that segments interrupted by a crash are finalized."""
+        directory = Path(tempfile.mkdtemp())
+        (directory / "123_a.flv.part").write_bytes(FLV_HEADER)
+        (directory / "123_b.flv.part").write_bytes(b'')
+
+        assert recover_partial_segments(directory) == [directory / "123_a.flv"]
+        assert sorted(p.name for p in directory.iterdir()) == ["123_a.flv"]
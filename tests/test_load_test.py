@@ -0,0 +1,61 @@
+"""Tests for the scheduler load test harness."""
+
+import asyncio
+
+from benchmarks.load_test import (
+    compare_results, jain_index, open_fds, percentile, run_load, start_order_inversions,
+)
+from benchmarks.range_server import SyntheticRangeServer
+
+
+class TestLoadStatistics:
+    """Test the statistics of the load report."""
+
+    def test_percentile_nearest_rank(self):
+        values = [float(v) for v in range(1, 101)]
+
+        assert percentile(values, 50) == 50.0
+        assert percentile(values, 99) == 99.0
+        assert percentile(values, 100) == 100.0
+        assert percentile([], 50) is None
+
+    def test_jain_index(self):
+        assert jain_index([2.0, 2.0, 2.0]) == 1.0
+        assert jain_index([1.0, 0.0, 0.0, 0.0]) == 0.25
+        assert jain_index([]) is None
+
+    def test_start_order_inversions(self):
+        assert start_order_inversions([0, 1, 2, 3]) == 0
+        assert start_order_inversions([0, 2, 1, 3]) == 1
+        assert start_order_inversions([3, 0, 1, 2]) == 3
+
+    def test_compare_results_flags_growth_beyond_tolerance(self):
+        case = {'jobs': 1000, 'concurrency': 32, 'threads': 2, 'file_size': 1024,
+                'peak_rss_mb': 100.0, 'peak_fds': 100, 'loop_lag_p99_ms': 10.0}
+
+        regressions = compare_results(
+            [{**case, 'peak_rss_mb': 140.0, 'peak_fds': 110}], [case], tolerance=0.25
+        )
+
+        assert len(regressions) == 1
+        assert 'peak_rss_mb' in regressions[0]
+
+
+class TestRunLoad:
+    """Test a small load run against a local range server."""
+
+    def test_runs_every_job_and_reports_resources(self, tmp_path):
+        async def _run():
+            async with SyntheticRangeServer({'job.bin': 64 * 1024}) as server:
+                return await run_load(server.url('job.bin'), 40, 4, 2, str(tmp_path), sample_interval=0.005)
+
+        report = asyncio.run(_run())
+
+        assert report['completed'] == 40
+        assert report['failed'] == 0
+        assert report['start_order_inversions'] == 0
+        assert 0 < report['duration_fairness'] <= 1
+        assert report['loop_lag_p99_ms'] is not None
+        if open_fds() is not None:
+            assert report['peak_fds'] >= report['baseline_fds']
+        assert list(tmp_path.iterdir()) == []
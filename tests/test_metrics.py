@@ -0,0 +1,128 @@
+"""Tests for the metrics registry and endpoint."""
+
+import asyncio
+import urllib.request
+
+import pytest
+from src.core.metrics import (
+    CallStatistics, MetricsRegistry, QUEUE_WAIT_SECONDS, start_metrics_server, status_class,
+)
+from src.services.scheduler import DownloadScheduler
+
+
+class TestMetricsRegistry:
+    """Test cases for MetricsRegistry."""
+
+    def setup_method(self):
+        """Setup test environment."""
+        self.registry = MetricsRegistry()
+
+    def test_counter_render(self):
+        """Test counters with labels in the text format."""
+        responses = self.registry.counter('http_responses_total', 'Responses', ['status_class'])
+        responses.labels(status_class(206)).inc()
+        responses.labels(status_class='2xx').inc(2)
+        responses.labels(status_class(503)).inc()
+
+        text = self.registry.render()
+
+        assert '# TYPE http_responses_total counter' in text
+        assert 'http_responses_total{status_class="2xx"} 3' in text
+        assert 'http_responses_total{status_class="5xx"} 1' in text
+
+    def test_histogram_buckets_are_cumulative(self):
+        """Test histogram buckets, sum and count."""
+        latency = self.registry.histogram('latency_seconds', 'Latency', ['endpoint'], buckets=(0.1, 1.0))
+        child = latency.labels(endpoint='/x/web-interface/view')
+        for value in (0.05, 0.5, 0.5, 5.0):
+            child.observe(value)
+
+        text = self.registry.render()
+        snapshot = self.registry.snapshot()['latency_seconds']['samples'][0]['value']
+
+        assert 'latency_seconds_bucket{endpoint="/x/web-interface/view",le="0.1"} 1' in text
+        assert 'latency_seconds_bucket{endpoint="/x/web-interface/view",le="1"} 3' in text
+        assert 'latency_seconds_bucket{endpoint="/x/web-interface/view",le="+Inf"} 4' in text
+        assert 'latency_seconds_count{endpoint="/x/web-interface/view"} 4' in text
+        assert snapshot['count'] == 4
+        assert snapshot['sum'] == pytest.approx(6.05)
+
+    def test_registration_is_idempotent(self):
+        """Test that registering a metric twice returns the same metric."""
+        first = self.registry.counter('retries_total', 'Retries', ['operation'])
+
+        assert self.registry.counter('retries_total', 'Retries', ['operation']) is first
+        with pytest.raises(ValueError):
+            self.registry.gauge('retries_total', 'Retries', ['operation'])
+        with pytest.raises(ValueError):
+            first.labels('a', 'b')
+
+    def test_metrics_endpoint(self):
+        """Test that /metrics serves the registry."""
+        self.registry.gauge('queue_depth', 'Depth', ['queue']).labels(queue='jobs').set(3)
+        server = start_metrics_server(0, metrics_registry=self.registry)
+        port = server.server_address[1]
+        try:
+            with urllib.request.urlopen(f"http://127.0.0.1:{port}/metrics") as response:
+                body = response.read().decode('utf-8')
+                content_type = response.headers['Content-Type']
+        finally:
+            server.shutdown()
+            server.server_close()
+
+        assert content_type.startswith('text/plain; version=0.0.4')
+        assert 'queue_depth{queue="jobs"} 3' in body
+
+
+class TestCallStatistics:
+    """Test cases for histogram quantiles and CallStatistics."""
+
+    def test_quantile_interpolates_within_buckets(self):
+        """Test quantile estimates from fixed buckets."""
+        latency = MetricsRegistry().histogram('latency_seconds', 'Latency', buckets=(0.1, 0.2, 0.4)).labels()
+        for value in [0.05] * 50 + [0.15] * 45 + [0.3] * 4 + [9.0]:
+            latency.observe(value)
+
+        assert latency.quantile(0.5) == pytest.approx(0.1)
+        assert latency.quantile(0.95) == pytest.approx(0.2)
+        assert 0.2 < latency.quantile(0.99) <= 0.4
+        assert latency.quantile(1.0) == 0.4
+
+    def test_record_and_reset(self):
+        """Test per-operation counts, failures and percentiles."""
+        stats = CallStatistics(buckets=(0.1, 1.0))
+        for _ in range(9):
+            stats.record('extract_video_info', 0.05, True)
+        stats.record('extract_video_info', 0.5, False)
+
+        data = stats.to_dict()
+        operation = data['operations']['extract_video_info']
+
+        assert (data['total_requests'], data['successful_requests'], data['failed_requests']) == (10, 9, 1)
+        assert data['average_response_time'] == pytest.approx(0.095)
+        assert operation['calls'] == 10 and operation['failures'] == 1
+        assert operation['p50'] <= 0.1 < operation['p99'] <= 1.0
+        assert data['last_used'] is not None
+
+        stats.reset()
+
+        assert stats.to_dict()['total_requests'] == 0
+        assert stats.to_dict()['operations'] == {}
+
+
+class TestSchedulerMetrics:
+    """Test cases for the scheduler queue metrics."""
+
+    def test_queue_wait_is_observed(self):
+        """Test that every job records its queue wait."""
+        child = QUEUE_WAIT_SECONDS.labels(queue='jobs')
+        before = child.snapshot()['count']
+
+        async def _worker(job):
+            await asyncio.sleep(0)
+            return job
+
+        result = asyncio.run(DownloadScheduler(_worker, concurrency=2).run(range(5)))
+
+        assert sorted(result.completed) == list(range(5))
+        assert child.snapshot()['count'] - before == 5
@@ -0,0 +1,146 @@
+"""End-to-end tests of the Bilibili extraction pipeline against the mock API."""
+
+import asyncio
+import struct
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+
+from benchmarks.bilibili_pipeline import StageTimer, run_pipeline
+from benchmarks.download_throughput import verify_download
+from benchmarks.mock_bilibili import MockBilibiliServer, MockVideo, segment_base
+from src.services.bilibili import BilibiliService
+from src.services.dash_clip import parse_sidx
+
+MB = 1024 * 1024
+BVID = 'BV1mock4y1Test'
+
+
+def _box(box_type: bytes, payload: bytes) -> bytes:
+    return struct.pack('>I4s', len(payload) + 8, box_type) + payload
+
+
+def _fragmented_mp4(fragment_sizes):
+    """ftyp, moov, a version 0 sidx and one placeholder box per fragment."""
+    references = b''.join(struct.pack('>III', size, 90000, 0x90000000) for size in fragment_sizes)
+    sidx = _box(b'sidx', struct.pack('>BxxxIIIIHH', 0, 1, 90000, 0, 0, 0, len(fragment_sizes)) + references)
+    fragments = b''.join(_box(b'free', bytes(size - 8)) for size in fragment_sizes)
+    return _box(b'ftyp', b'iso5' + bytes(4)) + _box(b'moov', bytes(32)) + sidx + fragments
+
+
+def _video(**kwargs) -> MockVideo:
+    options = {'video': {80: 2 * MB, 64: MB, 32: 512 * 1024}, 'audio': {30280: 256 * 1024, 30216: 128 * 1024}}
+    options.update(kwargs)
+    return MockVideo(BVID, 'Test video', **options)
+
+
+def _with_server(video: MockVideo, check):
+    """Run ``check(server, service)`` in a thread while the mock serves."""
+    async def _run():
+        async with MockBilibiliServer([video], {'abc123': video.bvid}) as server:
+            service = BilibiliService()
+            server.install(service)
+            return await asyncio.to_thread(check, server, service)
+
+    return asyncio.run(_run())
+
+
+class TestSegmentBase:
+    """Test SegmentBase ranges of served streams."""
+
+    def test_synthetic_streams_use_typical_ranges(self):
+        assert segment_base(4 * MB) == ((0, 927), (928, 1191))
+
+    def test_real_streams_point_at_moov_and_sidx(self):
+        data = _fragmented_mp4([1000, 2000])
+        (init_start, init_end), (index_start, index_end) = segment_base(data)
+
+        assert (init_start, init_end) == (0, 16 + 40 - 1)
+        references = parse_sidx(data[index_start:index_end + 1], index_start)
+        assert [ref.size for ref in references] == [1000, 2000]
+        assert references[0].offset == index_end + 1
+
+    def test_streams_without_index_are_rejected(self):
+        with pytest.raises(ValueError):
+            segment_base(_box(b'ftyp', bytes(8)) + _box(b'mdat', bytes(16)))
+
+
+class TestMockExtraction:
+    """Test the official API extraction against the mock server."""
+
+    def test_short_link_resolves_to_dash_formats(self):
+        def check(server, service):
+            return service._get_info_via_official('https://b23.tv/abc123'), dict(server.api_requests)
+
+        info, requests_made = _with_server(_video(), check)
+
+        assert info['bvid'] == BVID
+        assert info['title'] == 'Test video'
+        assert info['api_source'] == 'official'
+        assert requests_made == {'view': 1, 'playurl': 1}
+        formats = {fmt['format_id']: fmt for fmt in info['formats']}
+        assert set(formats) == {'dash-80', 'dash-64', 'dash-32', 'dash-audio-30280', 'dash-audio-30216'}
+        assert formats['dash-80']['height'] == 1080
+        assert formats['dash-80']['fps'] == 30.0
+        assert formats['dash-80']['vcodec'] == 'avc1.640032'
+        assert formats['dash-80']['segment_base'] == {'Initialization': '0-927', 'indexRange': '928-1191'}
+        assert formats['dash-80']['backup_urls'][0].endswith('?mirror=1')
+        assert formats['dash-audio-30280']['acodec'] == 'mp4a.40.2'
+
+    def test_page_parameter_selects_the_page(self):
+        video = _video(pages=3)
+        info = _with_server(video, lambda server, service: service._get_info_via_official(
+            server.video_url(BVID, page=2)
+        ))
+
+        assert info['page'] == 2
+        assert info['cid'] == video.cids[1]
+        assert [page['page'] for page in info['pages']] == [1, 2, 3]
+
+    def test_legacy_durl_without_dash(self):
+        video = _video()
+
+        def check(server, service):
+            play_info = service._call_bilibili_api('/x/player/playurl', {'bvid': BVID, 'cid': video.cids[0], 'fnval': 0})
+            return service._extract_formats_from_api(play_info)
+
+        formats = _with_server(video, check)
+
+        assert [fmt['format_id'] for fmt in formats] == ['durl-0']
+        assert formats[0]['ext'] == 'flv'
+        assert formats[0]['filesize'] == 2 * MB
+
+    def test_unknown_video_returns_none(self):
+        info = _with_server(_video(), lambda server, service: service._get_info_via_official(
+            server.video_url('BV1unknown00')
+        ))
+
+        assert info is None
+
+
+class TestPipeline:
+    """Test the end-to-end pipeline benchmark."""
+
+    def test_stage_timer_counts_nested_calls_once(self):
+        timer = StageTimer()
+        with timer.stage('resolve'):
+            with timer.stage('resolve'):
+                pass
+
+        assert list(timer.seconds) == ['resolve']
+
+    def test_url_to_files_without_ffmpeg(self, tmp_path):
+        async def _run():
+            async with MockBilibiliServer([_video()], {'abc123': BVID}) as server:
+                with patch('benchmarks.bilibili_pipeline.shutil.which', return_value=None):
+                    return await run_pipeline(server, 'https://b23.tv/abc123', str(tmp_path), threads=2)
+
+        result = asyncio.run(_run())
+
+        assert result['streams'] == ['dash-80', 'dash-audio-30280']
+        assert result['bytes'] == 2 * MB + 256 * 1024
+        assert result['muxed'] is False
+        assert set(result['stages_ms']) >= {'resolve', 'view', 'playurl', 'formats', 'extract', 'download'}
+        assert 'mux' not in result['stages_ms']
+        verify_download(Path(result['output']), 2 * MB)
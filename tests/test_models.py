@@ -0,0 +1,141 @@
+"""Tests for the compact video info and format records."""
+
+import tracemalloc
+
+import pytest
+
+from src.services.format_selector import select_format
+from src.services.models import Format, VideoInfo, compact_formats
+
+HEADERS = {'User-Agent': 'Mozilla/5.0', 'Accept': '*/*', 'Sec-Fetch-Mode': 'navigate'}
+
+
+def _ytdlp_format(index: int) -> dict:
+    """A format shaped like the ones yt-dlp returns for segmented streams."""
+    return {
+        'format_id': f'{100 + index}',
+        'url': f'https://cdn.example.com/video/{index}/manifest.mpd',
+        'ext': 'mp4',
+        'protocol': 'http_dash_segments',
+        'width': 1920,
+        'height': 1080 if index % 2 else 720,
+        'fps': 30,
+        'vcodec': 'avc1.640028',
+        'acodec': 'none',
+        'tbr': 2500.0 + index,
+        'http_headers': dict(HEADERS),
+        'fragments': [{'url': f'seg-{index}-{i}.m4s', 'duration': 2.0} for i in range(60)],
+        'downloader_options': {'http_chunk_size': 10485760},
+        'format': f'{100 + index} - 1920x1080',
+        'quality': index,
+        'source_preference': -1,
+        'has_drm': False,
+    }
+
+
+def _ytdlp_info(formats: int = 100) -> dict:
+    return {
+        'id': 'abc123',
+        'title': 'Title',
+        'description': 'Description ' * 50,
+        'duration': 600,
+        'uploader': 'Uploader',
+        'formats': [_ytdlp_format(i) for i in range(formats)],
+        'thumbnails': [{'url': f'thumb{i}.jpg', 'id': str(i)} for i in range(40)],
+        'automatic_captions': {f'lang{i}': [{'url': f'cap{i}.vtt', 'ext': 'vtt'}] for i in range(100)},
+        'subtitles': {'en': [{'url': 'en.vtt', 'ext': 'vtt'}]},
+        'ep_id': 1003,
+        'channel_follower_count': 12,
+    }
+
+
+class TestFormat:
+    """Test the compact format record."""
+
+    def test_behaves_like_the_dict(self):
+        fmt = Format.from_dict(_ytdlp_format(1))
+
+        assert fmt['format_id'] == '101'
+        assert fmt.get('height') == 1080
+        assert fmt.get('filesize', 0) == 0
+        assert 'url' in fmt
+        assert 'filesize' not in fmt
+        with pytest.raises(KeyError):
+            fmt['filesize']
+
+    def test_drops_fragments_and_unknown_fields(self):
+        fmt = Format.from_dict(_ytdlp_format(1))
+
+        assert 'fragments' not in fmt
+        assert 'downloader_options' not in fmt
+        assert not hasattr(fmt, '__dict__')
+        assert fmt.raw is None
+
+    def test_identical_headers_are_shared_and_read_only(self):
+        first, second = compact_formats([_ytdlp_format(1), _ytdlp_format(2)])
+
+        assert first['http_headers'] is second['http_headers']
+        assert dict(first['http_headers']) == HEADERS
+        with pytest.raises(TypeError):
+            first['http_headers']['Range'] = 'bytes=0-'
+
+    def test_raw_payload_is_kept_on_request(self):
+        data = _ytdlp_format(3)
+
+        assert Format.from_dict(data, keep_raw=True).raw == data
+
+    def test_equals_dict_of_kept_fields(self):
+        data = {'format_id': 'dash-80', 'url': 'https://example.com/v.m4s', 'height': 1080,
+                'backup_urls': ['https://backup.example.com/v.m4s']}
+
+        fmt = Format.from_dict(data)
+
+        assert fmt == {**data, 'backup_urls': ('https://backup.example.com/v.m4s',)}
+        assert fmt.to_dict()['format_id'] == 'dash-80'
+
+
+class TestVideoInfo:
+    """Test the compact video info record."""
+
+    def test_keeps_common_and_scalar_fields(self):
+        info = VideoInfo.from_dict(_ytdlp_info(4))
+
+        assert info['title'] == 'Title'
+        assert info['ep_id'] == 1003
+        assert info.get('channel_follower_count') == 12
+        assert 'thumbnails' not in info
+        assert 'automatic_captions' not in info
+        assert info['subtitles']['en'][0]['ext'] == 'vtt'
+        assert all(isinstance(fmt, Format) for fmt in info['formats'])
+
+    def test_format_selection_works_on_records(self):
+        info = VideoInfo.from_dict(_ytdlp_info(4))
+
+        selected = select_format(info['formats'], '720p')
+
+        assert selected['height'] == 720
+
+    def test_to_dict_and_raw(self):
+        data = _ytdlp_info(2)
+        info = VideoInfo.from_dict(data, keep_raw=True)
+
+        assert info.to_dict()['formats'][0]['format_id'] == '100'
+        assert info.raw['automatic_captions'] == data['automatic_captions']
+        assert VideoInfo.from_dict(info) is info
+
+    def test_uses_a_fraction_of_the_memory(self):
+        def _allocated(build):
+            tracemalloc.start()
+            try:
+                kept = build()
+                size = tracemalloc.get_traced_memory()[0]
+            finally:
+                tracemalloc.stop()
+            assert kept
+            return size
+
+        payloads = [_ytdlp_info(50) for _ in range(5)]
+        plain = _allocated(lambda: [_ytdlp_info(50) for _ in range(5)])
+        compact = _allocated(lambda: [VideoInfo.from_dict(data) for data in payloads])
+
+        assert compact < plain / 10
@@ -0,0 +1,181 @@
+"""Tests for download staging and the background mover."""
+
+import asyncio
+import errno
+import os
+import tempfile
+from pathlib import Path
+
+from unittest.mock import patch
+from benchmarks.range_server import SyntheticRangeServer
+from src.core.config import download_config
+from src.services.downloader import MultiThreadDownloader
+from src.services.mover import BackgroundMover, BandwidthLimiter, move_file, staging_path
+from src.services.scheduler import DownloadScheduler
+
+
+PAYLOAD = bytes(range(256)) * 4096
+
+
+class TestMoveFile:
+    """Test cases for move_file."""
+
+    def setup_method(self):
+        """Setup test environment."""
+        self.root = Path(tempfile.mkdtemp())
+        self.source = self.root / "staging" / "video.mp4"
+        self.source.parent.mkdir()
+        self.source.write_bytes(PAYLOAD)
+        self.target = self.root / "nas" / "video.mp4"
+
+    def test_rename_on_same_file_system(self):
+        """Test that a move within one file system is a rename."""
+        assert move_file(self.source, self.target) == 'rename'
+        assert self.target.read_bytes() == PAYLOAD
+        assert not self.source.exists()
+
+    def test_copy_across_file_systems(self):
+        """Test the chunked copy when rename fails with EXDEV."""
+        real_replace = os.replace
+        calls = []
+
+        def fake_replace(src, dst):
+            calls.append(src)
+            if len(calls) == 1:
+                raise OSError(errno.EXDEV, "Invalid cross-device link")
+            return real_replace(src, dst)
+
+        with patch('src.services.mover.os.replace', side_effect=fake_replace), \
+                patch('src.services.mover.MOVE_CHUNK_SIZE', 100000):
+            assert move_file(self.source, self.target) == 'copy'
+
+        assert self.target.read_bytes() == PAYLOAD
+        assert not self.source.exists()
+        assert not list(self.target.parent.glob("*.moving"))
+
+    def test_buffered_copy_fallback(self):
+        """Test that an unsupported copy_file_range falls back to read/write."""
+        with patch('src.services.mover.os.replace', side_effect=[OSError(errno.EXDEV, "xdev"), None]), \
+                patch('src.services.mover.os.copy_file_range', create=True,
+                      side_effect=OSError(errno.EXDEV, "xdev")) as copy_file_range:
+            move_file(self.source, self.target)
+
+        assert copy_file_range.call_count == 1
+        assert (self.target.parent / "video.mp4.moving").read_bytes() == PAYLOAD
+
+    def test_staging_path_is_unique_per_destination(self):
+        """Test that equal names in different directories do not collide."""
+        first = staging_path(self.root / "a" / "video.mp4", str(self.root / "tmp"))
+        second = staging_path(self.root / "b" / "video.mp4", str(self.root / "tmp"))
+
+        assert first.parent == second.parent == self.root / "tmp"
+        assert first != second
+        assert first.name.endswith("_video.mp4")
+
+
+class TestBandwidthLimiter:
+    """Test cases for BandwidthLimiter."""
+
+    def test_paces_transfers(self):
+        """Test that consecutive chunks are spaced by size / rate."""
+        limiter = BandwidthLimiter(rate=1000)
+
+        with patch('src.services.mover.time.sleep') as sleep:
+            limiter.consume(500)
+            limiter.consume(500)
+
+        assert sleep.call_count == 1
+        assert 0.45 < sleep.call_args[0][0] <= 0.5
+
+    def test_unlimited(self):
+        """Test that a zero rate never sleeps."""
+        with patch('src.services.mover.time.sleep') as sleep:
+            BandwidthLimiter(rate=0).consume(10 ** 9)
+
+        sleep.assert_not_called()
+
+
+class TestStagedDownload:
+    """Test cases for staged downloads."""
+
+    def test_download_is_staged_then_moved(self):
+        """Test that parts never touch the destination directory."""
+        root = Path(tempfile.mkdtemp())
+        save_path = root / "nas" / "video.mp4"
+        seen_in_destination = []
+        saved = []
+
+        def _on_progress(_: float) -> None:
+            seen_in_destination.extend(p.name for p in save_path.parent.iterdir())
+
+        async def _run():
+            mover = BackgroundMover(concurrency=1, bandwidth=0)
+            try:
+                async with SyntheticRangeServer({'video.m4s': PAYLOAD}) as server:
+                    downloader = MultiThreadDownloader(
+                        server.url('video.m4s'), str(save_path), 4, total_size=len(PAYLOAD),
+                        staging=True, mover=mover, on_saved=lambda: saved.append(save_path.exists())
+                    )
+                    moving = await downloader.download(_on_progress)
+                    assert moving is downloader.moving
+                    await mover.drain()
+                return downloader, mover
+            finally:
+                mover.shutdown()
+
+        with patch.object(download_config, 'temp_dir', str(root / "staging")):
+            downloader, mover = asyncio.run(_run())
+
+        assert downloader.work_path.parent == root / "staging"
+        assert save_path.read_bytes() == PAYLOAD
+        assert seen_in_destination == []
+        assert list((root / "staging").iterdir()) == []
+        assert mover.bytes_moved == len(PAYLOAD)
+        assert saved == [True]
+
+    def test_next_download_starts_while_move_runs(self):
+        """Test that a slow move to final storage does not hold the scheduler slot."""
+        root = Path(tempfile.mkdtemp())
+        staging = root / "staging"
+        events = []
+        real_replace = os.replace
+
+        def cross_device_replace(src, dst):
+            # Staging and destination on different file systems: copy, throttled
+            if Path(src).parent == staging:
+                raise OSError(errno.EXDEV, "Invalid cross-device link")
+            return real_replace(src, dst)
+
+        async def _run():
+            # 1 MiB at 2 MiB/s: each move takes about half a second
+            mover = BackgroundMover(concurrency=1, bandwidth=2 * 1024 * 1024)
+            try:
+                async with SyntheticRangeServer({'video.m4s': PAYLOAD}) as server:
+                    async def _download(index):
+                        events.append(f"start {index}")
+                        downloader = MultiThreadDownloader(
+                            server.url('video.m4s'), str(root / "nas" / f"video{index}.mp4"), 2,
+                            total_size=len(PAYLOAD), staging=True, mover=mover,
+                            on_saved=lambda: events.append(f"moved {index}")
+                        )
+                        await downloader.download()
+                        events.append(f"downloaded {index}")
+
+                    async def _jobs():
+                        for index in range(2):
+                            yield index
+
+                    await DownloadScheduler(_download, concurrency=1).run(_jobs())
+                    assert mover.pending
+                    await mover.drain()
+            finally:
+                mover.shutdown()
+
+        with patch.object(download_config, 'temp_dir', str(staging)), \
+                patch('src.services.mover.os.replace', side_effect=cross_device_replace), \
+                patch('src.services.mover.MOVE_CHUNK_SIZE', 64 * 1024):
+            asyncio.run(_run())
+
+        assert events.index("start 1") < events.index("moved 0")
+        assert sorted(events) == ["downloaded 0", "downloaded 1", "moved 0", "moved 1", "start 0", "start 1"]
+        assert (root / "nas" / "video1.mp4").read_bytes() == PAYLOAD
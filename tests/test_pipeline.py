@@ -0,0 +1,136 @@
+"""Tests for the shared single-video download flow."""
+
+import asyncio
+import tempfile
+from pathlib import Path
+
+from unittest.mock import Mock
+from benchmarks.range_server import SyntheticRangeServer
+from src.services.archive import DownloadArchive
+from src.services.pipeline import download_video, download_video_pages
+from src.services.prefetch import SpeculativePrefetcher
+
+
+PAYLOAD = bytes(range(256)) * 4096
+
+
+class TestDownloadVideo:
+    """Test cases for download_video."""
+
+    def setup_method(self):
+        """Setup test environment."""
+        self.root = Path(tempfile.mkdtemp())
+        self.archive = DownloadArchive(self.root / "archive.jsonl")
+        self.server = SyntheticRangeServer({'video.m4s': PAYLOAD})
+        self.service = Mock()
+        self.service.get_archive_id.side_effect = lambda url: url.rsplit('/', 1)[-1]
+        self.service._select_format.side_effect = lambda formats, quality: formats[0]
+
+    def _download(self, url, fingerprint=False, **kwargs):
+        async def _run():
+            async with self.server:
+                self.service.get_video_info.return_value = {
+                    'id': 'BV1', 'title': 'Test',
+                    'formats': [{'format_id': 'dash-80', 'url': self.server.url('video.m4s')}],
+                }
+                async with SpeculativePrefetcher(self.service, warm_connections=2,
+                                                 fingerprint=fingerprint) as prefetcher:
+                    return await download_video(
+                        prefetcher, url, output_dir=self.root, archive=self.archive, threads=2, **kwargs
+                    )
+        return asyncio.run(_run())
+
+    def test_download_then_skip_archived(self):
+        """Test that a downloaded video is recorded and skipped the next time."""
+        progress = []
+
+        first = self._download("https://www.bilibili.com/video/BV1",
+                               on_download=lambda output: progress.append)
+        requests = self.server.requests
+        second = self._download("https://www.bilibili.com/video/BV1")
+
+        assert first.status == 'downloaded'
+        assert first.path == self.root / "Test [BV1].mp4"
+        assert first.path.read_bytes() == PAYLOAD
+        assert progress[-1] == 100.0
+        assert second.status == 'archived'
+        assert second.path == first.path
+        assert self.server.requests == requests
+        assert self._download("https://www.bilibili.com/video/BV1", force=True).status == 'downloaded'
+
+    def test_identical_content_is_linked(self):
+        """Test that a reupload of downloaded content is linked instead of downloaded."""
+        self._download("https://www.bilibili.com/video/BV1", fingerprint=True)
+
+        titles = []
+        result = self._download("https://www.bilibili.com/video/BV2", fingerprint=True,
+                                on_info=lambda info: titles.append(info['title']))
+
+        assert result.status == 'linked'
+        assert result.source['video_id'] == 'BV1'
+        assert result.path == self.root / "Test [BV2].mp4"
+        assert result.path.read_bytes() == PAYLOAD
+        assert titles == ['Test']
+        assert self.archive.get('bilibili', 'BV2')['sha256'] == result.source['sha256']
+
+
+class TestDownloadVideoPages:
+    """Test cases for download_video_pages."""
+
+    def setup_method(self):
+        """Setup test environment."""
+        self.root = Path(tempfile.mkdtemp())
+        self.archive = DownloadArchive(self.root / "archive.jsonl")
+        self.server = SyntheticRangeServer({'video.m4s': PAYLOAD})
+        self.service = Mock()
+        self.service.get_archive_id.side_effect = \
+            lambda url, page=None: "BV1" if (page or 1) == 1 else f"BV1_p{page}"
+        self.video_info = {
+            'id': 'BV1', 'title': 'Test',
+            'pages': [{'page': n, 'part': f"Part {n}"} for n in range(1, 4)],
+        }
+
+    def _download(self, selection):
+        async def _run():
+            async with self.server:
+                self.service.get_page_download_urls.side_effect = lambda url, pages, quality: [
+                    {'page': int(n), 'part': f"Part {n}", 'url': self.server.url('video.m4s'), 'format_id': 'dash-80'}
+                    for n in pages.split(',')
+                ]
+                return await download_video_pages(
+                    "https://www.bilibili.com/video/BV1", selection, output_dir=self.root,
+                    video_info=self.video_info, service=self.service, archive=self.archive, threads=2
+                )
+        return asyncio.run(_run())
+
+    def test_archived_pages_are_skipped(self):
+        """Test that pages are recorded under their own ids and skipped the next time."""
+        first = self._download("1-2")
+        second = self._download("all")
+
+        assert [r.status for r in first] == ['downloaded', 'downloaded']
+        assert first[0].path == self.root / "P1_Part 1 [BV1].mp4"
+        assert first[1].path == self.root / "P2_Part 2 [BV1_p2].mp4"
+        assert first[1].path.read_bytes() == PAYLOAD
+        assert [r.status for r in second] == ['archived', 'archived', 'downloaded']
+        assert second[2].path == self.root / "P3_Part 3 [BV1_p3].mp4"
+        assert self.service.get_page_download_urls.call_args[0][1] == "3"
+        assert self.archive.get('bilibili', 'BV1_p3')['path'] == str(second[2].path)
+
+    def test_unresolved_page_is_reported(self):
+        """Test that a selected page without a play URL yields a failed result."""
+        async def _run():
+            async with self.server:
+                self.service.get_page_download_urls.return_value = [
+                    {'page': 1, 'part': "Part 1", 'url': self.server.url('video.m4s'), 'format_id': 'dash-80'}
+                ]
+                return await download_video_pages(
+                    "https://www.bilibili.com/video/BV1", "1-2", output_dir=self.root,
+                    video_info=self.video_info, service=self.service, archive=self.archive, threads=2
+                )
+
+        results = asyncio.run(_run())
+
+        assert [(r.page, r.status) for r in results] == [(1, 'downloaded'), (2, 'failed')]
+        assert not results[1].path.exists()
+        assert self.archive.get('bilibili', 'BV1_p2') is None
@@ -0,0 +1,95 @@
+"""Tests for speculative prefetching."""
+
+import asyncio
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+from unittest.mock import Mock
+from benchmarks.range_server import SyntheticRangeServer
+from src.services.downloader import AsyncDownloader
+from src.services.extraction import SingleFlightCache
+from src.services.prefetch import SpeculativePrefetcher
+
+
+PAYLOAD = bytes(range(256)) * 4096
+
+
+class TestSpeculativePrefetcher:
+    """Test cases for SpeculativePrefetcher."""
+
+    def test_prefetch_then_download(self):
+        """Test that the probed size and warm session feed the downloader."""
+        server = SyntheticRangeServer({'video.m4s': PAYLOAD})
+
+        async def _run(save_path):
+            async with server:
+                url = server.url('video.m4s')
+                service = Mock()
+                service.get_video_info.return_value = {
+                    'title': 'Test', 'formats': [{'format_id': 'dash-80', 'url': url, 'height': 1080}],
+                }
+                service._select_format.side_effect = lambda formats, quality: formats[0]
+                async with SpeculativePrefetcher(service, warm_connections=3) as prefetcher:
+                    handle = prefetcher.start("https://www.bilibili.com/video/BV1", 'best')
+                    info = await handle.info()
+                    target = await handle.target()
+                    await AsyncDownloader.download_file(
+                        target.url, save_path, num_threads=3,
+                        session=prefetcher.session, total_size=target.size
+                    )
+            return info, target
+
+        save_path = str(Path(tempfile.mkdtemp()) / "video.mp4")
+        info, target = asyncio.run(_run(save_path))
+
+        assert info['title'] == 'Test'
+        assert target.size == len(PAYLOAD)
+        assert target.accepts_ranges
+        assert Path(save_path).read_bytes() == PAYLOAD
+        methods = [method for method, _ in server.log]
+        assert 'HEAD' not in methods
+        assert methods.count('GET') == 3 + 3  # probe and warm-up, then the chunks
+
+
+class TestSingleFlightCache:
+    """Test cases for SingleFlightCache."""
+
+    def test_concurrent_calls_share_one_computation(self):
+        """Test that concurrent callers wait for the in-flight call."""
+        cache = SingleFlightCache(ttl=60)
+        calls = []
+
+        def _slow():
+            calls.append(1)
+            time.sleep(0.2)
+            return {'id': 'BV1'}
+
+        results = []
+        threads = [
+            threading.Thread(target=lambda: results.append(cache.get_or_call('url', _slow)))
+            for _ in range(4)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert len(calls) == 1
+        assert results == [{'id': 'BV1'}] * 4
+        assert cache.get_or_call('url', _slow) == {'id': 'BV1'}
+        assert len(calls) == 1
+
+    def test_failures_and_expired_entries_are_recomputed(self):
+        """Test that errors are not cached and entries expire."""
+        cache = SingleFlightCache(ttl=0)
+        failing = Mock(side_effect=[ValueError("boom"), 'ok', 'again'])
+
+        try:
+            cache.get_or_call('key', failing)
+        except ValueError:
+            pass
+
+        assert cache.get_or_call('key', failing) == 'ok'
+        assert cache.get_or_call('key', failing) == 'again'
@@ -0,0 +1,76 @@
+"""Tests for range parsing utilities."""
+
+import pytest
+from src.utils.range_utils import parse_content_range, parse_page_selection, parse_range_header, parse_time_range
+
+
+class TestParsePageSelection:
+    """Test cases for parse_page_selection."""
+    
+    def test_select_all(self):
+        """Test empty and wildcard selections."""
+        assert parse_page_selection(None, 3) == [1, 2, 3]
+        assert parse_page_selection("", 3) == [1, 2, 3]
+        assert parse_page_selection("all", 3) == [1, 2, 3]
+    
+    def test_ranges_and_single_pages(self):
+        """Test mixed ranges and single pages."""
+        assert parse_page_selection("1-5,9", 10) == [1, 2, 3, 4, 5, 9]
+        assert parse_page_selection("3,1,3", 5) == [1, 3]
+        assert parse_page_selection("8-", 10) == [8, 9, 10]
+        assert parse_page_selection("-2", 10) == [1, 2]
+    
+    def test_invalid_selection(self):
+        """Test invalid selections."""
+        for selection in ["abc", "5-3", "0", "1-11"]:
+            with pytest.raises(ValueError):
+                parse_page_selection(selection, 10)
+
+
+class TestParseTimeRange:
+    """Test cases for parse_time_range."""
+    
+    def test_time_ranges(self):
+        """Test full, short and open time ranges."""
+        assert parse_time_range("00:10:00-00:15:00") == (600, 900)
+        assert parse_time_range("1:30-2:00.5") == (90, 120.5)
+        assert parse_time_range("90-") == (90, None)
+    
+    def test_invalid_time_range(self):
+        """Test invalid time ranges."""
+        for section in ["10:00", "5:00-4:00", "a-b", "1:2:3:4-5"]:
+            with pytest.raises(ValueError):
+                parse_time_range(section)
+
+
+class TestParseRangeHeader:
+    """Test cases for parse_range_header."""
+    
+    def test_ranges(self):
+        """Test bounded, open and suffix ranges."""
+        assert parse_range_header(None, 100) == (0, 99)
+        assert parse_range_header("bytes=10-19", 100) == (10, 19)
+        assert parse_range_header("bytes=90-", 100) == (90, 99)
+        assert parse_range_header("bytes=-10", 100) == (90, 99)
+        assert parse_range_header("bytes=50-500", 100) == (50, 99)
+    
+    def test_unsatisfiable_range(self):
+        """Test invalid and unsatisfiable ranges."""
+        for header in ["bytes=100-", "items=0-1", "bytes=5-2", "bytes=a-b"]:
+            with pytest.raises(ValueError):
+                parse_range_header(header, 100)
+
+
+class TestParseContentRange:
+    """Test cases for parse_content_range."""
+    
+    def test_content_ranges(self):
+        """Test complete and unknown-length ranges."""
+        assert parse_content_range("bytes 0-99/1000") == (0, 99, 1000)
+        assert parse_content_range("bytes 100-199/*") == (100, 199, None)
+    
+    def test_invalid_content_range(self):
+        """Test missing and malformed headers."""
+        for header in [None, "", "bytes */1000", "items 0-1/2", "bytes 9-1/10"]:
+            with pytest.raises(ValueError):
+                parse_content_range(header)
@@ -0,0 +1,120 @@
+"""Tests for adaptive rate limiting."""
+
+import asyncio
+import time
+
+from unittest.mock import Mock
+from src.services.bilibili import BilibiliService
+from src.services.rate_limiter import AdaptiveRateLimiter, RateLimiterRegistry
+
+
+class TestAdaptiveRateLimiter:
+    """Test cases for AdaptiveRateLimiter."""
+
+    def test_slots_are_evenly_spaced(self):
+        """Test that concurrent reservations queue instead of bursting."""
+        limiter = AdaptiveRateLimiter(rate=10)
+        delays = [limiter.reserve() for _ in range(3)]
+
+        assert delays[0] == 0
+        assert abs(delays[1] - 0.1) < 0.01
+        assert abs(delays[2] - 0.2) < 0.01
+
+    def test_throttle_decreases_and_success_recovers(self):
+        """Test multiplicative decrease and additive increase."""
+        limiter = AdaptiveRateLimiter(rate=2, increase_step=0.5, cooldown=0)
+        limiter.on_throttle()
+        assert limiter.rate == 1.0
+
+        limiter.on_success()
+        limiter.on_success()
+        limiter.on_success()
+        assert limiter.rate == 2.0
+        assert limiter.throttled == 1
+
+    def test_throttle_pauses_queue(self):
+        """Test that Retry-After pauses the next slot."""
+        limiter = AdaptiveRateLimiter(rate=100)
+        limiter.on_throttle(retry_after=2)
+
+        assert limiter.reserve() > 1.9
+
+    def test_async_acquire(self):
+        """Test pacing from asyncio code."""
+        limiter = AdaptiveRateLimiter(rate=50)
+
+        async def _run():
+            start = time.monotonic()
+            await asyncio.gather(*(limiter.acquire_async() for _ in range(5)))
+            return time.monotonic() - start
+
+        assert asyncio.run(_run()) >= 0.07
+
+
+class TestRateLimiterRegistry:
+    """Test cases for RateLimiterRegistry."""
+
+    def test_platform_and_endpoint_limiters(self):
+        """Test that a request passes both the platform and the endpoint limiter."""
+        registry = RateLimiterRegistry({'bilibili': 2})
+        registry.configure('bilibili', 0.5, endpoint='/x/player/playurl')
+
+        limit = registry.limit('bilibili', '/x/player/playurl')
+        assert [l.max_rate for l in limit.limiters] == [2, 0.5]
+        assert registry.limit('bilibili', '/x/web-interface/view').limiters[1].max_rate == 2
+        assert registry.limit('youtube').limiters == []
+
+    def test_throttle_backs_off_only_the_endpoint(self):
+        """Test that a throttled endpoint does not slow down the rest of the platform."""
+        registry = RateLimiterRegistry({'bilibili': 2}, cooldown=0)
+
+        registry.limit('bilibili', '/x/player/playurl').on_throttle()
+
+        assert registry.get_limiter('bilibili', '/x/player/playurl').rate == 1
+        assert registry.get_limiter('bilibili').rate == 2
+        assert registry.get_limiter('bilibili', '/x/web-interface/view').rate == 2
+
+        registry.limit('bilibili').on_throttle()
+        assert registry.get_limiter('bilibili').rate == 1
+
+
+class TestBilibiliThrottling:
+    """Test cases for throttle handling in BilibiliService."""
+
+    def setup_method(self):
+        """Setup test environment."""
+        self.service = BilibiliService()
+        self.service.rate_limiters = RateLimiterRegistry({'bilibili': 1000}, cooldown=0)
+
+    def _response(self, payload, status=200):
+        response = Mock(status_code=status, headers={'Retry-After': '0'})
+        response.json.return_value = payload
+        return response
+
+    def test_throttled_request_is_retried(self):
+        """Test that -412 and HTTP 429 are queued again instead of failing."""
+        session = Mock()
+        session.get.side_effect = [
+            self._response({}, status=429),
+            self._response({'code': -412, 'message': 'request was banned'}),
+            self._response({'code': 0, 'data': {'bvid': 'BV1'}}),
+        ]
+        self.service._api_session = session
+
+        assert self.service._call_bilibili_api('/x/web-interface/view', {}) == {'bvid': 'BV1'}
+        assert session.get.call_count == 3
+
+        limiter = self.service.rate_limiters.get_limiter('bilibili', '/x/web-interface/view')
+        assert limiter.throttled == 2
+        assert limiter.rate < 1000
+        assert self.service.rate_limiters.get_limiter('bilibili').throttled == 0
+
+    def test_gives_up_after_retries(self):
+        """Test that a persistently throttled call returns None."""
+        session = Mock()
+        session.get.return_value = self._response({'code': -799})
+        self.service._api_session = session
+        self.service.max_throttle_retries = 2
+
+        assert self.service._call_bilibili_api('/x/web-interface/view', {}) is None
+        assert session.get.call_count == 3
@@ -0,0 +1,73 @@
+"""Tests for download retry, resume and verification under injected faults."""
+
+import asyncio
+import tempfile
+from pathlib import Path
+
+import pytest
+from benchmarks.fault_proxy import FaultSchedule
+from benchmarks.resilience import SCENARIOS, run_scenario
+
+
+SIZE = 8 * 1024 * 1024
+
+
+def _run(name, rules, directory=None):
+    return asyncio.run(run_scenario(
+        name, rules, SIZE, 4, directory or tempfile.mkdtemp(), stall_timeout=0.3, retry_delay=0.01
+    ))
+
+
+class TestFaultSchedule:
+    """Test cases for FaultSchedule."""
+
+    def test_parse_rules(self):
+        """Test the rule syntax."""
+        schedule = FaultSchedule.parse(['status:403@5M*2', 'reset/1M#1,3', 'stall:2.5'])
+        status, reset, stall = schedule.rules
+
+        assert (status.fault.kind, status.fault.status, status.after_total_bytes, status.times) == \
+            ('status', 403, 5 * 1024 * 1024, 2)
+        assert (reset.fault.after_bytes, reset.requests) == (1024 * 1024, {1, 3})
+        assert stall.fault.stall == 2.5
+        with pytest.raises(ValueError):
+            FaultSchedule.parse(['explode'])
+
+    def test_rules_fire_in_order_and_limit(self):
+        """Test request targeting, byte thresholds and fire counts."""
+        schedule = FaultSchedule.parse(['reset#1', 'status:403@100*1'])
+
+        assert schedule.next_fault(1, 0).kind == 'reset'
+        assert schedule.next_fault(2, 50) is None
+        assert schedule.next_fault(3, 100).kind == 'status'
+        assert schedule.next_fault(4, 200) is None
+
+
+class TestResilience:
+    """Test cases for MultiThreadDownloader recovery."""
+
+    @pytest.mark.parametrize('name', [name for name in SCENARIOS if name != 'clean'])
+    def test_recovers_from_fault(self, name):
+        """Test that every fault scenario ends with a verified file."""
+        result = _run(name, SCENARIOS[name])
+
+        assert result['recovered'], result.get('error')
+        assert result['retries'] >= 1
+        assert sum(result['faults_injected'].values()) >= 1
+
+    def test_resume_does_not_refetch_received_bytes(self):
+        """Test that a dropped connection resumes instead of restarting the chunk."""
+        result = _run('truncate', ['truncate/1M#1'])
+
+        # Only bytes still in flight when the connection dropped are fetched again
+        assert result['recovered']
+        assert result['bytes_wasted'] < 1024 * 1024
+
+    def test_gives_up_after_retries(self):
+        """Test that a persistent error fails the download and leaves no parts."""
+        directory = tempfile.mkdtemp()
+        result = _run('broken', ['status:500'], directory)
+
+        assert not result['recovered']
+        assert '500' in result['error']
+        assert list(Path(directory).iterdir()) == []
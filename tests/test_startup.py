@@ -0,0 +1,66 @@
+"""Tests for CLI startup cost."""
+
+import subprocess
+import sys
+from pathlib import Path
+
+
+ROOT = Path(__file__).resolve().parent.parent
+
+HEAVY_MODULES = ['aiohttp', 'requests', 'yt_dlp', 'pydantic', 'loguru', 'rich', 'src.core.config']
+
+
+class TestStartup:
+    """Test cases for lazy imports of the CLI entry point."""
+    
+    def _loaded_modules(self, code: str) -> set:
+        result = subprocess.run(
+            [sys.executable, '-c', code + '\nimport sys\nprint("\\n".join(sys.modules))'],
+            cwd=str(ROOT), capture_output=True, text=True, check=True,
+        )
+        return set(result.stdout.split())
+    
+    def test_cli_import_is_light(self):
+        """Test that importing the CLI does not load heavy modules."""
+        modules = self._loaded_modules('import src.cli.main')
+        
+        assert 'click' in modules
+        for name in HEAVY_MODULES:
+            assert name not in modules, f"{name} imported eagerly"
+    
+    def test_service_import_defers_requests(self):
+        """Test that the Bilibili service builds its HTTP session on first use."""
+        modules = self._loaded_modules('from src.services.bilibili import bilibili_service')
+        
+        assert 'requests' not in modules
+        assert 'yt_dlp' not in modules
+    
+    def test_platform_manager_defers_plugins(self):
+        """Test that the GUI platform manager registers plugins without importing them."""
+        modules = self._loaded_modules(
+            'from src.gui.plugins.platform_manager import PlatformManager\n'
+            'PlatformManager().route_url("https://www.bilibili.com/video/BV1xx411c7mD")'
+        )
+        
+        assert not any(name.startswith('src.gui.plugins.platforms.') for name in modules)
+        assert 'src.services.bilibili' not in modules
+        for name in HEAVY_MODULES:
+            assert name not in modules, f"{name} imported eagerly"
+    
+    def test_daemon_client_import_is_light(self):
+        """Test that the thin daemon client does not load the download stack."""
+        modules = self._loaded_modules('from src.services.daemon_client import DaemonClient')
+        
+        assert {name for name in modules if name.startswith('src.services.')} == {'src.services.daemon_client'}
+        for name in HEAVY_MODULES:
+            assert name not in modules, f"{name} imported eagerly"
+    
+    def test_help_runs(self):
+        """Test that --help works without the heavy modules."""
+        result = subprocess.run(
+            [sys.executable, 'main.py', '--help'],
+            cwd=str(ROOT), capture_output=True, text=True,
+        )
+        
+        assert result.returncode == 0
+        assert 'download-list' in result.stdout
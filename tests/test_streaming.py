@@ -0,0 +1,76 @@
+"""Tests for watch-while-downloading."""
+
+import asyncio
+import tempfile
+from pathlib import Path
+
+import aiohttp
+from benchmarks.range_server import SyntheticRangeServer
+from src.services.streaming import RangeServer, StreamingDownload
+
+
+PIECE = 1024
+PAYLOAD = bytes(range(256)) * 40  # 10 pieces
+
+
+class TestStreamingDownload:
+    """Test cases for StreamingDownload."""
+
+    def _download(self, url="http://example.com/video.mp4"):
+        save_path = str(Path(tempfile.mkdtemp()) / "video.mp4")
+        return StreamingDownload(url, save_path, len(PAYLOAD), num_workers=1, piece_size=PIECE)
+
+    def test_header_pieces_come_first(self):
+        """Test that the start and the tail are scheduled before the body."""
+        download = self._download()
+        order = []
+        for _ in range(4):
+            index = download._next_piece()
+            download._done[index] = True
+            order.append(index)
+
+        assert order == [0, 9, 1, 2]
+
+    def test_boost_moves_playhead(self):
+        """Test that a boosted range is fetched next and playback continues from it."""
+        download = self._download()
+        download._urgent.clear()
+        download.boost(6 * PIECE + 10, 7 * PIECE)
+
+        order = []
+        for _ in range(4):
+            index = download._next_piece()
+            download._done[index] = True
+            order.append(index)
+
+        assert order == [6, 7, 8, 9]
+
+    def test_server_waits_for_and_boosts_requested_range(self):
+        """Test that a player request for missing bytes is served once they arrive."""
+        origin = SyntheticRangeServer({'video.mp4': PAYLOAD}, latency=0.01)
+
+        async def _run(save_path):
+            async with origin:
+                download = StreamingDownload(
+                    origin.url('video.mp4'), save_path, len(PAYLOAD), num_workers=1, piece_size=PIECE
+                )
+                async with RangeServer(download) as server:
+                    task = asyncio.ensure_future(download.download())
+                    async with aiohttp.ClientSession() as session:
+                        async with session.get(server.url, headers={'Range': 'bytes=7000-7999'}) as response:
+                            status = response.status
+                            content_range = response.headers['Content-Range']
+                            body = await response.read()
+                    await task
+            return status, content_range, body
+
+        save_path = str(Path(tempfile.mkdtemp()) / "video.mp4")
+        status, content_range, body = asyncio.run(_run(save_path))
+
+        assert status == 206
+        assert content_range == f"bytes 7000-7999/{len(PAYLOAD)}"
+        assert body == PAYLOAD[7000:8000]
+        assert Path(save_path).read_bytes() == PAYLOAD
+        # The requested pieces jump ahead of the sequential body
+        origin_requests = [int(header[len('bytes='):].split('-')[0]) // PIECE for _, header in origin.log]
+        assert origin_requests.index(6) < origin_requests.index(2)
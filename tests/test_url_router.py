@@ -0,0 +1,286 @@
+"""Tests for the compiled URL routing index of the platform manager."""
+
+import asyncio
+import contextlib
+import io
+import json
+import time
+
+import pytest
+
+from benchmarks.url_routing import generate_urls
+from src.gui.plugins import manifest
+from src.gui.plugins.base_platform import BasePlatform
+from src.gui.plugins.manifest import PlatformSpec
+from src.core.metrics import PLATFORM_CALLS
+from src.gui.plugins.platform_manager import PlatformManager
+from src.gui.plugins.platforms.bilibili_platform import BilibiliPlatform
+from src.gui.plugins.platforms.douyin_platform import DouyinPlatform
+from src.gui.plugins.platforms.youtube_platform import YouTubePlatform
+from src.gui.plugins.url_router import HostTrie, Route, URLRouter, compile_url_patterns, extract_hostname
+
+
+@pytest.fixture
+def manager():
+    with contextlib.redirect_stdout(io.StringIO()):
+        return PlatformManager()
+
+
+class TestHostTrie:
+    """Test the hostname suffix trie."""
+
+    def test_matches_on_label_boundaries_only(self):
+        trie = HostTrie()
+        trie.insert('youtube.com', 'youtube')
+
+        assert trie.lookup('youtube.com') == 'youtube'
+        assert trie.lookup('m.youtube.com') == 'youtube'
+        assert trie.lookup('notyoutube.com') is None
+        assert trie.lookup('youtube.com.evil.net') is None
+
+    def test_longest_suffix_wins(self):
+        trie = HostTrie()
+        trie.insert('example.com', 'site')
+        trie.insert('video.example.com', 'video')
+
+        assert trie.lookup('cdn.video.example.com') == 'video'
+        assert trie.lookup('www.example.com') == 'site'
+
+    def test_remove_value(self):
+        trie = HostTrie()
+        trie.insert('example.com', 'site')
+        trie.insert('video.example.com', 'video')
+
+        trie.remove_value('video')
+
+        assert trie.lookup('video.example.com') == 'site'
+        assert trie.get('video.example.com') is None
+
+    def test_extract_hostname(self):
+        assert extract_hostname('https://user:pw@WWW.YouTube.com:8443/watch?v=x') == 'www.youtube.com'
+        assert extract_hostname('http://bilibili.com./video/BV1') == 'bilibili.com'
+        assert extract_hostname('bilibili.com/video/BV1') is None
+
+
+class TestURLRouter:
+    """Test routing URLs to platforms and video ids."""
+
+    @pytest.mark.parametrize('url, expected', [
+        ('https://www.bilibili.com/video/bv1xx411c7mD?p=2', Route('bilibili', 'BV1xx411c7mD')),
+        ('https://m.bilibili.com/video/av170001', Route('bilibili', 'av170001')),
+        ('https://www.bilibili.com/bangumi/play/EP1003', Route('bilibili', 'ep1003')),
+        ('https://b23.tv/xyz123', Route('bilibili', None)),
+        ('https://m.youtube.com/watch?feature=share&v=dQw4w9WgXcQ', Route('youtube', 'dQw4w9WgXcQ')),
+        ('https://youtu.be/dQw4w9WgXcQ?t=10', Route('youtube', 'dQw4w9WgXcQ')),
+        ('HTTPS://WWW.YOUTUBE.COM/shorts/abc_DEF-1', Route('youtube', 'abc_DEF-1')),
+        ('https://www.douyin.com/video/7300000000000000001', Route('douyin', '7300000000000000001')),
+        ('https://v.douyin.com/iRNBho6/', Route('douyin', None)),
+        ('https://notyoutube.com/watch?v=dQw4w9WgXcQ', None),
+        ('https://www.example.com/index.html', None),
+        ('', None),
+    ])
+    def test_route(self, manager, url, expected):
+        assert manager.route_url(url) == expected
+
+    def test_embedded_and_schemeless_urls_fall_back_to_patterns(self, manager):
+        assert manager.route_url('https://t.example.com/?u=https://youtu.be/abc') == Route('youtube', 'abc')
+        assert manager.route_url('bilibili.com/video/BV1abc') == Route('bilibili', 'BV1abc')
+
+    def test_platform_lookup_and_unregister(self, manager):
+        assert manager.get_platform_by_url('https://www.youtube.com/watch?v=abc').name == 'youtube'
+        assert manager.get_platform_by_url('https://notyoutube.com/watch?v=abc') is None
+
+        with contextlib.redirect_stdout(io.StringIO()):
+            manager.unregister_platform('youtube')
+
+        assert manager.get_platform_by_url('https://www.youtube.com/watch?v=abc') is None
+        assert manager.router.platforms == ['bilibili', 'douyin']
+
+    def test_platforms_without_patterns_use_their_own_methods(self):
+        router = URLRouter()
+        router.add('legacy', ['legacy.tv'], supports=lambda url: 'legacy:' in url,
+                   extract_id=lambda url: url.partition('legacy:')[2] or None)
+
+        assert router.route('https://www.legacy.tv/watch/1') == Route('legacy', None)
+        assert router.route('legacy:42') == Route('legacy', '42')
+
+    def test_domain_of_another_platform_is_kept(self):
+        router = URLRouter()
+        router.add('first', ['example.com'])
+        router.add('second', ['example.com', 'video.example.com'])
+
+        assert router.route('https://example.com/') == Route('first', None)
+        assert router.route('https://video.example.com/') == Route('second', None)
+
+    def test_classify_is_fast(self, manager):
+        urls = generate_urls(20000)
+
+        started = time.perf_counter()
+        routes = manager.classify_urls(urls)
+        elapsed = time.perf_counter() - started
+
+        assert len(routes) == len(urls)
+        assert not any(route for url, route in zip(urls, routes) if 'notyoutube' in url)
+        assert elapsed < 1.0
+
+
+class TestPluginPatterns:
+    """Test the precompiled URL patterns of the plugins."""
+
+    def test_patterns_are_combined_case_insensitively(self):
+        regex = compile_url_patterns([r'a\.com/(?P<id>\d+)', r'b\.com/x/(?P<id>\w+)'])
+
+        assert regex.search('https://B.COM/x/abc').group('id1') == 'abc'
+        assert regex.search('https://nota.com/1') is None
+
+    def test_plugin_methods(self):
+        bilibili, youtube, douyin = BilibiliPlatform(), YouTubePlatform(), DouyinPlatform()
+
+        assert bilibili.is_supported_url('https://b23.tv/xyz123')
+        assert bilibili.extract_video_id('https://www.bilibili.com/video/BV1xx411c7mD') == 'BV1xx411c7mD'
+        assert bilibili.extract_video_id('https://b23.tv/xyz123') is None
+        assert youtube.extract_video_id('https://www.youtube.com/watch?v=dQw4w9WgXcQ&t=1') == 'dQw4w9WgXcQ'
+        assert not youtube.is_supported_url('https://notyoutube.com/watch?v=dQw4w9WgXcQ')
+        assert douyin.extract_video_id('https://www.iesdouyin.com/share/video/123/') == '123'
+        assert len(douyin.extract_video_id('https://v.douyin.com/iRNBho6/')) == 16
+
+
+class CountingPlatform(BasePlatform):
+    """A platform that counts its instances and initializations."""
+
+    created = 0
+
+    def __init__(self):
+        super().__init__()
+        CountingPlatform.created += 1
+        self.initialized = 0
+
+    @property
+    def name(self) -> str:
+        return 'counting'
+
+    async def initialize(self):
+        await asyncio.sleep(0.01)
+        self.initialized += 1
+
+    def is_supported_url(self, url):
+        return 'counting.tv/v/' in url
+
+    async def extract_video_info(self, url):
+        return {}
+
+    def get_download_urls(self, video_info, quality='best'):
+        if quality == 'broken':
+            raise ValueError(quality)
+        return []
+
+
+COUNTING_SPEC = PlatformSpec('counting', f'{__name__}.CountingPlatform', ('counting.tv',),
+                             (r'counting\.tv/v/(?P<id>\d+)',))
+
+
+class TestLazyLoading:
+    """Test that plugins are registered from the manifest and loaded on demand."""
+
+    def test_only_specs_are_registered_up_front(self, manager):
+        assert manager.platforms == {}
+        assert [spec.name for spec in manager.get_platform_specs()] == ['bilibili', 'youtube', 'douyin']
+        assert manager.is_url_supported('https://youtu.be/abc')
+        assert manager.platforms == {}
+
+    def test_plugin_is_created_on_first_matching_url(self, manager):
+        platform = manager.get_platform_by_url('https://youtu.be/abc')
+
+        assert isinstance(platform, YouTubePlatform)
+        assert list(manager.platforms) == ['youtube']
+        assert manager.get_platform_by_name('youtube') is platform
+        assert manager.get_platform_info()['bilibili']['loaded'] is False
+
+    def test_async_load_initializes_once(self, manager):
+        CountingPlatform.created = 0
+        with contextlib.redirect_stdout(io.StringIO()):
+            manager.register_spec(COUNTING_SPEC)
+
+        async def _load():
+            return await asyncio.gather(*(
+                manager.get_platform_by_url_async('https://counting.tv/v/1') for _ in range(5)
+            ))
+
+        platforms = asyncio.run(_load())
+
+        assert CountingPlatform.created == 1
+        assert all(platform is platforms[0] for platform in platforms)
+        assert platforms[0].initialized == 1
+
+    def test_entry_points_register_specs(self, monkeypatch):
+        class _EntryPoint:
+            name = 'counting'
+
+            def load(self):
+                return {'name': 'counting', 'class_path': f'{__name__}.CountingPlatform',
+                        'supported_domains': ['counting.tv'], 'url_patterns': [r'counting\.tv/v/(?P<id>\d+)']}
+
+        monkeypatch.setattr(manifest, '_entry_points', lambda group: [_EntryPoint()])
+        with contextlib.redirect_stdout(io.StringIO()):
+            manager = PlatformManager()
+
+        assert manager.route_url('https://www.counting.tv/v/42') == Route('counting', '42')
+        assert 'counting' not in manager.platforms
+
+    def test_external_config_registers_specs(self, manager, tmp_path):
+        config = tmp_path / 'platforms.json'
+        config.write_text(json.dumps({'platforms': [{
+            'name': 'counting', 'class_path': f'{__name__}.CountingPlatform',
+            'supported_domains': ['counting.tv'], 'url_patterns': [r'counting\.tv/v/(?P<id>\d+)'],
+        }]}))
+
+        with contextlib.redirect_stdout(io.StringIO()):
+            loaded = asyncio.run(manager.load_external_platforms(str(config)))
+
+        assert loaded
+        assert 'counting' not in manager.platforms
+        assert isinstance(manager.get_platform_by_url('https://counting.tv/v/1'), CountingPlatform)
+
+    def test_manifest_matches_the_plugins(self):
+        for spec, platform in zip(manifest.BUILTIN_PLATFORMS,
+                                  (BilibiliPlatform(), YouTubePlatform(), DouyinPlatform())):
+            assert spec.name == platform.name
+            assert spec.supported_domains == tuple(platform.supported_domains)
+            assert spec.url_patterns == platform.url_patterns
+
+
+class TestUsageStatistics:
+    """Test that the manager times and counts plugin calls."""
+
+    def test_calls_are_counted_per_operation(self, manager):
+        with contextlib.redirect_stdout(io.StringIO()):
+            manager.register_platform(CountingPlatform())
+        platform = manager.get_platform_by_name('counting')
+        failures = PLATFORM_CALLS.labels('counting', 'get_download_urls', 'failure')
+        failures_before = failures.value
+
+        asyncio.run(platform.extract_video_info('https://counting.tv/v/1'))
+        platform.get_download_urls({})
+        with pytest.raises(ValueError):
+            platform.get_download_urls({}, 'broken')
+
+        stats = manager.get_usage_statistics()['counting']
+
+        assert stats['total_requests'] == 3
+        assert stats['failed_requests'] == 1
+        assert stats['operations']['get_download_urls']['calls'] == 2
+        assert stats['operations']['extract_video_info']['p99'] is not None
+        assert failures.value == failures_before + 1
+
+        manager.reset_statistics()
+
+        assert platform.get_usage_statistics()['total_requests'] == 0
+
+    def test_instrumentation_is_applied_once(self, manager):
+        platform = manager.get_platform_by_url('https://youtu.be/abc')
+        wrapped = platform.extract_video_info
+
+        with contextlib.redirect_stdout(io.StringIO()):
+            manager.register_platform(platform)
+
+        assert platform.extract_video_info is wrapped
@@ -0,0 +1,137 @@
+"""Tests for the yt-dlp worker pool."""
+
+import multiprocessing
+import threading
+
+import pytest
+from unittest.mock import patch
+from src.core.exceptions import NetworkError
+from src.services.ytdlp_pool import YtdlpWorkerPool, _worker_main
+
+
+class TestWorkerProtocol:
+    """Test cases for the worker request/response loop."""
+
+    def setup_method(self):
+        """Setup test environment."""
+        self.parent_conn, self.child_conn = multiprocessing.Pipe()
+
+    def _start_worker(self, max_tasks):
+        thread = threading.Thread(target=_worker_main, args=(self.child_conn, max_tasks, None))
+        thread.start()
+        return thread
+
+    @patch('yt_dlp.YoutubeDL')
+    def test_instances_stay_warm(self, mock_ydl_class):
+        """Test that one YoutubeDL instance serves repeated requests."""
+        mock_ydl = mock_ydl_class.return_value
+        mock_ydl.extract_info.side_effect = lambda url, **kwargs: {'id': url}
+        mock_ydl.sanitize_info.side_effect = lambda info: info
+
+        thread = self._start_worker(max_tasks=10)
+        for i in range(3):
+            self.parent_conn.send((i, f"video{i}", {'quiet': True}, True))
+            assert self.parent_conn.recv() == (i, True, {'id': f"video{i}"})
+        self.parent_conn.send(None)
+        thread.join(5)
+
+        assert mock_ydl_class.call_count == 1
+        assert mock_ydl.extract_info.call_count == 3
+
+    @patch('yt_dlp.YoutubeDL')
+    def test_errors_are_returned(self, mock_ydl_class):
+        """Test that extraction errors are sent back instead of killing the worker."""
+        mock_ydl_class.return_value.extract_info.side_effect = ValueError("boom")
+
+        thread = self._start_worker(max_tasks=10)
+        self.parent_conn.send((7, "video", {}, True))
+        request_id, ok, payload = self.parent_conn.recv()
+        self.parent_conn.send(None)
+        thread.join(5)
+
+        assert request_id == 7
+        assert not ok
+        assert payload == "ValueError: boom"
+
+    @patch('yt_dlp.YoutubeDL')
+    def test_worker_exits_after_max_tasks(self, mock_ydl_class):
+        """Test that a worker stops on its own once it is used up."""
+        mock_ydl_class.return_value.sanitize_info.side_effect = lambda info: {}
+
+        thread = self._start_worker(max_tasks=2)
+        for i in range(2):
+            self.parent_conn.send((i, "video", {}, True))
+            self.parent_conn.recv()
+        thread.join(5)
+
+        assert not thread.is_alive()
+
+
+class TestYtdlpWorkerPool:
+    """Test cases for YtdlpWorkerPool."""
+
+    @patch('yt_dlp.YoutubeDL')
+    def test_inline_mode(self, mock_ydl_class):
+        """Test that workers=0 extracts in the calling process."""
+        mock_ydl_class.return_value.__enter__.return_value.extract_info.return_value = {'id': 'abc'}
+        pool = YtdlpWorkerPool(workers=0)
+
+        assert pool.extract_info("https://example.com/v", {}) == {'id': 'abc'}
+
+    def test_worker_process_roundtrip(self):
+        """Test a real worker process, including recycling after each task."""
+        pool = YtdlpWorkerPool(workers=1, max_tasks_per_worker=1, timeout=30)
+        try:
+            for _ in range(2):
+                with pytest.raises(NetworkError, match="not a valid URL"):
+                    pool.extract_info("not a url", {'quiet': True})
+            assert pool._spawned == 0
+        finally:
+            pool.shutdown()
+
+    def test_waiting_caller_gets_a_replacement_worker(self):
+        """Test that a caller waiting on a full pool is served after the worker is recycled."""
+        pool = YtdlpWorkerPool(workers=1, max_tasks_per_worker=1, timeout=30)
+        errors = []
+
+        def _extract():
+            try:
+                pool.extract_info("not a url", {'quiet': True})
+            except NetworkError as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=_extract) for _ in range(2)]
+        try:
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join(30)
+            assert not any(thread.is_alive() for thread in threads)
+            assert len(errors) == 2
+            assert pool._spawned == 0
+        finally:
+            pool.shutdown()
+
+    def test_worker_startup_does_not_block_other_callers(self):
+        """Test that an idle worker is handed out while another one is still starting."""
+        starting = threading.Event()
+        release = threading.Event()
+
+        class SlowWorker:
+            def __init__(self, *args):
+                if not starting.is_set():
+                    starting.set()
+                    release.wait(5)
+
+        pool = YtdlpWorkerPool(workers=2)
+        idle = object()
+        with patch('src.services.ytdlp_pool._Worker', SlowWorker):
+            slow = threading.Thread(target=pool._acquire)
+            slow.start()
+            assert starting.wait(5)
+            pool._idle.append(idle)
+            try:
+                assert pool._acquire() is idle
+            finally:
+                release.set()
+                slow.join(5)